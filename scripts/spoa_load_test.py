@@ -0,0 +1,170 @@
+"""Load-test a banip SPOA agent with a fake HAProxy client.
+
+Start the agent first, for example with ``banip serve --spoa-port
+12345``, and then run::
+
+    uv run python -m scripts.spoa_load_test --port 12345
+
+Each connection performs the SPOP hello handshake and keeps up to
+``--pipeline`` NOTIFY frames in flight, like HAProxy does when the agent
+advertises pipelining. The script reports throughput and latency
+percentiles measured from sending a NOTIFY frame to receiving its ACK.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import ipaddress as ipa
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from banip.constants import AddressType
+from banip.utilities import MAX_FRAME_SIZE
+from banip.utilities import SPOP_VERSION
+from banip.utilities import Frame
+from banip.utilities import FrameType
+from banip.utilities import decode_kv
+from banip.utilities import encode_frame
+from banip.utilities import encode_kv
+from banip.utilities import encode_messages
+from banip.utilities import read_frame
+
+
+@dataclass(frozen=True)
+class LoadTestResult:
+    """Summary of one load-test run."""
+
+    requests: int
+    seconds: float
+    latencies: list[float]
+
+    @property
+    def throughput(self) -> float:
+        """Return answered requests per second."""
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """Return a latency percentile in seconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+        return ordered[index]
+
+
+async def run_connection(
+    host: str, port: int, addresses: list[AddressType], pipeline: int
+) -> list[float]:
+    """Send NOTIFY frames over one connection and time each ACK."""
+    reader, writer = await asyncio.open_connection(host, port)
+    hello = encode_kv(
+        {
+            "supported-versions": SPOP_VERSION,
+            "max-frame-size": MAX_FRAME_SIZE,
+            "capabilities": "pipelining",
+            "engine-id": "banip-load-test",
+        }
+    )
+    writer.write(encode_frame(Frame(FrameType.HAPROXY_HELLO, hello)))
+    reply = await read_frame(reader, MAX_FRAME_SIZE)
+    fields = decode_kv(reply.payload)
+    max_size = fields.get("max-frame-size")
+    if reply.type != FrameType.AGENT_HELLO or not isinstance(max_size, int):
+        raise SystemExit(f"Agent refused the handshake: {fields}")
+
+    window = asyncio.Semaphore(pipeline)
+    sent: dict[int, float] = {}
+    latencies: list[float] = []
+
+    async def send() -> None:
+        for frame_id, address in enumerate(addresses, start=1):
+            await window.acquire()
+            payload = encode_messages({"banip-check": {"ip": address}})
+            sent[frame_id] = time.perf_counter()
+            writer.write(
+                encode_frame(Frame(FrameType.NOTIFY, payload, frame_id, frame_id))
+            )
+            await writer.drain()
+
+    async def receive() -> None:
+        for _ in addresses:
+            frame = await read_frame(reader, max_size)
+            if frame.type != FrameType.ACK:
+                raise SystemExit(f"Unexpected frame: {decode_kv(frame.payload)}")
+            latencies.append(time.perf_counter() - sent.pop(frame.frame_id))
+            window.release()
+
+    await asyncio.gather(send(), receive())
+    goodbye = encode_kv({"status-code": 0, "message": "normal"})
+    writer.write(encode_frame(Frame(FrameType.HAPROXY_DISCONNECT, goodbye)))
+    await read_frame(reader, max_size)
+    writer.close()
+    return latencies
+
+
+async def run_load_test(
+    host: str,
+    port: int,
+    addresses: list[AddressType],
+    connections: int,
+    pipeline: int,
+) -> LoadTestResult:
+    """Spread addresses across connections and collect latencies."""
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            run_connection(host, port, addresses[index::connections], pipeline)
+            for index in range(connections)
+        )
+    )
+    seconds = time.perf_counter() - started
+    latencies = [latency for result in results for latency in result]
+    return LoadTestResult(len(latencies), seconds, latencies)
+
+
+def load_addresses(path: Path | None, count: int) -> list[AddressType]:
+    """Return addresses from a file, or random IPv4 addresses."""
+    if path is None:
+        return [ipa.IPv4Address(random.getrandbits(32)) for _ in range(count)]
+    addresses: list[AddressType] = []
+    for line in path.read_text().splitlines():
+        try:
+            addresses.append(ipa.ip_address(line.split()[0]))
+        except (IndexError, ValueError):
+            continue
+    return addresses[:count] if count else addresses
+
+
+def main() -> None:
+    """Run the load test and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--pipeline", type=int, default=32)
+    parser.add_argument(
+        "--addresses",
+        type=Path,
+        help="file with one address per line; random IPv4 addresses by default",
+    )
+    args = parser.parse_args()
+
+    addresses = load_addresses(args.addresses, args.requests)
+    result = asyncio.run(
+        run_load_test(args.host, args.port, addresses, args.connections, args.pipeline)
+    )
+    print(f"requests     {result.requests}")
+    print(f"connections  {args.connections} x pipeline {args.pipeline}")
+    print(f"elapsed      {result.seconds:.3f} s")
+    print(f"throughput   {result.throughput:,.0f} req/s")
+    print(f"p50 latency  {result.percentile(0.50) * 1000:.3f} ms")
+    print(f"p99 latency  {result.percentile(0.99) * 1000:.3f} ms")
+    print(f"max latency  {max(result.latencies, default=0.0) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
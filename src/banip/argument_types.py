@@ -1,4 +1,13 @@
+import ipaddress as ipa
+import re
 from argparse import ArgumentTypeError
+from datetime import timedelta
+
+from banip.constants import CHECK_FIELDS
+from banip.constants import AddressType
+from banip.constants import NetworkType
+
+DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
 
 # ======================================================================
 
@@ -66,3 +75,267 @@ def compact_type(x: str) -> int:
         raise ArgumentTypeError("Value must be between 1 and 255")
 
     return x_int
+
+
+# ======================================================================
+
+
+def jobs_type(x: str) -> int:
+    """Validate the jobs input.
+
+    Parameters
+    ----------
+    x : str
+        User input for a worker-count option.
+
+    Returns
+    -------
+    int
+        The validated user input.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the user input is not an integer.
+    argparse.ArgumentTypeError
+        If the user input is less than 1.
+    """
+    try:
+        x_int = int(x)
+    except ValueError:
+        raise ArgumentTypeError("Value must be an integer")
+
+    if x_int < 1:
+        raise ArgumentTypeError("Value must be at least 1")
+
+    return x_int
+
+
+# ======================================================================
+
+
+def top_type(x: str) -> int:
+    """Validate the top input.
+
+    Parameters
+    ----------
+    x : str
+        User input for the number of ranked rows to list.
+
+    Returns
+    -------
+    int
+        The validated user input.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the user input is not an integer.
+    argparse.ArgumentTypeError
+        If the user input is less than 1.
+    """
+    try:
+        x_int = int(x)
+    except ValueError:
+        raise ArgumentTypeError("Value must be an integer")
+
+    if x_int < 1:
+        raise ArgumentTypeError("Value must be at least 1")
+
+    return x_int
+
+
+def port_type(x: str) -> int:
+    """Validate the port input.
+
+    Parameters
+    ----------
+    x : str
+        User input for a TCP port option.
+
+    Returns
+    -------
+    int
+        The validated user input.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the user input is not an integer.
+    argparse.ArgumentTypeError
+        If the user input is not within the acceptable range [0, 65535].
+    """
+    try:
+        x_int = int(x)
+    except ValueError:
+        raise ArgumentTypeError("Value must be an integer")
+
+    if x_int not in range(0, 65536):
+        raise ArgumentTypeError("Value must be between 0 and 65535")
+
+    return x_int
+
+
+# ======================================================================
+
+
+def interval_type(x: str) -> float:
+    """Validate the interval input.
+
+    Parameters
+    ----------
+    x : str
+        User input for an interval in seconds.
+
+    Returns
+    -------
+    float
+        The validated user input.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the user input is not a number.
+    argparse.ArgumentTypeError
+        If the user input is not greater than 0.
+    """
+    try:
+        x_float = float(x)
+    except ValueError:
+        raise ArgumentTypeError("Value must be a number")
+
+    if not x_float > 0:
+        raise ArgumentTypeError("Value must be greater than 0")
+
+    return x_float
+
+
+# ======================================================================
+
+
+def duration_type(x: str) -> timedelta:
+    """Validate a duration input.
+
+    Parameters
+    ----------
+    x : str
+        User input for a duration, as a number followed by ``m``, ``h``,
+        ``d``, or ``w`` for minutes, hours, days, or weeks.
+
+    Returns
+    -------
+    timedelta
+        The validated user input.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the user input is not a number with a unit.
+    argparse.ArgumentTypeError
+        If the user input is not greater than 0.
+    """
+    unit = DURATION_UNITS.get(x[-1:].lower())
+    try:
+        amount = float(x[:-1])
+    except ValueError:
+        amount = None
+    if unit is None or amount is None:
+        raise ArgumentTypeError("Value must be a number followed by m, h, d, or w")
+
+    if not amount > 0:
+        raise ArgumentTypeError("Value must be greater than 0")
+
+    return timedelta(**{unit: amount})
+
+
+# ======================================================================
+
+
+def regex_type(x: str) -> str:
+    """Validate a regular expression input.
+
+    Parameters
+    ----------
+    x : str
+        User input for a regular expression option.
+
+    Returns
+    -------
+    str
+        The validated user input.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the user input is not a valid regular expression.
+    """
+    try:
+        re.compile(x)
+    except re.error as e:
+        raise ArgumentTypeError(f"Invalid regular expression: {e}")
+
+    return x
+
+
+# ======================================================================
+
+
+def target_type(x: str) -> AddressType | NetworkType:
+    """Validate an IP address or CIDR network input.
+
+    Parameters
+    ----------
+    x : str
+        User input for an address or network argument.
+
+    Returns
+    -------
+    AddressType | NetworkType
+        The parsed address, or the parsed network when the input
+        contains a prefix length.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the user input is not a valid address or network, or if a
+        network has host bits set.
+    """
+    try:
+        return ipa.ip_network(x) if "/" in x else ipa.ip_address(x)
+    except ValueError as e:
+        raise ArgumentTypeError(str(e))
+
+
+# ======================================================================
+
+
+def fields_type(x: str) -> tuple[str, ...]:
+    """Validate a comma-separated list of check result fields.
+
+    Parameters
+    ----------
+    x : str
+        User input for the fields option.
+
+    Returns
+    -------
+    tuple[str, ...]
+        The selected fields without duplicates, in display order.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the user input names no fields.
+    argparse.ArgumentTypeError
+        If the user input names an unknown field.
+    """
+    names = {name.strip() for name in x.split(",") if name.strip()}
+    if not names:
+        raise ArgumentTypeError("Value must name at least one field")
+
+    if unknown := sorted(names - set(CHECK_FIELDS)):
+        raise ArgumentTypeError(
+            f"Unknown field {unknown[0]!r}; choose from {', '.join(CHECK_FIELDS)}"
+        )
+
+    return tuple(name for name in CHECK_FIELDS if name in names)
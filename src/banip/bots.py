@@ -3,24 +3,40 @@
 import ipaddress as ipa
 import json
 import socket
+import sys
+import time
 from argparse import Namespace
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import UTC
 from datetime import datetime as dt
+from itertools import chain
+from itertools import repeat
+from pathlib import Path
 from typing import Any
 from typing import cast
 
 import requests
 from rich import box
 from rich.console import Console
+from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
 from banip.constants import BOTDATA
 from banip.constants import AddressType
 from banip.constants import NetworkType
-from banip.utilities import build_network_lookup
-from banip.utilities import ip_in_network
+from banip.utilities import HttpClient
+from banip.utilities import TaggedIndex
+from banip.utilities import address_key
+from banip.utilities import build_tagged_index
+from banip.utilities import network_key
+from banip.utilities import publish_generation
+from banip.utilities import read_tokens
+from banip.utilities import render_network_key
+from banip.utilities import source_stamps
+from banip.utilities import write_atomic
 
 PROVIDER_URLS = {
     "google": (
@@ -43,6 +59,8 @@ PROVIDERS = tuple(PROVIDER_URLS)
 META_WHOIS_HOST = "whois.radb.net"
 META_WHOIS_QUERY = "-i origin AS32934"
 META_WHOIS_SOURCE = f"whois://{META_WHOIS_HOST}/{META_WHOIS_QUERY}"
+# Providers fetched at the same time by a refresh.
+REFRESH_WORKERS = 8
 
 
 def output_table(title: str, *, caption: str | None = None) -> Table:
@@ -215,18 +233,27 @@ def query_whois(host: str, query: str, timeout: int = 30) -> str:
     return b"".join(chunks).decode(errors="replace")
 
 
-def fetch_provider(provider: str) -> dict[str, object]:
+def fetch_provider(
+    provider: str, client: HttpClient, conditional: bool = False
+) -> dict[str, object] | None:
     """Fetch and normalize one provider's managed ranges.
 
     Parameters
     ----------
     provider : str
         Provider key to refresh.
+    client : HttpClient
+        Client whose pooled connections are reused for the provider's
+        feeds, which share one host.
+    conditional : bool, optional
+        Whether the provider's stored entry is current for the recorded
+        feed validators. Defaults to False.
 
     Returns
     -------
-    dict[str, object]
-        Normalized provider data ready for storage.
+    dict[str, object] | None
+        Normalized provider data ready for storage, or None when every
+        feed is unchanged and the stored entry can be kept.
     """
     if provider == "meta":
         return {
@@ -236,15 +263,23 @@ def fetch_provider(provider: str) -> dict[str, object]:
             "ranges": parse_irr_ranges(query_whois(META_WHOIS_HOST, META_WHOIS_QUERY)),
         }
 
-    payloads = []
-    for url in PROVIDER_URLS[provider]:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        payloads.append(response.json())
+    urls = PROVIDER_URLS[provider]
+    results = [client.get(url, timeout=30, conditional=conditional) for url in urls]
+    if conditional and not any(result.modified for result in results):
+        return None
+    # Ranges are stored merged, so feeds answered with 304 are fetched
+    # again whenever another feed of the provider has changed.
+    results = [
+        client.get(result.url, timeout=30, conditional=False)
+        if result.status == requests.codes.not_modified
+        else result
+        for result in results
+    ]
+    payloads = [result.json() for result in results]
 
     entry: dict[str, object] = {
         "provider": provider,
-        "source": list(PROVIDER_URLS[provider]),
+        "source": list(urls),
         "refreshed_at": dt.now(UTC).isoformat(timespec="seconds"),
         "ranges": normalize_ranges(payloads),
     }
@@ -276,6 +311,7 @@ def write_botdata(data: dict[str, Any]) -> None:
     """
     providers = data.get("providers", {})
     ordered: dict[str, object] = {}
+    networks: dict[str, list[NetworkType]] = {}
     if isinstance(providers, dict):
         for provider in sorted(providers):
             entry = providers[provider]
@@ -283,13 +319,82 @@ def write_botdata(data: dict[str, Any]) -> None:
                 continue
             ranges = entry.get("ranges", [])
             if isinstance(ranges, list):
-                networks = [
+                networks[provider] = sort_networks(
                     ipa.ip_network(item) for item in ranges if isinstance(item, str)
-                ]
-                entry["ranges"] = [str(net) for net in sort_networks(networks)]
+                )
+                entry["ranges"] = [str(net) for net in networks[provider]]
             ordered[provider] = entry
     BOTDATA.parent.mkdir(parents=True, exist_ok=True)
-    BOTDATA.write_text(json.dumps({"providers": ordered}, indent=2) + "\n")
+    write_atomic(BOTDATA, json.dumps({"providers": ordered}, indent=2) + "\n")
+    write_bot_index(networks)
+
+
+def bot_index_path() -> Path:
+    """Return the provider index path stored next to the bot data.
+
+    Returns
+    -------
+    Path
+        JSON index path next to ``botdata.json``.
+    """
+    return BOTDATA.with_name(f"{BOTDATA.stem}_index.json")
+
+
+def write_bot_index(networks: dict[str, list[NetworkType]]) -> TaggedIndex:
+    """Build and store the provider-tagged index of managed bot ranges.
+
+    The index records the bot data file it was built from, so a stale
+    index is detected and rebuilt when the file changes.
+
+    Parameters
+    ----------
+    networks : dict[str, list[NetworkType]]
+        Managed bot networks grouped by provider.
+
+    Returns
+    -------
+    TaggedIndex
+        Index over every provider's networks.
+    """
+    index = build_tagged_index(
+        (network_key(network), provider)
+        for provider, items in networks.items()
+        for network in items
+    )
+    if BOTDATA.exists():
+        rows = [
+            [*key, list(tags)]
+            for version in (4, 6)
+            for key, tags in zip(index.keys[version], index.tags[version])
+        ]
+        stored = {"sources": source_stamps({"botdata": BOTDATA}), "networks": rows}
+        write_atomic(bot_index_path(), json.dumps(stored) + "\n")
+    return index
+
+
+def load_bot_index() -> TaggedIndex:
+    """Load the provider-tagged index of managed bot ranges.
+
+    The stored index holds integer network keys, so loading it avoids
+    parsing every range string. It is rebuilt from ``botdata.json`` when
+    missing, malformed, or older than the bot data.
+
+    Returns
+    -------
+    TaggedIndex
+        Index over every stored provider's networks.
+    """
+    try:
+        stored = json.loads(bot_index_path().read_text())
+        if stored["sources"] == source_stamps({"botdata": BOTDATA}):
+            return build_tagged_index(
+                ((version, start, prefixlen), provider)
+                for version, start, prefixlen, providers in stored["networks"]
+                for provider in providers
+            )
+    except (OSError, ValueError, TypeError, KeyError):
+        pass
+    return write_bot_index(load_managed_bot_networks())
 
 
 def load_managed_bot_networks(
@@ -327,9 +432,46 @@ def load_managed_bot_networks(
     return networks
 
 
+def timed_fetch(
+    provider: str, client: HttpClient, conditional: bool
+) -> tuple[dict[str, object] | None, str | None, float]:
+    """Fetch one provider and measure how long it took.
+
+    Parameters
+    ----------
+    provider : str
+        Provider key to refresh.
+    client : HttpClient
+        Shared client with pooled connections.
+    conditional : bool
+        Whether the provider's stored entry is current for the recorded
+        feed validators.
+
+    Returns
+    -------
+    tuple[dict[str, object] | None, str | None, float]
+        The normalized entry, or None when the feeds are unchanged or
+        the fetch failed; the error message, or None on success; and the
+        elapsed seconds.
+    """
+    started = time.perf_counter()
+    try:
+        entry = fetch_provider(provider, client, conditional)
+        error = None
+    except (requests.RequestException, OSError, ValueError) as e:
+        entry, error = None, str(e) or type(e).__name__
+    return entry, error, time.perf_counter() - started
+
+
 def refresh(provider: str) -> None:
     """Refresh one provider or all providers.
 
+    Providers are fetched concurrently by a bounded thread pool sharing
+    one client, so each feed host keeps its connections alive across
+    requests. Feeds are requested conditionally; a provider whose feeds
+    are unchanged keeps its stored entry without reparsing, and a
+    provider that cannot be fetched keeps its previously stored entry.
+
     Parameters
     ----------
     provider : str
@@ -342,30 +484,58 @@ def refresh(provider: str) -> None:
         data["providers"] = stored_providers
 
     selected = PROVIDERS if provider == "all" else (provider,)
-    refreshed: list[tuple[str, int, str]] = []
-    for item in selected:
-        entry = fetch_provider(item)
-        stored_providers[item] = entry
-        ranges = entry.get("ranges", [])
-        range_count = len(ranges) if isinstance(ranges, list) else 0
-        refreshed.append(
-            (
-                item,
-                range_count,
-                format_timestamp(entry.get("refreshed_at")),
+    workers = min(REFRESH_WORKERS, len(selected))
+    stored = [isinstance(stored_providers.get(item), dict) for item in selected]
+    with HttpClient(pool_size=workers) as client:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            fetched = list(executor.map(timed_fetch, selected, repeat(client), stored))
+
+        refreshed: list[tuple[str, int, str, float, Text]] = []
+        current: list[str] = []
+        for item, (entry, error, seconds) in zip(selected, fetched):
+            if entry is not None:
+                stored_providers[item] = entry
+                result = Text("updated", style="bold green")
+            elif error is None:
+                result = Text("unchanged", style="cyan")
+            elif item in stored_providers:
+                result = Text(f"kept previous: {error}", style="yellow")
+            else:
+                result = Text(f"failed: {error}", style="red")
+            if error is None:
+                current.extend(PROVIDER_URLS[item])
+            kept = stored_providers.get(item, {})
+            if not isinstance(kept, dict):
+                kept = {}
+            ranges = kept.get("ranges", [])
+            range_count = len(ranges) if isinstance(ranges, list) else 0
+            refreshed.append(
+                (
+                    item,
+                    range_count,
+                    format_timestamp(kept.get("refreshed_at")),
+                    seconds,
+                    result,
+                )
             )
-        )
-    write_botdata(data)
+        if any(entry is not None for entry, _, _ in fetched):
+            write_botdata(data)
+            publish_generation(BOTDATA.parent)
+        client.commit(current)
 
     table = output_table("Bot Range Refresh", caption=f"Saved to: {BOTDATA}")
     table.add_column("Provider", style="bold")
     table.add_column("Ranges", justify="right", style="cyan")
     table.add_column("Refreshed")
-    for item, range_count, refreshed_at in refreshed:
+    table.add_column("Fetch time", justify="right")
+    table.add_column("Result")
+    for item, range_count, refreshed_at, seconds, result in refreshed:
         table.add_row(
             item,
             f"{range_count:,d}",
             Text(refreshed_at, style="cyan"),
+            f"{seconds:.2f}s",
+            result,
         )
     Console().print(table)
 
@@ -406,41 +576,77 @@ def list_providers() -> None:
     console.print(table)
 
 
-def check_ip(ip: AddressType) -> None:
-    """Check whether an IP address appears in managed bot ranges.
+def check_ips(addresses: Iterable[AddressType | str]) -> None:
+    """Check addresses against every provider's managed bot ranges.
+
+    Each address is answered with one search of the provider-tagged
+    index, which reports every matching network, including ranges
+    nested inside another provider's range.
 
     Parameters
     ----------
-    ip : AddressType
-        IP address to check.
+    addresses : Iterable[AddressType | str]
+        Addresses to check. Strings that are not valid IP addresses are
+        reported as invalid.
     """
-    matches = []
-    for provider, networks in load_managed_bot_networks().items():
-        lookup = build_network_lookup(networks)
-        if network := ip_in_network(ip=ip, lookup=lookup):
-            matches.append((provider, network))
-
-    table = output_table("Managed Bot Check", caption=f"Address: {ip}")
+    index = load_bot_index()
+    table = output_table("Managed Bot Check")
+    table.add_column("Address", style="bold")
     table.add_column("Provider", style="bold")
     table.add_column("Matching network", style="cyan")
     table.add_column("Result")
 
-    if matches:
-        for provider, network in matches:
+    checked = found = 0
+    last = ""
+    for item in addresses:
+        checked += 1
+        last = str(item)
+        try:
+            ip = ipa.ip_address(item)
+        except ValueError:
             table.add_row(
-                provider,
-                str(network),
-                Text("found", style="bold green"),
+                last,
+                Text("—", style="dim"),
+                Text("—", style="dim"),
+                Text("invalid", style="red"),
             )
+            continue
+        matches = index.lookup(address_key(ip))
+        found += bool(matches)
+        for network, providers in matches:
+            for provider in providers:
+                table.add_row(
+                    str(ip),
+                    provider,
+                    render_network_key(network),
+                    Text("found", style="bold green"),
+                )
+        if not matches:
+            table.add_row(
+                str(ip),
+                Text("—", style="dim"),
+                Text("—", style="dim"),
+                Text("not found", style="yellow"),
+            )
+
+    if checked == 1:
+        table.caption = f"Address: {last}"
     else:
-        table.add_row(
-            Text("—", style="dim"),
-            Text("—", style="dim"),
-            Text("not found", style="yellow"),
-        )
+        table.caption = f"Addresses: {checked:,d} checked, {found:,d} found"
     Console().print(table)
 
 
+def check_ip(ip: AddressType) -> None:
+    """Check whether an IP address appears in managed bot ranges.
+
+    Parameters
+    ----------
+    ip : AddressType
+        IP address to check.
+    """
+    check_ips([ip])
+
+
 def task_runner(args: Namespace) -> None:
     """Run the selected bots subcommand.
 
@@ -454,7 +660,29 @@ def task_runner(args: Namespace) -> None:
     elif args.action == "list":
         list_providers()
     elif args.action == "check":
-        check_ip(args.ip)
+        source = getattr(args, "input", None)
+        message = ""
+        if not args.ips and not source:
+            message = "Provide at least one IP address or --input FILE."
+        elif source and source != "-" and not Path(source).is_file():
+            message = f"Input file not found: {source}"
+        if message:
+            Console().print(
+                Panel(
+                    message,
+                    title="Cannot check addresses",
+                    border_style="red",
+                    box=box.ROUNDED,
+                )
+            )
+            return
+        with ExitStack() as stack:
+            lines: Iterable[str] = ()
+            if source == "-":
+                lines = sys.stdin
+            elif source:
+                lines = stack.enter_context(Path(source).open("r"))
+            check_ips(chain(args.ips, read_tokens(lines)))
 
 
 if __name__ == "__main__":
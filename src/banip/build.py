@@ -2,23 +2,29 @@
 
 """Build a custom IP blocklist."""
 
-import ipaddress as ipa
-import shutil
 import sys
 from argparse import Namespace
 from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime as dt
 from pathlib import Path
+from typing import TypeVar
 
 from rich import box
 from rich.console import Console
+from rich.console import RenderableType
 from rich.table import Table
 from rich.text import Text
 
 from banip.bots import load_managed_bot_networks
+from banip.config import BanipConfig
 from banip.config import CountryConfig
 from banip.config import CountryPolicyMode
 from banip.config import load_config
+from banip.config import policy_verdicts
 from banip.constants import BOTDATA
 from banip.constants import CONFIG
 from banip.constants import COUNTRY_ALLOWLIST
@@ -26,24 +32,54 @@ from banip.constants import GEOLITE_4
 from banip.constants import GEOLITE_6
 from banip.constants import GEOLITE_LOC
 from banip.constants import IPSUM
-from banip.constants import AddressType
-from banip.constants import NetworkType
 from banip.constants import RENDERED_ALLOWLIST
 from banip.constants import RENDERED_BLOCKLIST
-from banip.utilities import build_network_lookup
-from banip.utilities import compact
+from banip.constants import AddressKey
+from banip.constants import NetworkKey
+from banip.utilities import Coverage
+from banip.utilities import IntervalLookup
+from banip.utilities import address_key
+from banip.utilities import build_interval_lookup
+from banip.utilities import check_snapshot
+from banip.utilities import check_snapshot_sources
+from banip.utilities import coalesce
+from banip.utilities import compact_keys
+from banip.utilities import copy_atomic
+from banip.utilities import country_intervals
+from banip.utilities import coverage
+from banip.utilities import dedupe_sidecar
+from banip.utilities import entry_key
+from banip.utilities import find_contained
 from banip.utilities import format_status
-from banip.utilities import ip_in_network
-from banip.utilities import load_ipsum
+from banip.utilities import geolite_index
+from banip.utilities import key_interval
+from banip.utilities import load_ipsum_keys
+from banip.utilities import load_rendered_blocklist_keys
+from banip.utilities import network_key
+from banip.utilities import patched_addresses
+from banip.utilities import publish_generation
+from banip.utilities import read_geolite_index
+from banip.utilities import render_address_key
+from banip.utilities import render_key
 from banip.utilities import render_lines
+from banip.utilities import render_network_key
+from banip.utilities import source_stamps
+from banip.utilities import span_keys
 from banip.utilities import split_hybrid
 from banip.utilities import status_label
 from banip.utilities import tag_networks
+from banip.utilities import write_atomic
+from banip.utilities import write_check_snapshot
+from banip.utilities import write_dedupe_sidecar
+
+POLICY_NETWORK_PATTERNS = ("country_blocked_*.txt", "country_permitted_*.txt")
+
+EntryT = TypeVar("EntryT", AddressKey, NetworkKey)
 
 
 def resolve_country_policies(
     countries: CountryConfig,
-    geolite: dict[NetworkType, str],
+    geolite: dict[NetworkKey, str],
 ) -> dict[str, set[str]]:
     """Resolve named policies into permitted country codes.
 
@@ -51,7 +87,7 @@ def resolve_country_policies(
     ----------
     countries : CountryConfig
         Validated named country policies.
-    geolite : dict[NetworkType, str]
+    geolite : dict[NetworkKey, str]
         GeoLite networks mapped to country labels.
 
     Returns
@@ -92,265 +128,535 @@ def write_country_policy_files(
 
     for name, codes in resolved.items():
         policy_path = COUNTRY_ALLOWLIST.with_name(f"country_allowlist_{name}.txt")
-        policy_path.write_text(render_lines(sorted(codes)))
+        write_atomic(policy_path, render_lines(sorted(codes)))
 
     default_codes = resolved[countries.default_policy]
-    COUNTRY_ALLOWLIST.write_text(render_lines(sorted(default_codes)))
+    write_atomic(COUNTRY_ALLOWLIST, render_lines(sorted(default_codes)))
+
+
+def compile_policy_networks(
+    intervals: dict[str, dict[int, list[tuple[int, int]]]],
+    codes: Iterable[str],
+) -> list[NetworkKey]:
+    """Compile country codes into a minimal list of CIDR networks.
+
+    Parameters
+    ----------
+    intervals : dict[str, dict[int, list[tuple[int, int]]]]
+        Coalesced country intervals from :func:`country_intervals`.
+    codes : Iterable[str]
+        Country labels whose address space should be covered.
+
+    Returns
+    -------
+    list[NetworkKey]
+        IPv4 networks followed by IPv6 networks, each sorted by starting
+        address.
+    """
+    selected = [intervals[code] for code in codes if code in intervals]
+    networks: list[NetworkKey] = []
+    for version in (4, 6):
+        spans = coalesce(span for families in selected for span in families[version])
+        for first, last in spans:
+            networks.extend(span_keys(version, first, last))
+    return networks
+
+
+# Coalesced country intervals installed in each policy worker process.
+policy_worker_intervals: dict[str, dict[str, dict[int, list[tuple[int, int]]]]] = {}
+
+
+def init_policy_worker(intervals: dict[str, dict[int, list[tuple[int, int]]]]) -> None:
+    """Install coalesced country intervals in a policy worker process.
+
+    Parameters
+    ----------
+    intervals : dict[str, dict[int, list[tuple[int, int]]]]
+        Coalesced country intervals shared by every policy.
+    """
+    policy_worker_intervals["shared"] = intervals
+
+
+def run_policy_worker(codes: list[str]) -> list[NetworkKey]:
+    """Compile one policy with the intervals installed in this worker.
+
+    Parameters
+    ----------
+    codes : list[str]
+        Country labels whose address space should be covered.
+
+    Returns
+    -------
+    list[NetworkKey]
+        Compiled networks from :func:`compile_policy_networks`.
+    """
+    return compile_policy_networks(policy_worker_intervals["shared"], codes)
+
 
+def write_policy_network_files(
+    geolite: dict[NetworkKey, str],
+    resolved: dict[str, set[str]],
+    scope: str,
+    intervals: dict[str, dict[int, list[tuple[int, int]]]] | None = None,
+    jobs: int = 1,
+) -> dict[str, int]:
+    """Write one compiled CIDR list for every named country policy.
 
-def exclude_network(
-    network: NetworkType,
-    exemption: NetworkType,
-) -> list[NetworkType]:
-    """Remove one exempt network from a blocked network.
+    Every policy is compiled from one shared table of coalesced country
+    intervals, either in this process or in worker processes that each
+    receive the table once.
 
     Parameters
     ----------
-    network : NetworkType
-        Network proposed for blocking.
-    exemption : NetworkType
-        Network that must remain unblocked.
+    geolite : dict[NetworkKey, str]
+        GeoLite networks mapped to country labels.
+    resolved : dict[str, set[str]]
+        Permitted country codes keyed by policy name.
+    scope : str
+        Either ``blocked`` or ``permitted``, selecting which address
+        space each list covers.
+    intervals : dict[str, dict[int, list[tuple[int, int]]]] | None, optional
+        Precompiled coalesced country intervals for ``geolite``.
+        Defaults to None, which derives them from ``geolite``.
+    jobs : int, optional
+        Maximum number of worker processes. Defaults to 1, which
+        compiles every policy in this process.
 
     Returns
     -------
-    list[NetworkType]
-        Remaining blocked fragments.
+    dict[str, int]
+        Number of networks written, keyed by policy name.
     """
-    if isinstance(network, ipa.IPv4Network):
-        if not isinstance(exemption, ipa.IPv4Network):
-            return [network]
-        if not network.overlaps(exemption):
-            return [network]
-        if network.subnet_of(exemption):
-            return []
-        return list(network.address_exclude(exemption))
-
-    if not isinstance(exemption, ipa.IPv6Network):
-        return [network]
-    if not network.overlaps(exemption):
-        return [network]
-    if network.subnet_of(exemption):
-        return []
-    return list(network.address_exclude(exemption))
+    current_paths = {
+        COUNTRY_ALLOWLIST.with_name(f"country_{scope}_{name}.txt") for name in resolved
+    }
+    for pattern in POLICY_NETWORK_PATTERNS:
+        for stale_path in COUNTRY_ALLOWLIST.parent.glob(pattern):
+            if stale_path not in current_paths:
+                stale_path.unlink()
+
+    if intervals is None:
+        intervals = country_intervals(geolite)
+    available_codes = set(intervals)
+    selected = {
+        name: sorted(codes if scope == "permitted" else available_codes - codes)
+        for name, codes in resolved.items()
+    }
+    if jobs <= 1 or len(selected) <= 1:
+        compiled = {
+            name: compile_policy_networks(intervals, codes)
+            for name, codes in selected.items()
+        }
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(selected)),
+            initializer=init_policy_worker,
+            initargs=(intervals,),
+        ) as executor:
+            compiled = dict(
+                zip(selected, executor.map(run_policy_worker, selected.values()))
+            )
+
+    for name, networks in compiled.items():
+        policy_path = COUNTRY_ALLOWLIST.with_name(f"country_{scope}_{name}.txt")
+        write_atomic(policy_path, render_lines(map(render_network_key, networks)))
+    return {name: len(networks) for name, networks in compiled.items()}
 
 
 def apply_allowlist(
-    addresses: Iterable[AddressType],
-    networks: Iterable[NetworkType],
-    allowlist: set[AddressType | NetworkType],
-) -> tuple[list[AddressType], list[NetworkType]]:
+    addresses: Iterable[AddressKey],
+    networks: Iterable[NetworkKey],
+    allow_lookup: IntervalLookup,
+) -> tuple[list[AddressKey], list[NetworkKey]]:
     """Remove allowlisted address space from blocked entries.
 
+    A network that overlaps the allowlist is replaced by the minimal
+    networks covering its remaining address space.
+
     Parameters
     ----------
-    addresses : Iterable[AddressType]
+    addresses : Iterable[AddressKey]
         Individual addresses proposed for blocking.
-    networks : Iterable[NetworkType]
+    networks : Iterable[NetworkKey]
         Networks proposed for blocking.
-    allowlist : set[AddressType | NetworkType]
-        Addresses and networks that must remain unblocked.
+    allow_lookup : IntervalLookup
+        Address space that must remain unblocked.
 
     Returns
     -------
-    tuple[list[AddressType], list[NetworkType]]
-        Blocked addresses and networks with all allowlisted space removed.
+    tuple[list[AddressKey], list[NetworkKey]]
+        Blocked addresses and networks with all allowlisted space
+        removed. Networks are sorted by version, address, and prefix
+        length.
     """
-    allow_ips, allow_nets = split_hybrid(allowlist)
-    allow_lookup = build_network_lookup(allow_nets)
-    filtered_ips = [
-        address
-        for address in addresses
-        if address not in allowlist
-        and not ip_in_network(ip=address, lookup=allow_lookup)
-    ]
-    exemptions = [
-        *allow_nets,
-        *(
-            ipa.ip_network(f"{address}/{address.max_prefixlen}")
-            for address in allow_ips
-        ),
-    ]
-    filtered_nets: list[NetworkType] = []
+    filtered_ips = [address for address in addresses if address not in allow_lookup]
+    filtered_nets: list[NetworkKey] = []
     for network in networks:
-        fragments = [network]
-        for exemption in exemptions:
-            if network.version != exemption.version:
-                continue
-            remaining: list[NetworkType] = []
-            for fragment in fragments:
-                remaining.extend(exclude_network(fragment, exemption))
-            fragments = remaining
-        filtered_nets.extend(fragments)
-
-    return filtered_ips, sorted(
-        filtered_nets,
-        key=lambda item: (item.version, int(item.network_address), item.prefixlen),
-    )
+        version, first, last = key_interval(network)
+        if not allow_lookup.overlaps(version, first, last):
+            filtered_nets.append(network)
+            continue
+        for gap_first, gap_last in allow_lookup.gaps(version, first, last):
+            filtered_nets.extend(span_keys(version, gap_first, gap_last))
 
+    return filtered_ips, sorted(filtered_nets)
 
-def task_runner(args: Namespace) -> None:
-    """Generate a custom IP blocklist.
+
+@dataclass(frozen=True)
+class BuildSettings:
+    """Options controlling one rendered blocklist.
 
     Parameters
     ----------
-    args : Namespace
-        Command-line arguments.
+    name : str | None
+        Build profile name, or None for a command-line build.
+    threshold : int
+        Minimum ipsum confidence score.
+    compact : int
+        Minimum /24 population before compaction, or 0 to disable it.
+    policies : tuple[str, ...]
+        Country policies whose permitted countries form the threat
+        scope.
+    bots : bool
+        Whether managed bot ranges are rendered.
+    output_path : Path
+        Destination for the rendered blocklist.
     """
-    # ------------------------------------------------------------------
 
-    # Select the requested blocklist destination while retaining the
-    # canonical local copy used by other banip commands.
-    print()
-    outfile = getattr(args, "outfile", None)
-    output_path = Path(outfile) if outfile else RENDERED_BLOCKLIST
+    name: str | None
+    threshold: int
+    compact: int
+    policies: tuple[str, ...]
+    bots: bool
+    output_path: Path
 
-    # ------------------------------------------------------------------
 
-    # Now make sure everything is in place.
-    files = [
-        CONFIG,
-        GEOLITE_4,
-        GEOLITE_6,
-        GEOLITE_LOC,
-        IPSUM,
-    ]
-    for file in files:
-        if not file.exists():
-            print(f"Missing file: {file}")
-            print("Visit https://geozeke.github.io/banip/ for more information.")
-            sys.exit(1)
+@dataclass(frozen=True)
+class SharedInputs:
+    """Prepared inputs loaded once and shared by every build profile.
 
-    try:
-        config = load_config(CONFIG)
-    except (FileNotFoundError, ValueError) as exc:
-        print(exc)
-        sys.exit(1)
+    Parameters
+    ----------
+    allow_lookup : IntervalLookup
+        Address space that must remain unblocked.
+    custom_ips : list[AddressKey]
+        Pruned denylist addresses.
+    custom_nets : list[NetworkKey]
+        Pruned denylist networks.
+    geolite : dict[NetworkKey, str]
+        GeoLite networks mapped to country labels.
+    intervals : dict[str, dict[int, list[tuple[int, int]]]] | None
+        Coalesced country intervals from the compiled GeoLite index, or
+        None when the GeoLite files were parsed instead.
+    resolved_policies : dict[str, set[str]]
+        Permitted country codes keyed by policy name.
+    ipsum : dict[AddressKey, int]
+        Ipsum confidence values keyed by address, including active
+        patched addresses.
+    bot_networks : dict[str, list[NetworkKey]]
+        Allowlist-filtered managed bot networks keyed by provider.
+    patched : tuple[int, int], optional
+        Patched addresses that are active and that have expired.
+        Defaults to none of either.
+    """
 
-    # ------------------------------------------------------------------
+    allow_lookup: IntervalLookup
+    custom_ips: list[AddressKey]
+    custom_nets: list[NetworkKey]
+    geolite: dict[NetworkKey, str]
+    intervals: dict[str, dict[int, list[tuple[int, int]]]] | None
+    resolved_policies: dict[str, set[str]]
+    ipsum: dict[AddressKey, int]
+    bot_networks: dict[str, list[NetworkKey]]
+    patched: tuple[int, int] = (0, 0)
+
+
+@dataclass(frozen=True)
+class BuildResult:
+    """Summary metrics for one rendered blocklist.
+
+    Parameters
+    ----------
+    settings : BuildSettings
+        Settings used for the build.
+    threat_countries : int
+        Number of countries in the threat scope.
+    ipsum_ips : int
+        Individual threat-feed addresses written.
+    ipsum_nets : int
+        Compacted threat-feed subnets written.
+    bot_nets : int
+        Managed bot networks written.
+    custom_ips : int
+        Individual denylist addresses written.
+    custom_nets : int
+        Denylist networks written.
+    compact_factor : float
+        Fraction of threat-feed entries removed by compaction.
+    coverage : dict[str, Coverage]
+        Distinct addresses covered by the threat feed (``ipsum``),
+        managed bots (``bots``), custom entries (``custom``), and the
+        whole blocklist (``total``).
+    deduplicated : int, optional
+        Entries dropped because another section already covers them.
+        Defaults to 0.
+    patched : tuple[int, int], optional
+        Patched addresses that are active and that have expired.
+        Defaults to none of either.
+    """
+
+    settings: BuildSettings
+    threat_countries: int
+    ipsum_ips: int
+    ipsum_nets: int
+    bot_nets: int
+    custom_ips: int
+    custom_nets: int
+    compact_factor: float
+    coverage: dict[str, Coverage]
+    deduplicated: int = 0
+    patched: tuple[int, int] = (0, 0)
+
+
+@dataclass
+class StageReport:
+    """Mutable status value printed when a build stage completes.
+
+    Parameters
+    ----------
+    status : str, optional
+        Status shown after the stage label. Defaults to a check mark.
+    """
+
+    status: str = "✅"
+
+
+@contextmanager
+def build_stage(
+    console: Console | None,
+    key: str,
+    **kwargs: object,
+) -> Iterator[StageReport]:
+    """Display progress for one build stage when a console is provided.
+
+    Parameters
+    ----------
+    console : Console | None
+        Rich console used for progress, or None to run quietly.
+    key : str
+        Key for the registered status label.
+    **kwargs : object
+        Values used to format dynamic labels.
 
+    Yields
+    ------
+    StageReport
+        Report whose status is printed when the stage completes.
+    """
+    report = StageReport()
+    if console is None:
+        yield report
+        return
+    with console.status(status_label(key, **kwargs)):
+        yield report
+    print(format_status(key, report.status, **kwargs))
+
+
+def load_shared_inputs(
+    config: BanipConfig,
+    load_bots: bool,
+    console: Console | None = None,
+) -> SharedInputs:
+    """Load and index the inputs shared by every build profile.
+
+    Parameters
+    ----------
+    config : BanipConfig
+        Validated configuration.
+    load_bots : bool
+        Whether stored managed bot ranges should be loaded.
+    console : Console | None, optional
+        Rich console used for progress. Defaults to None.
+
+    Returns
+    -------
+    SharedInputs
+        Prepared inputs for :func:`run_profile`.
+    """
     # Load the allowlist and denylist, give the allowlist final
     # precedence, and remove redundant individual denylist addresses.
-    console = Console()
-    msg = status_label("custom_prune")
-    with console.status(msg):
-        allowlist = config.allowlist
-        allow_ips, allow_nets = split_hybrid(allowlist)
-        custom_ips, custom_nets = split_hybrid(config.denylist)
+    with build_stage(console, "custom_prune"):
+        allow_lookup = build_interval_lookup(map(entry_key, config.allowlist))
+        denied_ips, denied_nets = split_hybrid(config.denylist)
         custom_ips, custom_nets = apply_allowlist(
-            custom_ips,
-            custom_nets,
-            allowlist,
+            map(address_key, denied_ips),
+            map(network_key, denied_nets),
+            allow_lookup,
         )
-        custom_nets_size = len(custom_nets)
-        custom_nets_lookup = build_network_lookup(custom_nets)
+        custom_nets_lookup = build_interval_lookup(custom_nets)
         # Remove any custom IP addresses that are covered by existing
         # custom subnets.
-        custom_ips = [
-            ip
-            for ip in custom_ips
-            if not ip_in_network(ip=ip, lookup=custom_nets_lookup)
-        ]
-    print(format_status("custom_prune"))
+        custom_ips = [ip for ip in custom_ips if ip not in custom_nets_lookup]
 
-    # ------------------------------------------------------------------
-
-    # Geotag all global networks, resolve each named country policy into
-    # permitted codes, and build one lookup covering countries allowed by
-    # any policy.
-    geolite = tag_networks()
-    msg = status_label("country_filter")
-    with console.status(msg):
+    # Geotag all global networks, from the compiled GeoLite index when
+    # it is current, and resolve each named country policy into
+    # permitted codes.
+    with build_stage(console, "geo_index") as report:
+        if (compiled := read_geolite_index()) is None:
+            report.status = "stale" if geolite_index().exists() else "missing"
+    geolite = tag_networks(compiled)
+    with build_stage(console, "country_filter"):
         resolved_policies = resolve_country_policies(config.countries, geolite)
-        threat_countries = set().union(*resolved_policies.values())
-        _, threat_geolite = split_hybrid(
-            [net for net, country in geolite.items() if country in threat_countries]
-        )
-        threat_geolite_lookup = build_network_lookup(threat_geolite)
         write_country_policy_files(config.countries, resolved_policies)
-    print(format_status("country_filter"))
 
-    # ------------------------------------------------------------------
+    # Patched addresses are overlaid on the feed, and expired patches
+    # are left out, while ipsum data is loaded.
+    with build_stage(console, "ipsum_load"):
+        ipsum = load_ipsum_keys()
+        patched = patched_addresses()
+
+    bot_networks: dict[str, list[NetworkKey]] = {}
+    if load_bots and config.bots.enabled and BOTDATA.exists():
+        with build_stage(console, "bots_load"):
+            bot_networks = {
+                provider: apply_allowlist([], map(network_key, networks), allow_lookup)[
+                    1
+                ]
+                for provider, networks in load_managed_bot_networks(
+                    config.bots.providers
+                ).items()
+            }
 
-    # Prune ipsum.txt to keep only IP addresses that (1) are from target
-    # countries, (2) are not already covered by a custom subnet, (3)
-    # meet the minimum threshold for number of hits, and (4) are not in
-    # the custom allowlist.
-    msg = status_label("ipsum_prune")
-    with console.status(msg):
-        allow_nets_lookup = build_network_lookup(allow_nets)
-        ipsum_D = load_ipsum()
+    return SharedInputs(
+        allow_lookup=allow_lookup,
+        custom_ips=custom_ips,
+        custom_nets=custom_nets,
+        geolite=geolite,
+        intervals=compiled.intervals if compiled else None,
+        resolved_policies=resolved_policies,
+        ipsum=ipsum,
+        bot_networks=bot_networks,
+        patched=patched,
+    )
+
+
+def run_profile(
+    inputs: SharedInputs,
+    settings: BuildSettings,
+    console: Console | None = None,
+) -> BuildResult:
+    """Prune, compact, and render one blocklist from shared inputs.
+
+    Parameters
+    ----------
+    inputs : SharedInputs
+        Prepared inputs from :func:`load_shared_inputs`.
+    settings : BuildSettings
+        Options for this blocklist.
+    console : Console | None, optional
+        Rich console used for progress. Defaults to None.
+
+    Returns
+    -------
+    BuildResult
+        Summary metrics for the rendered blocklist.
+    """
+    custom_nets = inputs.custom_nets
+    custom_nets_lookup = build_interval_lookup(custom_nets)
+    threat_countries: set[str] = set().union(
+        *(inputs.resolved_policies[name] for name in settings.policies)
+    )
+
+    # Prune ipsum.txt to keep only IP addresses that (1) meet the
+    # minimum threshold for number of hits, (2) are from countries
+    # permitted by a selected policy, (3) are not already covered by a
+    # custom subnet, and (4) are not in the custom allowlist.
+    with build_stage(console, "ipsum_prune"):
+        threat_lookup = build_interval_lookup(
+            net
+            for net, country in inputs.geolite.items()
+            if country in threat_countries
+        )
         ipsum_L = [
             ip
-            for ip, hits in ipsum_D.items()
+            for ip, hits in inputs.ipsum.items()
             if (
-                ip_in_network(ip=ip, lookup=threat_geolite_lookup)
-                and not ip_in_network(ip=ip, lookup=custom_nets_lookup)
-                and ip not in allowlist
-                and not ip_in_network(ip=ip, lookup=allow_nets_lookup)
-                and hits >= args.threshold
+                hits >= settings.threshold
+                and ip in threat_lookup
+                and ip not in custom_nets_lookup
+                and ip not in inputs.allow_lookup
             )
         ]
-    print(format_status("ipsum_prune"))
-
-    # ------------------------------------------------------------------
 
     # Compact ipsum. A compact factor of 0 indicates no compaction.
-    msg = status_label("ipsum_compact", compact=args.compact)
-    with console.status(msg):
-        ipsum_ips, ipsum_nets = compact(
-            ip_list=ipsum_L,
-            allowlist=allowlist,
-            min_num=args.compact,
+    with build_stage(console, "ipsum_compact", compact=settings.compact) as report:
+        ipsum_ips, ipsum_nets = compact_keys(
+            ip_keys=ipsum_L,
+            allow_lookup=inputs.allow_lookup,
+            min_num=settings.compact,
         )
-        ipsum_nets_lookup = build_network_lookup(ipsum_nets)
-        ipsum_ips_size = len(ipsum_ips)
-        ipsum_nets_size = len(ipsum_nets)
-        ipsum_size = ipsum_ips_size + ipsum_nets_size
-        ipsum_ips_set = set(ipsum_ips)
+        ipsum_size = len(ipsum_ips) + len(ipsum_nets)
         compact_factor = 1 - (ipsum_size / len(ipsum_L)) if ipsum_L else 0
-    print(
-        format_status("ipsum_compact", f"{compact_factor:<.2%}", compact=args.compact)
-    )
+        report.status = f"{compact_factor:<.2%}"
 
-    # ------------------------------------------------------------------
-
-    # Prune the list of custom IP addresses again so that remaining
-    # entries are not already covered by ipsum.txt.
-    msg = status_label("redundant_remove")
-    with console.status(msg):
-        custom_ips = [
-            ip
-            for ip in custom_ips
-            if ip not in ipsum_ips_set
-            and not ip_in_network(ip=ip, lookup=ipsum_nets_lookup)
+    # Remove entries already covered by an entry from another section
+    # (threat feed, managed bots, or custom denylist) and record where
+    # each one went so `banip check` can explain the omission.
+    with build_stage(console, "redundant_remove"):
+        managed_bot_networks = inputs.bot_networks if settings.bots else {}
+        providers = sorted(managed_bot_networks)
+        sections: list[tuple[str, str, list[AddressKey] | list[NetworkKey]]] = [
+            ("ipsum", "ipsum", ipsum_ips),
+            ("ipsum", "ipsum", ipsum_nets),
+            *(
+                ("bots", f"bots/{provider}", managed_bot_networks[provider])
+                for provider in providers
+            ),
+            ("custom", "custom", inputs.custom_ips),
+            ("custom", "custom", custom_nets),
         ]
-        custom_ips_size = len(custom_ips)
-    print(format_status("redundant_remove"))
-
-    # ------------------------------------------------------------------
-
-    # Render and save the complete ip_blocklist.txt and ip_allowlist.txt.
-    msg = status_label("lists_render")
-    with console.status(msg):
-        managed_bot_networks: dict[str, list[NetworkType]] = {}
-        if (
-            config.bots.enabled
-            and not getattr(args, "no_bots", False)
-            and BOTDATA.exists()
-        ):
-            managed_bot_networks = load_managed_bot_networks(config.bots.providers)
+        contained = find_contained(
+            [
+                (group, [key_interval(entry) for entry in entries])
+                for group, _, entries in sections
+            ]
+        )
+        dropped: list[set[int]] = [set() for _ in sections]
+        records: list[dict[str, str]] = []
+        for item in sorted(contained, key=lambda c: (c.section, c.entry)):
+            dropped[item.section].add(item.entry)
+            records.append(
+                {
+                    "entry": render_key(sections[item.section][2][item.entry]),
+                    "section": sections[item.section][1],
+                    "covered_by": render_key(
+                        sections[item.container_section][2][item.container]
+                    ),
+                    "covered_by_section": sections[item.container_section][1],
+                }
+            )
+        ipsum_ips = drop_entries(ipsum_ips, dropped[0])
+        ipsum_nets = drop_entries(ipsum_nets, dropped[1])
         managed_bot_networks = {
-            provider: apply_allowlist([], networks, allowlist)[1]
-            for provider, networks in managed_bot_networks.items()
+            provider: drop_entries(managed_bot_networks[provider], dropped[2 + i])
+            for i, provider in enumerate(providers)
         }
+        custom_ips = drop_entries(inputs.custom_ips, dropped[-2])
+        custom_nets = drop_entries(custom_nets, dropped[-1])
+        settings.output_path.parent.mkdir(parents=True, exist_ok=True)
+        write_dedupe_sidecar(dedupe_sidecar(settings.output_path), records)
+
+    # Render and save the complete blocklist.
+    with build_stage(console, "lists_render"):
         bot_nets = [
             net
             for provider in sorted(managed_bot_networks)
             for net in managed_bot_networks[provider]
         ]
-        bot_nets_size = len(bot_nets)
         now = dt.now().strftime("%Y-%m-%d %H:%M:%S")
-        blocklist_text = render_lines([*ipsum_ips, *ipsum_nets])
+        blocklist_text = render_lines(
+            [*map(render_address_key, ipsum_ips), *map(render_network_key, ipsum_nets)]
+        )
         if bot_nets:
             blocklist_text += (
                 "\n# ---------managed bot ranges -----------\n"
@@ -359,42 +665,246 @@ def task_runner(args: Namespace) -> None:
             )
             for provider in sorted(managed_bot_networks):
                 blocklist_text += f"# {provider}\n"
-                blocklist_text += render_lines(managed_bot_networks[provider])
+                blocklist_text += render_lines(
+                    map(render_network_key, managed_bot_networks[provider])
+                )
         blocklist_text += (
             "\n# ------------custom entries -------------\n"
             + f"# Added on: {now}\n"
             + "# ----------------------------------------\n\n"
-            + render_lines([*custom_ips, *custom_nets])
-        )
-        output_path.write_text(blocklist_text)
-        RENDERED_ALLOWLIST.write_text(render_lines([*allow_ips, *allow_nets]))
-    print(format_status("lists_render"))
-
-    if output_path != RENDERED_BLOCKLIST:
-        shutil.copy2(output_path, RENDERED_BLOCKLIST)
-
-    # Generate tables to display country policy and build metrics. Do
-    # not include network and broadcast addresses when calculating total
-    # IP addresses.
-    total_entries = ipsum_size + bot_nets_size + custom_nets_size + custom_ips_size
-    total_ipv4s = 0
-    total_ipv6s = 0
-    for ips in [ipsum_ips, custom_ips]:
-        total_ipv4s += sum([1 for ip in ips if ip.version == 4])
-        total_ipv6s += sum([1 for ip in ips if ip.version == 6])
-    for nets in [ipsum_nets, bot_nets, custom_nets]:
-        total_ipv4s += sum(
-            1 if net.num_addresses == 1 else net.num_addresses - 2
-            for net in nets
-            if net.version == 4
+            + render_lines(
+                [
+                    *map(render_address_key, custom_ips),
+                    *map(render_network_key, custom_nets),
+                ]
+            )
         )
-        total_ipv6s += sum(
-            1 if net.num_addresses == 1 else net.num_addresses - 2
-            for net in nets
-            if net.version == 6
+        settings.output_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(settings.output_path, blocklist_text)
+
+    # Count distinct covered addresses per section and for the whole
+    # list. Overlaps between sections are counted once in the total.
+    section_entries: dict[str, list[AddressKey | NetworkKey]] = {
+        "ipsum": [*ipsum_ips, *ipsum_nets],
+        "bots": list(bot_nets),
+        "custom": [*custom_ips, *custom_nets],
+    }
+    section_coverage = {
+        name: coverage(map(key_interval, entries))
+        for name, entries in section_entries.items()
+    }
+    section_coverage["total"] = coverage(
+        key_interval(entry) for entries in section_entries.values() for entry in entries
+    )
+
+    return BuildResult(
+        settings=settings,
+        threat_countries=len(threat_countries),
+        ipsum_ips=len(ipsum_ips),
+        ipsum_nets=len(ipsum_nets),
+        bot_nets=len(bot_nets),
+        custom_ips=len(custom_ips),
+        custom_nets=len(custom_nets),
+        compact_factor=compact_factor,
+        coverage=section_coverage,
+        deduplicated=len(records),
+        patched=inputs.patched,
+    )
+
+
+def drop_entries(entries: list[EntryT], dropped: set[int]) -> list[EntryT]:
+    """Return entries whose positions are not in ``dropped``.
+
+    Parameters
+    ----------
+    entries : list[EntryT]
+        Entries in rendering order.
+    dropped : set[int]
+        Positions to remove.
+
+    Returns
+    -------
+    list[EntryT]
+        Remaining entries in their original order.
+    """
+    if not dropped:
+        return entries
+    return [entry for index, entry in enumerate(entries) if index not in dropped]
+
+
+# Shared inputs installed in each profile worker process.
+worker_inputs: dict[str, SharedInputs] = {}
+
+
+def init_profile_worker(inputs: SharedInputs) -> None:
+    """Install shared inputs in a profile worker process.
+
+    Parameters
+    ----------
+    inputs : SharedInputs
+        Prepared inputs shared by every profile.
+    """
+    worker_inputs["shared"] = inputs
+
+
+def run_profile_worker(settings: BuildSettings) -> BuildResult:
+    """Run one profile with the inputs installed in this worker.
+
+    Parameters
+    ----------
+    settings : BuildSettings
+        Options for this blocklist.
+
+    Returns
+    -------
+    BuildResult
+        Summary metrics for the rendered blocklist.
+    """
+    return run_profile(worker_inputs["shared"], settings)
+
+
+def run_profiles(
+    inputs: SharedInputs,
+    profiles: list[BuildSettings],
+    jobs: int,
+    console: Console,
+) -> list[BuildResult]:
+    """Run build profiles sequentially or in worker processes.
+
+    Parameters
+    ----------
+    inputs : SharedInputs
+        Prepared inputs shared by every profile.
+    profiles : list[BuildSettings]
+        Profiles to build.
+    jobs : int
+        Maximum number of worker processes. A value of 1 runs every
+        profile in this process.
+    console : Console
+        Rich console used for progress.
+
+    Returns
+    -------
+    list[BuildResult]
+        Results in the same order as ``profiles``.
+    """
+    if jobs <= 1 or len(profiles) <= 1:
+        results = []
+        for settings in profiles:
+            if settings.name:
+                console.print(Text(f"Profile: {settings.name}", style="bold"))
+            results.append(run_profile(inputs, settings, console))
+        return results
+
+    with console.status(status_label("profiles_run")):
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(profiles)),
+            initializer=init_profile_worker,
+            initargs=(inputs,),
+        ) as executor:
+            results = list(executor.map(run_profile_worker, profiles))
+    print(format_status("profiles_run"))
+    return results
+
+
+def profile_settings(
+    config: BanipConfig,
+    selection: str,
+) -> list[BuildSettings]:
+    """Resolve a profile selection into build settings.
+
+    Parameters
+    ----------
+    config : BanipConfig
+        Validated configuration.
+    selection : str
+        Profile name, or ``all`` for every configured profile.
+
+    Returns
+    -------
+    list[BuildSettings]
+        Settings for each selected profile, sorted by name.
+
+    Raises
+    ------
+    ValueError
+        If no profiles are configured or the selection is unknown.
+    """
+    if not config.profiles:
+        raise ValueError("No build profiles are defined in the 'profiles' section.")
+    if selection != "all" and selection not in config.profiles:
+        raise ValueError(f"Unknown build profile: {selection!r}")
+    names = sorted(config.profiles) if selection == "all" else [selection]
+    return [
+        BuildSettings(
+            name=name,
+            threshold=config.profiles[name].threshold,
+            compact=config.profiles[name].compact,
+            policies=config.profiles[name].policies,
+            bots=config.profiles[name].bots,
+            output_path=config.profiles[name].outfile,
         )
+        for name in names
+    ]
+
 
-    policy_table = Table(
+def write_check_data(config: BanipConfig, inputs: SharedInputs) -> None:
+    """Write the check snapshot for the canonical rendered blocklist.
+
+    Parameters
+    ----------
+    config : BanipConfig
+        Validated configuration.
+    inputs : SharedInputs
+        Prepared inputs from :func:`load_shared_inputs`.
+    """
+    policies = config.countries.policies
+    ips, nets = load_rendered_blocklist_keys()
+    header: dict[str, object] = {
+        "sources": source_stamps(check_snapshot_sources()),
+        "policies": {
+            name: {"mode": policy.mode.value, "codes": sorted(policy.codes)}
+            for name, policy in sorted(policies.items())
+        },
+        "verdicts": {
+            code: policy_verdicts(code, policies)
+            for code in sorted(set(inputs.geolite.values()))
+        },
+    }
+    write_check_snapshot(
+        check_snapshot(RENDERED_BLOCKLIST),
+        ips,
+        nets,
+        inputs.ipsum,
+        header,
+    )
+
+
+def policy_table(
+    config: BanipConfig,
+    resolved_policies: dict[str, set[str]],
+    compiled_policies: dict[str, int],
+    policy_scope: str | None,
+) -> Table:
+    """Create the country policy summary table.
+
+    Parameters
+    ----------
+    config : BanipConfig
+        Validated configuration.
+    resolved_policies : dict[str, set[str]]
+        Permitted country codes keyed by policy name.
+    compiled_policies : dict[str, int]
+        Compiled network counts keyed by policy name, when requested.
+    policy_scope : str | None
+        Scope of the compiled networks, when requested.
+
+    Returns
+    -------
+    Table
+        Styled Rich table.
+    """
+    table = Table(
         title="Country Policies",
         title_style="bold cyan",
         box=box.ROUNDED,
@@ -402,10 +912,12 @@ def task_runner(args: Namespace) -> None:
         header_style="bold",
         padding=(0, 1),
     )
-    policy_table.add_column("Policy", style="bold")
-    policy_table.add_column("Mode")
-    policy_table.add_column("Configured", justify="right", style="cyan")
-    policy_table.add_column("Permitted", justify="right", style="cyan")
+    table.add_column("Policy", style="bold")
+    table.add_column("Mode")
+    table.add_column("Configured", justify="right", style="cyan")
+    table.add_column("Permitted", justify="right", style="cyan")
+    if compiled_policies:
+        table.add_column(f"Networks ({policy_scope})", justify="right", style="cyan")
 
     for name, policy in sorted(config.countries.policies.items()):
         policy_name = Text(name)
@@ -413,75 +925,239 @@ def task_runner(args: Namespace) -> None:
             policy_name.stylize("green")
             policy_name.append(" (default)", style="dim green")
         mode_style = "green" if policy.mode is CountryPolicyMode.ALLOWLIST else "red"
-        policy_table.add_row(
+        row: list[RenderableType] = [
             policy_name,
             Text(policy.mode.value, style=mode_style),
             f"{len(policy.codes):,d}",
             f"{len(resolved_policies[name]):,d}",
-        )
-    policy_table.add_section()
-    policy_table.add_row(
+        ]
+        if compiled_policies:
+            row.append(f"{compiled_policies[name]:,d}")
+        table.add_row(*row)
+    table.add_section()
+    table.add_row(
         Text("Threat scope", style="bold"),
         Text("union", style="dim"),
         "",
-        f"{len(threat_countries):,d}",
+        f"{len(set().union(*resolved_policies.values())):,d}",
     )
+    return table
+
+
+def summary_table(result: BuildResult) -> Table:
+    """Create the final build summary table for one blocklist.
+
+    Parameters
+    ----------
+    result : BuildResult
+        Metrics for the rendered blocklist.
 
-    summary_table = Table(
-        title="Final Build Summary",
+    Returns
+    -------
+    Table
+        Styled Rich table.
+    """
+    settings = result.settings
+    title = "Final Build Summary"
+    caption = None
+    if settings.name:
+        title = f"{title}: {settings.name}"
+        caption = (
+            f"Threshold {settings.threshold}, compact {settings.compact}, "
+            f"{result.threat_countries:,d} threat countries → {settings.output_path}"
+        )
+    table = Table(
+        title=title,
         title_style="bold cyan",
+        caption=caption,
+        caption_style="dim",
+        caption_justify="left",
         box=box.ROUNDED,
         border_style="bright_black",
         header_style="bold",
         padding=(0, 1),
     )
-    summary_table.add_column("Source")
-    summary_table.add_column("Addresses", justify="right", style="cyan")
-    summary_table.add_column("Subnets", justify="right", style="cyan")
-    summary_table.add_column("Entries", justify="right", style="cyan")
-    summary_table.add_row(
+    ipsum_size = result.ipsum_ips + result.ipsum_nets
+    total_entries = (
+        ipsum_size + result.bot_nets + result.custom_ips + result.custom_nets
+    )
+    coverage = result.coverage
+    table.add_column("Source")
+    table.add_column("Addresses", justify="right", style="cyan")
+    table.add_column("Subnets", justify="right", style="cyan")
+    table.add_column("Entries", justify="right", style="cyan")
+    table.add_column("IPv4 coverage", justify="right", style="cyan")
+    table.add_column("IPv6 coverage", justify="right", style="cyan")
+    table.add_row(
         "Threat feeds",
-        f"{ipsum_ips_size:,d}",
-        f"{ipsum_nets_size:,d}",
+        f"{result.ipsum_ips:,d}",
+        f"{result.ipsum_nets:,d}",
         f"{ipsum_size:,d}",
+        f"{coverage['ipsum'].ipv4:,d}",
+        f"{coverage['ipsum'].ipv6:.2e}",
     )
-    summary_table.add_row(
+    table.add_row(
         "Managed bots",
         Text("—", style="dim"),
-        f"{bot_nets_size:,d}",
-        f"{bot_nets_size:,d}",
+        f"{result.bot_nets:,d}",
+        f"{result.bot_nets:,d}",
+        f"{coverage['bots'].ipv4:,d}",
+        f"{coverage['bots'].ipv6:.2e}",
     )
-    summary_table.add_row(
+    table.add_row(
         "Custom entries",
-        f"{custom_ips_size:,d}",
-        f"{custom_nets_size:,d}",
-        f"{custom_ips_size + custom_nets_size:,d}",
+        f"{result.custom_ips:,d}",
+        f"{result.custom_nets:,d}",
+        f"{result.custom_ips + result.custom_nets:,d}",
+        f"{coverage['custom'].ipv4:,d}",
+        f"{coverage['custom'].ipv6:.2e}",
     )
-    summary_table.add_section()
-    summary_table.add_row(
+    table.add_section()
+    table.add_row(
         Text("Total written", style="bold green"),
         "",
         "",
         Text(f"{total_entries:,d}", style="bold green"),
+        Text(f"{coverage['total'].ipv4:,d}", style="bold green"),
+        Text(f"{coverage['total'].ipv6:.2e}", style="bold green"),
     )
-    summary_table.add_section()
-    summary_table.add_row(
-        Text("IPv4 coverage", style="dim"),
+    table.add_row(
+        Text("Deduplicated", style="dim"),
         "",
         "",
-        Text(f"{total_ipv4s:,d}", style="dim cyan"),
-    )
-    summary_table.add_row(
-        Text("IPv6 coverage", style="dim"),
+        Text(f"{result.deduplicated:,d}", style="dim cyan"),
         "",
         "",
-        Text(f"{total_ipv6s:.2e}", style="dim cyan"),
     )
+    for label, count in zip(("active", "expired"), result.patched, strict=True):
+        table.add_row(
+            Text(f"Patched ({label})", style="dim"),
+            Text(f"{count:,d}", style="dim cyan"),
+            "",
+            "",
+            "",
+            "",
+        )
+    return table
+
+
+def task_runner(args: Namespace) -> None:
+    """Generate a custom IP blocklist.
+
+    Parameters
+    ----------
+    args : Namespace
+        Command-line arguments.
+    """
+    # ------------------------------------------------------------------
 
+    # Select the requested blocklist destination while retaining the
+    # canonical local copy used by other banip commands.
     print()
-    console.print(policy_table)
+    outfile = getattr(args, "outfile", None)
+    output_path = Path(outfile) if outfile else RENDERED_BLOCKLIST
+    profile = getattr(args, "profile", None)
+
+    # ------------------------------------------------------------------
+
+    # Now make sure everything is in place.
+    files = [
+        CONFIG,
+        GEOLITE_4,
+        GEOLITE_6,
+        GEOLITE_LOC,
+        IPSUM,
+    ]
+    for file in files:
+        if not file.exists():
+            print(f"Missing file: {file}")
+            print("Visit https://geozeke.github.io/banip/ for more information.")
+            sys.exit(1)
+
+    try:
+        config = load_config(CONFIG)
+        if profile and outfile:
+            raise ValueError("Use 'outfile' in banip.yaml when building profiles.")
+        if profile:
+            profiles = profile_settings(config, profile)
+        else:
+            profiles = [
+                BuildSettings(
+                    name=None,
+                    threshold=args.threshold,
+                    compact=args.compact,
+                    policies=tuple(sorted(config.countries.policies)),
+                    bots=not getattr(args, "no_bots", False),
+                    output_path=output_path,
+                )
+            ]
+    except (FileNotFoundError, ValueError) as exc:
+        print(exc)
+        sys.exit(1)
+
+    # ------------------------------------------------------------------
+
+    # Load and index the shared inputs once for every profile.
+    console = Console()
+    inputs = load_shared_inputs(
+        config,
+        load_bots=any(settings.bots for settings in profiles),
+        console=console,
+    )
+
+    # Optionally compile every policy into a minimal CIDR list so a
+    # proxy can enforce it with one source-address ACL.
+    policy_scope = getattr(args, "policy_networks", None)
+    compiled_policies: dict[str, int] = {}
+    if policy_scope:
+        with build_stage(console, "policy_compile"):
+            compiled_policies = write_policy_network_files(
+                inputs.geolite,
+                inputs.resolved_policies,
+                policy_scope,
+                inputs.intervals,
+                jobs=getattr(args, "jobs", 1),
+            )
+
+    # ------------------------------------------------------------------
+
+    # Prune, compact, and render each blocklist, then save the shared
+    # ip_allowlist.txt.
+    results = run_profiles(
+        inputs,
+        profiles,
+        jobs=getattr(args, "jobs", 1),
+        console=console,
+    )
+    allow_ips, allow_nets = split_hybrid(config.allowlist)
+    write_atomic(RENDERED_ALLOWLIST, render_lines([*allow_ips, *allow_nets]))
+
+    if not profile and output_path != RENDERED_BLOCKLIST:
+        copy_atomic(output_path, RENDERED_BLOCKLIST)
+        copy_atomic(dedupe_sidecar(output_path), dedupe_sidecar(RENDERED_BLOCKLIST))
+
+    # Precompile the canonical blocklist, ipsum, and policy verdicts so
+    # `banip check` can answer from a memory-mapped snapshot.
+    if RENDERED_BLOCKLIST.exists():
+        with build_stage(console, "snapshot_write"):
+            write_check_data(config, inputs)
+
+    # Activate the finished outputs together as a new data generation.
+    publish_generation(RENDERED_BLOCKLIST.parent)
+
+    # Generate tables to display country policy and build metrics.
     print()
-    console.print(summary_table)
+    console.print(
+        policy_table(
+            config,
+            inputs.resolved_policies,
+            compiled_policies,
+            policy_scope,
+        )
+    )
+    for result in results:
+        print()
+        console.print(summary_table(result))
 
     return
 
@@ -1,13 +1,25 @@
 """Task runner for the check command."""
 
 import argparse
+import csv
 import ipaddress as ipa
+import json
+import sys
+from collections import Counter
+from collections.abc import Iterable
+from contextlib import ExitStack
 from dataclasses import dataclass
 from enum import StrEnum
+from functools import cached_property
+from functools import lru_cache
+from itertools import chain
+from itertools import islice
 from pathlib import Path
+from typing import TextIO
 
 from rich import box
 from rich.console import Console
+from rich.console import Group
 from rich.panel import Panel
 from rich.progress import BarColumn
 from rich.progress import Progress
@@ -19,43 +31,303 @@ from rich.text import Text
 from banip.config import CountryPolicy
 from banip.config import CountryPolicyMode
 from banip.config import load_config
+from banip.config import policy_verdicts
+from banip.constants import CHECK_FIELDS
 from banip.constants import CONFIG
 from banip.constants import COUNTRY_NETS_TXT
+from banip.constants import DATA
 from banip.constants import IPSUM
 from banip.constants import RENDERED_BLOCKLIST
+from banip.constants import AddressKey
 from banip.constants import AddressType
+from banip.constants import AddressTypes
+from banip.constants import NetworkKey
 from banip.constants import NetworkType
+from banip.constants import NetworkTypes
+from banip.utilities import CheckSnapshot
+from banip.utilities import CountryIndex
+from banip.utilities import DedupeIndex
+from banip.utilities import EntryIndex
 from banip.utilities import NetworkLookup
+from banip.utilities import address_key
+from banip.utilities import build_entry_index
 from banip.utilities import build_network_lookup
+from banip.utilities import check_snapshot
+from banip.utilities import check_snapshot_sources
+from banip.utilities import current_generation
+from banip.utilities import dedupe_sidecar
+from banip.utilities import generation_path
+from banip.utilities import interval_networks
 from banip.utilities import ip_in_network
+from banip.utilities import key_address
+from banip.utilities import key_interval
+from banip.utilities import key_network
+from banip.utilities import load_country_index
+from banip.utilities import load_dedupe_sidecar
 from banip.utilities import load_ipsum
 from banip.utilities import load_rendered_blocklist
 from banip.utilities import lookup_country
+from banip.utilities import network_key
+from banip.utilities import read_check_snapshot
+from banip.utilities import read_tokens
+from banip.utilities import union_size
+
+# Addresses checked and written together when streaming bulk input.
+CHECK_BATCH_SIZE = 4096
+CHECKED = "CHECKED"
+INVALID = "INVALID"
+# Rows listed in each range-check table before the rest are summarized.
+RANGE_TABLE_ROWS = 20
+
+
+# Data components each result field needs, in loading order.
+FIELD_COMPONENTS = {
+    "verdict": ("country_policies", "rendered_blocklist", "countries"),
+    "country": ("countries",),
+    "blocked_policies": ("country_policies", "countries"),
+    "permitted_policies": ("country_policies", "countries"),
+    "blocklist_match": ("rendered_blocklist",),
+    "ipsum_confidence": ("ipsum",),
+    "deduplicated": ("deduplicated",),
+}
+COMPONENT_LABELS = {
+    "country_policies": "Loading configuration",
+    "ipsum": "Loading ipsum data",
+    "rendered_blocklist": "Loading rendered blocklist",
+    "deduplicated": "Loading deduplication notes",
+    "countries": "Loading country network map",
+}
 
 
-@dataclass(frozen=True)
 class CheckData:
-    """Prepared data used for IP address checks.
+    """Lookup data for IP address checks, loaded on first use.
+
+    Each component is read the first time a check needs it, so a caller
+    that only asks for countries never parses ipsum data or the rendered
+    blocklist. Components passed to the constructor are used as given.
 
     Parameters
     ----------
     country_data_path : Path
         Path to the generated country network map.
-    rendered_ips : frozenset[AddressType]
-        Individual addresses in the rendered blocklist.
-    rendered_lookup : NetworkLookup
-        Lookup-ready networks in the rendered blocklist.
-    ipsum : dict[AddressType, int]
-        Ipsum confidence values keyed by address.
-    country_policies : dict[str, CountryPolicy]
-        Configured country policies keyed by name.
+    rendered_ips : frozenset[AddressType] | None, optional
+        Individual addresses in the rendered blocklist. Defaults to
+        None, which loads them on first use.
+    rendered_lookup : NetworkLookup | None, optional
+        Lookup-ready networks in the rendered blocklist. Defaults to
+        None, which loads them on first use.
+    ipsum : dict[AddressType, int] | None, optional
+        Ipsum confidence values keyed by address. Defaults to None,
+        which loads them on first use.
+    country_policies : dict[str, CountryPolicy] | None, optional
+        Configured country policies keyed by name. Defaults to None,
+        which reads them from the snapshot or configuration on first
+        use.
+    deduplicated : DedupeIndex | None, optional
+        Provenance for entries the build dropped as duplicates. Defaults
+        to None, which loads the sidecar on first use.
+    snapshot : CheckSnapshot | None, optional
+        Memory-mapped snapshot written by the last build. When present,
+        it answers blocklist, ipsum, and policy lookups instead of the
+        parsed text data. Defaults to None.
+    countries : CountryIndex | None, optional
+        In-memory country lookup. Defaults to None.
+    resident : bool, optional
+        Whether to load the country network map into memory on first
+        use when ``countries`` is not given. Otherwise countries are
+        found by searching the map on disk. Defaults to False.
+    generation : Path | None, optional
+        Data generation whose rendered blocklist, ipsum feed, and
+        deduplication sidecar are loaded. Defaults to None, which loads
+        them from the data directory.
     """
 
-    country_data_path: Path
-    rendered_ips: frozenset[AddressType]
-    rendered_lookup: NetworkLookup
-    ipsum: dict[AddressType, int]
-    country_policies: dict[str, CountryPolicy]
+    def __init__(
+        self,
+        country_data_path: Path,
+        rendered_ips: frozenset[AddressType] | None = None,
+        rendered_lookup: NetworkLookup | None = None,
+        ipsum: dict[AddressType, int] | None = None,
+        country_policies: dict[str, CountryPolicy] | None = None,
+        deduplicated: DedupeIndex | None = None,
+        snapshot: CheckSnapshot | None = None,
+        countries: CountryIndex | None = None,
+        resident: bool = False,
+        generation: Path | None = None,
+    ) -> None:
+        self.country_data_path = country_data_path
+        self.snapshot = snapshot
+        self.resident = resident
+        self.generation = generation
+        given = {
+            "rendered_ips": rendered_ips,
+            "rendered_lookup": rendered_lookup,
+            "ipsum": ipsum,
+            "country_policies": country_policies,
+            "deduplicated": deduplicated,
+            "countries": countries,
+        }
+        # Given components fill their cached properties directly.
+        self.__dict__.update(
+            {name: value for name, value in given.items() if value is not None}
+        )
+        if rendered_ips is not None and rendered_lookup is not None:
+            self.__dict__["rendered_blocklist"] = rendered_ips, rendered_lookup
+
+    @cached_property
+    def rendered_blocklist(self) -> tuple[frozenset[AddressType], NetworkLookup]:
+        """Return the parsed rendered blocklist.
+
+        Returns
+        -------
+        tuple[frozenset[AddressType], NetworkLookup]
+            Individual addresses and lookup-ready networks.
+        """
+        ips, networks = load_rendered_blocklist(
+            generation_path(RENDERED_BLOCKLIST, self.generation)
+        )
+        return frozenset(ips), build_network_lookup(networks)
+
+    @cached_property
+    def rendered_ips(self) -> frozenset[AddressType]:
+        """Return individual addresses in the rendered blocklist."""
+        return self.rendered_blocklist[0]
+
+    @cached_property
+    def rendered_lookup(self) -> NetworkLookup:
+        """Return lookup-ready networks in the rendered blocklist."""
+        return self.rendered_blocklist[1]
+
+    @cached_property
+    def ipsum(self) -> dict[AddressType, int]:
+        """Return ipsum confidence values keyed by address.
+
+        The feed is read from the data generation, with the live patch
+        journal overlaid on it.
+        """
+        return load_ipsum(generation_path(IPSUM, self.generation))
+
+    @cached_property
+    def country_policies(self) -> dict[str, CountryPolicy]:
+        """Return configured country policies keyed by name.
+
+        Returns
+        -------
+        dict[str, CountryPolicy]
+            Policies recorded in the snapshot, or read from
+            ``banip.yaml`` when there is no snapshot.
+        """
+        if self.snapshot:
+            return {
+                name: CountryPolicy(
+                    mode=CountryPolicyMode(policy["mode"]),
+                    codes=set(policy["codes"]),
+                )
+                for name, policy in self.snapshot.header["policies"].items()
+            }
+        return load_config(CONFIG).countries.policies
+
+    @cached_property
+    def deduplicated(self) -> DedupeIndex:
+        """Return provenance for entries the build dropped as duplicates."""
+        return load_dedupe_sidecar(
+            generation_path(dedupe_sidecar(RENDERED_BLOCKLIST), self.generation)
+        )
+
+    @cached_property
+    def countries(self) -> CountryIndex | None:
+        """Return the in-memory country lookup when data is resident.
+
+        Returns
+        -------
+        CountryIndex | None
+            Loaded country network map, or None when countries are
+            searched on disk.
+        """
+        return load_country_index(self.country_data_path) if self.resident else None
+
+    def pending(self, fields: Iterable[str]) -> list[str]:
+        """Return components that checks of some fields will still load.
+
+        Parameters
+        ----------
+        fields : Iterable[str]
+            Result fields from ``CHECK_FIELDS``.
+
+        Returns
+        -------
+        list[str]
+            Unloaded component names, in loading order. Components the
+            snapshot answers, and the country network map when data is
+            not resident, are never pending.
+        """
+        needed = set(field_components(tuple(fields)))
+        if self.snapshot:
+            needed -= {"ipsum", "rendered_blocklist"}
+        if not self.resident:
+            needed.discard("countries")
+        return [
+            name
+            for name in COMPONENT_LABELS
+            if name in needed and name not in self.__dict__
+        ]
+
+    @cached_property
+    def entry_index(self) -> EntryIndex:
+        """Return a range lookup over the parsed rendered blocklist.
+
+        Returns
+        -------
+        EntryIndex
+            Rendered addresses and networks, built on first use.
+        """
+        networks = (
+            bounds.network
+            for bounds in (*self.rendered_lookup.ipv4, *self.rendered_lookup.ipv6)
+        )
+        return build_entry_index(
+            [
+                *(address_key(ip) for ip in self.rendered_ips),
+                *(network_key(network) for network in networks),
+            ]
+        )
+
+    @cached_property
+    def country_index(self) -> CountryIndex:
+        """Return an in-memory country lookup for range queries.
+
+        Returns
+        -------
+        CountryIndex
+            The resident country lookup, or the country network map
+            loaded once from ``country_data_path``.
+        """
+        if self.countries is not None:
+            return self.countries
+        return load_country_index(self.country_data_path)
+
+    def blocklist_entries(
+        self, version: int, first: int, last: int
+    ) -> list[AddressKey | NetworkKey]:
+        """Return rendered blocklist entries overlapping an inclusive range.
+
+        Parameters
+        ----------
+        version : int
+            IP version of the range, either 4 or 6.
+        first : int
+            First address in the range as an integer.
+        last : int
+            Last address in the range as an integer.
+
+        Returns
+        -------
+        list[AddressKey | NetworkKey]
+            Overlapping entries as integer keys.
+        """
+        if self.snapshot:
+            return self.snapshot.entries(version, first, last)
+        return list(self.entry_index.overlapping(version, first, last))
 
 
 class CheckVerdict(StrEnum):
@@ -85,6 +357,9 @@ class CheckResult:
         Country policies that block the address country.
     permitted_policies : tuple[str, ...]
         Country policies that permit the address country.
+    deduplicated : tuple[str, ...], optional
+        Build notes for entries covering the address that were dropped
+        because another section already covers them. Defaults to ().
     """
 
     address: AddressType
@@ -93,6 +368,7 @@ class CheckResult:
     ipsum_confidence: int | None
     blocked_policies: tuple[str, ...]
     permitted_policies: tuple[str, ...]
+    deduplicated: tuple[str, ...] = ()
 
     @property
     def verdict(self) -> CheckVerdict:
@@ -114,19 +390,121 @@ class CheckResult:
         return CheckVerdict.NOT_BLOCKED
 
 
-def load_check_data(console: Console) -> CheckData:
+@dataclass(frozen=True)
+class CountrySpan:
+    """Part of a queried range assigned to one country.
+
+    Parameters
+    ----------
+    country_code : str
+        Country code from the country network map.
+    addresses : int
+        Addresses of the queried range in the country.
+    networks : tuple[NetworkType, ...]
+        GeoLite2 networks of the country overlapping the range.
+    blocked_policies : tuple[str, ...]
+        Country policies that block the country.
+    permitted_policies : tuple[str, ...]
+        Country policies that permit the country.
+    """
+
+    country_code: str
+    addresses: int
+    networks: tuple[NetworkType, ...]
+    blocked_policies: tuple[str, ...]
+    permitted_policies: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class RangeResult:
+    """Result of checking one network against blocklist and country data.
+
+    Parameters
+    ----------
+    network : NetworkType
+        Network that was checked.
+    covering : tuple[AddressType | NetworkType, ...]
+        Blocklist entries containing the whole network, from the
+        broadest to the narrowest.
+    contained : tuple[AddressType | NetworkType, ...]
+        Blocklist entries inside the network, sorted by address.
+    blocklist_addresses : int
+        Addresses of the network covered by blocklist entries.
+    blocked_addresses : int
+        Addresses of the network with a ``BLOCKED`` verdict, from
+        blocklist entries or from countries every policy blocks.
+    countries : tuple[CountrySpan, ...]
+        Countries spanned by the network, from the most to the fewest
+        addresses.
+    """
+
+    network: NetworkType
+    covering: tuple[AddressType | NetworkType, ...]
+    contained: tuple[AddressType | NetworkType, ...]
+    blocklist_addresses: int
+    blocked_addresses: int
+    countries: tuple[CountrySpan, ...]
+
+    @property
+    def addresses(self) -> int:
+        """Return the number of addresses in the network."""
+        return self.network.num_addresses
+
+    @property
+    def unknown_addresses(self) -> int:
+        """Return the number of addresses without a known country."""
+        return self.addresses - sum(span.addresses for span in self.countries)
+
+
+def load_check_data(
+    console: Console,
+    resident: bool = False,
+    fields: Iterable[str] = CHECK_FIELDS,
+) -> CheckData:
     """Load and prepare data required by the check command.
 
+    Only the components needed for the requested fields are loaded
+    here. Any other component loads on first use.
+
     Parameters
     ----------
     console : Console
         Rich console used to display loading progress.
+    resident : bool, optional
+        Whether to hold lookup data in memory, including the country
+        network map and decoded snapshot keys. This slows loading but
+        pays off for long-running services that answer many lookups.
+        Defaults to False.
+    fields : Iterable[str], optional
+        Result fields from ``CHECK_FIELDS`` the caller will use.
+        Defaults to every field.
 
     Returns
     -------
     CheckData
         Prepared data for repeated address checks.
     """
+    # Read build outputs from the active generation, which later builds
+    # never modify, and use its snapshot when it is newer than every
+    # source file.
+    generation = current_generation(DATA)
+    snapshot = read_check_snapshot(
+        generation_path(check_snapshot(RENDERED_BLOCKLIST), generation),
+        {
+            label: generation_path(path, generation)
+            for label, path in check_snapshot_sources().items()
+        },
+        decode=resident,
+    )
+    data = CheckData(
+        generation_path(COUNTRY_NETS_TXT, generation),
+        snapshot=snapshot,
+        resident=resident,
+        generation=generation,
+    )
+    if not (pending := data.pending(fields)):
+        return data
+
     progress = Progress(
         TextColumn("{task.description}"),
         BarColumn(),
@@ -135,28 +513,55 @@ def load_check_data(console: Console) -> CheckData:
         transient=True,
     )
     with progress:
-        task = progress.add_task("Loading configuration", total=3)
-        config = load_config(CONFIG)
-        progress.advance(task)
-
-        progress.update(task, description="Loading ipsum data")
-        ipsum = load_ipsum()
-        progress.advance(task)
-
-        progress.update(task, description="Loading rendered blocklist")
-        rendered_ips, rendered_networks = load_rendered_blocklist()
-        progress.advance(task)
-
-        return CheckData(
-            country_data_path=COUNTRY_NETS_TXT,
-            rendered_ips=frozenset(rendered_ips),
-            rendered_lookup=build_network_lookup(rendered_networks),
-            ipsum=ipsum,
-            country_policies=config.countries.policies,
-        )
+        task = progress.add_task(COMPONENT_LABELS[pending[0]], total=len(pending))
+        for name in pending:
+            progress.update(task, description=COMPONENT_LABELS[name])
+            getattr(data, name)
+            progress.advance(task)
+    return data
+
 
+def country_verdicts(
+    country_code: str, data: CheckData
+) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Return the policies that block and permit a country.
 
-def check_address(address: AddressType, data: CheckData) -> CheckResult:
+    Parameters
+    ----------
+    country_code : str
+        Two-letter country code.
+    data : CheckData
+        Prepared lookup data.
+
+    Returns
+    -------
+    tuple[tuple[str, ...], tuple[str, ...]]
+        Names of blocking and permitting policies.
+    """
+    verdicts = data.snapshot.verdicts(country_code) if data.snapshot else None
+    return verdicts or policy_verdicts(country_code, data.country_policies)
+
+
+@lru_cache
+def field_components(fields: tuple[str, ...]) -> frozenset[str]:
+    """Return the data components needed to report some result fields.
+
+    Parameters
+    ----------
+    fields : tuple[str, ...]
+        Result fields from ``CHECK_FIELDS``.
+
+    Returns
+    -------
+    frozenset[str]
+        Component names from ``COMPONENT_LABELS``.
+    """
+    return frozenset(name for key in fields for name in FIELD_COMPONENTS[key])
+
+
+def check_address(
+    address: AddressType, data: CheckData, fields: tuple[str, ...] = CHECK_FIELDS
+) -> CheckResult:
     """Check one address against prepared country and blocklist data.
 
     Parameters
@@ -165,43 +570,251 @@ def check_address(address: AddressType, data: CheckData) -> CheckResult:
         Address to check.
     data : CheckData
         Prepared lookup data.
+    fields : tuple[str, ...], optional
+        Result fields from ``CHECK_FIELDS`` to compute. Data needed only
+        by other fields is not consulted or loaded, and those fields are
+        left empty. Defaults to every field.
 
     Returns
     -------
     CheckResult
         Structured result for the address.
     """
-    country_code = lookup_country(address, data.country_data_path)
+    needed = field_components(fields)
+    key = address_key(address)
+    country_code: str | None = None
+    if "countries" in needed:
+        if data.countries:
+            country_code = data.countries.lookup(key)
+        else:
+            country_code = lookup_country(address, data.country_data_path)
 
-    if address in data.rendered_ips:
-        blocklist_match: AddressType | NetworkType | None = address
-    else:
-        blocklist_match = ip_in_network(address, data.rendered_lookup)
-
-    blocked_policies: list[str] = []
-    permitted_policies: list[str] = []
-    if country_code:
-        for name, policy in sorted(data.country_policies.items()):
-            blocked = (
-                country_code not in policy.codes
-                if policy.mode is CountryPolicyMode.ALLOWLIST
-                else country_code in policy.codes
-            )
-            if blocked:
-                blocked_policies.append(name)
-            else:
-                permitted_policies.append(name)
+    blocklist_match: AddressType | NetworkType | None = None
+    if "rendered_blocklist" in needed:
+        if data.snapshot:
+            if data.snapshot.contains_ip(key):
+                blocklist_match = address
+            elif network := data.snapshot.network(key):
+                blocklist_match = key_network(network)
+        elif address in data.rendered_ips:
+            blocklist_match = address
+        else:
+            blocklist_match = ip_in_network(address, data.rendered_lookup)
+
+    ipsum_confidence: int | None = None
+    if "ipsum" in needed:
+        if data.snapshot:
+            ipsum_confidence = data.snapshot.confidence(key)
+        else:
+            ipsum_confidence = data.ipsum.get(address)
+
+    blocked_policies: tuple[str, ...] = ()
+    permitted_policies: tuple[str, ...] = ()
+    if country_code and "country_policies" in needed:
+        blocked_policies, permitted_policies = country_verdicts(country_code, data)
 
     return CheckResult(
         address=address,
         country_code=country_code,
         blocklist_match=blocklist_match,
-        ipsum_confidence=data.ipsum.get(address),
-        blocked_policies=tuple(blocked_policies),
-        permitted_policies=tuple(permitted_policies),
+        ipsum_confidence=ipsum_confidence,
+        blocked_policies=blocked_policies,
+        permitted_policies=permitted_policies,
+        deduplicated=(
+            data.deduplicated.lookup(address) if "deduplicated" in needed else ()
+        ),
     )
 
 
+def check_range(network: NetworkType, data: CheckData) -> RangeResult:
+    """Check one network against prepared country and blocklist data.
+
+    Blocklist entries and country networks are found with range queries
+    on sorted indexes, so the cost grows with the number of entries and
+    countries in the network rather than with its size.
+
+    Parameters
+    ----------
+    network : NetworkType
+        Network to check.
+    data : CheckData
+        Prepared lookup data. When it holds no resident country index,
+        the country network map is loaded into it on the first check.
+
+    Returns
+    -------
+    RangeResult
+        Structured result for the network.
+    """
+    version = network.version
+    first = int(network.network_address)
+    last = int(network.broadcast_address)
+
+    covering: list[AddressType | NetworkType] = []
+    contained: list[AddressType | NetworkType] = []
+    blocklisted: list[tuple[int, int]] = []
+    # Broader entries sort first, so covering entries run outermost-in.
+    bounds = sorted(
+        (key_interval(key)[1:] for key in data.blocklist_entries(version, first, last)),
+        key=lambda interval: (interval[0], -interval[1]),
+    )
+    for start, end in bounds:
+        entry: AddressType | NetworkType = (
+            key_address((version, start))
+            if start == end
+            else interval_networks(version, start, end)[0]
+        )
+        if start <= first and end >= last:
+            covering.append(entry)
+        else:
+            contained.append(entry)
+        blocklisted.append((max(start, first), min(end, last)))
+
+    spans: dict[str, tuple[int, list[NetworkType]]] = {}
+    blocked = list(blocklisted)
+    for start, end, code in data.country_index.overlapping(version, first, last):
+        clipped = max(start, first), min(end, last)
+        addresses, networks = spans.get(code, (0, []))
+        networks.extend(interval_networks(version, start, end))
+        spans[code] = addresses + clipped[1] - clipped[0] + 1, networks
+
+    country_spans: list[CountrySpan] = []
+    for code, (addresses, networks) in spans.items():
+        blocked_policies, permitted_policies = country_verdicts(code, data)
+        country_spans.append(
+            CountrySpan(
+                country_code=code,
+                addresses=addresses,
+                networks=tuple(networks),
+                blocked_policies=blocked_policies,
+                permitted_policies=permitted_policies,
+            )
+        )
+        if blocked_policies and not permitted_policies:
+            blocked.extend(
+                (
+                    max(int(net.network_address), first),
+                    min(int(net.broadcast_address), last),
+                )
+                for net in networks
+            )
+
+    return RangeResult(
+        network=network,
+        covering=tuple(covering),
+        contained=tuple(contained),
+        blocklist_addresses=union_size(blocklisted),
+        blocked_addresses=union_size(blocked),
+        countries=tuple(
+            sorted(country_spans, key=lambda span: (-span.addresses, span.country_code))
+        ),
+    )
+
+
+def result_record(
+    result: CheckResult, fields: tuple[str, ...] = CHECK_FIELDS
+) -> dict[str, object]:
+    """Return a JSON-serializable record for a check result.
+
+    Parameters
+    ----------
+    result : CheckResult
+        Result to convert.
+    fields : tuple[str, ...], optional
+        Result fields from ``CHECK_FIELDS`` to include after the
+        address. Defaults to every field.
+
+    Returns
+    -------
+    dict[str, object]
+        Result fields keyed by name, with addresses and networks as
+        strings.
+    """
+    values: dict[str, object] = {
+        "verdict": str(result.verdict),
+        "country": result.country_code,
+        "blocked_policies": list(result.blocked_policies),
+        "permitted_policies": list(result.permitted_policies),
+        "blocklist_match": (
+            str(result.blocklist_match) if result.blocklist_match else None
+        ),
+        "ipsum_confidence": result.ipsum_confidence,
+        "deduplicated": list(result.deduplicated),
+    }
+    return {"address": str(result.address)} | {name: values[name] for name in fields}
+
+
+def range_record(result: RangeResult) -> dict[str, object]:
+    """Return a JSON-serializable record for a range check result.
+
+    Parameters
+    ----------
+    result : RangeResult
+        Result to convert.
+
+    Returns
+    -------
+    dict[str, object]
+        Result fields keyed by name, with addresses and networks as
+        strings.
+    """
+    return {
+        "network": str(result.network),
+        "addresses": result.addresses,
+        "blocked_addresses": result.blocked_addresses,
+        "blocked_fraction": result.blocked_addresses / result.addresses,
+        "blocklist_addresses": result.blocklist_addresses,
+        "blocklist_fraction": result.blocklist_addresses / result.addresses,
+        "unknown_addresses": result.unknown_addresses,
+        "covering": [str(entry) for entry in result.covering],
+        "contained": [str(entry) for entry in result.contained],
+        "countries": [
+            {
+                "country": span.country_code,
+                "addresses": span.addresses,
+                "blocked_policies": list(span.blocked_policies),
+                "permitted_policies": list(span.permitted_policies),
+                "networks": [str(network) for network in span.networks],
+            }
+            for span in result.countries
+        ],
+    }
+
+
+def check_batch(
+    tokens: list[str], data: CheckData, fields: tuple[str, ...] = CHECK_FIELDS
+) -> list[CheckResult | str]:
+    """Check a batch of address strings.
+
+    Repeated addresses within the batch are checked once.
+
+    Parameters
+    ----------
+    tokens : list[str]
+        Address strings to check.
+    data : CheckData
+        Prepared lookup data.
+    fields : tuple[str, ...], optional
+        Result fields from ``CHECK_FIELDS`` to compute. Defaults to
+        every field.
+
+    Returns
+    -------
+    list[CheckResult | str]
+        One result per token, in order. Tokens that are not valid IP
+        addresses are returned unchanged.
+    """
+    checked: dict[str, CheckResult | str] = {}
+    for token in tokens:
+        if token in checked:
+            continue
+        try:
+            checked[token] = check_address(ipa.ip_address(token), data, fields)
+        except ValueError:
+            checked[token] = token
+    return [checked[token] for token in tokens]
+
+
 def verdict_text(result: CheckResult) -> Text:
     """Return a styled textual verdict for a check result.
 
@@ -237,20 +850,64 @@ def policy_text(result: CheckResult) -> Text:
     """
     if not result.country_code:
         return Text("unavailable", style="yellow")
+    return policy_summary(result.blocked_policies, result.permitted_policies)
+
+
+def policy_summary(
+    blocked_policies: tuple[str, ...], permitted_policies: tuple[str, ...]
+) -> Text:
+    """Return styled names of blocking and permitting policies.
 
+    Parameters
+    ----------
+    blocked_policies : tuple[str, ...]
+        Country policies that block a country.
+    permitted_policies : tuple[str, ...]
+        Country policies that permit a country.
+
+    Returns
+    -------
+    Text
+        Named blocked and permitted policies.
+    """
     summary = Text()
-    if result.blocked_policies:
+    if blocked_policies:
         summary.append("blocked: ", style="red")
-        summary.append(", ".join(result.blocked_policies), style="bold red")
-    if result.permitted_policies:
+        summary.append(", ".join(blocked_policies), style="bold red")
+    if permitted_policies:
         if summary:
             summary.append("; ")
         summary.append("permitted: ", style="green")
-        summary.append(", ".join(result.permitted_policies), style="bold green")
+        summary.append(", ".join(permitted_policies), style="bold green")
     return summary
 
 
-def display_result(console: Console, result: CheckResult) -> None:
+def selected_policies(result: CheckResult, fields: tuple[str, ...]) -> Text:
+    """Return styled policy decisions limited to the selected fields.
+
+    Parameters
+    ----------
+    result : CheckResult
+        Result to summarize.
+    fields : tuple[str, ...]
+        Result fields from ``CHECK_FIELDS`` selected for output.
+
+    Returns
+    -------
+    Text
+        Named blocked and permitted policies.
+    """
+    if not result.country_code:
+        return Text("unavailable", style="yellow")
+    return policy_summary(
+        result.blocked_policies if "blocked_policies" in fields else (),
+        result.permitted_policies if "permitted_policies" in fields else (),
+    )
+
+
+def display_result(
+    console: Console, result: CheckResult, fields: tuple[str, ...] = CHECK_FIELDS
+) -> None:
     """Display a detailed Rich card for one result.
 
     Parameters
@@ -259,31 +916,176 @@ def display_result(console: Console, result: CheckResult) -> None:
         Rich console used for output.
     result : CheckResult
         Result to display.
+    fields : tuple[str, ...], optional
+        Result fields from ``CHECK_FIELDS`` to display. Defaults to
+        every field.
     """
     details = Table.grid(padding=(0, 1))
     details.add_column(style="bold", justify="right")
     details.add_column()
-    details.add_row("Verdict", verdict_text(result))
-    details.add_row("Country", result.country_code or "—")
-    details.add_row("Country policies", policy_text(result))
+    if "verdict" in fields:
+        details.add_row("Verdict", verdict_text(result))
+    if "country" in fields:
+        details.add_row("Country", result.country_code or "—")
+    if "blocked_policies" in fields or "permitted_policies" in fields:
+        details.add_row("Country policies", selected_policies(result, fields))
+    if "blocklist_match" in fields:
+        details.add_row(
+            "Blocklist match",
+            str(result.blocklist_match) if result.blocklist_match else "—",
+        )
+    if "ipsum_confidence" in fields:
+        details.add_row(
+            "ipsum confidence",
+            f"{result.ipsum_confidence}/10"
+            if result.ipsum_confidence is not None
+            else "—",
+        )
+    if "deduplicated" in fields and result.deduplicated:
+        details.add_row("Deduplicated", "\n".join(result.deduplicated))
+    if "verdict" not in fields:
+        border_style = "cyan"
+    elif result.verdict is CheckVerdict.BLOCKED:
+        border_style = "red"
+    elif result.verdict is CheckVerdict.NOT_BLOCKED:
+        border_style = "green"
+    else:
+        border_style = "yellow"
+    console.print(
+        Panel(
+            details,
+            title=f"IP Check: {result.address}",
+            title_align="left",
+            border_style=border_style,
+            box=box.ROUNDED,
+            expand=False,
+        )
+    )
+
+
+def share_text(part: int, whole: int) -> str:
+    """Return a count and its share of a whole for display.
+
+    Parameters
+    ----------
+    part : int
+        Count within the whole.
+    whole : int
+        Total count.
+
+    Returns
+    -------
+    str
+        Count with thousands separators and a percentage.
+    """
+    return f"{part:,} ({part / whole:.1%})"
+
+
+def range_table(title: str) -> Table:
+    """Return an empty table styled for a range check card.
+
+    Parameters
+    ----------
+    title : str
+        Table title.
+
+    Returns
+    -------
+    Table
+        Styled table without columns.
+    """
+    return Table(
+        title=title,
+        title_style="bold cyan",
+        box=box.ROUNDED,
+        border_style="bright_black",
+        header_style="bold",
+        padding=(0, 1),
+    )
+
+
+def display_range(console: Console, result: RangeResult) -> None:
+    """Display a detailed Rich card for one range check.
+
+    Parameters
+    ----------
+    console : Console
+        Rich console used for output.
+    result : RangeResult
+        Result to display.
+    """
+    details = Table.grid(padding=(0, 1))
+    details.add_column(style="bold", justify="right")
+    details.add_column()
+    details.add_row("Addresses", f"{result.addresses:,}")
+    details.add_row("Blocked", share_text(result.blocked_addresses, result.addresses))
     details.add_row(
-        "Blocklist match",
-        str(result.blocklist_match) if result.blocklist_match else "—",
+        "Blocklist coverage",
+        share_text(result.blocklist_addresses, result.addresses),
     )
     details.add_row(
-        "ipsum confidence",
-        f"{result.ipsum_confidence}/10" if result.ipsum_confidence is not None else "—",
+        "Country unknown", share_text(result.unknown_addresses, result.addresses)
     )
-    if result.verdict is CheckVerdict.BLOCKED:
+    details.add_row(
+        "Blocklist entries",
+        f"{len(result.covering):,} covering the range, "
+        f"{len(result.contained):,} inside it",
+    )
+    parts: list[Table] = [details]
+
+    entries = [
+        *((entry, "covers range") for entry in result.covering),
+        *((entry, "inside range") for entry in result.contained),
+    ]
+    if entries:
+        table = range_table("Blocklist Entries")
+        table.add_column("Entry", style="cyan", overflow="fold")
+        table.add_column("Relation")
+        for entry, relation in entries[:RANGE_TABLE_ROWS]:
+            table.add_row(str(entry), relation)
+        if len(entries) > RANGE_TABLE_ROWS:
+            table.caption = f"{len(entries) - RANGE_TABLE_ROWS:,} more not shown"
+        parts.append(table)
+
+    if result.countries:
+        table = range_table("Countries")
+        table.add_column("Country", no_wrap=True)
+        table.add_column("Addresses", justify="right")
+        table.add_column("GeoLite2 ranges", justify="right")
+        table.add_column("Country policies", overflow="fold")
+        for span in result.countries:
+            table.add_row(
+                span.country_code,
+                share_text(span.addresses, result.addresses),
+                f"{len(span.networks):,}",
+                policy_summary(span.blocked_policies, span.permitted_policies),
+            )
+        parts.append(table)
+
+        networks = sorted(
+            (network, span.country_code)
+            for span in result.countries
+            for network in span.networks
+        )
+        table = range_table("GeoLite2 Ranges")
+        table.add_column("Network", style="cyan", overflow="fold")
+        table.add_column("Country", no_wrap=True)
+        for network, code in networks[:RANGE_TABLE_ROWS]:
+            table.add_row(str(network), code)
+        if len(networks) > RANGE_TABLE_ROWS:
+            table.caption = f"{len(networks) - RANGE_TABLE_ROWS:,} more not shown"
+        parts.append(table)
+
+    if result.blocked_addresses == result.addresses:
         border_style = "red"
-    elif result.verdict is CheckVerdict.NOT_BLOCKED:
+    elif not result.blocked_addresses:
         border_style = "green"
     else:
         border_style = "yellow"
     console.print(
         Panel(
-            details,
-            title=f"IP Check: {result.address}",
+            Group(*parts),
+            title=f"Range Check: {result.network}",
             title_align="left",
             border_style=border_style,
             box=box.ROUNDED,
@@ -292,7 +1094,11 @@ def display_result(console: Console, result: CheckResult) -> None:
     )
 
 
-def display_results(console: Console, results: list[CheckResult]) -> None:
+def display_results(
+    console: Console,
+    results: list[CheckResult],
+    fields: tuple[str, ...] = CHECK_FIELDS,
+) -> None:
     """Display a compact Rich table for multiple results.
 
     Parameters
@@ -301,6 +1107,9 @@ def display_results(console: Console, results: list[CheckResult]) -> None:
         Rich console used for output.
     results : list[CheckResult]
         Results to display.
+    fields : tuple[str, ...], optional
+        Result fields from ``CHECK_FIELDS`` to display. Defaults to
+        every field.
     """
     table = Table(
         title="Blocklist Check",
@@ -310,28 +1119,195 @@ def display_results(console: Console, results: list[CheckResult]) -> None:
         header_style="bold",
         padding=(0, 1),
     )
+    policies = "blocked_policies" in fields or "permitted_policies" in fields
     table.add_column("Address", style="cyan", min_width=15, overflow="fold")
-    table.add_column("Verdict", overflow="fold")
-    table.add_column("Country", no_wrap=True)
-    table.add_column("Country policies", overflow="fold")
-    table.add_column("Blocklist match", overflow="fold")
-    table.add_column("ipsum confidence", justify="right")
+    if "verdict" in fields:
+        table.add_column("Verdict", overflow="fold")
+    if "country" in fields:
+        table.add_column("Country", no_wrap=True)
+    if policies:
+        table.add_column("Country policies", overflow="fold")
+    if "blocklist_match" in fields:
+        table.add_column("Blocklist match", overflow="fold")
+    if "ipsum_confidence" in fields:
+        table.add_column("ipsum confidence", justify="right")
 
     for result in results:
-        table.add_row(
-            str(result.address),
-            verdict_text(result),
-            result.country_code or "—",
-            policy_text(result),
-            str(result.blocklist_match) if result.blocklist_match else "—",
-            f"{result.ipsum_confidence}/10"
-            if result.ipsum_confidence is not None
-            else "—",
-        )
+        cells: list[Text | str] = [str(result.address)]
+        if "verdict" in fields:
+            cells.append(verdict_text(result))
+        if "country" in fields:
+            cells.append(result.country_code or "—")
+        if policies:
+            cells.append(selected_policies(result, fields))
+        if "blocklist_match" in fields:
+            cells.append(str(result.blocklist_match) if result.blocklist_match else "—")
+        if "ipsum_confidence" in fields:
+            cells.append(
+                f"{result.ipsum_confidence}/10"
+                if result.ipsum_confidence is not None
+                else "—"
+            )
+        table.add_row(*cells)
+    console.print(table)
+
+
+def csv_row(
+    result: CheckResult, fields: tuple[str, ...] = CHECK_FIELDS
+) -> list[object]:
+    """Return the CSV fields for a check result.
+
+    Parameters
+    ----------
+    result : CheckResult
+        Result to convert.
+    fields : tuple[str, ...], optional
+        Result fields from ``CHECK_FIELDS`` to include after the
+        address. Defaults to every field.
+
+    Returns
+    -------
+    list[object]
+        The address and the selected fields in order, with lists joined
+        by semicolons.
+    """
+    return [
+        ";".join(map(str, value)) if isinstance(value, list) else value
+        for value in result_record(result, fields).values()
+    ]
+
+
+def invalid_csv_row(token: str, fields: tuple[str, ...] = CHECK_FIELDS) -> list[str]:
+    """Return the CSV fields for input that is not an IP address.
+
+    Parameters
+    ----------
+    token : str
+        Invalid input.
+    fields : tuple[str, ...], optional
+        Result fields from ``CHECK_FIELDS`` written after the address.
+        Defaults to every field.
+
+    Returns
+    -------
+    list[str]
+        The input, ``INVALID`` in the verdict column, and empty cells
+        for the other fields. Without the verdict field, the row ends
+        with an ``error`` column instead.
+    """
+    row = [token, *(INVALID if field == "verdict" else "" for field in fields)]
+    return row if "verdict" in fields else [*row, "invalid IP address"]
+
+
+def stream_results(
+    console: Console,
+    tokens: Iterable[str],
+    data: CheckData,
+    output_format: str,
+    out: TextIO,
+    fields: tuple[str, ...] = CHECK_FIELDS,
+) -> Counter[str]:
+    """Check addresses in fixed-size batches and write each batch at once.
+
+    Only one batch is held in memory, so arbitrarily large inputs can
+    be classified and output begins after the first batch.
+
+    Parameters
+    ----------
+    console : Console
+        Rich console used for table output and invalid-address notes.
+    tokens : Iterable[str]
+        Address strings to check.
+    data : CheckData
+        Prepared lookup data.
+    output_format : str
+        ``ndjson``, ``csv``, or ``table``.
+    out : TextIO
+        Destination for NDJSON and CSV output.
+    fields : tuple[str, ...], optional
+        Result fields from ``CHECK_FIELDS`` to compute and write.
+        Defaults to every field.
+
+    Returns
+    -------
+    Counter[str]
+        Number of addresses for each verdict, with invalid input counted
+        as ``INVALID``. Without the verdict field, valid addresses are
+        counted as ``CHECKED``.
+    """
+    counts: Counter[str] = Counter()
+    writer = csv.writer(out)
+    # Without a verdict column, an error column marks invalid input.
+    error_column = [] if "verdict" in fields else [""]
+    if output_format == "csv":
+        writer.writerow(["address", *fields, *(["error"] if error_column else [])])
+    iterator = iter(tokens)
+    while batch := list(islice(iterator, CHECK_BATCH_SIZE)):
+        results = check_batch(batch, data, fields)
+        for result in results:
+            if isinstance(result, str):
+                counts[INVALID] += 1
+            else:
+                counts[result.verdict if "verdict" in fields else CHECKED] += 1
+        if output_format == "table":
+            for result in results:
+                if isinstance(result, str):
+                    console.print(
+                        Text(f"{result} is not a valid IP address.", style="red")
+                    )
+            display_results(
+                console,
+                [result for result in results if not isinstance(result, str)],
+                fields,
+            )
+            continue
+        for result in results:
+            if output_format == "ndjson":
+                record = (
+                    {"address": result, "error": "invalid IP address"}
+                    if isinstance(result, str)
+                    else result_record(result, fields)
+                )
+                out.write(json.dumps(record) + "\n")
+            elif isinstance(result, str):
+                writer.writerow(invalid_csv_row(result, fields))
+            else:
+                writer.writerow([*csv_row(result, fields), *error_column])
+        out.flush()
+    return counts
+
+
+def display_summary(console: Console, counts: Counter[str]) -> None:
+    """Display the number of addresses with each verdict.
+
+    Parameters
+    ----------
+    console : Console
+        Rich console used for output.
+    counts : Counter[str]
+        Number of addresses for each verdict.
+    """
+    table = Table(
+        title="Check Summary",
+        title_style="bold cyan",
+        box=box.ROUNDED,
+        border_style="bright_black",
+        header_style="bold",
+        padding=(0, 1),
+    )
+    table.add_column("Verdict")
+    table.add_column("Addresses", justify="right")
+    for verdict in [*CheckVerdict, CHECKED, INVALID]:
+        if counts[verdict]:
+            table.add_row(verdict, f"{counts[verdict]:,}")
+    table.add_section()
+    table.add_row("Total", f"{counts.total():,}", style="bold")
     console.print(table)
 
 
-def interactive_check(console: Console, data: CheckData) -> None:
+def interactive_check(
+    console: Console, data: CheckData, fields: tuple[str, ...] = CHECK_FIELDS
+) -> None:
     """Prompt for and display address checks until the user exits.
 
     Parameters
@@ -340,6 +1316,9 @@ def interactive_check(console: Console, data: CheckData) -> None:
         Rich console used for output.
     data : CheckData
         Prepared lookup data.
+    fields : tuple[str, ...], optional
+        Result fields from ``CHECK_FIELDS`` to compute and display.
+        Defaults to every field.
     """
     while True:
         try:
@@ -357,7 +1336,7 @@ def interactive_check(console: Console, data: CheckData) -> None:
             console.print(Text(f"{user_input} is not a valid IP address.", style="red"))
             continue
 
-        display_result(console, check_address(address, data))
+        display_result(console, check_address(address, data, fields), fields)
 
 
 def display_missing_data(console: Console) -> bool:
@@ -395,7 +1374,7 @@ def display_missing_data(console: Console) -> bool:
 
 
 def task_runner(args: argparse.Namespace) -> None:
-    """Display available data for one or more IP addresses.
+    """Display available data for one or more IP addresses or networks.
 
     Parameters
     ----------
@@ -406,15 +1385,71 @@ def task_runner(args: argparse.Namespace) -> None:
     if display_missing_data(console):
         return
 
-    data = load_check_data(console)
-    addresses: list[AddressType] = args.ip_addresses
+    targets: list[AddressType | NetworkType] = args.ip_addresses
+    addresses = [target for target in targets if isinstance(target, AddressTypes)]
+    networks = [target for target in targets if isinstance(target, NetworkTypes)]
+    source = getattr(args, "input", None)
+    output_format = getattr(args, "format", "table")
+    fields: tuple[str, ...] = getattr(args, "fields", CHECK_FIELDS)
+    # Range checks need the blocklist, countries, and policies.
+    load_fields = (*fields, "verdict") if networks else fields
+    if networks and output_format == "csv":
+        console.print(
+            Panel(
+                "Network ranges can be checked with table or NDJSON output.",
+                title="Cannot check addresses",
+                border_style="red",
+                box=box.ROUNDED,
+            )
+        )
+        return
+
+    if not source and output_format == "table":
+        data = load_check_data(console, resident=bool(networks), fields=load_fields)
+        for network in networks:
+            display_range(console, check_range(network, data))
+        if not targets:
+            interactive_check(console, data, fields)
+        elif len(addresses) == 1:
+            display_result(console, check_address(addresses[0], data, fields), fields)
+        elif addresses:
+            display_results(
+                console,
+                [check_address(address, data, fields) for address in addresses],
+                fields,
+            )
+        return
 
-    if not addresses:
-        interactive_check(console, data)
-    elif len(addresses) == 1:
-        display_result(console, check_address(addresses[0], data))
-    else:
-        display_results(
-            console,
-            [check_address(address, data) for address in addresses],
+    if source and source != "-" and not Path(source).is_file():
+        console.print(
+            Panel(
+                f"Input file not found: {source}",
+                title="Cannot check addresses",
+                border_style="red",
+                box=box.ROUNDED,
+            )
+        )
+        return
+
+    # Keep stdout machine-readable when streaming NDJSON or CSV.
+    status = console if output_format == "table" else Console(stderr=True)
+    data = load_check_data(
+        status, resident=bool(source or networks), fields=load_fields
+    )
+    for network in networks:
+        result = check_range(network, data)
+        if output_format == "table":
+            display_range(console, result)
+        else:
+            sys.stdout.write(json.dumps(range_record(result)) + "\n")
+    with ExitStack() as stack:
+        lines: Iterable[str] = ()
+        if source == "-":
+            lines = sys.stdin
+        elif source:
+            lines = stack.enter_context(Path(source).open("r"))
+        tokens = chain(map(str, addresses), read_tokens(lines))
+        counts = stream_results(
+            console, tokens, data, output_format, sys.stdout, fields
         )
+    display_summary(status, counts)
@@ -19,6 +19,7 @@ from ruamel.yaml.error import YAMLError
 from banip.constants import CONFIG
 from banip.constants import LEGACY_CUSTOM_ALLOWLIST
 from banip.constants import LEGACY_CUSTOM_DENYLIST
+from banip.constants import RENDERED_BLOCKLIST
 from banip.constants import TARGETS
 from banip.constants import AddressType
 from banip.constants import NetworkType
@@ -31,6 +32,7 @@ CONFIG_VERSION = 3
 COUNTRY_POLICY_NAME = re.compile(r"^[a-z][a-z0-9_-]*$")
 DEFAULT_MAXMIND_EDITION = "GeoLite2-Country-CSV"
 DEFAULT_SECRETS_FILE = "~/.secrets"
+DEFAULT_THRESHOLD = 3
 COUNTRY_CODES = frozenset(
     """
     AD AE AF AG AI AL AM AO AQ AR AS AT AU AW AX AZ BA BB BD BE BF BG BH BI BJ
@@ -121,6 +123,32 @@ class DatabaseConfig:
     ipsum_url: str | None
 
 
+@dataclass(frozen=True)
+class BuildProfile:
+    """Validated named build profile.
+
+    Parameters
+    ----------
+    threshold : int
+        Minimum ipsum confidence score.
+    compact : int
+        Minimum /24 population before compaction, or 0 to disable it.
+    policies : tuple[str, ...]
+        Country policies whose permitted countries form the threat
+        scope.
+    bots : bool
+        Whether managed bot ranges are rendered.
+    outfile : Path
+        Destination for the rendered blocklist.
+    """
+
+    threshold: int
+    compact: int
+    policies: tuple[str, ...]
+    bots: bool
+    outfile: Path
+
+
 @dataclass(frozen=True)
 class BanipConfig:
     """Validated banip configuration.
@@ -137,6 +165,8 @@ class BanipConfig:
         Managed bot range settings.
     database : DatabaseConfig
         External database update settings.
+    profiles : dict[str, BuildProfile]
+        Named build profiles keyed by name.
     """
 
     countries: CountryConfig
@@ -144,6 +174,38 @@ class BanipConfig:
     denylist: set[AddressType | NetworkType]
     bots: BotConfig
     database: DatabaseConfig
+    profiles: dict[str, BuildProfile]
+
+
+def policy_verdicts(
+    country_code: str,
+    policies: dict[str, CountryPolicy],
+) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Split named country policies by their decision for one country.
+
+    Parameters
+    ----------
+    country_code : str
+        Two-letter country code.
+    policies : dict[str, CountryPolicy]
+        Configured country policies keyed by name.
+
+    Returns
+    -------
+    tuple[tuple[str, ...], tuple[str, ...]]
+        Sorted names of policies that block the country, followed by
+        sorted names of policies that permit it.
+    """
+    blocked: list[str] = []
+    permitted: list[str] = []
+    for name, policy in sorted(policies.items()):
+        if (country_code in policy.codes) == (
+            policy.mode is CountryPolicyMode.BLOCKLIST
+        ):
+            blocked.append(name)
+        else:
+            permitted.append(name)
+    return tuple(blocked), tuple(permitted)
 
 
 def reject_unknown_keys(
@@ -419,6 +481,97 @@ def parse_database_config(values: object) -> DatabaseConfig:
     )
 
 
+def parse_profile_config(
+    values: object,
+    countries: CountryConfig,
+) -> dict[str, BuildProfile]:
+    """Validate named build profiles.
+
+    Parameters
+    ----------
+    values : object
+        Raw YAML value from the ``profiles`` section.
+    countries : CountryConfig
+        Validated country policies that profiles may reference.
+
+    Returns
+    -------
+    dict[str, BuildProfile]
+        Build profiles keyed by their validated names.
+    """
+    if values is None:
+        return {}
+    if not isinstance(values, dict):
+        raise ValueError("Config section 'profiles' must be a mapping.")
+
+    profiles: dict[str, BuildProfile] = {}
+    for name, raw_profile in values.items():
+        if (
+            not isinstance(name, str)
+            or not COUNTRY_POLICY_NAME.fullmatch(name)
+            or name == "all"
+        ):
+            raise ValueError(f"Invalid build profile name: {name!r}")
+        section = f"profiles.{name}"
+        if raw_profile is None:
+            raw_profile = {}
+        if not isinstance(raw_profile, dict):
+            raise ValueError(f"Config section '{section}' must be a mapping.")
+        reject_unknown_keys(
+            section,
+            raw_profile,
+            {"threshold", "compact", "policies", "bots", "outfile"},
+        )
+
+        threshold = raw_profile.get("threshold", DEFAULT_THRESHOLD)
+        if type(threshold) is not int or threshold not in range(1, 11):
+            raise ValueError(
+                f"Config entry '{section}.threshold' must be an integer from 1 to 10."
+            )
+        compact = raw_profile.get("compact", 0)
+        if type(compact) is not int or compact not in range(0, 256):
+            raise ValueError(
+                f"Config entry '{section}.compact' must be an integer from 0 to 255."
+            )
+
+        policies = raw_profile.get("policies", sorted(countries.policies))
+        if (
+            not isinstance(policies, list)
+            or not policies
+            or not all(isinstance(policy, str) for policy in policies)
+        ):
+            raise ValueError(
+                f"Config entry '{section}.policies' must be a non-empty list of names."
+            )
+        if unknown := sorted(set(policies) - set(countries.policies)):
+            raise ValueError(
+                f"Unknown country policy in '{section}.policies': {', '.join(unknown)}"
+            )
+
+        bots = raw_profile.get("bots", True)
+        if not isinstance(bots, bool):
+            raise ValueError(f"Config entry '{section}.bots' must be true or false.")
+
+        outfile = raw_profile.get("outfile")
+        if outfile is not None and (
+            not isinstance(outfile, str) or not outfile.strip()
+        ):
+            raise ValueError(f"Config entry '{section}.outfile' must be a path.")
+
+        profiles[name] = BuildProfile(
+            threshold=threshold,
+            compact=compact,
+            policies=tuple(sorted(set(policies))),
+            bots=bots,
+            outfile=(
+                Path(outfile.strip()).expanduser()
+                if isinstance(outfile, str)
+                else RENDERED_BLOCKLIST.with_name(f"ip_blocklist_{name}.txt")
+            ),
+        )
+    return profiles
+
+
 def load_raw_config(path: Path = CONFIG) -> CommentedMap:
     """Load raw YAML config data.
 
@@ -470,14 +623,24 @@ def parse_current_config(data: CommentedMap) -> BanipConfig:
     reject_unknown_keys(
         "root",
         data,
-        {"version", "countries", "allowlist", "denylist", "bots", "database"},
+        {
+            "version",
+            "countries",
+            "allowlist",
+            "denylist",
+            "bots",
+            "database",
+            "profiles",
+        },
     )
+    countries = parse_country_config(data.get("countries"))
     return BanipConfig(
-        countries=parse_country_config(data.get("countries")),
+        countries=countries,
         allowlist=parse_ip_entries("allowlist", data.get("allowlist")),
         denylist=parse_ip_entries("denylist", data.get("denylist")),
         bots=parse_bot_config(data.get("bots")),
         database=parse_database_config(data.get("database")),
+        profiles=parse_profile_config(data.get("profiles"), countries),
     )
 
 
@@ -23,16 +23,32 @@ LEGACY_CUSTOM_ALLOWLIST = DATA / "custom_whitelist.txt"
 LEGACY_CUSTOM_DENYLIST = DATA / "custom_blacklist.txt"
 RENDERED_ALLOWLIST = DATA / "ip_allowlist.txt"
 RENDERED_BLOCKLIST = DATA / "ip_blocklist.txt"
+SERVE_SOCKET = DATA / "banip.sock"
 GEOLITE_4 = DATA / "geolite" / "GeoLite2-Country-Blocks-IPv4.csv"
 GEOLITE_6 = DATA / "geolite" / "GeoLite2-Country-Blocks-IPv6.csv"
 GEOLITE_LOC = DATA / "geolite" / "GeoLite2-Country-Locations-en.csv"
+HTTP_CACHE = DATA / "http_cache.json"
 IPSUM = DATA / "ipsum.txt"
 TARGETS = DATA / "targets.txt"
 
 # Padding for pretty printing
 PAD = 30
+# Result fields reported for each checked address, in display order.
+CHECK_FIELDS = (
+    "verdict",
+    "country",
+    "blocked_policies",
+    "permitted_policies",
+    "blocklist_match",
+    "ipsum_confidence",
+    "deduplicated",
+)
 # Type aliases for IP data types
 AddressType: TypeAlias = IPv4Address | IPv6Address
 NetworkType: TypeAlias = IPv4Network | IPv6Network
 AddressTypes = (IPv4Address, IPv6Address)
 NetworkTypes = (IPv4Network, IPv6Network)
+# Integer keys used by the build pipeline: (version, address) for
+# addresses and (version, network address, prefix length) for networks.
+AddressKey: TypeAlias = tuple[int, int]
+NetworkKey: TypeAlias = tuple[int, int, int]
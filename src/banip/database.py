@@ -1,20 +1,31 @@
 """Initialize and update external banip database files."""
 
+import hashlib
+import json
 import os
 import shutil
 import sys
-import tempfile
+import time
 import zipfile
 from argparse import Namespace
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 
 import requests
 from rich import box
 from rich.console import Console
+from rich.progress import BarColumn
+from rich.progress import DownloadColumn
+from rich.progress import Progress
+from rich.progress import TextColumn
+from rich.progress import TransferSpeedColumn
 from rich.table import Table
 from rich.text import Text
 
+from banip.config import DatabaseConfig
 from banip.config import initialize_config
 from banip.config import load_config
 from banip.constants import CONFIG
@@ -25,11 +36,30 @@ from banip.constants import GEOLITE_4
 from banip.constants import GEOLITE_6
 from banip.constants import GEOLITE_LOC
 from banip.constants import IPSUM
+from banip.utilities import CHUNK_SIZE
+from banip.utilities import HttpClient
+from banip.utilities import IpsumParser
+from banip.utilities import country_intervals
+from banip.utilities import current_generation
+from banip.utilities import geolite_index
+from banip.utilities import geolite_index_current
+from banip.utilities import geolite_sources
+from banip.utilities import ipsum_cache
+from banip.utilities import ipsum_cache_matches
+from banip.utilities import parse_geolite
+from banip.utilities import parse_ipsum
+from banip.utilities import publish_generation
+from banip.utilities import source_stamps
+from banip.utilities import store_ipsum_cache
+from banip.utilities import write_atomic
+from banip.utilities import write_geolite_index
+from banip.utilities import write_ipsum_cache
 
 IPSUM_URL = "https://raw.githubusercontent.com/stamparm/ipsum/master/ipsum.txt"
 MAXMIND_DOWNLOAD_URL = (
     "https://download.maxmind.com/geoip/databases/{edition}/download?suffix=zip"
 )
+MAXMIND_CHECKSUM_URL = f"{MAXMIND_DOWNLOAD_URL}.sha256"
 REQUIRED_GEOLITE_FILES = (
     "GeoLite2-Country-Blocks-IPv4.csv",
     "GeoLite2-Country-Blocks-IPv6.csv",
@@ -37,6 +67,53 @@ REQUIRED_GEOLITE_FILES = (
 )
 
 
+@dataclass(frozen=True)
+class SourceUpdate:
+    """Outcome of updating one external source.
+
+    Parameters
+    ----------
+    source : str
+        Source name.
+    changed : bool
+        Whether new data was written.
+    size : int
+        Bytes downloaded.
+    seconds : float
+        Time spent downloading and post-processing.
+    error : str | None, optional
+        Failure message. Defaults to None.
+    """
+
+    source: str
+    changed: bool
+    size: int
+    seconds: float
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class CompiledIndex:
+    """Outcome of compiling one binary index.
+
+    Parameters
+    ----------
+    index : str
+        Index name.
+    result : str
+        ``compiled``, ``current``, or the reason it was skipped.
+    size : int
+        Index size in bytes.
+    seconds : float
+        Time spent compiling.
+    """
+
+    index: str
+    result: str
+    size: int
+    seconds: float
+
+
 def init_database(overwrite: bool = False) -> None:
     """Create the local data structure and starter config.
 
@@ -60,15 +137,62 @@ def init_database(overwrite: bool = False) -> None:
     print(f"Wrote {CONFIG}")
 
 
-def update_ipsum() -> None:
-    """Download the ipsum threat-intelligence feed."""
-    settings = load_config(CONFIG).database
+def download_progress() -> Progress:
+    """Return a transient progress display for feed downloads.
+
+    Returns
+    -------
+    Progress
+        Progress display showing transferred bytes and speed.
+    """
+    return Progress(
+        TextColumn("{task.description}"),
+        BarColumn(),
+        DownloadColumn(),
+        TransferSpeedColumn(),
+        transient=True,
+    )
+
+
+def update_ipsum(
+    client: HttpClient, settings: DatabaseConfig, progress: Progress | None = None
+) -> SourceUpdate:
+    """Download the ipsum threat-intelligence feed and cache its entries.
+
+    The feed is parsed line by line as it streams in, and the binary
+    cache read by ``banip build`` and ``banip check`` is written as soon
+    as the download finishes, so neither has to parse the text file.
+
+    Parameters
+    ----------
+    client : HttpClient
+        Client used for a conditional, resumable download.
+    settings : DatabaseConfig
+        Validated database settings.
+    progress : Progress | None, optional
+        Progress display for the download. Defaults to None.
+
+    Returns
+    -------
+    SourceUpdate
+        Whether new feed data was written and how much was downloaded.
+    """
+    started = time.perf_counter()
     url = settings.ipsum_url or IPSUM_URL
-    response = requests.get(url, timeout=60)
-    response.raise_for_status()
     IPSUM.parent.mkdir(parents=True, exist_ok=True)
-    IPSUM.write_text(response.text)
-    print(f"Updated {IPSUM}")
+    parser = IpsumParser()
+    result = client.download(
+        url, IPSUM, conditional=IPSUM.exists(), progress=progress, sink=parser
+    )
+    client.commit([url])
+    if result.status == requests.codes.not_modified:
+        if not ipsum_cache_matches(IPSUM):
+            store_ipsum_cache(IPSUM, parse_ipsum(IPSUM))
+    else:
+        store_ipsum_cache(IPSUM, parser.finish())
+    return SourceUpdate(
+        "ipsum", result.modified, result.size, time.perf_counter() - started
+    )
 
 
 def load_secrets(path: Path) -> None:
@@ -92,15 +216,19 @@ def load_secrets(path: Path) -> None:
             os.environ[key] = value
 
 
-def maxmind_settings() -> tuple[str, str, str]:
+def maxmind_settings(settings: DatabaseConfig) -> tuple[str, str, str]:
     """Return MaxMind edition and credentials.
 
+    Parameters
+    ----------
+    settings : DatabaseConfig
+        Validated database settings.
+
     Returns
     -------
     tuple[str, str, str]
         Edition, account ID, and license key.
     """
-    settings = load_config(CONFIG).database
     if settings.secrets_file:
         load_secrets(Path(settings.secrets_file).expanduser())
 
@@ -131,25 +259,51 @@ def validate_geolite(path: Path) -> None:
         raise RuntimeError(f"Missing GeoLite files: {', '.join(missing)}")
 
 
-def replace_geolite(extracted: Path) -> None:
-    """Atomically replace the local GeoLite directory.
+def stage_geolite(archive_path: Path) -> Path:
+    """Extract the required GeoLite CSV files into a staging directory.
+
+    Only ``REQUIRED_GEOLITE_FILES`` are extracted, each streamed from
+    the archive straight into ``~/.banip/geolite.new``.
 
     Parameters
     ----------
-    extracted : Path
-        Validated extracted GeoLite directory.
+    archive_path : Path
+        Downloaded GeoLite zip archive.
+
+    Returns
+    -------
+    Path
+        Validated staging directory.
     """
-    target = DATA / "geolite"
     replacement = DATA / "geolite.new"
-    backup = DATA / "geolite.old"
     if replacement.exists():
         shutil.rmtree(replacement)
     replacement.mkdir(parents=True)
-    for item in extracted.rglob("*"):
-        if item.is_file():
-            destination = replacement / item.name
-            shutil.copy2(item, destination)
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                name = Path(info.filename).name
+                if info.is_dir() or name not in REQUIRED_GEOLITE_FILES:
+                    continue
+                with archive.open(info) as source:
+                    with (replacement / name).open("wb") as target:
+                        shutil.copyfileobj(source, target, CHUNK_SIZE)
+    except zipfile.BadZipFile as exc:
+        raise RuntimeError("Downloaded GeoLite archive is not a valid zip.") from exc
+    validate_geolite(replacement)
+    return replacement
+
+
+def replace_geolite(replacement: Path) -> None:
+    """Atomically replace the local GeoLite directory.
 
+    Parameters
+    ----------
+    replacement : Path
+        Validated staging directory.
+    """
+    target = DATA / "geolite"
+    backup = DATA / "geolite.old"
     if backup.exists():
         shutil.rmtree(backup)
     if target.exists():
@@ -159,36 +313,444 @@ def replace_geolite(extracted: Path) -> None:
         shutil.rmtree(backup)
 
 
-def update_geolite() -> None:
-    """Download, validate, and stage MaxMind GeoLite2 country data."""
-    edition, account_id, license_key = maxmind_settings()
+def published_checksum(client: HttpClient, url: str, auth: tuple[str, str]) -> str:
+    """Return the SHA-256 digest MaxMind publishes for an archive.
+
+    Parameters
+    ----------
+    client : HttpClient
+        Client used for the request.
+    url : str
+        Checksum URL.
+    auth : tuple[str, str]
+        MaxMind account ID and license key.
+
+    Returns
+    -------
+    str
+        Lowercase hexadecimal digest.
+    """
+    result = client.get(url, timeout=30, auth=auth, conditional=False)
+    parts = result.text.split()
+    digest = parts[0].lower() if parts else ""
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        raise RuntimeError("MaxMind returned an invalid GeoLite checksum.")
+    return digest
+
+
+def update_geolite(
+    client: HttpClient, settings: DatabaseConfig, progress: Progress | None = None
+) -> SourceUpdate:
+    """Download, verify, and stage MaxMind GeoLite2 country data.
+
+    The archive is streamed to disk and checked against the SHA-256
+    digest MaxMind publishes before anything is extracted. An
+    interrupted download is kept as ``geolite.zip.part`` and resumed by
+    the next update.
+
+    Parameters
+    ----------
+    client : HttpClient
+        Client used for a conditional, resumable download.
+    settings : DatabaseConfig
+        Validated database settings.
+    progress : Progress | None, optional
+        Progress display for the download. Defaults to None.
+
+    Returns
+    -------
+    SourceUpdate
+        Whether new GeoLite data was staged and how much was downloaded.
+    """
+    started = time.perf_counter()
+    edition, account_id, license_key = maxmind_settings(settings)
     url = MAXMIND_DOWNLOAD_URL.format(edition=edition)
     auth = (account_id, license_key)
+    current = all(path.exists() for path in (GEOLITE_4, GEOLITE_6, GEOLITE_LOC))
+    archive_path = DATA / "geolite.zip"
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        result = client.download(
+            url, archive_path, auth=auth, conditional=current, progress=progress
+        )
+        if result.modified:
+            checksum = published_checksum(
+                client, MAXMIND_CHECKSUM_URL.format(edition=edition), auth
+            )
+            if result.validators.sha256 != checksum:
+                raise RuntimeError(
+                    "Downloaded GeoLite archive does not match the published SHA-256."
+                )
+            replace_geolite(stage_geolite(archive_path))
+    finally:
+        archive_path.unlink(missing_ok=True)
+        shutil.rmtree(DATA / "geolite.new", ignore_errors=True)
+    client.commit([url])
+    return SourceUpdate(
+        "geolite",
+        result.modified,
+        result.size,
+        time.perf_counter() - started,
+    )
+
+
+def run_update(
+    update: Callable[[HttpClient, DatabaseConfig, Progress | None], SourceUpdate],
+    source: str,
+    client: HttpClient,
+    settings: DatabaseConfig,
+    progress: Progress | None,
+) -> SourceUpdate:
+    """Run one source update, capturing its failure.
+
+    Parameters
+    ----------
+    update : Callable[[HttpClient, DatabaseConfig, Progress | None], SourceUpdate]
+        Update function for the source.
+    source : str
+        Source name.
+    client : HttpClient
+        Shared client.
+    settings : DatabaseConfig
+        Validated database settings.
+    progress : Progress | None
+        Shared progress display.
+
+    Returns
+    -------
+    SourceUpdate
+        The update outcome, or a failed outcome holding the error.
+    """
+    started = time.perf_counter()
+    try:
+        return update(client, settings, progress)
+    except (OSError, RuntimeError, ValueError, requests.RequestException) as exc:
+        return SourceUpdate(
+            source,
+            False,
+            0,
+            time.perf_counter() - started,
+            str(exc) or type(exc).__name__,
+        )
+
+
+def update_sources(sources: list[str]) -> list[SourceUpdate]:
+    """Update external sources concurrently.
+
+    Configuration is loaded once, and each source downloads and
+    post-processes in its own thread, so ipsum is parsed into its cache
+    while GeoLite is still downloading.
+
+    Parameters
+    ----------
+    sources : list[str]
+        Source names from ``SOURCE_UPDATES``.
+
+    Returns
+    -------
+    list[SourceUpdate]
+        Outcomes in the order of ``sources``.
+    """
+    settings = load_config(CONFIG).database
+    with HttpClient() as client, download_progress() as progress:
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            futures = [
+                executor.submit(
+                    run_update,
+                    SOURCE_UPDATES[source],
+                    source,
+                    client,
+                    settings,
+                    progress,
+                )
+                for source in sources
+            ]
+            return [future.result() for future in futures]
+
+
+def display_updates(updates: list[SourceUpdate]) -> None:
+    """Print a summary of source updates.
+
+    Parameters
+    ----------
+    updates : list[SourceUpdate]
+        Update outcomes.
+    """
+    table = Table(
+        title="Database Update",
+        title_style="bold cyan",
+        caption=f"Data directory: {DATA}",
+        caption_style="dim",
+        caption_justify="left",
+        box=box.ROUNDED,
+        border_style="bright_black",
+        header_style="bold",
+        padding=(0, 1),
+    )
+    table.add_column("Source")
+    table.add_column("Result")
+    table.add_column("Downloaded", justify="right")
+    table.add_column("Time", justify="right")
+    for update in updates:
+        if update.error:
+            result = Text(f"failed: {update.error}", style="bold red")
+        elif update.changed:
+            result = Text("updated", style="green")
+        else:
+            result = Text("unchanged", style="cyan")
+        table.add_row(
+            update.source,
+            result,
+            f"{update.size:,d} bytes",
+            f"{update.seconds:.2f}s",
+        )
+    Console().print(table)
+
+
+SOURCE_UPDATES = {"ipsum": update_ipsum, "geolite": update_geolite}
+
+
+def manifest_path() -> Path:
+    """Return the compiled index manifest path.
+
+    Returns
+    -------
+    Path
+        Manifest path in the data directory.
+    """
+    return DATA / "compiled.json"
+
+
+def compiled_indexes() -> dict[str, tuple[Path, dict[str, Path]]]:
+    """Return each compiled index with the inputs it is built from.
+
+    Returns
+    -------
+    dict[str, tuple[Path, dict[str, Path]]]
+        Index path and input paths keyed by labels, keyed by index name.
+    """
+    return {
+        "geolite": (geolite_index(), geolite_sources()),
+        "ipsum": (ipsum_cache(IPSUM), {"ipsum": IPSUM}),
+    }
+
+
+def compile_geolite() -> None:
+    """Compile the GeoLite CSV files into the binary country index."""
+    networks = parse_geolite()
+    write_geolite_index(networks, country_intervals(networks))
+
+
+def compile_ipsum() -> None:
+    """Compile the ipsum feed into its binary cache."""
+    write_ipsum_cache(IPSUM, parse_ipsum(IPSUM))
 
+
+def ipsum_cache_current() -> bool:
+    """Return whether the ipsum cache matches the ipsum feed.
+
+    Returns
+    -------
+    bool
+        True when the cache exists and is current.
+    """
+    return ipsum_cache_matches(IPSUM)
+
+
+INDEX_COMPILERS: dict[str, tuple[Callable[[], None], Callable[[], bool]]] = {
+    "geolite": (compile_geolite, geolite_index_current),
+    "ipsum": (compile_ipsum, ipsum_cache_current),
+}
+
+
+def file_digest(path: Path) -> str:
+    """Return the SHA-256 digest of a file.
+
+    Parameters
+    ----------
+    path : Path
+        File to hash.
+
+    Returns
+    -------
+    str
+        Hexadecimal digest.
+    """
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def load_manifest() -> dict[str, dict]:
+    """Load the compiled index manifest.
+
+    Returns
+    -------
+    dict[str, dict]
+        Manifest entries keyed by index name, or an empty mapping when
+        the manifest is missing or unreadable.
+    """
     try:
-        requests.head(url, auth=auth, allow_redirects=True, timeout=30)
-    except requests.RequestException:
-        pass
-
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        zip_path = temp_path / "geolite.zip"
-        response = requests.get(url, auth=auth, allow_redirects=True, timeout=120)
-        response.raise_for_status()
-        zip_path.write_bytes(response.content)
-
-        extract_path = temp_path / "extracted"
-        extract_path.mkdir()
-        try:
-            with zipfile.ZipFile(zip_path) as archive:
-                archive.extractall(extract_path)
-        except zipfile.BadZipFile as exc:
-            raise RuntimeError(
-                "Downloaded GeoLite archive is not a valid zip."
-            ) from exc
-        validate_geolite(extract_path)
-        replace_geolite(extract_path)
-    print(f"Updated {DATA / 'geolite'}")
+        manifest = json.loads(manifest_path().read_text())
+    except (OSError, ValueError):
+        return {}
+    indexes = manifest.get("indexes") if isinstance(manifest, dict) else None
+    return indexes if isinstance(indexes, dict) else {}
+
+
+def index_state(name: str, manifest: dict[str, dict]) -> str:
+    """Return whether a compiled index is current, stale, or missing.
+
+    An index is stale when its header no longer matches the stamps of
+    its inputs, or when an input still has the stamp recorded in the
+    manifest but a different SHA-256 digest.
+
+    Parameters
+    ----------
+    name : str
+        Index name from :func:`compiled_indexes`.
+    manifest : dict[str, dict]
+        Manifest entries from :func:`load_manifest`.
+
+    Returns
+    -------
+    str
+        ``current``, ``stale``, or ``missing``.
+    """
+    path, sources = compiled_indexes()[name]
+    if not path.exists():
+        return "missing"
+    if not INDEX_COMPILERS[name][1]():
+        return "stale"
+    recorded = manifest.get(name, {}).get("inputs", {})
+    stamps = source_stamps(sources)
+    for label, source in sources.items():
+        entry = recorded.get(label)
+        if (
+            entry
+            and entry.get("stamp") == stamps.get(label)
+            and entry.get("sha256") != file_digest(source)
+        ):
+            return "stale"
+    return "current"
+
+
+def manifest_entry(path: Path, sources: dict[str, Path]) -> dict[str, object]:
+    """Return the manifest entry for a compiled index.
+
+    Parameters
+    ----------
+    path : Path
+        Compiled index path.
+    sources : dict[str, Path]
+        Index inputs keyed by label.
+
+    Returns
+    -------
+    dict[str, object]
+        Index file name, compile time, and the size, stamp, and SHA-256
+        digest of every input.
+    """
+    stamps = source_stamps(sources)
+    return {
+        "path": path.name,
+        "compiled": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "inputs": {
+            label: {
+                "path": str(source),
+                "size": stamps[label][1],
+                "stamp": stamps[label],
+                "sha256": file_digest(source),
+            }
+            for label, source in sources.items()
+        },
+    }
+
+
+def compile_indexes(force: bool = False) -> list[CompiledIndex]:
+    """Compile the binary indexes read by ``build`` and ``check``.
+
+    Indexes whose inputs are missing are skipped. Unless ``force`` is
+    set, current indexes are left as they are. The manifest records the
+    size, stamp, and SHA-256 digest of every input of each compiled
+    index.
+
+    Parameters
+    ----------
+    force : bool, optional
+        Whether to rebuild current indexes too. Defaults to False.
+
+    Returns
+    -------
+    list[CompiledIndex]
+        One outcome per index.
+    """
+    manifest = load_manifest()
+    outcomes: list[CompiledIndex] = []
+    for name, (path, sources) in compiled_indexes().items():
+        started = time.perf_counter()
+        if missing := [
+            label for label, source in sources.items() if not source.exists()
+        ]:
+            outcomes.append(
+                CompiledIndex(name, f"skipped: missing {', '.join(missing)}", 0, 0.0)
+            )
+            continue
+        if not force and index_state(name, manifest) == "current":
+            # An update may have rewritten the index along with its
+            # inputs, so record the inputs it now matches.
+            recorded = manifest.get(name, {}).get("inputs", {})
+            stamps = source_stamps(sources)
+            if any(
+                recorded.get(label, {}).get("stamp") != stamp
+                for label, stamp in stamps.items()
+            ):
+                manifest[name] = manifest_entry(path, sources)
+            outcomes.append(CompiledIndex(name, "current", path.stat().st_size, 0.0))
+            continue
+        INDEX_COMPILERS[name][0]()
+        manifest[name] = manifest_entry(path, sources)
+        outcomes.append(
+            CompiledIndex(
+                name, "compiled", path.stat().st_size, time.perf_counter() - started
+            )
+        )
+
+    write_atomic(manifest_path(), json.dumps({"indexes": manifest}, indent=2) + "\n")
+    return outcomes
+
+
+def display_compiled(outcomes: list[CompiledIndex]) -> None:
+    """Print a summary of compiled indexes.
+
+    Parameters
+    ----------
+    outcomes : list[CompiledIndex]
+        Compilation outcomes.
+    """
+    table = Table(
+        title="Compiled Indexes",
+        title_style="bold cyan",
+        caption=f"Manifest: {manifest_path()}",
+        caption_style="dim",
+        caption_justify="left",
+        box=box.ROUNDED,
+        border_style="bright_black",
+        header_style="bold",
+        padding=(0, 1),
+    )
+    table.add_column("Index")
+    table.add_column("Result")
+    table.add_column("Size", justify="right")
+    table.add_column("Time", justify="right")
+    styles = {"compiled": "green", "current": "cyan"}
+    for outcome in outcomes:
+        table.add_row(
+            outcome.index,
+            Text(outcome.result, style=styles.get(outcome.result, "yellow")),
+            f"{outcome.size:,d} bytes",
+            f"{outcome.seconds:.2f}s",
+        )
+    Console().print(table)
 
 
 def status() -> None:
@@ -228,6 +790,32 @@ def status() -> None:
                 Text("missing", style="bold red"),
                 Text("—", style="dim"),
             )
+    if generation := current_generation(DATA):
+        modified = datetime.fromtimestamp(generation.stat().st_mtime).astimezone()
+        table.add_row(
+            "Active data generation",
+            Text(generation.name, style="green"),
+            Text(modified.strftime("%Y-%m-%d %H:%M:%S %Z"), style="cyan"),
+        )
+    else:
+        table.add_row(
+            "Active data generation",
+            Text("none", style="yellow"),
+            Text("—", style="dim"),
+        )
+    manifest = load_manifest()
+    labels = {"geolite": "Compiled GeoLite index", "ipsum": "Compiled ipsum cache"}
+    styles = {"current": "green", "stale": "yellow", "missing": "bold red"}
+    for name, (path, _) in compiled_indexes().items():
+        state = index_state(name, manifest)
+        if state == "missing":
+            modified_text = Text("—", style="dim")
+        else:
+            modified = datetime.fromtimestamp(path.stat().st_mtime).astimezone()
+            modified_text = Text(
+                modified.strftime("%Y-%m-%d %H:%M:%S %Z"), style="cyan"
+            )
+        table.add_row(labels[name], Text(state, style=styles[state]), modified_text)
     Console().print(table)
 
 
@@ -243,10 +831,28 @@ def task_runner(args: Namespace) -> None:
         if args.action == "init":
             init_database(overwrite=args.overwrite)
         elif args.action == "update":
-            if args.source in ("all", "ipsum"):
-                update_ipsum()
-            if args.source in ("all", "geolite"):
-                update_geolite()
+            sources = list(SOURCE_UPDATES) if args.source == "all" else [args.source]
+            updates = update_sources(sources)
+            display_updates(updates)
+            # Data from sources that did update is compiled and published
+            # even when another source failed.
+            failed = any(update.error for update in updates)
+            changed = any(update.changed for update in updates)
+            if changed or not failed:
+                outcomes = compile_indexes()
+                display_compiled(outcomes)
+                # Unchanged data needs no new generation once one exists.
+                if (
+                    changed
+                    or any(outcome.result == "compiled" for outcome in outcomes)
+                    or current_generation(DATA) is None
+                ):
+                    publish_generation(DATA)
+            if failed:
+                sys.exit(1)
+        elif args.action == "compile":
+            display_compiled(compile_indexes(force=True))
+            publish_generation(DATA)
         elif args.action == "status":
             status()
     except (OSError, RuntimeError, ValueError, requests.RequestException) as exc:
@@ -0,0 +1,398 @@
+"""Task runner for the logscan command."""
+
+import argparse
+import ipaddress as ipa
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from functools import lru_cache
+from functools import partial
+from pathlib import Path
+
+from rich import box
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+
+from banip.check import CheckData
+from banip.check import CheckVerdict
+from banip.check import check_address
+from banip.check import display_missing_data
+from banip.check import load_check_data
+from banip.utilities import client_token
+from banip.utilities import format_status
+from banip.utilities import open_log
+from banip.utilities import status_label
+
+LOG_PATTERNS = {
+    "nginx": r"^(?P<ip>\S+)",
+    "haproxy": r"\]: (?P<ip>\S+):\d+ ",
+}
+# Distinct client tokens remembered by the parse cache in each process.
+PARSE_CACHE_SIZE = 65536
+# Check result fields aggregated by logscan; ipsum data is never loaded.
+LOG_FIELDS = ("verdict", "country", "blocked_policies", "permitted_policies")
+
+
+@dataclass(frozen=True)
+class LogScan:
+    """Client addresses found in one or more access logs.
+
+    Parameters
+    ----------
+    lines : int
+        Lines read.
+    unmatched : int
+        Lines without a valid client address.
+    hits : Counter[str]
+        Requests keyed by normalized client address.
+    """
+
+    lines: int
+    unmatched: int
+    hits: Counter[str]
+
+
+@dataclass
+class Tally:
+    """Request and distinct-address counts for one category.
+
+    Parameters
+    ----------
+    requests : int, optional
+        Requests in the category. Defaults to 0.
+    addresses : int, optional
+        Distinct client addresses in the category. Defaults to 0.
+    blocked : int, optional
+        Requests in the category with a blocked verdict. Defaults to 0.
+    """
+
+    requests: int = 0
+    addresses: int = 0
+    blocked: int = 0
+
+    def add(self, requests: int, blocked: bool) -> None:
+        """Add one client address and its requests.
+
+        Parameters
+        ----------
+        requests : int
+            Requests from the address.
+        blocked : bool
+            Whether the address has a blocked verdict.
+        """
+        self.requests += requests
+        self.addresses += 1
+        self.blocked += requests if blocked else 0
+
+
+@dataclass
+class LogReport:
+    """Requests aggregated by verdict, country, and country policy.
+
+    Parameters
+    ----------
+    verdicts : dict[str, Tally]
+        Tallies keyed by verdict.
+    countries : dict[str, Tally]
+        Tallies keyed by country code, with ``—`` for unknown
+        countries.
+    blocked_by : dict[str, Tally]
+        Tallies keyed by the name of each policy blocking the country.
+    permitted_by : dict[str, Tally]
+        Tallies keyed by the name of each policy permitting the country.
+    """
+
+    verdicts: dict[str, Tally] = field(default_factory=dict)
+    countries: dict[str, Tally] = field(default_factory=dict)
+    blocked_by: dict[str, Tally] = field(default_factory=dict)
+    permitted_by: dict[str, Tally] = field(default_factory=dict)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_client(token: str) -> str | None:
+    """Normalize a client address token from a log line.
+
+    Results are cached, so busy clients are parsed once while memory
+    stays bounded.
+
+    Parameters
+    ----------
+    token : str
+        Address token, optionally with an IPv4 port or as a bracketed
+        IPv6 address with a port.
+
+    Returns
+    -------
+    str | None
+        Normalized address, or None when the token is not an address.
+    """
+    if token.startswith("["):
+        token = token[1 : token.find("]")]
+    elif token.count(":") == 1:
+        token = token.partition(":")[0]
+    try:
+        return str(ipa.ip_address(token))
+    except ValueError:
+        return None
+
+
+def scan_log(path: Path, regex: str | None, index: int | None) -> LogScan:
+    """Count requests per client address in one access log.
+
+    Parameters
+    ----------
+    path : Path
+        Log path.
+    regex : str | None
+        Expression locating the address, used when ``index`` is None.
+    index : int | None
+        Whitespace-separated field holding the address.
+
+    Returns
+    -------
+    LogScan
+        Line counts and requests keyed by client address.
+    """
+    pattern = re.compile(regex) if regex else None
+    hits: Counter[str] = Counter()
+    lines = unmatched = 0
+    with open_log(path) as f:
+        for line in f:
+            lines += 1
+            if address := parse_client(client_token(line, pattern, index)):
+                hits[address] += 1
+            else:
+                unmatched += 1
+    return LogScan(lines, unmatched, hits)
+
+
+def scan_logs(
+    paths: list[Path], regex: str | None, index: int | None, jobs: int
+) -> LogScan:
+    """Scan access logs, optionally in worker processes.
+
+    Parameters
+    ----------
+    paths : list[Path]
+        Log paths.
+    regex : str | None
+        Expression locating the address, used when ``index`` is None.
+    index : int | None
+        Whitespace-separated field holding the address.
+    jobs : int
+        Maximum number of worker processes. A value of 1 scans every
+        log in this process.
+
+    Returns
+    -------
+    LogScan
+        Combined line counts and requests keyed by client address.
+    """
+    scan = partial(scan_log, regex=regex, index=index)
+    if jobs <= 1 or len(paths) <= 1:
+        scans = [scan(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+            scans = list(executor.map(scan, paths))
+
+    hits: Counter[str] = Counter()
+    for result in scans:
+        hits.update(result.hits)
+    return LogScan(
+        lines=sum(result.lines for result in scans),
+        unmatched=sum(result.unmatched for result in scans),
+        hits=hits,
+    )
+
+
+def classify_hits(hits: Counter[str], data: CheckData) -> LogReport:
+    """Check each distinct client once and aggregate its requests.
+
+    Parameters
+    ----------
+    hits : Counter[str]
+        Requests keyed by normalized client address.
+    data : CheckData
+        Prepared lookup data.
+
+    Returns
+    -------
+    LogReport
+        Requests aggregated by verdict, country, and country policy.
+    """
+    report = LogReport()
+    for address, requests in hits.items():
+        result = check_address(ipa.ip_address(address), data, LOG_FIELDS)
+        blocked = result.verdict is CheckVerdict.BLOCKED
+        report.verdicts.setdefault(result.verdict, Tally()).add(requests, blocked)
+        report.countries.setdefault(result.country_code or "—", Tally()).add(
+            requests, blocked
+        )
+        for name in result.blocked_policies:
+            report.blocked_by.setdefault(name, Tally()).add(requests, blocked)
+        for name in result.permitted_policies:
+            report.permitted_by.setdefault(name, Tally()).add(requests, blocked)
+    return report
+
+
+def share(part: int, whole: int) -> str:
+    """Return a percentage for display.
+
+    Parameters
+    ----------
+    part : int
+        Count within the whole.
+    whole : int
+        Total count.
+
+    Returns
+    -------
+    str
+        Percentage with one decimal place.
+    """
+    return f"{part / whole:.1%}" if whole else "—"
+
+
+def report_table(title: str, show_header: bool = True) -> Table:
+    """Return an empty table styled like other banip summaries.
+
+    Parameters
+    ----------
+    title : str
+        Table title.
+    show_header : bool, optional
+        Whether to show column headers. Defaults to True.
+
+    Returns
+    -------
+    Table
+        Styled table without columns.
+    """
+    return Table(
+        title=title,
+        title_style="bold cyan",
+        box=box.ROUNDED,
+        border_style="bright_black",
+        header_style="bold",
+        show_header=show_header,
+        padding=(0, 1),
+    )
+
+
+def display_report(
+    console: Console, scan: LogScan, report: LogReport, files: int, top: int
+) -> None:
+    """Display log scan totals and aggregated requests.
+
+    Parameters
+    ----------
+    console : Console
+        Rich console used for output.
+    scan : LogScan
+        Combined scan results.
+    report : LogReport
+        Aggregated requests.
+    files : int
+        Number of scanned log files.
+    top : int
+        Number of countries to list.
+    """
+    requests = scan.hits.total()
+
+    totals = report_table("Log Scan", show_header=False)
+    totals.add_column(style="bold")
+    totals.add_column(justify="right")
+    totals.add_row("Files", f"{files:,}")
+    totals.add_row("Lines", f"{scan.lines:,}")
+    totals.add_row("Requests with a client address", f"{requests:,}")
+    totals.add_row("Lines without a client address", f"{scan.unmatched:,}")
+    totals.add_row("Distinct client addresses", f"{len(scan.hits):,}")
+    console.print(totals)
+
+    verdicts = report_table("Verdicts")
+    verdicts.add_column("Verdict")
+    verdicts.add_column("Requests", justify="right")
+    verdicts.add_column("Share", justify="right")
+    verdicts.add_column("Addresses", justify="right")
+    for verdict in CheckVerdict:
+        if tally := report.verdicts.get(verdict):
+            verdicts.add_row(
+                verdict,
+                f"{tally.requests:,}",
+                share(tally.requests, requests),
+                f"{tally.addresses:,}",
+            )
+    console.print(verdicts)
+
+    countries = report_table(f"Top {top} Countries")
+    countries.add_column("Country")
+    countries.add_column("Requests", justify="right")
+    countries.add_column("Share", justify="right")
+    countries.add_column("Addresses", justify="right")
+    countries.add_column("Blocked requests", justify="right")
+    ranked = sorted(
+        report.countries.items(), key=lambda item: (-item[1].requests, item[0])
+    )
+    for code, tally in ranked[:top]:
+        countries.add_row(
+            code,
+            f"{tally.requests:,}",
+            share(tally.requests, requests),
+            f"{tally.addresses:,}",
+            f"{tally.blocked:,}",
+        )
+    console.print(countries)
+
+    policies = report_table("Country Policies")
+    policies.add_column("Policy")
+    policies.add_column("Blocked requests", justify="right")
+    policies.add_column("Permitted requests", justify="right")
+    for name in sorted({*report.blocked_by, *report.permitted_by}):
+        policies.add_row(
+            name,
+            f"{report.blocked_by.get(name, Tally()).requests:,}",
+            f"{report.permitted_by.get(name, Tally()).requests:,}",
+        )
+    console.print(policies)
+
+
+def task_runner(args: argparse.Namespace) -> None:
+    """Classify access-log clients against generated data.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed command-line arguments.
+    """
+    console = Console()
+    if display_missing_data(console):
+        return
+
+    if missing := [path for path in args.logs if not path.is_file()]:
+        paths = "\n".join(f"• {path}" for path in missing)
+        console.print(
+            Panel(
+                f"Log files not found:\n{paths}",
+                title="Cannot scan logs",
+                border_style="red",
+                box=box.ROUNDED,
+            )
+        )
+        sys.exit(1)
+
+    regex = args.regex or LOG_PATTERNS[args.log_format]
+    with console.status(status_label("log_scan")):
+        scan = scan_logs(args.logs, regex, args.index, args.jobs)
+    print(format_status("log_scan"))
+
+    data = load_check_data(console, resident=True, fields=LOG_FIELDS)
+    with console.status(status_label("log_classify")):
+        report = classify_hits(scan.hits, data)
+    print(format_status("log_classify"))
+
+    print()
+    display_report(console, scan, report, len(args.logs), args.top)
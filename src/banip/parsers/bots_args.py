@@ -29,10 +29,26 @@ def load_command_args(sp: _SubParsersAction) -> None:
     subparsers.add_parser(name="list", description=msg)
 
     msg = """
-    Check whether an IP address appears in stored managed bot ranges.
+    Check whether IP addresses appear in stored managed bot ranges. Every
+    provider is answered with one search of the provider index stored
+    next to ~/.banip/botdata.json, and ranges nested inside another
+    provider's range are reported too.
     """
     check = subparsers.add_parser(name="check", description=msg)
-    check.add_argument("ip", type=ipa.ip_address, help=msg)
+    check.add_argument(
+        "ips",
+        metavar="IP",
+        nargs="*",
+        type=ipa.ip_address,
+        help="IPv4 or IPv6 addresses to check.",
+    )
+
+    msg = """
+    Read addresses from FILE, one per line, or from standard input when
+    FILE is "-". The first whitespace-separated element of each line is
+    used, and blank lines and lines starting with "#" are skipped.
+    """
+    check.add_argument("-i", "--input", metavar="FILE", help=msg)
 
     return
 
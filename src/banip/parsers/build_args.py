@@ -4,6 +4,7 @@ from argparse import _SubParsersAction
 from pathlib import Path
 
 from banip.argument_types import compact_type
+from banip.argument_types import jobs_type
 from banip.argument_types import threshold_type
 
 COMMAND_NAME = "build"
@@ -52,6 +53,35 @@ def load_command_args(sp: _SubParsersAction) -> None:
     """
     parser.add_argument("--no-bots", action="store_true", help=msg)
 
+    msg = """
+    Compile every named country policy into a minimal list of CIDR
+    networks covering its blocked or permitted address space. Lists are
+    written to ~/.banip/country_<scope>_<policy>.txt so a proxy can
+    enforce a policy with a single source-address ACL.
+    """
+    parser.add_argument(
+        "--policy-networks",
+        choices=("blocked", "permitted"),
+        metavar="SCOPE",
+        help=msg,
+    )
+
+    msg = """
+    Build a named profile from the profiles section of banip.yaml, or
+    all profiles in one pass. GeoLite, ipsum, and managed bot data are
+    loaded once and shared by every profile. Profile settings replace
+    the threshold, compact, and no-bots options, and each profile writes
+    its own output file.
+    """
+    parser.add_argument("-p", "--profile", metavar="NAME", help=msg)
+
+    msg = """
+    Maximum number of worker processes used to build profiles and
+    compile policy networks in parallel. The default is 1, which does
+    both one at a time.
+    """
+    parser.add_argument("-j", "--jobs", type=jobs_type, help=msg, default=1)
+
     return
 
 
@@ -1,8 +1,11 @@
 """Argument parser for check command."""
 
-import ipaddress as ipa
 from argparse import _SubParsersAction
 
+from banip.argument_types import fields_type
+from banip.argument_types import target_type
+from banip.constants import CHECK_FIELDS
+
 COMMAND_NAME = "check"
 
 
@@ -19,11 +22,56 @@ def load_command_args(sp: _SubParsersAction) -> None:
         "ip_addresses",
         metavar="IP",
         nargs="*",
-        type=ipa.ip_address,
+        type=target_type,
         help=(
             "IPv4 or IPv6 addresses to check. When omitted, addresses "
-            "are read interactively."
+            "are read interactively. A CIDR network, such as "
+            "198.51.100.0/24, is checked as a range: banip reports the "
+            "blocklist entries covering or inside it, the share of its "
+            "addresses that are blocked, and the countries and GeoLite2 "
+            "ranges it spans."
         ),
     )
 
+    msg = """
+    Read addresses from FILE, one per line, or from standard input when
+    FILE is "-". The first whitespace-separated element of each line is
+    used, and blank lines and lines starting with "#" are skipped.
+    Addresses are checked and written in batches, so large inputs use
+    bounded memory.
+    """
+    parser.add_argument("-i", "--input", metavar="FILE", help=msg)
+
+    msg = """
+    Output format. "ndjson" writes one JSON record per line, "csv" writes
+    a header and one row per address, and "table" displays Rich tables.
+    With --input or a non-table format, results are written as they are
+    checked and a summary of verdict counts follows. The default is
+    "table".
+    """
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=("ndjson", "csv", "table"),
+        default="table",
+        help=msg,
+    )
+
+    msg = """
+    Comma-separated result fields to compute and show, such as
+    "verdict,country". The choices are verdict, country,
+    blocked_policies, permitted_policies, blocklist_match,
+    ipsum_confidence, and deduplicated. Data needed only by other fields
+    is not loaded, so omitting ipsum_confidence skips parsing ipsum data
+    when the build snapshot is out of date. The address is always shown.
+    The default is every field.
+    """
+    parser.add_argument(
+        "--fields",
+        metavar="LIST",
+        type=fields_type,
+        default=CHECK_FIELDS,
+        help=msg,
+    )
+
     return
@@ -40,7 +40,14 @@ def load_command_args(sp: _SubParsersAction) -> None:
     )
 
     msg = """
-    Show whether expected local data files exist.
+    Rebuild the binary GeoLite index and ipsum cache that build and check
+    load instead of parsing the downloaded files.
+    """
+    subparsers.add_parser(name="compile", description=msg)
+
+    msg = """
+    Show whether expected local data files exist and whether compiled
+    indexes are current.
     """
     subparsers.add_parser(name="status", description=msg)
 
@@ -0,0 +1,71 @@
+"""Argument parser for the logscan command."""
+
+from argparse import _SubParsersAction
+from pathlib import Path
+
+from banip.argument_types import jobs_type
+from banip.argument_types import regex_type
+from banip.argument_types import top_type
+
+COMMAND_NAME = "logscan"
+
+
+# ======================================================================
+
+
+def load_command_args(sp: _SubParsersAction) -> None:
+    """Assemble the argument parser."""
+    msg = """
+    Classify the client addresses in HAProxy or nginx access logs
+    against data generated by "banip build", and report how many
+    requests fall under each verdict, country, and country policy.
+    """
+    parser = sp.add_parser(name=COMMAND_NAME, description=msg)
+
+    msg = """
+    Access log files to scan. Gzip-compressed logs are detected
+    automatically.
+    """
+    parser.add_argument("logs", metavar="LOG", nargs="+", type=Path, help=msg)
+
+    msg = """
+    Log format used to find the client address. "nginx" reads the first
+    field of each line, as written by the combined log format. "haproxy"
+    reads the client address and port that follow the syslog header of
+    HAProxy HTTP and TCP logs. The default is "nginx".
+    """
+    parser.add_argument(
+        "--log-format",
+        choices=("nginx", "haproxy"),
+        default="nginx",
+        help=msg,
+    )
+
+    msg = """
+    Read the client address from this zero-based whitespace-separated
+    field instead of using the log format. Negative indexes count from
+    the end of the line. A trailing IPv4 port or a bracketed IPv6
+    address with a port is accepted.
+    """
+    parser.add_argument("-i", "--index", type=int, help=msg)
+
+    msg = """
+    Read the client address with this regular expression instead of
+    using the log format. The address is taken from the group named
+    "ip", or else from the first group or the whole match.
+    """
+    parser.add_argument("-r", "--regex", type=regex_type, help=msg)
+
+    msg = """
+    Number of countries to list, ordered by request count. The default is
+    10.
+    """
+    parser.add_argument("--top", type=top_type, help=msg, default=10)
+
+    msg = """
+    Maximum number of worker processes used to scan log files in
+    parallel. The default is 1, which scans files one at a time.
+    """
+    parser.add_argument("-j", "--jobs", type=jobs_type, help=msg, default=1)
+
+    return
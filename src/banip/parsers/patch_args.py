@@ -1,8 +1,10 @@
 """Argument parser for the patch command."""
 
-from argparse import FileType
 from argparse import _SubParsersAction
 
+from banip.argument_types import duration_type
+from banip.argument_types import jobs_type
+from banip.argument_types import regex_type
 from banip.argument_types import threshold_type
 
 COMMAND_NAME = "patch"
@@ -15,15 +17,28 @@ def load_command_args(sp: _SubParsersAction) -> None:
     """Assemble the argument parser."""
     msg = """
     Patch the ipsum.txt file with the contents of another list of IP
-    addresses. Results are deduplicated, and only new entries are added
-    to ipsum.txt.
+    addresses. New entries are appended to a patch journal that is
+    overlaid on ipsum.txt whenever it is loaded, so patches survive
+    feed updates.
     """
     parser = sp.add_parser(name=COMMAND_NAME, description=msg)
+    source = parser.add_mutually_exclusive_group(required=True)
 
     msg = """
-    File containing additional IP addresses to augment ipsum.txt.
+    Files containing additional IP addresses to augment ipsum.txt, such
+    as lists or fail2ban and HAProxy logs. Quoted glob patterns are
+    expanded, gzip-compressed files are detected automatically, and "-"
+    reads standard input.
     """
-    parser.add_argument("newips", type=FileType("r"), help=msg)
+    source.add_argument("newips", metavar="FILE", nargs="*", default=[], help=msg)
+
+    msg = """
+    Rewrite the patch journal without expired entries or entries that
+    another entry for the same IP address outlasts with an equal or
+    higher confidence factor. An address keeps several entries when
+    their expiry or decay schedules differ.
+    """
+    source.add_argument("--compact", action="store_true", help=msg)
 
     msg = """
     Files of additional IP addresses must be text files with an IP
@@ -34,6 +49,13 @@ def load_command_args(sp: _SubParsersAction) -> None:
     """
     parser.add_argument("-i", "--index", type=int, help=msg, default=-1)
 
+    msg = """
+    Read the IP address with this regular expression instead of a
+    whitespace-separated element. The address is taken from the group
+    named "ip", or else from the first group or the whole match.
+    """
+    parser.add_argument("-p", "--pattern", type=regex_type, help=msg)
+
     msg = """
     Each blocked IP address in ipsum.txt has a factor (from 1 to 10)
     indicating confidence that the IP address is malicious (higher is
@@ -41,6 +63,29 @@ def load_command_args(sp: _SubParsersAction) -> None:
     all new IP addresses added to ipsum.txt. The default is 10.
     """
     parser.add_argument("-c", "--confidence", type=threshold_type, help=msg, default=10)
+    schedule = parser.add_mutually_exclusive_group()
+
+    msg = """
+    Expire the new entries after this long, given as a number followed
+    by m, h, d, or w for minutes, hours, days, or weeks. By default,
+    entries never expire.
+    """
+    schedule.add_argument("--ttl", type=duration_type, help=msg)
+
+    msg = """
+    Let the confidence factor of the new entries fall steadily to zero
+    over this long, after which they expire. Use the same format as
+    --ttl.
+    """
+    schedule.add_argument("--decay", type=duration_type, help=msg)
+
+    msg = """
+    Maximum number of worker processes used to parse input files in
+    parallel. Large uncompressed files are split into chunks so that
+    workers share them. The default is 1, which parses input in this
+    process.
+    """
+    parser.add_argument("-j", "--jobs", type=jobs_type, help=msg, default=1)
 
     return
 
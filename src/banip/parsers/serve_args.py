@@ -0,0 +1,54 @@
+"""Argument parser for serve command."""
+
+from argparse import _SubParsersAction
+from pathlib import Path
+
+from banip.argument_types import interval_type
+from banip.argument_types import port_type
+from banip.constants import SERVE_SOCKET
+
+COMMAND_NAME = "serve"
+
+
+# ======================================================================
+
+
+def load_command_args(sp: _SubParsersAction) -> None:
+    """Assemble the argument parser."""
+    msg = """
+    Keep check data loaded and answer single and batch address lookups
+    over a Unix domain socket and a localhost HTTP endpoint. Responses
+    are JSON. The service reloads its data when a build finishes.
+    """
+    parser = sp.add_parser(name=COMMAND_NAME, description=msg)
+
+    msg = f"""
+    Unix domain socket path. Requests and responses are newline-delimited
+    JSON. The default is {SERVE_SOCKET}.
+    """
+    parser.add_argument("-s", "--socket", type=Path, help=msg, default=SERVE_SOCKET)
+
+    msg = """
+    TCP port for the HTTP endpoint on 127.0.0.1. The default is 8514. Use
+    0 to choose a free port.
+    """
+    parser.add_argument("-p", "--port", type=port_type, help=msg, default=8514)
+
+    msg = """
+    Do not start the HTTP endpoint.
+    """
+    parser.add_argument("--no-http", action="store_true", help=msg)
+
+    msg = """
+    TCP port on 127.0.0.1 for an HAProxy Stream Processing Offload Agent.
+    HAProxy sends each client address in an SPOE message and receives
+    verdict variables in reply. The agent is disabled by default.
+    """
+    parser.add_argument("--spoa-port", type=port_type, help=msg)
+
+    msg = """
+    Seconds between checks for new build data. The default is 2.
+    """
+    parser.add_argument("--reload-interval", type=interval_type, help=msg, default=2.0)
+
+    return
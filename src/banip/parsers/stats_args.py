@@ -11,9 +11,11 @@ COMMAND_NAME = "stats"
 def load_command_args(sp: _SubParsersAction) -> None:
     """Assemble the argument parser."""
     msg = """
-    Produce statistics for a country code.
+    Produce statistics for a country code, or a ranking of every
+    country.
     """
     parser = sp.add_parser(name=COMMAND_NAME, description=msg)
+    scope = parser.add_mutually_exclusive_group(required=True)
 
     msg = """
     Two-letter ISO 3166-1 alpha-2 country code, not the two-letter
@@ -22,7 +24,23 @@ def load_command_args(sp: _SubParsersAction) -> None:
     code is "gb". See https://www.geonames.org/countries/ for a list of
     country codes.
     """
-    parser.add_argument("country_code", type=str, help=msg)
+    scope.add_argument("country_code", type=str, nargs="?", help=msg)
+
+    msg = """
+    Rank every country by the number of IPv4 addresses mapped to it.
+    """
+    scope.add_argument("--all", action="store_true", help=msg)
+
+    msg = """
+    Output format. "table" shows Rich tables. "json" writes the counts
+    as JSON to standard output. The default is "table".
+    """
+    parser.add_argument(
+        "--format",
+        choices=("table", "json"),
+        default="table",
+        help=msg,
+    )
 
     return
 
@@ -2,26 +2,274 @@
 
 """Augment the IP addresses in ipsum.txt."""
 
+import glob
+import re
 import sys
+import time
 from argparse import Namespace
-from typing import cast
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
 
 from rich import box
 from rich.console import Console
+from rich.panel import Panel
 from rich.table import Table
 
 from banip.constants import IPSUM
-from banip.constants import AddressType
-from banip.utilities import extract_ip
+from banip.constants import AddressKey
+from banip.utilities import append_ipsum_journal
+from banip.utilities import client_token
+from banip.utilities import compact_ipsum_journal
 from banip.utilities import format_status
-from banip.utilities import load_ipsum
-from banip.utilities import render_lines
+from banip.utilities import ipsum_journal
+from banip.utilities import is_gzip
+from banip.utilities import line_ranges
+from banip.utilities import open_log
+from banip.utilities import parse_address_key
+from banip.utilities import read_line_range
 from banip.utilities import status_label
 
+# Bytes of an uncompressed input file parsed by one worker task.
+PATCH_CHUNK_SIZE = 32 * 1024 * 1024
+STDIN = "-"
+
+
+@dataclass(frozen=True)
+class PatchPart:
+    """A piece of patch input parsed by one task.
+
+    Parameters
+    ----------
+    path : Path
+        Input file.
+    start : int, optional
+        First byte offset of an uncompressed file. Defaults to 0.
+    end : int | None, optional
+        Byte offset just past the piece, or None to read the whole file,
+        which may be gzip-compressed. Defaults to None.
+    """
+
+    path: Path
+    start: int = 0
+    end: int | None = None
+
+
+@dataclass(frozen=True)
+class PatchScan:
+    """Addresses found in patch input.
+
+    Parameters
+    ----------
+    lines : int
+        Lines read.
+    matched : int
+        Lines holding a valid IP address.
+    addresses : set[AddressKey]
+        Distinct addresses found.
+    """
+
+    lines: int
+    matched: int
+    addresses: set[AddressKey]
+
+
+def scan_lines(
+    lines: Iterable[str], pattern: re.Pattern[str] | None, index: int | None
+) -> PatchScan:
+    """Extract distinct IP addresses from lines of input.
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        Input lines.
+    pattern : re.Pattern[str] | None
+        Expression locating the address, used when ``index`` is None.
+    index : int | None
+        Whitespace-separated element holding the address.
+
+    Returns
+    -------
+    PatchScan
+        Line counts and distinct addresses.
+    """
+    addresses: set[AddressKey] = set()
+    count = matched = 0
+    for line in lines:
+        count += 1
+        if key := parse_address_key(client_token(line, pattern, index)):
+            matched += 1
+            addresses.add(key)
+    return PatchScan(count, matched, addresses)
+
+
+def scan_part(part: PatchPart, regex: str | None, index: int | None) -> PatchScan:
+    """Extract distinct IP addresses from one piece of patch input.
+
+    Addresses are deduplicated here, so a worker process sends back
+    each address once however often it appears in its piece.
+
+    Parameters
+    ----------
+    part : PatchPart
+        Input piece.
+    regex : str | None
+        Expression locating the address, used when ``index`` is None.
+    index : int | None
+        Whitespace-separated element holding the address.
+
+    Returns
+    -------
+    PatchScan
+        Line counts and distinct addresses.
+    """
+    pattern = re.compile(regex) if regex else None
+    if part.end is None:
+        with open_log(part.path) as f:
+            return scan_lines(f, pattern, index)
+    return scan_lines(read_line_range(part.path, part.start, part.end), pattern, index)
+
+
+def input_parts(paths: list[Path], jobs: int) -> list[PatchPart]:
+    """Divide input files into pieces for parallel parsing.
+
+    Parameters
+    ----------
+    paths : list[Path]
+        Input files.
+    jobs : int
+        Maximum number of worker processes. Files are only split when
+        more than one worker is available.
+
+    Returns
+    -------
+    list[PatchPart]
+        Pieces in input order. Compressed files are never split.
+    """
+    parts: list[PatchPart] = []
+    for path in paths:
+        if jobs <= 1 or is_gzip(path):
+            parts.append(PatchPart(path))
+        else:
+            parts.extend(
+                PatchPart(path, start, end)
+                for start, end in line_ranges(path, PATCH_CHUNK_SIZE)
+            )
+    return parts
+
+
+def expand_inputs(names: list[str]) -> tuple[list[Path], list[str]]:
+    """Expand input file names and glob patterns.
+
+    Parameters
+    ----------
+    names : list[str]
+        File names or glob patterns from the command line, excluding
+        standard input.
+
+    Returns
+    -------
+    tuple[list[Path], list[str]]
+        Distinct input files in command-line order, and the names that
+        matched no file.
+    """
+    paths: dict[Path, None] = {}
+    missing: list[str] = []
+    for name in names:
+        matches = [Path(match) for match in sorted(glob.glob(name))]
+        if files := [path for path in matches if path.is_file()]:
+            paths.update(dict.fromkeys(files))
+        else:
+            missing.append(name)
+    return list(paths), missing
+
+
+def scan_inputs(
+    paths: list[Path],
+    stdin: bool,
+    regex: str | None,
+    index: int | None,
+    jobs: int,
+) -> tuple[PatchScan, dict[str, set[AddressKey]]]:
+    """Extract IP addresses from every patch input.
+
+    Parameters
+    ----------
+    paths : list[Path]
+        Input files.
+    stdin : bool
+        Whether to read standard input after the files.
+    regex : str | None
+        Expression locating the address, used when ``index`` is None.
+    index : int | None
+        Whitespace-separated element holding the address.
+    jobs : int
+        Maximum number of worker processes.
+
+    Returns
+    -------
+    tuple[PatchScan, dict[str, set[AddressKey]]]
+        Combined counts and distinct addresses, and the addresses keyed
+        by the name of the input that first contained them.
+    """
+    parts = input_parts(paths, jobs)
+    scan = partial(scan_part, regex=regex, index=index)
+    if jobs <= 1 or len(parts) <= 1:
+        scans = [scan(part) for part in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(parts))) as executor:
+            scans = list(executor.map(scan, parts))
+    sources = [str(part.path) for part in parts]
+    if stdin:
+        pattern = re.compile(regex) if regex else None
+        scans.append(scan_lines(sys.stdin, pattern, index))
+        sources.append("<stdin>")
+
+    found: dict[str, set[AddressKey]] = {}
+    addresses: set[AddressKey] = set()
+    for source, result in zip(sources, scans, strict=True):
+        new = result.addresses - addresses
+        addresses |= new
+        found.setdefault(source, set()).update(new)
+    total = PatchScan(
+        lines=sum(result.lines for result in scans),
+        matched=sum(result.matched for result in scans),
+        addresses=addresses,
+    )
+    return total, found
+
+
+def compact_journal(console: Console) -> None:
+    """Drop expired and redundant entries from the patch journal.
+
+    Parameters
+    ----------
+    console : Console
+        Rich console used for output.
+    """
+    with console.status(status_label("journal_compact")):
+        before, after = compact_ipsum_journal(IPSUM)
+    print(format_status("journal_compact"))
+
+    table = Table(title="Journal Compaction", box=box.SQUARE, show_header=False)
+    table.add_column(justify="right")
+    table.add_column(justify="right")
+    table.add_row("Journal entries before", f"{before:,d}")
+    table.add_row("Journal entries after", f"{after:,d}")
+
+    print()
+    console.print(table)
+
 
 def task_runner(args: Namespace) -> None:
     """Augment the addresses in ipsum.txt.
 
+    New addresses are appended to the patch journal rather than written
+    into ipsum.txt, so the work done depends only on the size of the
+    input and the patch is kept when the feed is next updated.
+
     Parameters
     ----------
     args : Namespace
@@ -39,47 +287,59 @@ def task_runner(args: Namespace) -> None:
             print("Visit https://geozeke.github.io/banip/ for more information.")
             sys.exit(1)
 
-    # Load ipsum.txt.
-    msg = status_label("ipsum_load")
-    with console.status(msg):
-        ipsum = load_ipsum()
-    print(format_status("ipsum_load"))
+    if args.compact:
+        compact_journal(console)
+        return
 
-    original_ipsum_size = len(ipsum)
-    new_ips_considered = 0
+    paths, missing = expand_inputs([name for name in args.newips if name != STDIN])
+    if missing:
+        names = "\n".join(f"• {name}" for name in missing)
+        console.print(
+            Panel(
+                f"Input files not found:\n{names}",
+                title="Cannot patch ipsum",
+                border_style="red",
+                box=box.ROUNDED,
+            )
+        )
+        sys.exit(1)
 
     # Start patching.
-    msg = status_label("ipsum_patch")
-    with console.status(msg):
-        for line in args.newips:
-            parts = line.split()
-            try:
-                raw_ip = parts[args.index]
-            except IndexError:
-                continue
-            if ip := cast(AddressType, extract_ip(raw_ip)):
-                new_ips_considered += 1
-                if (ip not in ipsum) or (ipsum[ip] < args.confidence):
-                    ipsum[ip] = args.confidence
+    index = None if args.pattern else args.index
+    started = time.perf_counter()
+    with console.status(status_label("ipsum_patch")):
+        scan, found = scan_inputs(
+            paths, STDIN in args.newips, args.pattern, index, args.jobs
+        )
+        new_ips_added = sum(
+            append_ipsum_journal(
+                IPSUM,
+                dict.fromkeys(sorted(addresses), args.confidence),
+                source,
+                lifetime=args.decay or args.ttl,
+                decay=args.decay is not None,
+            )
+            for source, addresses in found.items()
+            if addresses
+        )
+    seconds = time.perf_counter() - started
     print(format_status("ipsum_patch"))
-    new_ips_added = len(ipsum) - original_ipsum_size
-
-    # Update the file on disk.
-    IPSUM.write_text(render_lines(f"{ip} {hits}" for ip, hits in ipsum.items()))
 
     # Generate a table to display metrics.
     table = Table(title="Final Augmentation Stats", box=box.SQUARE, show_header=False)
     table.add_column(justify="right")
     table.add_column(justify="right")
 
-    table.add_row("Original ipsum.txt size", f"{(original_ipsum_size):,d}")
-    table.add_row("New IP addresses analyzed", f"{(new_ips_considered):,d}")
-    table.add_row("New IP addresses added", f"{(new_ips_added):,d}")
-    table.add_row("New ipsum.txt size", f"{(len(ipsum)):,d}")
+    table.add_row("Input files", f"{len(paths) + (STDIN in args.newips):,d}")
+    table.add_row("Lines read", f"{scan.lines:,d}")
+    table.add_row("New IP addresses analyzed", f"{scan.matched:,d}")
+    table.add_row("Journal entries added", f"{new_ips_added:,d}")
+    table.add_row("Elapsed time", f"{seconds:.2f}s")
+    table.add_row("Throughput", f"{scan.lines / max(seconds, 1e-9):,.0f} lines/s")
+    table.add_row("Patch journal", str(ipsum_journal(IPSUM)))
 
     print()
     console.print(table)
-    args.newips.close()
 
     return
 
@@ -0,0 +1,737 @@
+"""Task runner for the serve command."""
+
+import argparse
+import asyncio
+import ipaddress as ipa
+import json
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from functools import partial
+from pathlib import Path
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+from rich import box
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+
+from banip.check import CheckData
+from banip.check import CheckVerdict
+from banip.check import check_address
+from banip.check import display_missing_data
+from banip.check import load_check_data
+from banip.check import result_record
+from banip.constants import DATA
+from banip.constants import RENDERED_BLOCKLIST
+from banip.constants import AddressType
+from banip.constants import AddressTypes
+from banip.utilities import FLAG_FIN
+from banip.utilities import MAX_FRAME_SIZE
+from banip.utilities import SPOP_VERSION
+from banip.utilities import Frame
+from banip.utilities import FrameType
+from banip.utilities import SpopError
+from banip.utilities import SpopStatus
+from banip.utilities import VarScope
+from banip.utilities import check_snapshot
+from banip.utilities import check_snapshot_sources
+from banip.utilities import current_generation
+from banip.utilities import decode_kv
+from banip.utilities import decode_messages
+from banip.utilities import dedupe_sidecar
+from banip.utilities import encode_frame
+from banip.utilities import encode_kv
+from banip.utilities import encode_set_vars
+from banip.utilities import generation_path
+from banip.utilities import read_frame
+from banip.utilities import source_stamps
+
+HTTP_HOST = "127.0.0.1"
+MAX_REQUEST_BYTES = 1 << 20
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.0001, 0.001, 0.01, 0.1)
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Content Too Large",
+}
+
+
+@dataclass
+class LatencyCounter:
+    """Request count and latency totals for one endpoint.
+
+    Parameters
+    ----------
+    count : int, optional
+        Requests answered. Defaults to 0.
+    errors : int, optional
+        Requests answered with an error. Defaults to 0.
+    total : float, optional
+        Total handling time in seconds. Defaults to 0.0.
+    maximum : float, optional
+        Longest handling time in seconds. Defaults to 0.0.
+    buckets : list[int], optional
+        Request counts for each bound in ``LATENCY_BUCKETS``, followed by
+        the count of slower requests.
+    """
+
+    count: int = 0
+    errors: int = 0
+    total: float = 0.0
+    maximum: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        """Add one request to the counter.
+
+        Parameters
+        ----------
+        seconds : float
+            Time taken to answer the request.
+        error : bool, optional
+            Whether the request was answered with an error. Defaults to
+            False.
+        """
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def summary(self) -> dict[str, object]:
+        """Return the counter as a JSON-serializable record.
+
+        Returns
+        -------
+        dict[str, object]
+            Counts, mean and maximum latency in milliseconds, and the
+            latency histogram keyed by bucket bound.
+        """
+        labels = [f"{bound * 1000:g}ms" for bound in LATENCY_BUCKETS] + ["+inf"]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "max_ms": self.maximum * 1000,
+            "buckets": dict(zip(labels, self.buckets, strict=True)),
+        }
+
+
+def data_stamps() -> dict[str, list[int]]:
+    """Return modification stamps for the files the service depends on.
+
+    Files are read from the active data generation when there is one,
+    so the stamps change only when a new generation is activated.
+
+    Returns
+    -------
+    dict[str, list[int]]
+        ``[mtime_ns, size]`` for each existing file, keyed by label.
+    """
+    generation = current_generation(DATA)
+    sources = {
+        **check_snapshot_sources(),
+        "snapshot": check_snapshot(RENDERED_BLOCKLIST),
+        "dedupe": dedupe_sidecar(RENDERED_BLOCKLIST),
+    }
+    return source_stamps(
+        {label: generation_path(path, generation) for label, path in sources.items()}
+    )
+
+
+class CheckService:
+    """Resident check data with hot reloading and latency counters.
+
+    Each request reads :attr:`data` once and answers from that
+    reference, so a reload swaps in new data for later requests without
+    affecting requests already being answered.
+
+    Parameters
+    ----------
+    data : CheckData
+        Prepared lookup data.
+    stamps : dict[str, list[int]]
+        Stamps of the files ``data`` was loaded from.
+    """
+
+    def __init__(self, data: CheckData, stamps: dict[str, list[int]]) -> None:
+        self.data = data
+        self.stamps = stamps
+        self.pending = stamps
+        self.reloads = 0
+        self.started = time.monotonic()
+        self.latency: dict[str, LatencyCounter] = {}
+
+    def lookup(self, addresses: list[object]) -> list[dict[str, object]]:
+        """Check a batch of addresses against one data reference.
+
+        Parameters
+        ----------
+        addresses : list[object]
+            Address strings from a request.
+
+        Returns
+        -------
+        list[dict[str, object]]
+            One result record per address, in request order. Invalid
+            addresses produce a record with an ``error`` value.
+        """
+        data = self.data
+        records: list[dict[str, object]] = []
+        for text in addresses:
+            try:
+                address = ipa.ip_address(str(text).strip())
+            except ValueError:
+                records.append({"address": text, "error": "invalid IP address"})
+                continue
+            records.append(result_record(check_address(address, data)))
+        return records
+
+    def verdict_variables(
+        self, messages: dict[str, dict[str, object]]
+    ) -> dict[str, object] | None:
+        """Return HAProxy variables describing the address in a NOTIFY.
+
+        The address is read from the first message argument named
+        ``ip``, or else from the first argument holding an address.
+
+        Parameters
+        ----------
+        messages : dict[str, dict[str, object]]
+            Decoded NOTIFY messages.
+
+        Returns
+        -------
+        dict[str, object] | None
+            ``verdict`` and ``blocked`` values, plus ``country``,
+            ``match``, and ``ipsum`` when available, or None when no
+            message carries an address.
+        """
+        values = [args.get("ip") for args in messages.values()]
+        values += [value for args in messages.values() for value in args.values()]
+        address: AddressType | None = None
+        for value in values:
+            if isinstance(value, AddressTypes):
+                address = value
+            elif isinstance(value, str):
+                try:
+                    address = ipa.ip_address(value.strip())
+                except ValueError:
+                    continue
+            if address:
+                break
+        if address is None:
+            return None
+
+        result = check_address(address, self.data)
+        variables: dict[str, object] = {
+            "verdict": str(result.verdict),
+            "blocked": result.verdict is CheckVerdict.BLOCKED,
+        }
+        if result.country_code:
+            variables["country"] = result.country_code
+        if result.blocklist_match:
+            variables["match"] = str(result.blocklist_match)
+        if result.ipsum_confidence is not None:
+            variables["ipsum"] = result.ipsum_confidence
+        return variables
+
+    def answer(self, request: object) -> tuple[str, dict[str, object]]:
+        """Answer one decoded JSON request.
+
+        Parameters
+        ----------
+        request : object
+            Decoded request: ``{"ip": ADDRESS}``, ``{"ips": [ADDRESS,
+            ...]}``, or ``{"stats": true}``.
+
+        Returns
+        -------
+        tuple[str, dict[str, object]]
+            Request kind used for latency counters, and the response.
+        """
+        if isinstance(request, dict):
+            if "ip" in request:
+                return "ip", {"result": self.lookup([request["ip"]])[0]}
+            if isinstance(request.get("ips"), list):
+                return "ips", {"results": self.lookup(request["ips"])}
+            if request.get("stats"):
+                return "stats", self.stats()
+        return "invalid", {"error": "expected an ip, ips, or stats request"}
+
+    def stats(self) -> dict[str, object]:
+        """Return service counters.
+
+        Returns
+        -------
+        dict[str, object]
+            Uptime, reload count, data source, and per-endpoint latency
+            counters.
+        """
+        return {
+            "uptime_seconds": round(time.monotonic() - self.started, 3),
+            "reloads": self.reloads,
+            "snapshot": self.data.snapshot is not None,
+            "endpoints": {
+                name: counter.summary()
+                for name, counter in sorted(self.latency.items())
+            },
+        }
+
+    def record(self, endpoint: str, started: float, error: bool) -> None:
+        """Record the latency of one answered request.
+
+        Parameters
+        ----------
+        endpoint : str
+            Endpoint name.
+        started : float
+            :func:`time.perf_counter` value when the request arrived.
+        error : bool
+            Whether the request was answered with an error.
+        """
+        counter = self.latency.setdefault(endpoint, LatencyCounter())
+        counter.record(time.perf_counter() - started, error)
+
+    async def refresh(self) -> bool:
+        """Reload data when a finished build has changed its files.
+
+        Files must be unchanged for two consecutive calls before they
+        are loaded, so a build that is still writing is not picked up
+        halfway. Loading runs in a worker thread and the new data
+        replaces the old reference in one assignment.
+
+        Returns
+        -------
+        bool
+            True when new data was loaded.
+        """
+        stamps = data_stamps()
+        settled = stamps == self.pending
+        self.pending = stamps
+        if stamps == self.stamps or not settled:
+            return False
+        try:
+            data = await asyncio.to_thread(
+                load_check_data, Console(quiet=True), resident=True
+            )
+        except (OSError, ValueError):
+            return False
+        self.data = data
+        self.stamps = stamps
+        self.reloads += 1
+        return True
+
+    async def watch(self, interval: float) -> None:
+        """Poll for new build data until cancelled.
+
+        Parameters
+        ----------
+        interval : float
+            Seconds between polls.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await self.refresh()
+
+
+async def handle_socket(
+    service: CheckService,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """Answer newline-delimited JSON requests on one socket connection.
+
+    Parameters
+    ----------
+    service : CheckService
+        Service answering requests.
+    reader : asyncio.StreamReader
+        Connection reader.
+    writer : asyncio.StreamWriter
+        Connection writer.
+    """
+    try:
+        while line := await reader.readline():
+            started = time.perf_counter()
+            try:
+                kind, response = service.answer(json.loads(line))
+            except ValueError:
+                kind, response = "invalid", {"error": "invalid JSON"}
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+            service.record(f"socket {kind}", started, "error" in response)
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+def route_http(
+    service: CheckService, method: str, target: str, body: bytes
+) -> tuple[str, int, dict[str, object]]:
+    """Answer one HTTP request.
+
+    Parameters
+    ----------
+    service : CheckService
+        Service answering requests.
+    method : str
+        Request method.
+    target : str
+        Request target, including any query string.
+    body : bytes
+        Request body.
+
+    Returns
+    -------
+    tuple[str, int, dict[str, object]]
+        Endpoint name used for latency counters, status code, and the
+        response.
+    """
+    url = urlsplit(target)
+    endpoint = f"{method} {url.path}"
+    if url.path not in ("/check", "/stats"):
+        return "http other", 404, {"error": "not found"}
+
+    if method == "GET" and url.path == "/stats":
+        return endpoint, 200, service.stats()
+    if method == "GET" and url.path == "/check":
+        addresses: list[object] = list(parse_qs(url.query).get("ip", []))
+        if not addresses:
+            return endpoint, 400, {"error": "missing ip query parameter"}
+        if len(addresses) == 1:
+            return endpoint, 200, {"result": service.lookup(addresses)[0]}
+        return endpoint, 200, {"results": service.lookup(addresses)}
+    if method == "POST" and url.path == "/check":
+        try:
+            kind, response = service.answer(json.loads(body))
+        except ValueError:
+            return endpoint, 400, {"error": "invalid JSON"}
+        if kind in ("ip", "ips"):
+            return endpoint, 200, response
+        return endpoint, 400, {"error": "expected an ip or ips request"}
+    return "http other", 405, {"error": "method not allowed"}
+
+
+async def handle_http(
+    service: CheckService,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """Answer HTTP/1.1 JSON requests on one connection.
+
+    Parameters
+    ----------
+    service : CheckService
+        Service answering requests.
+    reader : asyncio.StreamReader
+        Connection reader.
+    writer : asyncio.StreamWriter
+        Connection writer.
+    """
+    try:
+        while request_line := await reader.readline():
+            started = time.perf_counter()
+            headers: dict[str, str] = {}
+            response: dict[str, object]
+            while (line := await reader.readline()).strip():
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+                length = int(headers.get("content-length", "0"))
+            except ValueError:
+                endpoint, status, response = "http other", 400, {"error": "bad request"}
+                version, length = "HTTP/1.0", 0
+            else:
+                if length > MAX_REQUEST_BYTES:
+                    endpoint, status, response = (
+                        "http other",
+                        413,
+                        {"error": "request too large"},
+                    )
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    endpoint, status, response = route_http(
+                        service, method, target, body
+                    )
+
+            keep_alive = (
+                version == "HTTP/1.1"
+                and headers.get("connection", "").lower() != "close"
+                and status != 413
+            )
+            payload = json.dumps(response).encode()
+            writer.write(
+                (
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    "\r\n"
+                ).encode("latin-1")
+                + payload
+            )
+            await writer.drain()
+            service.record(endpoint, started, status >= 400)
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def handle_spoa(
+    service: CheckService,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """Answer HAProxy SPOP frames on one agent connection.
+
+    After the hello handshake, each NOTIFY frame is answered with an ACK
+    that sets session-scoped verdict variables. Frames are answered in
+    the order they arrive, so HAProxy can pipeline several NOTIFY frames
+    without waiting for each ACK.
+
+    Parameters
+    ----------
+    service : CheckService
+        Service answering requests.
+    reader : asyncio.StreamReader
+        Connection reader.
+    writer : asyncio.StreamWriter
+        Connection writer.
+    """
+
+    def disconnect(status: SpopStatus, message: str) -> None:
+        payload = encode_kv({"status-code": int(status), "message": message})
+        writer.write(encode_frame(Frame(FrameType.AGENT_DISCONNECT, payload)))
+
+    try:
+        hello = await read_frame(reader, MAX_FRAME_SIZE)
+        if hello.type != FrameType.HAPROXY_HELLO:
+            raise SpopError(SpopStatus.INVALID, "expected HAPROXY-HELLO")
+        fields = decode_kv(hello.payload)
+        versions = str(fields.get("supported-versions", "")).split(",")
+        if SPOP_VERSION not in (version.strip() for version in versions):
+            raise SpopError(SpopStatus.BAD_VERSION, "unsupported version")
+        if not isinstance(max_size := fields.get("max-frame-size"), int):
+            raise SpopError(SpopStatus.NO_FRAME_SIZE, "max-frame-size not found")
+        max_size = min(max_size, MAX_FRAME_SIZE)
+        payload = encode_kv(
+            {
+                "version": SPOP_VERSION,
+                "max-frame-size": max_size,
+                "capabilities": "pipelining",
+            }
+        )
+        writer.write(encode_frame(Frame(FrameType.AGENT_HELLO, payload)))
+        if fields.get("healthcheck"):
+            return
+
+        while True:
+            frame = await read_frame(reader, max_size)
+            if frame.type == FrameType.HAPROXY_DISCONNECT:
+                disconnect(SpopStatus.NORMAL, "normal")
+                return
+            if frame.type != FrameType.NOTIFY:
+                raise SpopError(SpopStatus.INVALID, "expected NOTIFY")
+            if not frame.flags & FLAG_FIN:
+                raise SpopError(
+                    SpopStatus.FRAGMENTATION, "fragmentation is not supported"
+                )
+            started = time.perf_counter()
+            variables = service.verdict_variables(decode_messages(frame.payload))
+            ack = Frame(
+                FrameType.ACK,
+                encode_set_vars(VarScope.SESSION, variables or {}),
+                frame.stream_id,
+                frame.frame_id,
+            )
+            writer.write(encode_frame(ack))
+            await writer.drain()
+            service.record("spoa notify", started, variables is None)
+    except SpopError as e:
+        disconnect(e.status, str(e))
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_servers(
+    service: CheckService,
+    socket_path: Path,
+    port: int | None,
+    spoa_port: int | None = None,
+) -> dict[str, asyncio.Server]:
+    """Start the Unix socket server and any TCP servers.
+
+    Parameters
+    ----------
+    service : CheckService
+        Service answering requests.
+    socket_path : Path
+        Unix domain socket path.
+    port : int | None
+        HTTP port on 127.0.0.1, or None to skip the HTTP endpoint.
+    spoa_port : int | None, optional
+        SPOP port on 127.0.0.1, or None to skip the HAProxy agent.
+        Defaults to None.
+
+    Returns
+    -------
+    dict[str, asyncio.Server]
+        Started servers keyed by ``socket``, ``http``, and ``spoa``.
+
+    Raises
+    ------
+    OSError
+        If another process is already serving on the socket path.
+    """
+    # Refuse to take over a socket that another service still answers.
+    if socket_path.exists():
+        try:
+            _, writer = await asyncio.open_unix_connection(socket_path)
+        except OSError:
+            socket_path.unlink()
+        else:
+            writer.close()
+            raise OSError(f"{socket_path} is already in use")
+
+    servers = {
+        "socket": await asyncio.start_unix_server(
+            partial(handle_socket, service),
+            path=socket_path,
+            limit=MAX_REQUEST_BYTES,
+        )
+    }
+    socket_path.chmod(0o600)
+    if port is not None:
+        servers["http"] = await asyncio.start_server(
+            partial(handle_http, service),
+            host=HTTP_HOST,
+            port=port,
+            limit=MAX_REQUEST_BYTES,
+        )
+    if spoa_port is not None:
+        servers["spoa"] = await asyncio.start_server(
+            partial(handle_spoa, service), host=HTTP_HOST, port=spoa_port
+        )
+    return servers
+
+
+def display_endpoints(
+    console: Console,
+    service: CheckService,
+    servers: dict[str, asyncio.Server],
+    reload_interval: float,
+) -> None:
+    """Display the listening endpoints.
+
+    Parameters
+    ----------
+    console : Console
+        Rich console used for output.
+    service : CheckService
+        Running service.
+    servers : dict[str, asyncio.Server]
+        Started servers keyed by endpoint.
+    reload_interval : float
+        Seconds between checks for new build data.
+    """
+    details = Table.grid(padding=(0, 1))
+    details.add_column(style="bold", justify="right")
+    details.add_column()
+    details.add_row("Unix socket", str(servers["socket"].sockets[0].getsockname()))
+    if "http" in servers:
+        host, port = servers["http"].sockets[0].getsockname()[:2]
+        details.add_row("HTTP", f"http://{host}:{port}/check")
+    if "spoa" in servers:
+        host, port = servers["spoa"].sockets[0].getsockname()[:2]
+        details.add_row("SPOA", f"{host}:{port}")
+    details.add_row("Data", "build snapshot" if service.data.snapshot else "text files")
+    details.add_row("Reload check", f"every {reload_interval:g}s")
+    console.print(
+        Panel(
+            details,
+            title="banip serve",
+            title_align="left",
+            subtitle="Ctrl-C to stop",
+            border_style="cyan",
+            box=box.ROUNDED,
+            expand=False,
+        )
+    )
+
+
+async def serve(
+    console: Console, service: CheckService, args: argparse.Namespace
+) -> None:
+    """Run the servers and the reload watcher until cancelled.
+
+    Parameters
+    ----------
+    console : Console
+        Rich console used for output.
+    service : CheckService
+        Service answering requests.
+    args : argparse.Namespace
+        Parsed command-line arguments.
+    """
+    servers = await start_servers(
+        service,
+        args.socket,
+        None if args.no_http else args.port,
+        args.spoa_port,
+    )
+    display_endpoints(console, service, servers, args.reload_interval)
+    watcher = asyncio.create_task(service.watch(args.reload_interval))
+    try:
+        await asyncio.gather(*(server.serve_forever() for server in servers.values()))
+    finally:
+        watcher.cancel()
+        for server in servers.values():
+            server.close()
+        args.socket.unlink(missing_ok=True)
+
+
+def task_runner(args: argparse.Namespace) -> None:
+    """Serve address checks until interrupted.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed command-line arguments.
+    """
+    console = Console()
+    if display_missing_data(console):
+        return
+
+    stamps = data_stamps()
+    service = CheckService(load_check_data(console, resident=True), stamps)
+    try:
+        asyncio.run(serve(console, service, args))
+    except KeyboardInterrupt:
+        console.print("Stopped.")
+    except OSError as e:
+        console.print(
+            Panel(
+                str(e),
+                title="Cannot start service",
+                border_style="red",
+                box=box.ROUNDED,
+            )
+        )
@@ -1,6 +1,9 @@
 """Task runner for the stats command."""
 
 import argparse
+import json
+import sys
+from typing import TextIO
 
 from rich import box
 from rich.console import Console
@@ -8,14 +11,170 @@ from rich.style import Style
 from rich.table import Table
 
 from banip.constants import COUNTRY_NETS_TXT
-from banip.constants import NetworkType
+from banip.utilities import CountryStats
+from banip.utilities import country_stats_path
 from banip.utilities import format_status
-from banip.utilities import load_country_networks
+from banip.utilities import load_country_network_keys
+from banip.utilities import read_country_stats
 from banip.utilities import status_label
+from banip.utilities import summarize_countries
+from banip.utilities import write_country_stats
+
+
+def load_stats(console: Console, out: TextIO) -> dict[str, CountryStats]:
+    """Load per-country statistics from the precomputed index.
+
+    When the index is missing or older than the country network map,
+    which the status line reports as ``missing`` or ``stale``, the map
+    is summarized instead and the index rewritten.
+
+    Parameters
+    ----------
+    console : Console
+        Rich console used for progress.
+    out : TextIO
+        Stream that receives completed status lines.
+
+    Returns
+    -------
+    dict[str, CountryStats]
+        Counts keyed by country label.
+    """
+    with console.status(status_label("stats_index")):
+        stats = read_country_stats()
+    if stats is not None:
+        print(format_status("stats_index"), file=out)
+        return stats
+    state = "stale" if country_stats_path().exists() else "missing"
+    print(format_status("stats_index", state), file=out)
+
+    with console.status(status_label("stats_load")):
+        networks = load_country_network_keys()
+    print(format_status("stats_load"), file=out)
+
+    with console.status(status_label("analyze")):
+        stats = summarize_countries(networks)
+        write_country_stats(stats)
+    print(format_status("analyze"), file=out)
+    return stats
+
+
+def rank_countries(stats: dict[str, CountryStats]) -> list[tuple[str, CountryStats]]:
+    """Order countries by the address space mapped to them.
+
+    Parameters
+    ----------
+    stats : dict[str, CountryStats]
+        Counts keyed by country label.
+
+    Returns
+    -------
+    list[tuple[str, CountryStats]]
+        Countries by descending IPv4 and then IPv6 address count, with
+        ties in label order.
+    """
+    return sorted(
+        stats.items(),
+        key=lambda item: (-item[1].addresses4, -item[1].addresses6, item[0]),
+    )
+
+
+def stats_record(country: str, counts: CountryStats) -> dict[str, object]:
+    """Return JSON-ready statistics for one country.
+
+    Parameters
+    ----------
+    country : str
+        Country label.
+    counts : CountryStats
+        Counts for the country.
+
+    Returns
+    -------
+    dict[str, object]
+        Country label, network counts, and exact address counts.
+    """
+    return {
+        "country": country,
+        "networks_v4": counts.networks4,
+        "networks_v6": counts.networks6,
+        "addresses_v4": counts.addresses4,
+        "addresses_v6": counts.addresses6,
+    }
+
+
+def country_table(country: str, counts: CountryStats) -> Table:
+    """Create the statistics table for one country.
+
+    Parameters
+    ----------
+    country : str
+        Country label.
+    counts : CountryStats
+        Counts for the country.
+
+    Returns
+    -------
+    Table
+        Styled Rich table.
+    """
+    table = Table(
+        title=f"Results for: {country}",
+        box=box.SQUARE,
+        title_style=Style(italic=False),
+        show_header=False,
+    )
+
+    table.add_column(justify="right")
+    table.add_column(justify="right")
+
+    table.add_row("Networks (v4)", f"{counts.networks4:,d}")
+    table.add_row("Networks (v6)", f"{counts.networks6:,d}", end_section=True)
+    table.add_row("IP addresses (v4)", f"{counts.addresses4:,d}")
+    table.add_row("IP addresses (v6)", f"{counts.addresses6:.2e}")
+    return table
+
+
+def ranking_table(ranked: list[tuple[str, CountryStats]]) -> Table:
+    """Create the ranking table for every country.
+
+    Parameters
+    ----------
+    ranked : list[tuple[str, CountryStats]]
+        Countries in ranking order.
+
+    Returns
+    -------
+    Table
+        Styled Rich table.
+    """
+    table = Table(
+        title="Country Rankings",
+        box=box.SQUARE,
+        title_style=Style(italic=False),
+    )
+
+    table.add_column("Rank", justify="right")
+    table.add_column("Country")
+    table.add_column("Networks (v4)", justify="right")
+    table.add_column("Networks (v6)", justify="right")
+    table.add_column("IP addresses (v4)", justify="right")
+    table.add_column("IP addresses (v6)", justify="right")
+
+    for rank, (country, counts) in enumerate(ranked, start=1):
+        table.add_row(
+            f"{rank:,d}",
+            country,
+            f"{counts.networks4:,d}",
+            f"{counts.networks6:,d}",
+            f"{counts.addresses4:,d}",
+            f"{counts.addresses6:.2e}",
+        )
+    return table
 
 
 def task_runner(args: argparse.Namespace) -> None:
-    """Display statistics for a given country.
+    """Display statistics for a given country or every country.
 
     Parameters
     ----------
@@ -27,53 +186,42 @@ def task_runner(args: argparse.Namespace) -> None:
         Some required files are missing. Run the \'build\'
         command before generating statistics for a given country. Run
         this command for more information:
-        
+
         \'banip build -h\'
         """
         print("\n".join([line.strip() for line in msg.split("\n")]))
         return
 
+    # JSON goes to standard output on its own, so progress moves to
+    # standard error.
+    as_json = args.format == "json"
+    out = sys.stderr if as_json else sys.stdout
+    console = Console(stderr=as_json)
+
+    print(file=out)
+    stats = load_stats(console, out)
+    print(file=out)
+
+    if args.all:
+        ranked = rank_countries(stats)
+        if as_json:
+            print(json.dumps([stats_record(*item) for item in ranked], indent=2))
+        else:
+            console.print(ranking_table(ranked))
+        return
+
     target_country = args.country_code.upper()
-    console = Console()
-
-    print()
-    msg = status_label("stats_load")
-    with console.status(msg):
-        D: dict[NetworkType, str] = {}
-        D = load_country_networks()
-    print(format_status("stats_load"))
-
-    msg = status_label("analyze")
-    results = {"nets_4": 0, "ips_4": 0, "nets_6": 0, "ips_6": 0}
-    with console.status(msg):
-        for net, country in D.items():
-            if country == target_country:
-                results[f"nets_{net.version}"] += 1
-                results[f"ips_{net.version}"] += (
-                    1 if net.num_addresses == 1 else net.num_addresses - 2
-                )
-    print(format_status("analyze"))
-    print()
-
-    if all(value == 0 for value in results.values()):
+    if (counts := stats.get(target_country)) is None:
+        if as_json:
+            error = {"country": target_country, "error": "not found"}
+            print(json.dumps(error, indent=2))
+            sys.exit(1)
         print(f"{target_country} not found")
         return
 
-    no_italic = Style(italic=False)
-    table = Table(
-        title=f"Results for: {target_country}",
-        box=box.SQUARE,
-        title_style=no_italic,
-        show_header=False,
-    )
-
-    table.add_column(justify="right")
-    table.add_column(justify="right")
-
-    table.add_row("Networks (v4)", f"{results['nets_4']:,d}")
-    table.add_row("Networks (v6)", f"{results['nets_6']:,d}", end_section=True)
-    table.add_row("IP addresses (v4)", f"{results['ips_4']:,d}")
-    table.add_row("IP addresses (v6)", f"{results['ips_6']:.2e}")
-    console.print(table)
+    if as_json:
+        print(json.dumps(stats_record(target_country, counts), indent=2))
+    else:
+        console.print(country_table(target_country, counts))
 
     return
@@ -1,10 +1,49 @@
 """Shared utility helpers for banip."""
 
+from banip.utilities.data import CountryStats
+from banip.utilities.data import GeoliteIndex
+from banip.utilities.data import IpsumParser
+from banip.utilities.data import JournalEntry
+from banip.utilities.data import append_ipsum_journal
+from banip.utilities.data import cached_ipsum_keys
+from banip.utilities.data import check_snapshot_sources
+from banip.utilities.data import compact_ipsum_journal
+from banip.utilities.data import country_stats_path
+from banip.utilities.data import dedupe_sidecar
+from banip.utilities.data import geolite_index
+from banip.utilities.data import geolite_index_current
+from banip.utilities.data import geolite_sources
+from banip.utilities.data import ipsum_cache
+from banip.utilities.data import ipsum_cache_matches
+from banip.utilities.data import ipsum_journal
+from banip.utilities.data import journal_confidence
+from banip.utilities.data import journal_lock
+from banip.utilities.data import load_country_index
+from banip.utilities.data import load_country_network_keys
 from banip.utilities.data import load_country_networks
+from banip.utilities.data import load_dedupe_sidecar
 from banip.utilities.data import load_ipsum
+from banip.utilities.data import load_ipsum_keys
 from banip.utilities.data import load_rendered_blocklist
+from banip.utilities.data import load_rendered_blocklist_keys
 from banip.utilities.data import lookup_country
+from banip.utilities.data import parse_geolite
+from banip.utilities.data import parse_ipsum
+from banip.utilities.data import parse_ipsum_line
+from banip.utilities.data import parse_journal_entry
+from banip.utilities.data import patched_addresses
+from banip.utilities.data import read_country_stats
+from banip.utilities.data import read_geolite_index
+from banip.utilities.data import read_ipsum_cache
+from banip.utilities.data import read_ipsum_journal
+from banip.utilities.data import render_journal_entry
+from banip.utilities.data import store_ipsum_cache
+from banip.utilities.data import summarize_countries
 from banip.utilities.data import tag_networks
+from banip.utilities.data import write_country_stats
+from banip.utilities.data import write_dedupe_sidecar
+from banip.utilities.data import write_geolite_index
+from banip.utilities.data import write_ipsum_cache
 from banip.utilities.display import STATUS_MESSAGES
 from banip.utilities.display import StatusMessages
 from banip.utilities.display import clear
@@ -12,34 +51,233 @@ from banip.utilities.display import format_status
 from banip.utilities.display import print_docstring
 from banip.utilities.display import status_label
 from banip.utilities.external import get_public_ip
+from banip.utilities.fetch import CHUNK_SIZE
+from banip.utilities.fetch import ChunkSink
+from banip.utilities.fetch import FetchResult
+from banip.utilities.fetch import HttpClient
+from banip.utilities.fetch import Validators
+from banip.utilities.fetch import load_validators
+from banip.utilities.generations import GENERATIONS_KEPT
+from banip.utilities.generations import copy_atomic
+from banip.utilities.generations import current_generation
+from banip.utilities.generations import generation_files
+from banip.utilities.generations import generation_path
+from banip.utilities.generations import list_generations
+from banip.utilities.generations import publish_generation
+from banip.utilities.generations import staged_file
+from banip.utilities.generations import write_atomic
+from banip.utilities.intervals import Containment
+from banip.utilities.intervals import Coverage
+from banip.utilities.intervals import coalesce
+from banip.utilities.intervals import coverage
+from banip.utilities.intervals import entry_interval
+from banip.utilities.intervals import find_contained
+from banip.utilities.intervals import interval_networks
+from banip.utilities.intervals import network_interval
+from banip.utilities.intervals import union_size
+from banip.utilities.ip import address_key
+from banip.utilities.ip import entry_key
 from banip.utilities.ip import extract_ip
+from banip.utilities.ip import key_address
+from banip.utilities.ip import key_interval
+from banip.utilities.ip import key_network
+from banip.utilities.ip import network_key
+from banip.utilities.ip import parse_address_key
+from banip.utilities.ip import parse_network_key
+from banip.utilities.ip import render_address_key
+from banip.utilities.ip import render_key
 from banip.utilities.ip import render_lines
+from banip.utilities.ip import render_network_key
+from banip.utilities.ip import span_keys
 from banip.utilities.ip import split_hybrid
+from banip.utilities.logs import GZIP_MAGIC
+from banip.utilities.logs import client_token
+from banip.utilities.logs import is_gzip
+from banip.utilities.logs import line_ranges
+from banip.utilities.logs import open_log
+from banip.utilities.logs import read_line_range
+from banip.utilities.logs import read_tokens
+from banip.utilities.lookup import CountryIndex
+from banip.utilities.lookup import DedupeIndex
+from banip.utilities.lookup import EntryIndex
+from banip.utilities.lookup import IntervalLookup
 from banip.utilities.lookup import NetworkBounds
 from banip.utilities.lookup import NetworkLookup
+from banip.utilities.lookup import TaggedIndex
+from banip.utilities.lookup import build_country_index
+from banip.utilities.lookup import build_entry_index
+from banip.utilities.lookup import build_interval_lookup
 from banip.utilities.lookup import build_network_lookup
+from banip.utilities.lookup import build_tagged_index
 from banip.utilities.lookup import compact
+from banip.utilities.lookup import compact_keys
+from banip.utilities.lookup import country_intervals
 from banip.utilities.lookup import ip_in_network
+from banip.utilities.snapshot import CheckSnapshot
+from banip.utilities.snapshot import FixedRecords
+from banip.utilities.snapshot import check_snapshot
+from banip.utilities.snapshot import read_check_snapshot
+from banip.utilities.snapshot import source_stamps
+from banip.utilities.snapshot import write_check_snapshot
+from banip.utilities.spop import FLAG_FIN
+from banip.utilities.spop import MAX_FRAME_SIZE
+from banip.utilities.spop import SPOP_VERSION
+from banip.utilities.spop import Frame
+from banip.utilities.spop import FrameType
+from banip.utilities.spop import SpopError
+from banip.utilities.spop import SpopStatus
+from banip.utilities.spop import VarScope
+from banip.utilities.spop import decode_kv
+from banip.utilities.spop import decode_messages
+from banip.utilities.spop import decode_set_vars
+from banip.utilities.spop import decode_typed
+from banip.utilities.spop import decode_varint
+from banip.utilities.spop import encode_frame
+from banip.utilities.spop import encode_kv
+from banip.utilities.spop import encode_messages
+from banip.utilities.spop import encode_set_vars
+from banip.utilities.spop import encode_typed
+from banip.utilities.spop import encode_varint
+from banip.utilities.spop import read_frame
 
 __all__ = [
+    "CHUNK_SIZE",
+    "FLAG_FIN",
+    "GENERATIONS_KEPT",
+    "GZIP_MAGIC",
+    "MAX_FRAME_SIZE",
+    "SPOP_VERSION",
     "STATUS_MESSAGES",
+    "CheckSnapshot",
+    "ChunkSink",
+    "Containment",
+    "CountryIndex",
+    "CountryStats",
+    "Coverage",
+    "DedupeIndex",
+    "EntryIndex",
+    "FetchResult",
+    "FixedRecords",
+    "Frame",
+    "FrameType",
+    "GeoliteIndex",
+    "HttpClient",
+    "IntervalLookup",
+    "IpsumParser",
+    "JournalEntry",
     "NetworkBounds",
     "NetworkLookup",
+    "SpopError",
+    "SpopStatus",
     "StatusMessages",
+    "TaggedIndex",
+    "Validators",
+    "VarScope",
+    "address_key",
+    "append_ipsum_journal",
+    "build_country_index",
+    "build_entry_index",
+    "build_interval_lookup",
     "build_network_lookup",
+    "build_tagged_index",
+    "cached_ipsum_keys",
+    "check_snapshot",
+    "check_snapshot_sources",
     "clear",
+    "client_token",
+    "coalesce",
     "compact",
+    "compact_ipsum_journal",
+    "compact_keys",
+    "copy_atomic",
+    "country_intervals",
+    "country_stats_path",
+    "coverage",
+    "current_generation",
+    "decode_kv",
+    "decode_messages",
+    "decode_set_vars",
+    "decode_typed",
+    "decode_varint",
+    "dedupe_sidecar",
+    "encode_frame",
+    "encode_kv",
+    "encode_messages",
+    "encode_set_vars",
+    "encode_typed",
+    "encode_varint",
+    "entry_interval",
+    "entry_key",
     "extract_ip",
+    "find_contained",
     "format_status",
+    "generation_files",
+    "generation_path",
+    "geolite_index",
+    "geolite_index_current",
+    "geolite_sources",
     "get_public_ip",
+    "interval_networks",
     "ip_in_network",
+    "ipsum_cache",
+    "ipsum_cache_matches",
+    "ipsum_journal",
+    "is_gzip",
+    "journal_confidence",
+    "journal_lock",
+    "key_address",
+    "key_interval",
+    "key_network",
+    "line_ranges",
+    "list_generations",
+    "load_country_index",
+    "load_country_network_keys",
     "load_country_networks",
+    "load_dedupe_sidecar",
     "load_ipsum",
+    "load_ipsum_keys",
     "load_rendered_blocklist",
+    "load_rendered_blocklist_keys",
+    "load_validators",
     "lookup_country",
+    "network_interval",
+    "network_key",
+    "open_log",
+    "parse_address_key",
+    "parse_geolite",
+    "parse_ipsum",
+    "parse_ipsum_line",
+    "parse_journal_entry",
+    "parse_network_key",
+    "patched_addresses",
     "print_docstring",
+    "publish_generation",
+    "read_check_snapshot",
+    "read_country_stats",
+    "read_frame",
+    "read_geolite_index",
+    "read_ipsum_cache",
+    "read_ipsum_journal",
+    "read_line_range",
+    "read_tokens",
+    "render_address_key",
+    "render_journal_entry",
+    "render_key",
     "render_lines",
+    "render_network_key",
+    "source_stamps",
+    "span_keys",
     "split_hybrid",
+    "staged_file",
     "status_label",
+    "store_ipsum_cache",
+    "summarize_countries",
     "tag_networks",
+    "union_size",
+    "write_atomic",
+    "write_check_snapshot",
+    "write_country_stats",
+    "write_dedupe_sidecar",
+    "write_geolite_index",
+    "write_ipsum_cache",
 ]
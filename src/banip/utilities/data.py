@@ -1,76 +1,497 @@
 """Data-file loading and generation helpers."""
 
 import csv
+import fcntl
 import ipaddress as ipa
+import json
+import math
 import mmap
+import struct
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timedelta
 from pathlib import Path
 
 from rich.console import Console
 
+from banip.constants import CONFIG
 from banip.constants import COUNTRY_NETS_TXT
 from banip.constants import GEOLITE_4
 from banip.constants import GEOLITE_6
 from banip.constants import GEOLITE_LOC
 from banip.constants import IPSUM
 from banip.constants import RENDERED_BLOCKLIST
+from banip.constants import AddressKey
 from banip.constants import AddressType
+from banip.constants import NetworkKey
 from banip.constants import NetworkType
 from banip.utilities.display import format_status
 from banip.utilities.display import status_label
+from banip.utilities.generations import staged_file
+from banip.utilities.generations import write_atomic
+from banip.utilities.intervals import union_size
 from banip.utilities.ip import extract_ip
+from banip.utilities.ip import key_address
+from banip.utilities.ip import parse_address_key
+from banip.utilities.ip import parse_network_key
+from banip.utilities.ip import render_address_key
 from banip.utilities.ip import render_lines
+from banip.utilities.ip import render_network_key
 from banip.utilities.ip import split_hybrid
+from banip.utilities.lookup import CountryIndex
+from banip.utilities.lookup import DedupeIndex
+from banip.utilities.lookup import build_country_index
+from banip.utilities.lookup import country_intervals
+from banip.utilities.snapshot import HEADER_SIZE
+from banip.utilities.snapshot import source_stamps
 
+IPSUM_CACHE_MAGIC = b"BANIPIP1"
+# Magic value, feed mtime_ns and size, then IPv4 and IPv6 record counts.
+IPSUM_CACHE_HEADER = struct.Struct(">8sQQII")
+# Address, split into 64-bit halves for IPv6, and a signed hit count.
+IPSUM_RECORDS = {4: struct.Struct(">Ii"), 6: struct.Struct(">QQi")}
+LOW_64 = (1 << 64) - 1
+GEOLITE_INDEX_MAGIC = b"BANIPGL1"
+# Network records hold the start address, prefix length, and country
+# label number; span records hold coalesced bounds and the label number.
+GEOLITE_RECORDS = {
+    "nets4": struct.Struct(">IBH"),
+    "nets6": struct.Struct(">QQBH"),
+    "spans4": struct.Struct(">IIH"),
+    "spans6": struct.Struct(">QQQQH"),
+}
 
-def tag_networks() -> dict[NetworkType, str]:
-    """Generate the haproxy_geo_ip.txt database.
 
-    This will create a HAProxy-friendly file of global subnets and their
-    associated two-letter country codes.
+@dataclass(frozen=True)
+class GeoliteIndex:
+    """GeoLite country data loaded from the compiled index.
+
+    Parameters
+    ----------
+    networks : dict[NetworkKey, str]
+        GeoLite networks mapped to country labels.
+    intervals : dict[str, dict[int, list[tuple[int, int]]]]
+        Coalesced integer intervals keyed by country label and then by
+        IP version, as returned by :func:`country_intervals`.
+    """
+
+    networks: dict[NetworkKey, str]
+    intervals: dict[str, dict[int, list[tuple[int, int]]]]
+
+
+def geolite_sources() -> dict[str, Path]:
+    """Return the GeoLite CSV files keyed by a stable label.
 
     Returns
     -------
-    dict[NetworkType, str]
-        The generated database as a dictionary for reuse by other
-        commands.
+    dict[str, Path]
+        GeoLite input paths.
+    """
+    return {"geolite_4": GEOLITE_4, "geolite_6": GEOLITE_6, "geolite_loc": GEOLITE_LOC}
+
+
+def geolite_index() -> Path:
+    """Return the compiled GeoLite index path.
+
+    Returns
+    -------
+    Path
+        Binary index path next to the GeoLite directory.
+    """
+    return GEOLITE_4.parent.with_name("geolite_index.bin")
+
+
+def parse_geolite() -> dict[NetworkKey, str]:
+    """Geotag every network in the GeoLite CSV files.
+
+    Returns
+    -------
+    dict[NetworkKey, str]
+        GeoLite networks mapped to country labels.
+
+    Raises
+    ------
+    ValueError
+        If a GeoLite network is not valid.
     """
     countries: dict[int, str] = {}
-    networks: dict[NetworkType, str] = {}
-    console = Console()
+    networks: dict[NetworkKey, str] = {}
+    with GEOLITE_LOC.open("r") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for country in reader:
+            if not (cic := country[4]):
+                cic = country[2]
+            countries[int(country[0])] = cic
 
-    msg = status_label("geo_pull")
-    with console.status(msg):
-        with GEOLITE_LOC.open("r") as f:
+    for geolite_file in [GEOLITE_4, GEOLITE_6]:
+        with geolite_file.open("r") as f:
             reader = csv.reader(f)
             next(reader)
-            for country in reader:
-                if not (cic := country[4]):
-                    cic = country[2]
-                countries[int(country[0])] = cic
-    print(format_status("geo_pull"))
+            for net in reader:
+                try:
+                    country_id = countries[int(net[1])]
+                except ValueError:
+                    country_id = countries[int(net[2])]
+                if not (key := parse_network_key(net[0])):
+                    raise ValueError(f"Invalid GeoLite2 network: {net[0]}")
+                networks[key] = country_id
+    return networks
 
-    msg = status_label("geo_tag")
-    with console.status(msg):
-        for geolite_file in [GEOLITE_4, GEOLITE_6]:
-            with geolite_file.open("r") as f:
-                reader = csv.reader(f)
-                next(reader)
-                for net in reader:
-                    try:
-                        country_id = countries[int(net[1])]
-                    except ValueError:
-                        country_id = countries[int(net[2])]
-                    networks[ipa.ip_network(net[0])] = country_id
-    print(format_status("geo_tag"))
+
+def split_value(version: int, value: int) -> tuple[int, ...]:
+    """Split an address into the integer fields of a record.
+
+    Parameters
+    ----------
+    version : int
+        IP version, either 4 or 6.
+    value : int
+        Address as an integer.
+
+    Returns
+    -------
+    tuple[int, ...]
+        The address for IPv4, or its high and low 64 bits for IPv6.
+    """
+    return (value,) if version == 4 else (value >> 64, value & LOW_64)
+
+
+def write_geolite_index(
+    networks: dict[NetworkKey, str],
+    intervals: dict[str, dict[int, list[tuple[int, int]]]],
+) -> None:
+    """Write GeoLite networks and coalesced country intervals.
+
+    The index holds a magic value, a JSON header with the GeoLite source
+    stamps and country labels, and fixed-width big-endian record
+    sections for each address family. Country labels are stored as
+    indexes into the header's label list.
+
+    Parameters
+    ----------
+    networks : dict[NetworkKey, str]
+        GeoLite networks mapped to country labels.
+    intervals : dict[str, dict[int, list[tuple[int, int]]]]
+        Coalesced country intervals from :func:`country_intervals`.
+    """
+    codes = sorted({*networks.values(), *intervals})
+    numbers = {code: number for number, code in enumerate(codes)}
+    sections: dict[str, list[int]] = {}
+    chunks: list[bytes] = []
+    offset = 0
+    for version in (4, 6):
+        for name, records in (
+            (
+                f"nets{version}",
+                [
+                    GEOLITE_RECORDS[f"nets{version}"].pack(
+                        *split_value(version, start), prefixlen, numbers[code]
+                    )
+                    for (family, start, prefixlen), code in sorted(networks.items())
+                    if family == version
+                ],
+            ),
+            (
+                f"spans{version}",
+                [
+                    GEOLITE_RECORDS[f"spans{version}"].pack(
+                        *split_value(version, first),
+                        *split_value(version, last),
+                        numbers[code],
+                    )
+                    for code in codes
+                    for first, last in intervals.get(code, {}).get(version, [])
+                ],
+            ),
+        ):
+            chunk = b"".join(records)
+            sections[name] = [offset, len(records)]
+            chunks.append(chunk)
+            offset += len(chunk)
+
+    header = {
+        "sources": source_stamps(geolite_sources()),
+        "codes": codes,
+        "sections": sections,
+    }
+    encoded = json.dumps(header).encode()
+    index = geolite_index()
+    with staged_file(index) as tmp_path, tmp_path.open("wb") as f:
+        f.write(GEOLITE_INDEX_MAGIC)
+        f.write(len(encoded).to_bytes(HEADER_SIZE))
+        f.write(encoded)
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def read_geolite_header(data: bytes) -> dict | None:
+    """Decode a compiled GeoLite index header when it is current.
+
+    Parameters
+    ----------
+    data : bytes
+        Index contents, or at least its leading header.
+
+    Returns
+    -------
+    dict | None
+        Decoded header, or None when it is malformed or older than the
+        GeoLite files.
+    """
+    prefix = len(GEOLITE_INDEX_MAGIC) + HEADER_SIZE
+    if data[: len(GEOLITE_INDEX_MAGIC)] != GEOLITE_INDEX_MAGIC:
+        return None
+    length = int.from_bytes(data[len(GEOLITE_INDEX_MAGIC) : prefix])
+    try:
+        header = json.loads(data[prefix : prefix + length])
+    except ValueError:
+        return None
+    if not isinstance(header, dict) or header.get("sources") != source_stamps(
+        geolite_sources()
+    ):
+        return None
+    header["offset"] = prefix + length
+    return header
+
+
+def read_geolite_index() -> GeoliteIndex | None:
+    """Load the compiled GeoLite index when it matches the GeoLite files.
+
+    Returns
+    -------
+    GeoliteIndex | None
+        Networks and coalesced country intervals, or None when the index
+        is missing, malformed, or older than the GeoLite files.
+    """
+    try:
+        data = geolite_index().read_bytes()
+    except OSError:
+        return None
+    if not (header := read_geolite_header(data)):
+        return None
+    try:
+        codes: list[str] = header["codes"]
+        view = memoryview(data)[header["offset"] :]
+        sections = {
+            name: GEOLITE_RECORDS[name].iter_unpack(
+                view[offset : offset + count * GEOLITE_RECORDS[name].size]
+            )
+            for name, (offset, count) in header["sections"].items()
+        }
+        networks: dict[NetworkKey, str] = {
+            (4, start, prefixlen): codes[code]
+            for start, prefixlen, code in sections["nets4"]
+        }
+        for high, low, prefixlen, code in sections["nets6"]:
+            networks[(6, high << 64 | low, prefixlen)] = codes[code]
+        intervals: dict[str, dict[int, list[tuple[int, int]]]] = {}
+        for first, last, code in sections["spans4"]:
+            intervals.setdefault(codes[code], {4: [], 6: []})[4].append((first, last))
+        for first_high, first_low, last_high, last_low, code in sections["spans6"]:
+            intervals.setdefault(codes[code], {4: [], 6: []})[6].append(
+                (first_high << 64 | first_low, last_high << 64 | last_low)
+            )
+    except (IndexError, KeyError, TypeError, ValueError, struct.error):
+        return None
+    return GeoliteIndex(networks, intervals)
+
+
+def geolite_index_current() -> bool:
+    """Return whether the compiled GeoLite index matches the GeoLite files.
+
+    Only the index header is read.
+
+    Returns
+    -------
+    bool
+        True when the index exists and is current.
+    """
+    try:
+        with geolite_index().open("rb") as f:
+            prefix = f.read(len(GEOLITE_INDEX_MAGIC) + HEADER_SIZE)
+            length = int.from_bytes(prefix[len(GEOLITE_INDEX_MAGIC) :])
+            data = prefix + f.read(length)
+    except OSError:
+        return False
+    return read_geolite_header(data) is not None
+
+
+@dataclass(frozen=True)
+class CountryStats:
+    """Network and address counts for one country.
+
+    Parameters
+    ----------
+    networks4 : int
+        IPv4 networks mapped to the country.
+    networks6 : int
+        IPv6 networks mapped to the country.
+    addresses4 : int
+        Distinct IPv4 addresses covered by those networks.
+    addresses6 : int
+        Distinct IPv6 addresses covered by those networks.
+    """
+
+    networks4: int
+    networks6: int
+    addresses4: int
+    addresses6: int
+
+
+def country_stats_path() -> Path:
+    """Return the path of the per-country statistics index.
+
+    Returns
+    -------
+    Path
+        Index path next to the country network map.
+    """
+    return COUNTRY_NETS_TXT.with_name("country_stats.json")
+
+
+def summarize_countries(
+    networks: dict[NetworkKey, str],
+    intervals: dict[str, dict[int, list[tuple[int, int]]]] | None = None,
+) -> dict[str, CountryStats]:
+    """Count the networks and addresses mapped to each country.
+
+    Parameters
+    ----------
+    networks : dict[NetworkKey, str]
+        Networks mapped to country labels.
+    intervals : dict[str, dict[int, list[tuple[int, int]]]] | None, optional
+        Coalesced intervals from :func:`country_intervals`, when already
+        computed. Defaults to None.
+
+    Returns
+    -------
+    dict[str, CountryStats]
+        Counts keyed by country label, in label order.
+    """
+    if intervals is None:
+        intervals = country_intervals(networks)
+    counts = Counter((country, key[0]) for key, country in networks.items())
+    return {
+        country: CountryStats(
+            networks4=counts[country, 4],
+            networks6=counts[country, 6],
+            addresses4=union_size(families.get(4, [])),
+            addresses6=union_size(families.get(6, [])),
+        )
+        for country, families in sorted(intervals.items())
+    }
+
+
+def write_country_stats(stats: dict[str, CountryStats]) -> None:
+    """Write the per-country statistics index.
+
+    The index records the modification stamp of the country network
+    map, so it is ignored once the map changes without it.
+
+    Parameters
+    ----------
+    stats : dict[str, CountryStats]
+        Counts keyed by country label.
+    """
+    index = {
+        "sources": source_stamps({"countries": COUNTRY_NETS_TXT}),
+        "countries": {
+            country: [
+                counts.networks4,
+                counts.networks6,
+                counts.addresses4,
+                counts.addresses6,
+            ]
+            for country, counts in stats.items()
+        },
+    }
+    write_atomic(country_stats_path(), json.dumps(index) + "\n")
+
+
+def read_country_stats() -> dict[str, CountryStats] | None:
+    """Read the per-country statistics index when it is current.
+
+    Returns
+    -------
+    dict[str, CountryStats] | None
+        Counts keyed by country label, or None when the index is
+        missing, unreadable, or older than the country network map.
+    """
+    try:
+        index = json.loads(country_stats_path().read_text())
+        if index["sources"] != source_stamps({"countries": COUNTRY_NETS_TXT}):
+            return None
+        return {
+            country: CountryStats(*counts)
+            for country, counts in index["countries"].items()
+        }
+    except (OSError, KeyError, TypeError, ValueError):
+        return None
+
+
+def load_country_network_keys() -> dict[NetworkKey, str]:
+    """Load the HAProxy country network map keyed by integer network key.
+
+    Returns
+    -------
+    dict[NetworkKey, str]
+        Country labels keyed by network.
+    """
+    networks: dict[NetworkKey, str] = {}
+    with COUNTRY_NETS_TXT.open("r") as f:
+        for line in f:
+            try:
+                network_text, country_code = line.split(maxsplit=1)
+            except ValueError:
+                continue
+            if key := parse_network_key(network_text):
+                networks[key] = country_code.strip()
+    return networks
+
+
+def tag_networks(compiled: GeoliteIndex | None = None) -> dict[NetworkKey, str]:
+    """Generate the haproxy_geo_ip.txt database.
+
+    This will create a HAProxy-friendly file of global subnets and their
+    associated two-letter country codes, along with the per-country
+    statistics index read by the stats command.
+
+    Parameters
+    ----------
+    compiled : GeoliteIndex | None, optional
+        Compiled GeoLite index to use instead of parsing the GeoLite CSV
+        files. Defaults to None.
+
+    Returns
+    -------
+    dict[NetworkKey, str]
+        The generated database keyed by integer network key for reuse by
+        other commands.
+    """
+    console = Console()
+
+    if compiled is not None:
+        networks = compiled.networks
+    else:
+        msg = status_label("geo_tag")
+        with console.status(msg):
+            networks = parse_geolite()
+        print(format_status("geo_tag"))
 
     msg = status_label("build_products")
     with console.status(msg):
-        keys = sorted(
-            networks,
-            key=lambda network: (network.version, int(network.network_address)),
+        keys = sorted(networks, key=lambda key: (key[0], key[1]))
+        write_atomic(
+            COUNTRY_NETS_TXT,
+            render_lines(f"{render_network_key(key)} {networks[key]}" for key in keys),
         )
-        COUNTRY_NETS_TXT.write_text(
-            render_lines(f"{format(key)} {networks[key]}" for key in keys)
+        write_country_stats(
+            summarize_countries(networks, compiled.intervals if compiled else None)
         )
     print(format_status("build_products"))
 
@@ -151,38 +572,845 @@ def load_country_networks() -> dict[NetworkType, str]:
     return networks
 
 
-def load_ipsum() -> dict[AddressType, int]:
-    """Load the ipsum.txt file into a dictionary.
+def load_country_index(path: Path | None = None) -> CountryIndex:
+    """Load the HAProxy country network map into an in-memory index.
+
+    Parameters
+    ----------
+    path : Path | None, optional
+        Country network map to load. Defaults to None, which loads the
+        map in the data directory.
 
     Returns
     -------
-    dict[AddressType, int]
-        The contents of ipsum.txt as a dictionary.
+    CountryIndex
+        Country lookup keyed by integer address.
     """
-    with IPSUM.open("r") as f:
-        ipsum: dict[AddressType, int] = {}
+    networks: list[tuple[NetworkKey, str]] = []
+    with (path or COUNTRY_NETS_TXT).open("r") as f:
         for line in f:
-            parts = line.strip().split()
             try:
-                ip = ipa.ip_address(parts[0])
-                hits = int(parts[1])
-            except (IndexError, ValueError):
+                network_text, country_code = line.split(maxsplit=1)
+            except ValueError:
                 continue
-            ipsum[ip] = hits
+            if key := parse_network_key(network_text):
+                networks.append((key, country_code.strip()))
+    return build_country_index(networks)
+
+
+def ipsum_cache(path: Path) -> Path:
+    """Return the parsed-feed cache path for an ipsum file.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+
+    Returns
+    -------
+    Path
+        Binary cache path next to the feed.
+    """
+    return path.with_name(f"{path.stem}_cache.bin")
+
+
+def parse_ipsum_line(line: str) -> tuple[AddressKey, int] | None:
+    """Parse one ipsum feed record.
+
+    Parameters
+    ----------
+    line : str
+        Feed line holding an address and its hit count.
+
+    Returns
+    -------
+    tuple[AddressKey, int] | None
+        Address key and hit count, or None for comments, blank lines,
+        and malformed records.
+    """
+    parts = line.split()
+    try:
+        hits = int(parts[1])
+    except (IndexError, ValueError):
+        return None
+    if key := parse_address_key(parts[0]):
+        return key, hits
+    return None
+
+
+def parse_ipsum(path: Path) -> dict[AddressKey, int]:
+    """Parse an ipsum feed keyed by integer address key.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+
+    Returns
+    -------
+    dict[AddressKey, int]
+        Hit counts keyed by address.
+    """
+    with path.open("r") as f:
+        ipsum: dict[AddressKey, int] = {}
+        for line in f:
+            if record := parse_ipsum_line(line):
+                ipsum[record[0]] = record[1]
+
+    return ipsum
+
+
+@dataclass
+class IpsumParser:
+    """Parse an ipsum feed from the chunks of a streamed download.
+
+    Instances are passed to :meth:`HttpClient.download` so the feed is
+    parsed while it arrives rather than reread from disk afterwards.
+
+    Parameters
+    ----------
+    ipsum : dict[AddressKey, int], optional
+        Hit counts parsed so far, keyed by address. Defaults to empty.
+    tail : bytes, optional
+        Incomplete last line of the chunks received so far. Defaults to
+        empty bytes.
+    """
+
+    ipsum: dict[AddressKey, int] = field(default_factory=dict)
+    tail: bytes = b""
+
+    def reset(self) -> None:
+        """Discard parsed records before the download starts over."""
+        self.ipsum.clear()
+        self.tail = b""
+
+    def update(self, chunk: bytes) -> None:
+        """Parse the complete lines of the next chunk.
+
+        Parameters
+        ----------
+        chunk : bytes
+            Next piece of the feed.
+        """
+        lines = (self.tail + chunk).split(b"\n")
+        self.tail = lines.pop()
+        for line in lines:
+            if record := parse_ipsum_line(line.decode(errors="replace")):
+                self.ipsum[record[0]] = record[1]
+
+    def finish(self) -> dict[AddressKey, int]:
+        """Parse any final unterminated line and return the feed.
+
+        Returns
+        -------
+        dict[AddressKey, int]
+            Hit counts keyed by address.
+        """
+        self.update(b"\n")
+        return self.ipsum
+
+
+def write_ipsum_cache(path: Path, ipsum: dict[AddressKey, int]) -> None:
+    """Write parsed ipsum data next to the feed it came from.
+
+    The cache holds a header with the feed's modification stamp and
+    fixed-width big-endian records for each address family.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+    ipsum : dict[AddressKey, int]
+        Hit counts parsed from the feed.
+
+    Raises
+    ------
+    struct.error
+        If a hit count does not fit a signed 32-bit record.
+    """
+    stat = path.stat()
+    ipv4 = sorted(
+        (value, hits) for (version, value), hits in ipsum.items() if version == 4
+    )
+    ipv6 = sorted(
+        (value, hits) for (version, value), hits in ipsum.items() if version == 6
+    )
+    chunks = [
+        IPSUM_CACHE_HEADER.pack(
+            IPSUM_CACHE_MAGIC, stat.st_mtime_ns, stat.st_size, len(ipv4), len(ipv6)
+        ),
+        *(IPSUM_RECORDS[4].pack(value, hits) for value, hits in ipv4),
+        *(
+            IPSUM_RECORDS[6].pack(value >> 64, value & LOW_64, hits)
+            for value, hits in ipv6
+        ),
+    ]
+    write_atomic(ipsum_cache(path), b"".join(chunks))
+
+
+def store_ipsum_cache(path: Path, ipsum: dict[AddressKey, int]) -> None:
+    """Write the ipsum cache, leaving it to be rebuilt on failure.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+    ipsum : dict[AddressKey, int]
+        Hit counts parsed from the feed.
+    """
+    try:
+        write_ipsum_cache(path, ipsum)
+    except (OSError, struct.error):
+        pass
+
+
+def read_ipsum_cache(path: Path) -> dict[AddressKey, int] | None:
+    """Read parsed ipsum data when the cache matches the feed.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+
+    Returns
+    -------
+    dict[AddressKey, int] | None
+        Hit counts keyed by address, or None when the cache is missing,
+        malformed, or older than the feed.
+    """
+    try:
+        stat = path.stat()
+        data = ipsum_cache(path).read_bytes()
+        magic, mtime_ns, size, count4, count6 = IPSUM_CACHE_HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    end4 = IPSUM_CACHE_HEADER.size + count4 * IPSUM_RECORDS[4].size
+    end6 = end4 + count6 * IPSUM_RECORDS[6].size
+    if (
+        magic != IPSUM_CACHE_MAGIC
+        or (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size)
+        or len(data) != end6
+    ):
+        return None
+    records = memoryview(data)
+    ipsum: dict[AddressKey, int] = {
+        (4, value): hits
+        for value, hits in IPSUM_RECORDS[4].iter_unpack(
+            records[IPSUM_CACHE_HEADER.size : end4]
+        )
+    }
+    for high, low, hits in IPSUM_RECORDS[6].iter_unpack(records[end4:end6]):
+        ipsum[(6, high << 64 | low)] = hits
+    return ipsum
+
+
+def ipsum_cache_matches(path: Path) -> bool:
+    """Return whether the ipsum cache matches the feed.
+
+    Only the cache header and size are read.
 
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+
+    Returns
+    -------
+    bool
+        True when the cache exists and is current.
+    """
+    cache = ipsum_cache(path)
+    try:
+        stat = path.stat()
+        with cache.open("rb") as f:
+            header = f.read(IPSUM_CACHE_HEADER.size)
+        magic, mtime_ns, size, count4, count6 = IPSUM_CACHE_HEADER.unpack(header)
+        length = cache.stat().st_size
+    except (OSError, struct.error):
+        return False
+    return (
+        magic == IPSUM_CACHE_MAGIC
+        and (mtime_ns, size) == (stat.st_mtime_ns, stat.st_size)
+        and length
+        == IPSUM_CACHE_HEADER.size
+        + count4 * IPSUM_RECORDS[4].size
+        + count6 * IPSUM_RECORDS[6].size
+    )
+
+
+def cached_ipsum_keys(path: Path) -> dict[AddressKey, int]:
+    """Load an ipsum feed through its binary cache.
+
+    Parsed data is read from the cache next to the feed when it is
+    current. Otherwise the feed is parsed and the cache refreshed.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+
+    Returns
+    -------
+    dict[AddressKey, int]
+        Hit counts keyed by address.
+    """
+    if (ipsum := read_ipsum_cache(path)) is not None:
+        return ipsum
+    ipsum = parse_ipsum(path)
+    store_ipsum_cache(path, ipsum)
     return ipsum
 
 
-def load_rendered_blocklist() -> tuple[list[AddressType], list[NetworkType]]:
+@dataclass(frozen=True)
+class JournalEntry:
+    """One address added to the ipsum data by the patch command.
+
+    Parameters
+    ----------
+    key : AddressKey
+        Patched address.
+    confidence : int
+        Confidence factor assigned to the address.
+    source : str
+        Name of the file the address was read from.
+    timestamp : datetime
+        Time the entry was recorded.
+    expires : datetime | None, optional
+        Time the entry stops applying, or None when it never expires.
+        Defaults to None.
+    decay : bool, optional
+        Whether the confidence falls linearly from ``confidence`` at
+        ``timestamp`` to zero at ``expires`` instead of staying fixed
+        until then. Defaults to False.
+    """
+
+    key: AddressKey
+    confidence: int
+    source: str
+    timestamp: datetime
+    expires: datetime | None = None
+    decay: bool = False
+
+    def weight(self, moment: datetime) -> float:
+        """Return the unrounded confidence at a moment, ignoring expiry.
+
+        Parameters
+        ----------
+        moment : datetime
+            Time at which the schedule is evaluated.
+
+        Returns
+        -------
+        float
+            Fixed confidence, or the point on the decay line.
+        """
+        if not self.decay or self.expires is None:
+            return float(self.confidence)
+        lifetime = (self.expires - self.timestamp).total_seconds()
+        remaining = (self.expires - moment).total_seconds()
+        return self.confidence * remaining / lifetime if lifetime > 0 else 0.0
+
+    def confidence_at(self, moment: datetime) -> int | None:
+        """Return the confidence that applies at a moment.
+
+        Parameters
+        ----------
+        moment : datetime
+            Time at which the entry is evaluated.
+
+        Returns
+        -------
+        int | None
+            Confidence factor, rounded up while the entry decays, or
+            None once the entry has expired.
+        """
+        if self.expires is not None and moment >= self.expires:
+            return None
+        return math.ceil(self.weight(moment))
+
+    def covers(self, other: "JournalEntry", moment: datetime) -> bool:
+        """Return whether this entry makes another one redundant.
+
+        Fixed and decaying confidences are linear between ``moment``
+        and the other entry's expiry, so comparing both ends of that
+        span is enough.
+
+        Parameters
+        ----------
+        other : JournalEntry
+            Entry for the same address.
+        moment : datetime
+            Time from which the entries are compared.
+
+        Returns
+        -------
+        bool
+            True when this entry applies at least as long as ``other``
+            and its confidence is never lower.
+        """
+        if other.expires is None:
+            return self.expires is None and self.weight(moment) >= other.weight(moment)
+        if self.expires is not None and self.expires < other.expires:
+            return False
+        end = other.expires
+        final = 0.0 if other.decay else float(other.confidence)
+        return self.weight(moment) >= other.weight(moment) and self.weight(end) >= final
+
+
+def ipsum_journal(path: Path) -> Path:
+    """Return the patch journal path for an ipsum file.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+
+    Returns
+    -------
+    Path
+        Append-only journal path next to the feed.
+    """
+    return path.with_name(f"{path.stem}_journal.log")
+
+
+@contextmanager
+def journal_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on the ipsum patch journal.
+
+    The lock is taken on a sidecar file rather than the journal itself,
+    because compaction replaces the journal and a lock on the replaced
+    file would no longer exclude writers that open the new one.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+
+    Yields
+    ------
+    None
+        Control while the lock is held.
+    """
+    with ipsum_journal(path).with_suffix(".lock").open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def render_journal_entry(entry: JournalEntry) -> str:
+    """Return the journal line for an entry.
+
+    Parameters
+    ----------
+    entry : JournalEntry
+        Entry to render.
+
+    Returns
+    -------
+    str
+        Tab-separated address, confidence, source, and timestamp,
+        followed by the expiry and ``decay`` or ``fixed`` for entries
+        that expire, and a newline.
+    """
+    source = " ".join(entry.source.split())
+    fields = [
+        render_address_key(entry.key),
+        str(entry.confidence),
+        source,
+        entry.timestamp.isoformat(timespec="seconds"),
+    ]
+    if entry.expires is not None:
+        fields.append(entry.expires.isoformat(timespec="seconds"))
+        fields.append("decay" if entry.decay else "fixed")
+    return "\t".join(fields) + "\n"
+
+
+def parse_journal_entry(line: str) -> JournalEntry | None:
+    """Parse one patch journal line.
+
+    Parameters
+    ----------
+    line : str
+        Journal line.
+
+    Returns
+    -------
+    JournalEntry | None
+        Parsed entry, or None for malformed lines, such as a final line
+        left incomplete by an interrupted patch.
+    """
+    parts = line.rstrip("\n").split("\t")
+    if len(parts) not in (4, 6) or not line.endswith("\n"):
+        return None
+    try:
+        confidence = int(parts[1])
+        # Times without an offset are taken as local time.
+        timestamp = datetime.fromisoformat(parts[3]).astimezone()
+        expires = (
+            datetime.fromisoformat(parts[4]).astimezone() if len(parts) == 6 else None
+        )
+    except ValueError:
+        return None
+    if expires is not None and parts[5] not in ("decay", "fixed"):
+        return None
+    if key := parse_address_key(parts[0]):
+        decay = len(parts) == 6 and parts[5] == "decay"
+        return JournalEntry(key, confidence, parts[2], timestamp, expires, decay)
+    return None
+
+
+def append_ipsum_journal(
+    path: Path,
+    confidence: dict[AddressKey, int],
+    source: str,
+    lifetime: timedelta | None = None,
+    decay: bool = False,
+) -> int:
+    """Record patched addresses at the end of the ipsum patch journal.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+    confidence : dict[AddressKey, int]
+        Confidence factors keyed by patched address.
+    source : str
+        Name of the file the addresses were read from.
+    lifetime : timedelta | None, optional
+        Time until the entries expire, or None to keep them until the
+        journal is edited. Defaults to None.
+    decay : bool, optional
+        Whether confidence falls linearly to zero over ``lifetime``.
+        Defaults to False.
+
+    Returns
+    -------
+    int
+        Number of entries appended.
+    """
+    timestamp = datetime.now().astimezone().replace(microsecond=0)
+    expires = timestamp + lifetime if lifetime is not None else None
+    lines = "".join(
+        render_journal_entry(
+            JournalEntry(key, value, source, timestamp, expires, decay)
+        )
+        for key, value in confidence.items()
+    )
+    with journal_lock(path), ipsum_journal(path).open("a") as f:
+        f.write(lines)
+    return len(confidence)
+
+
+def read_ipsum_journal(path: Path) -> list[JournalEntry]:
+    """Read the ipsum patch journal in the order entries were recorded.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+
+    Returns
+    -------
+    list[JournalEntry]
+        Journal entries, or an empty list when nothing was patched.
+    """
+    try:
+        with ipsum_journal(path).open("r") as f:
+            return [entry for line in f if (entry := parse_journal_entry(line))]
+    except FileNotFoundError:
+        return []
+
+
+def journal_confidence(
+    entries: list[JournalEntry], moment: datetime | None = None
+) -> dict[AddressKey, int]:
+    """Return the highest confidence that applies to each patched address.
+
+    Expiry and decay are evaluated here, when the journal is loaded, so
+    the journal never needs rewriting as entries age.
+
+    Parameters
+    ----------
+    entries : list[JournalEntry]
+        Journal entries.
+    moment : datetime | None, optional
+        Time at which entries are evaluated. Defaults to now.
+
+    Returns
+    -------
+    dict[AddressKey, int]
+        Confidence factors of addresses with an active entry, keyed by
+        address in address order.
+    """
+    moment = moment or datetime.now().astimezone()
+    patched: dict[AddressKey, int] = {}
+    for entry in sorted(entries, key=lambda entry: entry.key):
+        if (confidence := entry.confidence_at(moment)) is not None:
+            patched[entry.key] = max(patched.get(entry.key, 0), confidence)
+    return patched
+
+
+def patched_addresses(moment: datetime | None = None) -> tuple[int, int]:
+    """Count patched addresses that are active and that have expired.
+
+    Parameters
+    ----------
+    moment : datetime | None, optional
+        Time at which entries are evaluated. Defaults to now.
+
+    Returns
+    -------
+    tuple[int, int]
+        Addresses with an active journal entry, and addresses whose
+        entries have all expired.
+    """
+    entries = read_ipsum_journal(IPSUM)
+    active = len(journal_confidence(entries, moment))
+    return active, len({entry.key for entry in entries}) - active
+
+
+def compacted_entries(
+    entries: list[JournalEntry], moment: datetime
+) -> list[JournalEntry]:
+    """Return the journal entries that survive compaction.
+
+    Parameters
+    ----------
+    entries : list[JournalEntry]
+        Journal entries in the order they were recorded.
+    moment : datetime
+        Time at which entries are evaluated.
+
+    Returns
+    -------
+    list[JournalEntry]
+        Entries that are neither expired nor redundant, grouped by
+        address and in journal order within each address.
+    """
+    candidates: dict[AddressKey, list[JournalEntry]] = {}
+    for entry in reversed(entries):
+        if entry.confidence_at(moment) is not None:
+            candidates.setdefault(entry.key, []).append(entry)
+
+    kept: list[JournalEntry] = []
+    for key in sorted(candidates):
+        survivors: list[JournalEntry] = []
+        for entry in candidates[key]:
+            if not any(other.covers(entry, moment) for other in survivors):
+                survivors = [
+                    other for other in survivors if not entry.covers(other, moment)
+                ]
+                survivors.append(entry)
+        kept.extend(reversed(survivors))
+    return kept
+
+
+def compact_ipsum_journal(
+    path: Path, moment: datetime | None = None
+) -> tuple[int, int]:
+    """Rewrite the patch journal without expired or redundant entries.
+
+    An entry is redundant when another entry for the same address
+    applies at least as long with a confidence that is never lower. The
+    latest of equivalent entries is kept, so a journal without expiring
+    entries ends up with one entry per address.
+
+    Parameters
+    ----------
+    path : Path
+        Ipsum feed path.
+    moment : datetime | None, optional
+        Time at which entries are evaluated. Defaults to now.
+
+    Returns
+    -------
+    tuple[int, int]
+        Entries before and after compaction.
+    """
+    moment = moment or datetime.now().astimezone()
+    with journal_lock(path):
+        entries = read_ipsum_journal(path)
+        kept = compacted_entries(entries, moment)
+        if entries:
+            write_atomic(ipsum_journal(path), "".join(map(render_journal_entry, kept)))
+    return len(entries), len(kept)
+
+
+def load_ipsum_keys(path: Path | None = None) -> dict[AddressKey, int]:
+    """Load the ipsum.txt file keyed by integer address key.
+
+    Addresses from the patch journal are overlaid on the feed, raising
+    the confidence of an address only when the journal records a higher
+    value.
+
+    Parameters
+    ----------
+    path : Path | None, optional
+        Copy of ipsum.txt to load, such as the one held by a data
+        generation. Its binary cache is read when current but never
+        written. Defaults to None, which loads the feed in the data
+        directory through its cache.
+
+    Returns
+    -------
+    dict[AddressKey, int]
+        The contents of ipsum.txt as a dictionary.
+    """
+    if path is None or path == IPSUM:
+        ipsum = cached_ipsum_keys(IPSUM)
+    elif (cached := read_ipsum_cache(path)) is not None:
+        ipsum = cached
+    else:
+        ipsum = parse_ipsum(path)
+    for key, confidence in journal_confidence(read_ipsum_journal(IPSUM)).items():
+        if ipsum.get(key, 0) < confidence:
+            ipsum[key] = confidence
+    return ipsum
+
+
+def load_ipsum(path: Path | None = None) -> dict[AddressType, int]:
+    """Load the ipsum.txt file into a dictionary.
+
+    Parameters
+    ----------
+    path : Path | None, optional
+        Copy of ipsum.txt to load. Defaults to None, which loads the
+        feed in the data directory.
+
+    Returns
+    -------
+    dict[AddressType, int]
+        The contents of ipsum.txt as a dictionary.
+    """
+    return {key_address(key): hits for key, hits in load_ipsum_keys(path).items()}
+
+
+def load_rendered_blocklist(
+    path: Path | None = None,
+) -> tuple[list[AddressType], list[NetworkType]]:
     """Load the contents of the rendered blocklist.
 
     Separate it into sorted lists of IP addresses and networks.
 
+    Parameters
+    ----------
+    path : Path | None, optional
+        Rendered blocklist to load. Defaults to None, which loads the
+        blocklist in the data directory.
+
     Returns
     -------
     tuple[list[AddressType], list[NetworkType]]
         The rendered blocklist split into IP addresses and networks.
     """
-    with RENDERED_BLOCKLIST.open("r") as f:
+    with (path or RENDERED_BLOCKLIST).open("r") as f:
         rendered = [token for line in f if (token := extract_ip(line.strip()))]
     return split_hybrid(rendered)
+
+
+def load_rendered_blocklist_keys() -> tuple[list[AddressKey], list[NetworkKey]]:
+    """Load the rendered blocklist as integer keys.
+
+    Returns
+    -------
+    tuple[list[AddressKey], list[NetworkKey]]
+        Address keys and network keys in file order.
+    """
+    ips: list[AddressKey] = []
+    nets: list[NetworkKey] = []
+    with RENDERED_BLOCKLIST.open("r") as f:
+        for line in f:
+            token = line.strip()
+            if not token or token.startswith("#"):
+                continue
+            if "/" in token:
+                if network := parse_network_key(token):
+                    nets.append(network)
+            elif address := parse_address_key(token):
+                ips.append(address)
+    return ips, nets
+
+
+def check_snapshot_sources() -> dict[str, Path]:
+    """Return the files a check snapshot is derived from.
+
+    Returns
+    -------
+    dict[str, Path]
+        Source paths keyed by the labels stored in the snapshot.
+    """
+    return {
+        "config": CONFIG,
+        "countries": COUNTRY_NETS_TXT,
+        "blocklist": RENDERED_BLOCKLIST,
+        "ipsum": IPSUM,
+        "journal": ipsum_journal(IPSUM),
+    }
+
+
+def dedupe_sidecar(path: Path) -> Path:
+    """Return the provenance sidecar path for a rendered blocklist.
+
+    Parameters
+    ----------
+    path : Path
+        Rendered blocklist path.
+
+    Returns
+    -------
+    Path
+        JSON sidecar path next to the blocklist.
+    """
+    return path.with_name(f"{path.stem}_dedupe.json")
+
+
+def write_dedupe_sidecar(path: Path, records: list[dict[str, str]]) -> None:
+    """Write provenance records for deduplicated blocklist entries.
+
+    Parameters
+    ----------
+    path : Path
+        Sidecar destination.
+    records : list[dict[str, str]]
+        Records with ``entry``, ``section``, ``covered_by``, and
+        ``covered_by_section`` values.
+    """
+    write_atomic(path, json.dumps({"dropped": records}, indent=2) + "\n")
+
+
+def load_dedupe_sidecar(path: Path) -> DedupeIndex:
+    """Load deduplication provenance written next to a blocklist.
+
+    Parameters
+    ----------
+    path : Path
+        Sidecar path.
+
+    Returns
+    -------
+    DedupeIndex
+        Provenance notes keyed by dropped network. The index is empty
+        when the sidecar is missing or malformed.
+    """
+    notes: dict[NetworkType, list[str]] = {}
+    try:
+        records = json.loads(path.read_text()).get("dropped", [])
+    except (OSError, ValueError, AttributeError):
+        return DedupeIndex({})
+    if not isinstance(records, list):
+        return DedupeIndex({})
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        try:
+            network = ipa.ip_network(record["entry"])
+            note = (
+                f"{record['section']} {record['entry']} "
+                f"(covered by {record['covered_by_section']} {record['covered_by']})"
+            )
+        except (KeyError, ValueError):
+            continue
+        notes.setdefault(network, []).append(note)
+    return DedupeIndex({network: tuple(items) for network, items in notes.items()})
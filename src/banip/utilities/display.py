@@ -91,20 +91,29 @@ STATUS_MESSAGES = StatusMessages(
     {
         "analyze": "Analyzing",
         "blocklist_rendered_load": "Loading rendered blocklist",
+        "bots_load": "Loading managed bot ranges",
         "build_products": "Generating build products",
         "country_filter": "Filtering networks",
         "custom_prune": "Pruning custom denylist",
         "geolite_load": "Loading geolocation data",
-        "geo_pull": "Pulling country IDs",
+        "geo_index": "Loading compiled GeoLite index",
         "geo_tag": "Geotagging networks",
+        "index_compile": "Compiling data indexes",
+        "journal_compact": "Compacting ipsum patch journal",
         "ipsum_compact": "Compacting ipsum ({compact})",
         "ipsum_load": "Loading ipsum.txt",
         "ipsum_load_data": "Loading ipsum data",
         "ipsum_patch": "Patching with new IP addresses",
         "ipsum_prune": "Pruning ipsum.txt",
         "lists_render": "Rendering lists",
+        "log_classify": "Classifying client addresses",
+        "log_scan": "Scanning access logs",
+        "policy_compile": "Compiling policy networks",
+        "profiles_run": "Building profiles in parallel",
         "redundant_remove": "Removing redundant IP addresses",
         "repack": "Repackaging custom IP addresses",
+        "snapshot_write": "Writing check snapshot",
+        "stats_index": "Loading country stats index",
         "stats_load": "Loading data",
     }
 )
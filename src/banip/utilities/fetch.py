@@ -0,0 +1,564 @@
+"""Pooled HTTP client with conditional requests and retries."""
+
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+from typing import Protocol
+
+import requests
+from requests.adapters import HTTPAdapter
+from rich.progress import Progress
+from urllib3.util.retry import Retry
+
+from banip.constants import HTTP_CACHE
+from banip.utilities.generations import write_atomic
+
+# Attempts after the first for connection errors and retryable statuses.
+HTTP_RETRIES = 3
+# Base delay in seconds; urllib3 doubles it for each further retry.
+HTTP_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Bytes read from the network and written to disk at a time. An
+# interrupted read discards at most this much of a partial download.
+CHUNK_SIZE = 1 << 16
+
+
+class ChunkSink(Protocol):
+    """Consumer of a download's body as it is streamed to disk."""
+
+    def reset(self) -> None:
+        """Discard everything received, before the body starts over."""
+
+    def update(self, chunk: bytes) -> None:
+        """Consume the next piece of the body, in order."""
+
+
+@dataclass(frozen=True)
+class Validators:
+    """Cache validators recorded for one URL.
+
+    Parameters
+    ----------
+    etag : str | None, optional
+        ``ETag`` response header. Defaults to None.
+    last_modified : str | None, optional
+        ``Last-Modified`` response header. Defaults to None.
+    sha256 : str | None, optional
+        SHA-256 digest of the response body. Defaults to None.
+    """
+
+    etag: str | None = None
+    last_modified: str | None = None
+    sha256: str | None = None
+
+    def headers(self) -> dict[str, str]:
+        """Return conditional request headers for these validators.
+
+        Returns
+        -------
+        dict[str, str]
+            ``If-None-Match`` and ``If-Modified-Since`` headers for the
+            validators that are present.
+        """
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    """Response to a conditional GET request.
+
+    Parameters
+    ----------
+    url : str
+        Requested URL.
+    status : int
+        HTTP status code.
+    content : bytes
+        Response body. Empty when the server answered 304 or the body
+        was streamed to a file.
+    size : int
+        Response body size in bytes.
+    validators : Validators
+        Validators describing the current upstream content.
+    modified : bool
+        False when the server answered 304 or returned a body identical
+        to the previously recorded one.
+    """
+
+    url: str
+    status: int
+    content: bytes
+    size: int
+    validators: Validators
+    modified: bool
+
+    @property
+    def text(self) -> str:
+        """Return the body decoded as UTF-8.
+
+        Returns
+        -------
+        str
+            Decoded body with undecodable bytes replaced.
+        """
+        return self.content.decode(errors="replace")
+
+    def json(self) -> Any:
+        """Return the body parsed as JSON.
+
+        Returns
+        -------
+        Any
+            Parsed JSON document.
+        """
+        return json.loads(self.content)
+
+
+def partial_path(destination: Path) -> Path:
+    """Return the path holding an unfinished download.
+
+    Parameters
+    ----------
+    destination : Path
+        Final download path.
+
+    Returns
+    -------
+    Path
+        ``.part`` file next to the destination.
+    """
+    return destination.with_name(f"{destination.name}.part")
+
+
+def response_validators(response: requests.Response, sha256: str) -> Validators:
+    """Return the validators describing a successful response.
+
+    Parameters
+    ----------
+    response : requests.Response
+        Successful response.
+    sha256 : str
+        SHA-256 digest of the response body.
+
+    Returns
+    -------
+    Validators
+        Response validators.
+    """
+    return Validators(
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        sha256=sha256,
+    )
+
+
+def load_validators(path: Path) -> dict[str, Validators]:
+    """Load recorded validators keyed by URL.
+
+    Parameters
+    ----------
+    path : Path
+        Validator cache path.
+
+    Returns
+    -------
+    dict[str, Validators]
+        Validators keyed by URL. The cache is empty when the file is
+        missing or malformed.
+    """
+    try:
+        records = json.loads(path.read_text()).get("urls", {})
+        return {url: Validators(**record) for url, record in records.items()}
+    except (OSError, ValueError, AttributeError, TypeError):
+        return {}
+
+
+class HttpClient:
+    """Pooled HTTP session with a persistent validator cache.
+
+    Requests reuse pooled connections per host and are retried with
+    exponential backoff on connection errors and retryable statuses.
+    Recorded validators turn a repeat GET into a conditional request, so
+    unchanged upstream data is answered with 304 and no body.
+
+    Parameters
+    ----------
+    cache_path : Path, optional
+        Validator cache path. Defaults to ``~/.banip/http_cache.json``.
+    retries : int, optional
+        Retries after the first attempt. Defaults to ``HTTP_RETRIES``.
+    backoff : float, optional
+        Base retry delay in seconds. Defaults to ``HTTP_BACKOFF``.
+    pool_size : int, optional
+        Connections kept per host. Defaults to 10.
+    """
+
+    def __init__(
+        self,
+        cache_path: Path = HTTP_CACHE,
+        *,
+        retries: int = HTTP_RETRIES,
+        backoff: float = HTTP_BACKOFF,
+        pool_size: int = 10,
+    ) -> None:
+        self.cache_path = cache_path
+        self.retries = retries
+        self.backoff = backoff
+        self.validators = load_validators(cache_path)
+        self.pending: dict[str, Validators] = {}
+        self.lock = threading.Lock()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self) -> "HttpClient":
+        """Return the client for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close pooled connections."""
+        self.close()
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+    def get(
+        self,
+        url: str,
+        *,
+        timeout: float = 60,
+        auth: tuple[str, str] | None = None,
+        conditional: bool = True,
+    ) -> FetchResult:
+        """Fetch a URL, conditionally when validators are recorded.
+
+        New validators are held until :meth:`commit` records them, so a
+        caller that fails to store the content fetches it again next
+        time.
+
+        Parameters
+        ----------
+        url : str
+            URL to fetch.
+        timeout : float, optional
+            Connect and read timeout in seconds. Defaults to 60.
+        auth : tuple[str, str] | None, optional
+            HTTP basic authentication credentials. Defaults to None.
+        conditional : bool, optional
+            Whether to send recorded validators. Pass False when the
+            previously fetched content is no longer available locally.
+            Defaults to True.
+
+        Returns
+        -------
+        FetchResult
+            Response body and validators.
+
+        Raises
+        ------
+        requests.RequestException
+            If the request fails after all retries or returns an error
+            status.
+        """
+        cached = self.cached(url, conditional)
+        headers = cached.headers() if cached else {}
+        response = self.session.get(url, headers=headers, timeout=timeout, auth=auth)
+        if cached and response.status_code == requests.codes.not_modified:
+            return FetchResult(url, response.status_code, b"", 0, cached, False)
+        response.raise_for_status()
+        content = response.content
+        validators = response_validators(response, hashlib.sha256(content).hexdigest())
+        return self.result(
+            url, response.status_code, content, len(content), validators, cached
+        )
+
+    def download(
+        self,
+        url: str,
+        destination: Path,
+        *,
+        timeout: float = 60,
+        auth: tuple[str, str] | None = None,
+        conditional: bool = True,
+        progress: Progress | None = None,
+        sink: ChunkSink | None = None,
+    ) -> FetchResult:
+        """Stream a URL to a file, resuming any interrupted download.
+
+        The body is written to a ``.part`` file next to the destination
+        in ``CHUNK_SIZE`` pieces and hashed as it arrives, so memory use
+        does not grow with the download. A ``.part`` file left by an
+        earlier attempt is continued with a ``Range`` request guarded by
+        ``If-Range``; servers without range support, or whose content
+        has changed, send the whole body again. A connection lost after
+        data arrived is resumed up to the configured number of retries.
+        The destination appears only once the body is complete.
+
+        Parameters
+        ----------
+        url : str
+            URL to fetch.
+        destination : Path
+            File receiving the body. It is left untouched when the
+            server answers 304.
+        timeout : float, optional
+            Connect and read timeout in seconds. Defaults to 60.
+        auth : tuple[str, str] | None, optional
+            HTTP basic authentication credentials. Defaults to None.
+        conditional : bool, optional
+            Whether to send recorded validators when no partial download
+            exists. Defaults to True.
+        progress : Progress | None, optional
+            Rich progress display receiving a task for the download.
+            Defaults to None.
+        sink : ChunkSink | None, optional
+            Consumer fed the complete body in order, including any part
+            kept from an earlier attempt, so it can be processed while
+            it downloads. It is reset whenever the body starts over.
+            Defaults to None.
+
+        Returns
+        -------
+        FetchResult
+            Download size and validators, with empty content.
+
+        Raises
+        ------
+        requests.RequestException
+            If the request fails after all retries or returns an error
+            status.
+        """
+        part = partial_path(destination)
+        resumes = 0
+        while True:
+            before = part.stat().st_size if part.exists() else 0
+            try:
+                return self.stream(
+                    url, destination, timeout, auth, conditional, progress, sink
+                )
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ):
+                after = part.stat().st_size if part.exists() else 0
+                if after <= before or resumes >= self.retries:
+                    raise
+                resumes += 1
+                time.sleep(self.backoff * 2 ** (resumes - 1))
+
+    def stream(
+        self,
+        url: str,
+        destination: Path,
+        timeout: float,
+        auth: tuple[str, str] | None,
+        conditional: bool,
+        progress: Progress | None,
+        sink: ChunkSink | None = None,
+    ) -> FetchResult:
+        """Make one download attempt for :meth:`download`.
+
+        Parameters
+        ----------
+        url : str
+            URL to fetch.
+        destination : Path
+            File receiving the body.
+        timeout : float
+            Connect and read timeout in seconds.
+        auth : tuple[str, str] | None
+            HTTP basic authentication credentials.
+        conditional : bool
+            Whether to send recorded validators when no partial download
+            exists.
+        progress : Progress | None
+            Rich progress display receiving a task for the download.
+        sink : ChunkSink | None, optional
+            Consumer fed the complete body in order. Defaults to None.
+
+        Returns
+        -------
+        FetchResult
+            Download size and validators, with empty content.
+        """
+        part = partial_path(destination)
+        marker = part.with_name(f"{part.name}.json")
+        offset = part.stat().st_size if part.exists() else 0
+        resumable = load_validators(marker).get(url) if offset else None
+        cached = None
+        if resumable and (guard := resumable.etag or resumable.last_modified):
+            headers = {"Range": f"bytes={offset}-", "If-Range": guard}
+        else:
+            offset = 0
+            cached = self.cached(url, conditional)
+            headers = cached.headers() if cached else {}
+        # Byte counts and ranges refer to the body as sent, so ask for it
+        # without a content coding that requests would decode.
+        headers["Accept-Encoding"] = "identity"
+
+        with self.session.get(
+            url, headers=headers, timeout=timeout, auth=auth, stream=True
+        ) as response:
+            if cached and response.status_code == requests.codes.not_modified:
+                return FetchResult(url, response.status_code, b"", 0, cached, False)
+            content_range = response.headers.get("Content-Range", "")
+            if offset and (
+                response.status_code == requests.codes.range_not_satisfiable
+                or (
+                    response.status_code == requests.codes.partial_content
+                    and not content_range.startswith(f"bytes {offset}-")
+                )
+            ):
+                # The partial file is no longer a prefix of the content,
+                # or the server sent a range other than the one requested.
+                part.unlink()
+                marker.unlink(missing_ok=True)
+                return self.stream(
+                    url, destination, timeout, auth, conditional, progress, sink
+                )
+            response.raise_for_status()
+            digest = hashlib.sha256()
+            if sink is not None:
+                sink.reset()
+            if offset and response.status_code == requests.codes.partial_content:
+                with part.open("rb") as f:
+                    while chunk := f.read(CHUNK_SIZE):
+                        digest.update(chunk)
+                        if sink is not None:
+                            sink.update(chunk)
+            else:
+                offset = 0
+            validators = response_validators(response, "")
+            length = response.headers.get("Content-Length")
+            total = offset + int(length) if length and length.isdigit() else None
+            if response.headers.get("Content-Encoding", "identity") == "identity":
+                records = {url: asdict(validators)}
+                marker.write_text(json.dumps({"urls": records}) + "\n")
+            else:
+                # A server that encodes the body anyway sends a length,
+                # and would honor ranges, in encoded bytes that do not
+                # match the decoded file, so the download is not resumed.
+                marker.unlink(missing_ok=True)
+                total = None
+            task = None
+            if progress is not None:
+                task = progress.add_task(
+                    destination.name, total=total, completed=offset
+                )
+            size = offset
+            with part.open("ab" if offset else "wb") as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    if sink is not None:
+                        sink.update(chunk)
+                    size += f.write(chunk)
+                    if progress is not None and task is not None:
+                        progress.update(task, completed=size)
+            if total is not None and size != total:
+                raise requests.ConnectionError(
+                    f"Download of {url} ended after {size:,} of {total:,} bytes"
+                )
+
+        part.replace(destination)
+        marker.unlink(missing_ok=True)
+        validators = replace(validators, sha256=digest.hexdigest())
+        return self.result(url, response.status_code, b"", size, validators, cached)
+
+    def cached(self, url: str, conditional: bool) -> Validators | None:
+        """Return recorded validators to send with a request.
+
+        Parameters
+        ----------
+        url : str
+            Requested URL.
+        conditional : bool
+            Whether the request may be conditional.
+
+        Returns
+        -------
+        Validators | None
+            Recorded validators, or None for an unconditional request.
+        """
+        with self.lock:
+            return self.validators.get(url) if conditional else None
+
+    def result(
+        self,
+        url: str,
+        status: int,
+        content: bytes,
+        size: int,
+        validators: Validators,
+        cached: Validators | None,
+    ) -> FetchResult:
+        """Hold new validators until commit and describe the response.
+
+        Parameters
+        ----------
+        url : str
+            Requested URL.
+        status : int
+            HTTP status code.
+        content : bytes
+            Response body, or empty bytes for a streamed download.
+        size : int
+            Response body size in bytes.
+        validators : Validators
+            Validators of the response.
+        cached : Validators | None
+            Validators sent with the request, or None when it was
+            unconditional.
+
+        Returns
+        -------
+        FetchResult
+            Response compared with the recorded content hash.
+        """
+        with self.lock:
+            self.pending[url] = validators
+        modified = cached is None or cached.sha256 != validators.sha256
+        return FetchResult(url, status, content, size, validators, modified)
+
+    def commit(self, urls: Iterable[str]) -> None:
+        """Record validators for URLs whose content has been stored.
+
+        Parameters
+        ----------
+        urls : Iterable[str]
+            URLs fetched by this client.
+        """
+        with self.lock:
+            changed = False
+            for url in urls:
+                if url in self.pending:
+                    self.validators[url] = self.pending.pop(url)
+                    changed = True
+            if not changed:
+                return
+            records = {url: asdict(item) for url, item in self.validators.items()}
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(
+                self.cache_path, json.dumps({"urls": records}, indent=2) + "\n"
+            )
@@ -0,0 +1,216 @@
+"""Versioned data generations activated through a symlink."""
+
+import os
+import secrets
+import shutil
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Data files captured in each generation, relative to the data directory.
+GENERATION_PATTERNS = ("*.txt", "*.bin", "*.json", "geolite/*.csv")
+# Files matching the patterns that are service state, not data.
+GENERATION_EXCLUDES = ("http_cache.json", "*.part.json", "*.tmp")
+# Previous generations kept after a new one is activated.
+GENERATIONS_KEPT = 3
+
+
+@contextmanager
+def staged_file(path: Path) -> Iterator[Path]:
+    """Stage a replacement for a file under a unique temporary name.
+
+    The staged file replaces ``path`` in one rename when the block
+    finishes and is removed if the block fails. Each call gets its own
+    name, so processes replacing the same file never share or remove
+    each other's staged copy.
+
+    Parameters
+    ----------
+    path : Path
+        File to replace.
+
+    Yields
+    ------
+    Path
+        Unused path next to ``path`` for the caller to create.
+    """
+    staged = path.with_name(f"{path.name}.{os.getpid()}-{secrets.token_hex(4)}.tmp")
+    try:
+        yield staged
+        staged.replace(path)
+    finally:
+        staged.unlink(missing_ok=True)
+
+
+def write_atomic(path: Path, data: str | bytes) -> None:
+    """Replace a file in one step.
+
+    The content is written to a temporary file that then replaces the
+    destination, so readers see the old or the new file but never a
+    partial one, and generations holding a link to the old file keep
+    it unchanged.
+
+    Parameters
+    ----------
+    path : Path
+        File to replace.
+    data : str | bytes
+        New file content.
+    """
+    with staged_file(path) as staged:
+        if isinstance(data, str):
+            staged.write_text(data)
+        else:
+            staged.write_bytes(data)
+
+
+def copy_atomic(source: Path, destination: Path) -> None:
+    """Copy a file with its metadata, replacing the destination in one step.
+
+    Parameters
+    ----------
+    source : Path
+        File to copy.
+    destination : Path
+        File to replace.
+    """
+    with staged_file(destination) as staged:
+        shutil.copy2(source, staged)
+
+
+def generation_files(root: Path) -> list[Path]:
+    """Return the data files a new generation captures.
+
+    Parameters
+    ----------
+    root : Path
+        Data directory.
+
+    Returns
+    -------
+    list[Path]
+        Matching regular files, relative to ``root``.
+    """
+    files = {
+        path.relative_to(root)
+        for pattern in GENERATION_PATTERNS
+        for path in root.glob(pattern)
+        if path.is_file()
+        and not path.is_symlink()
+        and not any(path.match(exclude) for exclude in GENERATION_EXCLUDES)
+    }
+    return sorted(files)
+
+
+def current_generation(root: Path) -> Path | None:
+    """Return the active generation directory.
+
+    Parameters
+    ----------
+    root : Path
+        Data directory.
+
+    Returns
+    -------
+    Path | None
+        Resolved generation directory, or None when no generation has
+        been activated.
+    """
+    current = root / "current"
+    if not current.is_symlink():
+        return None
+    generation = current.resolve()
+    return generation if generation.is_dir() else None
+
+
+def generation_path(path: Path, generation: Path | None) -> Path:
+    """Return the copy of a data file held by a generation.
+
+    Parameters
+    ----------
+    path : Path
+        Data file in the data directory.
+    generation : Path | None
+        Generation directory from :func:`current_generation`.
+
+    Returns
+    -------
+    Path
+        The generation's copy of the file, or ``path`` itself when there
+        is no generation, the file is outside the data directory, or the
+        generation does not hold it.
+    """
+    if generation is None:
+        return path
+    try:
+        relative = path.relative_to(generation.parent.parent)
+    except ValueError:
+        return path
+    pinned = generation / relative
+    return pinned if pinned.exists() else path
+
+
+def list_generations(root: Path) -> list[Path]:
+    """Return generation directories from oldest to newest.
+
+    Parameters
+    ----------
+    root : Path
+        Data directory.
+
+    Returns
+    -------
+    list[Path]
+        Generation directories.
+    """
+    generations = root / "generations"
+    if not generations.is_dir():
+        return []
+    return sorted(path for path in generations.iterdir() if path.is_dir())
+
+
+def publish_generation(root: Path, keep: int = GENERATIONS_KEPT) -> Path | None:
+    """Capture the data files in a new generation and activate it.
+
+    Files are hard-linked into the generation rather than copied, which
+    is safe because banip replaces data files instead of rewriting them
+    in place. The ``current`` symlink is then swapped to the new
+    generation in one rename, and generations beyond the newest ``keep``
+    previous ones are removed.
+
+    Parameters
+    ----------
+    root : Path
+        Data directory.
+    keep : int, optional
+        Previous generations to keep. Defaults to ``GENERATIONS_KEPT``.
+
+    Returns
+    -------
+    Path | None
+        The activated generation, or None when there are no data files.
+    """
+    if not (files := generation_files(root)):
+        return None
+    generations = root / "generations"
+    generations.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    generation = Path(tempfile.mkdtemp(prefix=f"{stamp}-", dir=generations))
+    for relative in files:
+        target = generation / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(root / relative, target)
+        except OSError:
+            shutil.copy2(root / relative, target)
+    generation.chmod(0o755)
+
+    with staged_file(root / "current") as staged:
+        staged.symlink_to(generation.relative_to(root), target_is_directory=True)
+
+    previous = [path for path in list_generations(root) if path != generation]
+    for stale in previous[: max(len(previous) - keep, 0)]:
+        shutil.rmtree(stale, ignore_errors=True)
+    return generation
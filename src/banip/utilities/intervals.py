@@ -0,0 +1,215 @@
+"""Integer interval helpers for IP address space."""
+
+import ipaddress as ipa
+from collections.abc import Iterable
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from banip.constants import AddressType
+from banip.constants import NetworkType
+
+
+def network_interval(network: NetworkType) -> tuple[int, int]:
+    """Return the inclusive integer bounds of a network.
+
+    Parameters
+    ----------
+    network : NetworkType
+        Either an IPv4 or IPv6 network.
+
+    Returns
+    -------
+    tuple[int, int]
+        The first and last addresses in the network as integers.
+    """
+    return int(network.network_address), int(network.broadcast_address)
+
+
+def entry_interval(entry: AddressType | NetworkType) -> tuple[int, int, int]:
+    """Return the version and inclusive integer bounds of a list entry.
+
+    Parameters
+    ----------
+    entry : AddressType | NetworkType
+        An address or network from a rendered list.
+
+    Returns
+    -------
+    tuple[int, int, int]
+        The IP version followed by the first and last addresses.
+    """
+    if isinstance(entry, (ipa.IPv4Address, ipa.IPv6Address)):
+        return entry.version, int(entry), int(entry)
+    return (entry.version, *network_interval(entry))
+
+
+def coalesce(intervals: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge overlapping and adjacent inclusive intervals.
+
+    Parameters
+    ----------
+    intervals : Iterable[tuple[int, int]]
+        Inclusive integer intervals from one address family, in any
+        order.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        Disjoint, non-adjacent intervals sorted by their first value.
+    """
+    merged: list[tuple[int, int]] = []
+    for first, last in sorted(intervals):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = merged[-1][0], last
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def union_size(intervals: Iterable[tuple[int, int]]) -> int:
+    """Return the number of integers covered by a set of intervals.
+
+    Overlapping intervals are counted once.
+
+    Parameters
+    ----------
+    intervals : Iterable[tuple[int, int]]
+        Inclusive integer intervals from one address family, in any
+        order.
+
+    Returns
+    -------
+    int
+        Size of the union of the intervals.
+    """
+    total = 0
+    end = -1
+    for first, last in sorted(intervals):
+        if last > end:
+            total += last - max(first, end + 1) + 1
+            end = last
+    return total
+
+
+@dataclass(frozen=True)
+class Coverage:
+    """Exact number of addresses covered in each address family.
+
+    Parameters
+    ----------
+    ipv4 : int, optional
+        Distinct IPv4 addresses covered. Defaults to 0.
+    ipv6 : int, optional
+        Distinct IPv6 addresses covered. Defaults to 0.
+    """
+
+    ipv4: int = 0
+    ipv6: int = 0
+
+
+def coverage(intervals: Iterable[tuple[int, int, int]]) -> Coverage:
+    """Return the exact address coverage of a set of intervals.
+
+    Intervals are split by family and each family is swept once in
+    sorted order, so overlapping entries are never double-counted.
+
+    Parameters
+    ----------
+    intervals : Iterable[tuple[int, int, int]]
+        ``(version, first, last)`` intervals from either family, such as
+        those returned by :func:`entry_interval`.
+
+    Returns
+    -------
+    Coverage
+        Distinct addresses covered in each family.
+    """
+    families: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+    for version, first, last in intervals:
+        families[version].append((first, last))
+    return Coverage(ipv4=union_size(families[4]), ipv6=union_size(families[6]))
+
+
+def interval_networks(version: int, first: int, last: int) -> list[NetworkType]:
+    """Return the minimal CIDR networks covering an inclusive interval.
+
+    Parameters
+    ----------
+    version : int
+        IP version of the interval, either 4 or 6.
+    first : int
+        First address in the interval as an integer.
+    last : int
+        Last address in the interval as an integer.
+
+    Returns
+    -------
+    list[NetworkType]
+        Networks sorted by starting address.
+    """
+    address = ipa.IPv4Address if version == 4 else ipa.IPv6Address
+    return list(ipa.summarize_address_range(address(first), address(last)))
+
+
+@dataclass(frozen=True)
+class Containment:
+    """An entry fully covered by an entry from another section.
+
+    Parameters
+    ----------
+    section : int
+        Index of the section holding the covered entry.
+    entry : int
+        Index of the covered entry within its section.
+    container_section : int
+        Index of the section holding the covering entry.
+    container : int
+        Index of the covering entry within its section.
+    """
+
+    section: int
+    entry: int
+    container_section: int
+    container: int
+
+
+def find_contained(
+    sections: Sequence[tuple[str, Sequence[tuple[int, int, int]]]],
+) -> list[Containment]:
+    """Find entries covered by another section in one sorted pass.
+
+    Every entry is a ``(version, first, last)`` CIDR interval, so any two
+    entries are either nested or disjoint. Sections are listed in
+    precedence order: when two sections hold the same range, the entry
+    from the earlier section is kept. Sections sharing a group name are
+    never compared with each other.
+
+    Parameters
+    ----------
+    sections : Sequence[tuple[str, Sequence[tuple[int, int, int]]]]
+        Group names and entries for each section, in precedence order.
+
+    Returns
+    -------
+    list[Containment]
+        Covered entries, each paired with the innermost covering entry
+        from a different group.
+    """
+    entries = sorted(
+        (version, first, -last, section, index)
+        for section, (_, items) in enumerate(sections)
+        for index, (version, first, last) in enumerate(items)
+    )
+    found: list[Containment] = []
+    stack: list[tuple[int, int, int, int]] = []
+    for version, first, negative_last, section, index in entries:
+        while stack and (stack[-1][0] != version or stack[-1][1] < first):
+            stack.pop()
+        group = sections[section][0]
+        for _, _, container_section, container in reversed(stack):
+            if sections[container_section][0] != group:
+                found.append(Containment(section, index, container_section, container))
+                break
+        stack.append((version, -negative_last, section, index))
+    return found
@@ -1,13 +1,18 @@
 """IP parsing and rendering helpers."""
 
 import ipaddress as ipa
+import socket
 from collections.abc import Iterable
 
+from banip.constants import AddressKey
 from banip.constants import AddressType
 from banip.constants import AddressTypes
+from banip.constants import NetworkKey
 from banip.constants import NetworkType
 from banip.constants import NetworkTypes
 
+ADDRESS_BITS = {4: 32, 6: 128}
+
 
 def split_hybrid(
     hybrid_list: Iterable[AddressType | NetworkType],
@@ -77,3 +82,241 @@ def extract_ip(from_str: str) -> AddressType | NetworkType | None:
         return None
 
     return to_ip
+
+
+def parse_address_key(text: str) -> AddressKey | None:
+    """Parse an IP address directly into an integer key.
+
+    Parameters
+    ----------
+    text : str
+        IPv4 or IPv6 address text.
+
+    Returns
+    -------
+    AddressKey | None
+        ``(version, address)``, or None if parsing fails.
+    """
+    family, version = (socket.AF_INET6, 6) if ":" in text else (socket.AF_INET, 4)
+    try:
+        packed = socket.inet_pton(family, text)
+    except (OSError, ValueError):
+        return None
+    return version, int.from_bytes(packed)
+
+
+def parse_network_key(text: str) -> NetworkKey | None:
+    """Parse a CIDR network directly into an integer key.
+
+    Host bits must be zero, matching :func:`ipaddress.ip_network`.
+
+    Parameters
+    ----------
+    text : str
+        IPv4 or IPv6 network text with a prefix length.
+
+    Returns
+    -------
+    NetworkKey | None
+        ``(version, network address, prefix length)``, or None if
+        parsing fails.
+    """
+    address_text, _, prefix_text = text.partition("/")
+    if not (address := parse_address_key(address_text)):
+        return None
+    version, start = address
+    if not (prefix_text.isascii() and prefix_text.isdigit()):
+        return None
+    if int(prefix_text) > ADDRESS_BITS[version]:
+        return None
+    prefixlen = int(prefix_text)
+    if start & ((1 << (ADDRESS_BITS[version] - prefixlen)) - 1):
+        return None
+    return version, start, prefixlen
+
+
+def address_key(address: AddressType) -> AddressKey:
+    """Return the integer key for an address object.
+
+    Parameters
+    ----------
+    address : AddressType
+        Either an IPv4 or IPv6 address.
+
+    Returns
+    -------
+    AddressKey
+        ``(version, address)``.
+    """
+    return address.version, int(address)
+
+
+def network_key(network: NetworkType) -> NetworkKey:
+    """Return the integer key for a network object.
+
+    Parameters
+    ----------
+    network : NetworkType
+        Either an IPv4 or IPv6 network.
+
+    Returns
+    -------
+    NetworkKey
+        ``(version, network address, prefix length)``.
+    """
+    return network.version, int(network.network_address), network.prefixlen
+
+
+def entry_key(entry: AddressType | NetworkType) -> AddressKey | NetworkKey:
+    """Return the integer key for an address or network object.
+
+    Parameters
+    ----------
+    entry : AddressType | NetworkType
+        Either an address or a network.
+
+    Returns
+    -------
+    AddressKey | NetworkKey
+        The equivalent address or network key.
+    """
+    if isinstance(entry, AddressTypes):
+        return address_key(entry)
+    return network_key(entry)
+
+
+def key_address(key: AddressKey) -> AddressType:
+    """Return the address object for an integer key.
+
+    Parameters
+    ----------
+    key : AddressKey
+        Integer address key.
+
+    Returns
+    -------
+    AddressType
+        The equivalent IPv4 or IPv6 address.
+    """
+    version, value = key
+    return ipa.IPv4Address(value) if version == 4 else ipa.IPv6Address(value)
+
+
+def key_network(key: NetworkKey) -> NetworkType:
+    """Return the network object for an integer key.
+
+    Parameters
+    ----------
+    key : NetworkKey
+        Integer network key.
+
+    Returns
+    -------
+    NetworkType
+        The equivalent IPv4 or IPv6 network.
+    """
+    version, start, prefixlen = key
+    if version == 4:
+        return ipa.IPv4Network((start, prefixlen))
+    return ipa.IPv6Network((start, prefixlen))
+
+
+def key_interval(key: AddressKey | NetworkKey) -> tuple[int, int, int]:
+    """Return the version and inclusive bounds of an address or network key.
+
+    Parameters
+    ----------
+    key : AddressKey | NetworkKey
+        Integer address or network key.
+
+    Returns
+    -------
+    tuple[int, int, int]
+        The IP version followed by the first and last addresses.
+    """
+    if len(key) == 2:
+        return key[0], key[1], key[1]
+    version, start, prefixlen = key
+    return version, start, start + (1 << (ADDRESS_BITS[version] - prefixlen)) - 1
+
+
+def span_keys(version: int, first: int, last: int) -> list[NetworkKey]:
+    """Return the minimal network keys covering an inclusive interval.
+
+    Parameters
+    ----------
+    version : int
+        IP version of the interval, either 4 or 6.
+    first : int
+        First address in the interval as an integer.
+    last : int
+        Last address in the interval as an integer.
+
+    Returns
+    -------
+    list[NetworkKey]
+        Network keys sorted by starting address.
+    """
+    bits = ADDRESS_BITS[version]
+    keys: list[NetworkKey] = []
+    while first <= last:
+        size = (first & -first).bit_length() - 1 if first else bits
+        while size and first + (1 << size) - 1 > last:
+            size -= 1
+        keys.append((version, first, bits - size))
+        first += 1 << size
+    return keys
+
+
+def render_address_key(key: AddressKey) -> str:
+    """Render an address key in standard text form.
+
+    Parameters
+    ----------
+    key : AddressKey
+        Integer address key.
+
+    Returns
+    -------
+    str
+        Address text identical to :class:`ipaddress` output.
+    """
+    version, value = key
+    if version == 4:
+        return socket.inet_ntop(socket.AF_INET, value.to_bytes(4))
+    return str(ipa.IPv6Address(value))
+
+
+def render_network_key(key: NetworkKey) -> str:
+    """Render a network key in standard CIDR form.
+
+    Parameters
+    ----------
+    key : NetworkKey
+        Integer network key.
+
+    Returns
+    -------
+    str
+        Network text identical to :class:`ipaddress` output.
+    """
+    version, start, prefixlen = key
+    return f"{render_address_key((version, start))}/{prefixlen}"
+
+
+def render_key(key: AddressKey | NetworkKey) -> str:
+    """Render an address or network key in standard text form.
+
+    Parameters
+    ----------
+    key : AddressKey | NetworkKey
+        Integer address or network key.
+
+    Returns
+    -------
+    str
+        Address or CIDR text.
+    """
+    if len(key) == 2:
+        return render_address_key((key[0], key[1]))
+    return render_network_key((key[0], key[1], key[2]))
@@ -0,0 +1,143 @@
+"""Helpers for reading addresses from log and list files."""
+
+import gzip
+import re
+from collections.abc import Iterable
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TextIO
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def is_gzip(path: Path) -> bool:
+    """Return whether a file is gzip-compressed.
+
+    Parameters
+    ----------
+    path : Path
+        File path.
+
+    Returns
+    -------
+    bool
+        True when the file starts with the gzip magic number.
+    """
+    with path.open("rb") as f:
+        return f.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+
+
+def open_log(path: Path) -> TextIO:
+    """Open a plain or gzip-compressed log for reading.
+
+    Parameters
+    ----------
+    path : Path
+        Log path.
+
+    Returns
+    -------
+    TextIO
+        Text stream. Undecodable bytes are replaced.
+    """
+    if is_gzip(path):
+        return gzip.open(path, "rt", errors="replace")
+    return path.open("r", errors="replace")
+
+
+def client_token(line: str, pattern: re.Pattern[str] | None, index: int | None) -> str:
+    """Return the client address token from a log line.
+
+    Parameters
+    ----------
+    line : str
+        Log line.
+    pattern : re.Pattern[str] | None
+        Expression locating the address, used when ``index`` is None.
+    index : int | None
+        Whitespace-separated field holding the address.
+
+    Returns
+    -------
+    str
+        Address token, or an empty string when none is found.
+    """
+    if index is not None:
+        parts = line.split()
+        return parts[index] if -len(parts) <= index < len(parts) else ""
+    if pattern is None or not (match := pattern.search(line)):
+        return ""
+    if "ip" in pattern.groupindex:
+        return match["ip"] or ""
+    return match[1] if pattern.groups else match[0]
+
+
+def read_tokens(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the address token from each line of bulk input.
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        Input lines. The first whitespace-separated element of each line
+        is used; blank lines and lines starting with ``#`` are skipped.
+
+    Yields
+    ------
+    str
+        Address token.
+    """
+    for line in lines:
+        parts = line.split(maxsplit=1)
+        if parts and not parts[0].startswith("#"):
+            yield parts[0]
+
+
+def line_ranges(path: Path, size: int) -> list[tuple[int, int]]:
+    """Split a plain file into byte ranges of roughly equal size.
+
+    Ranges are read with :func:`read_line_range`, which assigns each
+    line to the range it starts in, so the ranges may be read
+    independently without splitting or repeating a line.
+
+    Parameters
+    ----------
+    path : Path
+        Uncompressed file path.
+    size : int
+        Target number of bytes in each range.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        ``(start, end)`` byte offsets covering the whole file.
+    """
+    total = path.stat().st_size
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+def read_line_range(path: Path, start: int, end: int) -> Iterator[str]:
+    """Read the lines of a plain file that start within a byte range.
+
+    Parameters
+    ----------
+    path : Path
+        Uncompressed file path.
+    start : int
+        First byte offset of the range.
+    end : int
+        Byte offset just past the range.
+
+    Yields
+    ------
+    str
+        Decoded lines. Undecodable bytes are replaced.
+    """
+    with path.open("rb") as f:
+        position = start
+        if start:
+            # Skip the end of a line that began in the previous range.
+            f.seek(start - 1)
+            position += len(f.readline()) - 1
+        while position < end and (line := f.readline()):
+            position += len(line)
+            yield line.decode(errors="replace")
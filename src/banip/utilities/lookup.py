@@ -1,11 +1,22 @@
 """Network lookup and compaction helpers."""
 
-import ipaddress as ipa
+from bisect import bisect_left
+from bisect import bisect_right
 from collections.abc import Iterable
 from dataclasses import dataclass
+from functools import cached_property
 
+from banip.constants import AddressKey
 from banip.constants import AddressType
+from banip.constants import NetworkKey
 from banip.constants import NetworkType
+from banip.utilities.intervals import coalesce
+from banip.utilities.ip import ADDRESS_BITS
+from banip.utilities.ip import address_key
+from banip.utilities.ip import key_address
+from banip.utilities.ip import key_interval
+from banip.utilities.ip import key_network
+from banip.utilities.ip import network_key
 from banip.utilities.ip import split_hybrid
 
 
@@ -44,6 +55,517 @@ class NetworkLookup:
     ipv6: tuple[NetworkBounds, ...]
 
 
+@dataclass(frozen=True)
+class IntervalLookup:
+    """Membership lookup over coalesced integer intervals.
+
+    Overlapping and nested entries are merged when the lookup is built,
+    so a membership test is a single bisection per address family.
+
+    Parameters
+    ----------
+    starts : dict[int, list[int]]
+        First address of each interval keyed by IP version.
+    ends : dict[int, list[int]]
+        Last address of each interval keyed by IP version.
+    """
+
+    starts: dict[int, list[int]]
+    ends: dict[int, list[int]]
+
+    def __contains__(self, key: AddressKey) -> bool:
+        """Return whether an address key falls inside any interval.
+
+        Parameters
+        ----------
+        key : AddressKey
+            Integer address key.
+
+        Returns
+        -------
+        bool
+            True when the address is covered.
+        """
+        version, value = key
+        index = bisect_right(self.starts[version], value) - 1
+        return index >= 0 and value <= self.ends[version][index]
+
+    def overlaps(self, version: int, first: int, last: int) -> bool:
+        """Return whether any interval overlaps an inclusive range.
+
+        Parameters
+        ----------
+        version : int
+            IP version of the range, either 4 or 6.
+        first : int
+            First address in the range as an integer.
+        last : int
+            Last address in the range as an integer.
+
+        Returns
+        -------
+        bool
+            True when at least one covered address is in the range.
+        """
+        index = bisect_right(self.starts[version], last) - 1
+        return index >= 0 and self.ends[version][index] >= first
+
+    def gaps(self, version: int, first: int, last: int) -> list[tuple[int, int]]:
+        """Return the parts of an inclusive range not covered by any interval.
+
+        Parameters
+        ----------
+        version : int
+            IP version of the range, either 4 or 6.
+        first : int
+            First address in the range as an integer.
+        last : int
+            Last address in the range as an integer.
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            Uncovered inclusive sub-ranges sorted by first address.
+        """
+        starts = self.starts[version]
+        ends = self.ends[version]
+        index = max(bisect_right(starts, first) - 1, 0)
+        cursor = first
+        found: list[tuple[int, int]] = []
+        while index < len(starts) and starts[index] <= last:
+            if ends[index] >= cursor:
+                if starts[index] > cursor:
+                    found.append((cursor, starts[index] - 1))
+                cursor = ends[index] + 1
+            index += 1
+        if cursor <= last:
+            found.append((cursor, last))
+        return found
+
+
+def build_interval_lookup(
+    keys: Iterable[AddressKey | NetworkKey],
+) -> IntervalLookup:
+    """Build a membership lookup from address and network keys.
+
+    Parameters
+    ----------
+    keys : Iterable[AddressKey | NetworkKey]
+        Integer address and network keys from either family.
+
+    Returns
+    -------
+    IntervalLookup
+        Coalesced intervals split by address family.
+    """
+    families: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+    for key in keys:
+        version, first, last = key_interval(key)
+        families[version].append((first, last))
+    starts: dict[int, list[int]] = {}
+    ends: dict[int, list[int]] = {}
+    for version, intervals in families.items():
+        merged = coalesce(intervals)
+        starts[version] = [first for first, _ in merged]
+        ends[version] = [last for _, last in merged]
+    return IntervalLookup(starts=starts, ends=ends)
+
+
+@dataclass(frozen=True)
+class CountryIndex:
+    """In-memory country lookup over non-overlapping networks.
+
+    Parameters
+    ----------
+    starts : dict[int, list[int]]
+        First address of each network keyed by IP version.
+    ends : dict[int, list[int]]
+        Last address of each network keyed by IP version.
+    codes : dict[int, list[str]]
+        Country code of each network keyed by IP version.
+    """
+
+    starts: dict[int, list[int]]
+    ends: dict[int, list[int]]
+    codes: dict[int, list[str]]
+
+    def lookup(self, key: AddressKey) -> str | None:
+        """Return the country code for an address key.
+
+        Parameters
+        ----------
+        key : AddressKey
+            Integer address key.
+
+        Returns
+        -------
+        str | None
+            Matching country code, or ``None`` when no network contains
+            the address.
+        """
+        version, value = key
+        index = bisect_right(self.starts[version], value) - 1
+        if index >= 0 and value <= self.ends[version][index]:
+            return self.codes[version][index]
+        return None
+
+    def overlapping(
+        self, version: int, first: int, last: int
+    ) -> list[tuple[int, int, str]]:
+        """Return the networks overlapping an inclusive range.
+
+        Parameters
+        ----------
+        version : int
+            IP version of the range, either 4 or 6.
+        first : int
+            First address in the range as an integer.
+        last : int
+            Last address in the range as an integer.
+
+        Returns
+        -------
+        list[tuple[int, int, str]]
+            First address, last address, and country code of each
+            overlapping network, sorted by first address.
+        """
+        starts = self.starts[version]
+        ends = self.ends[version]
+        index = max(bisect_right(starts, first) - 1, 0)
+        if index < len(ends) and ends[index] < first:
+            index += 1
+        stop = bisect_right(starts, last)
+        return [
+            (starts[i], ends[i], self.codes[version][i]) for i in range(index, stop)
+        ]
+
+
+def build_country_index(networks: Iterable[tuple[NetworkKey, str]]) -> CountryIndex:
+    """Build an in-memory country lookup from tagged networks.
+
+    Parameters
+    ----------
+    networks : Iterable[tuple[NetworkKey, str]]
+        Non-overlapping network keys and their country codes, in any
+        order.
+
+    Returns
+    -------
+    CountryIndex
+        Networks sorted by starting address and split by family.
+    """
+    starts: dict[int, list[int]] = {4: [], 6: []}
+    ends: dict[int, list[int]] = {4: [], 6: []}
+    codes: dict[int, list[str]] = {4: [], 6: []}
+    for key, code in sorted(networks):
+        version, first, last = key_interval(key)
+        starts[version].append(first)
+        ends[version].append(last)
+        codes[version].append(code)
+    return CountryIndex(starts=starts, ends=ends, codes=codes)
+
+
+def country_intervals(
+    geolite: dict[NetworkKey, str],
+) -> dict[str, dict[int, list[tuple[int, int]]]]:
+    """Group GeoLite networks into coalesced intervals by country.
+
+    Parameters
+    ----------
+    geolite : dict[NetworkKey, str]
+        GeoLite networks mapped to country labels.
+
+    Returns
+    -------
+    dict[str, dict[int, list[tuple[int, int]]]]
+        Coalesced integer intervals keyed by country label and then by
+        IP version.
+    """
+    grouped: dict[str, dict[int, list[tuple[int, int]]]] = {}
+    for network, country in geolite.items():
+        version, first, last = key_interval(network)
+        grouped.setdefault(country, {4: [], 6: []})[version].append((first, last))
+    return {
+        country: {version: coalesce(spans) for version, spans in families.items()}
+        for country, families in grouped.items()
+    }
+
+
+def network_parents(networks: list[NetworkKey]) -> list[int]:
+    """Return the index of the innermost enclosing network for each entry.
+
+    Parameters
+    ----------
+    networks : list[NetworkKey]
+        Networks from one family sorted by address and then prefix
+        length.
+
+    Returns
+    -------
+    list[int]
+        Parent indices, or -1 for top-level networks.
+    """
+    parents: list[int] = []
+    stack: list[tuple[int, int]] = []
+    for index, (version, start, prefixlen) in enumerate(networks):
+        while stack and stack[-1][1] < start:
+            stack.pop()
+        parents.append(stack[-1][0] if stack else -1)
+        last = start + (1 << (ADDRESS_BITS[version] - prefixlen)) - 1
+        stack.append((index, last))
+    return parents
+
+
+@dataclass(frozen=True)
+class EntryIndex:
+    """Range lookup over nested or disjoint blocklist entries.
+
+    Entries are CIDR ranges, so any two are either nested or disjoint.
+    Each entry records its innermost enclosing entry, which lets a range
+    query find the entries covering its first address without scanning.
+
+    Parameters
+    ----------
+    keys : dict[int, list[NetworkKey]]
+        Entries keyed by IP version, sorted by address and then prefix
+        length. Addresses are stored as full-length networks.
+    ends : dict[int, list[int]]
+        Last address of each entry keyed by IP version.
+    parents : dict[int, list[int]]
+        Index of the innermost enclosing entry, or -1, keyed by IP
+        version.
+    """
+
+    keys: dict[int, list[NetworkKey]]
+    ends: dict[int, list[int]]
+    parents: dict[int, list[int]]
+
+    @cached_property
+    def starts(self) -> dict[int, list[int]]:
+        """Return the first address of each entry keyed by IP version.
+
+        Returns
+        -------
+        dict[int, list[int]]
+            Starting addresses for bisection.
+        """
+        return {
+            version: [start for _, start, _ in keys]
+            for version, keys in self.keys.items()
+        }
+
+    def overlapping(self, version: int, first: int, last: int) -> list[NetworkKey]:
+        """Return the entries overlapping an inclusive range.
+
+        A query costs one bisection per bound, a walk up the entries
+        enclosing the first address, and one step per entry starting
+        inside the range.
+
+        Parameters
+        ----------
+        version : int
+            IP version of the range, either 4 or 6.
+        first : int
+            First address in the range as an integer.
+        last : int
+            Last address in the range as an integer.
+
+        Returns
+        -------
+        list[NetworkKey]
+            Overlapping entries sorted by address and then prefix length.
+        """
+        starts = self.starts[version]
+        ends = self.ends[version]
+        parents = self.parents[version]
+        lower = bisect_left(starts, first)
+        index = lower - 1
+        while index >= 0 and ends[index] < first:
+            index = parents[index]
+        enclosing: list[int] = []
+        while index >= 0:
+            enclosing.append(index)
+            index = parents[index]
+        indexes = [*reversed(enclosing), *range(lower, bisect_right(starts, last))]
+        return [self.keys[version][i] for i in indexes]
+
+
+def build_entry_index(keys: Iterable[AddressKey | NetworkKey]) -> EntryIndex:
+    """Build a range lookup from blocklist address and network keys.
+
+    Parameters
+    ----------
+    keys : Iterable[AddressKey | NetworkKey]
+        Integer address and network keys from either family.
+
+    Returns
+    -------
+    EntryIndex
+        Entries split by family with their enclosing entries.
+    """
+    families: dict[int, set[NetworkKey]] = {4: set(), 6: set()}
+    for key in keys:
+        if len(key) == 2:
+            families[key[0]].add((key[0], key[1], ADDRESS_BITS[key[0]]))
+        else:
+            families[key[0]].add(key)
+    ordered = {version: sorted(family) for version, family in families.items()}
+    return EntryIndex(
+        keys=ordered,
+        ends={
+            version: [key_interval(key)[2] for key in family]
+            for version, family in ordered.items()
+        },
+        parents={
+            version: network_parents(family) for version, family in ordered.items()
+        },
+    )
+
+
+@dataclass(frozen=True)
+class TaggedIndex(EntryIndex):
+    """Address lookup over nested or disjoint networks carrying tags.
+
+    Networks from every tag share one index, so an address is answered
+    with one bisection and a walk up the networks enclosing it.
+
+    Parameters
+    ----------
+    keys : dict[int, list[NetworkKey]]
+        Networks keyed by IP version, sorted by address and then prefix
+        length.
+    ends : dict[int, list[int]]
+        Last address of each network keyed by IP version.
+    parents : dict[int, list[int]]
+        Index of the innermost enclosing network, or -1, keyed by IP
+        version.
+    tags : dict[int, list[tuple[str, ...]]]
+        Sorted tags of each network keyed by IP version.
+    """
+
+    tags: dict[int, list[tuple[str, ...]]]
+
+    def lookup(self, key: AddressKey) -> list[tuple[NetworkKey, tuple[str, ...]]]:
+        """Return every network containing an address with its tags.
+
+        Parameters
+        ----------
+        key : AddressKey
+            Integer address key.
+
+        Returns
+        -------
+        list[tuple[NetworkKey, tuple[str, ...]]]
+            Containing networks and their tags, ordered from the
+            broadest to the narrowest network.
+        """
+        version, value = key
+        ends = self.ends[version]
+        parents = self.parents[version]
+        index = bisect_right(self.starts[version], value) - 1
+        while index >= 0 and ends[index] < value:
+            index = parents[index]
+        found: list[tuple[NetworkKey, tuple[str, ...]]] = []
+        while index >= 0:
+            found.append((self.keys[version][index], self.tags[version][index]))
+            index = parents[index]
+        return found[::-1]
+
+
+def build_tagged_index(networks: Iterable[tuple[NetworkKey, str]]) -> TaggedIndex:
+    """Build an address lookup from tagged networks.
+
+    Parameters
+    ----------
+    networks : Iterable[tuple[NetworkKey, str]]
+        Network keys and their tags, in any order. A network listed
+        with several tags is stored once.
+
+    Returns
+    -------
+    TaggedIndex
+        Networks split by family with their enclosing networks and tags.
+    """
+    tagged: dict[NetworkKey, set[str]] = {}
+    for key, tag in networks:
+        tagged.setdefault(key, set()).add(tag)
+    ordered: dict[int, list[NetworkKey]] = {4: [], 6: []}
+    for key in sorted(tagged):
+        ordered[key[0]].append(key)
+    return TaggedIndex(
+        keys=ordered,
+        ends={
+            version: [key_interval(key)[2] for key in family]
+            for version, family in ordered.items()
+        },
+        parents={
+            version: network_parents(family) for version, family in ordered.items()
+        },
+        tags={
+            version: [tuple(sorted(tagged[key])) for key in family]
+            for version, family in ordered.items()
+        },
+    )
+
+
+@dataclass(frozen=True)
+class DedupeIndex:
+    """Provenance for blocklist entries removed as cross-section duplicates.
+
+    Parameters
+    ----------
+    notes : dict[NetworkType, tuple[str, ...]]
+        Provenance notes keyed by the dropped entry. Dropped addresses
+        are stored as single-address networks.
+    """
+
+    notes: dict[NetworkType, tuple[str, ...]]
+
+    @cached_property
+    def keyed(self) -> dict[int, dict[int, dict[int, tuple[str, ...]]]]:
+        """Return notes keyed by version, prefix length, and start address.
+
+        Returns
+        -------
+        dict[int, dict[int, dict[int, tuple[str, ...]]]]
+            Notes grouped by IP version and then prefix length, with
+            prefix lengths in ascending order.
+        """
+        keyed: dict[int, dict[int, dict[int, tuple[str, ...]]]] = {4: {}, 6: {}}
+        for network, notes in sorted(
+            self.notes.items(), key=lambda item: item[0].prefixlen
+        ):
+            version, start, prefixlen = network_key(network)
+            keyed[version].setdefault(prefixlen, {})[start] = notes
+        return keyed
+
+    def lookup(self, ip: AddressType) -> tuple[str, ...]:
+        """Return notes for every dropped entry containing an address.
+
+        Only prefix lengths present in the index are probed, so a lookup
+        costs at most one dictionary access per distinct prefix length.
+
+        Parameters
+        ----------
+        ip : AddressType
+            Address to look up.
+
+        Returns
+        -------
+        tuple[str, ...]
+            Notes ordered from the broadest to the narrowest entry.
+        """
+        if not self.notes:
+            return ()
+        value = int(ip)
+        bits = ip.max_prefixlen
+        found: list[str] = []
+        for prefixlen, starts in self.keyed[ip.version].items():
+            host_bits = bits - prefixlen
+            found.extend(starts.get(value >> host_bits << host_bits, ()))
+        return tuple(found)
+
+
 def build_network_lookup(networks: Iterable[NetworkType]) -> NetworkLookup:
     """Precompute integer bounds for network membership checks.
 
@@ -78,6 +600,56 @@ def build_network_lookup(networks: Iterable[NetworkType]) -> NetworkLookup:
     )
 
 
+def compact_keys(
+    ip_keys: Iterable[AddressKey],
+    allow_lookup: IntervalLookup,
+    min_num: int,
+) -> tuple[list[AddressKey], list[NetworkKey]]:
+    """Compact address keys into representative /24 network keys.
+
+    Parameters
+    ----------
+    ip_keys : Iterable[AddressKey]
+        Address keys to compact, usually the filtered ipsum data.
+    allow_lookup : IntervalLookup
+        Allowed address space. A compacted subnet must not overlap it.
+    min_num : int
+        The minimum number of IP addresses required before the group is
+        collapsed into a /24 subnet.
+
+    Returns
+    -------
+    tuple[list[AddressKey], list[NetworkKey]]
+        Address keys sorted by address and /24 network keys sorted by
+        network address.
+    """
+    if min_num == 0:
+        return sorted(ip_keys, key=lambda key: key[1]), []
+
+    groups: dict[int, list[AddressKey]] = {}
+    leftovers: list[AddressKey] = []
+    for key in ip_keys:
+        if key[0] != 4:
+            leftovers.append(key)
+            continue
+        groups.setdefault(key[1] >> 8, []).append(key)
+
+    addresses: list[AddressKey] = []
+    networks: list[NetworkKey] = []
+    for prefix, keys in groups.items():
+        first = prefix << 8
+        members = set(keys)
+        if len(members) >= min_num and not allow_lookup.overlaps(4, first, first + 255):
+            networks.append((4, first, 24))
+        else:
+            addresses.extend(members)
+
+    return (
+        sorted([*addresses, *leftovers], key=lambda key: key[1]),
+        sorted(networks, key=lambda key: key[1]),
+    )
+
+
 def compact(
     ip_list: list[AddressType],
     allowlist: Iterable[AddressType | NetworkType],
@@ -85,6 +657,8 @@ def compact(
 ) -> tuple[list[AddressType], list[NetworkType]]:
     """Compact IP addresses into representative /24 subnets.
 
+    This wraps :func:`compact_keys` for callers holding address objects.
+
     Parameters
     ----------
     ip_list : list[AddressType]
@@ -102,35 +676,22 @@ def compact(
     tuple[list[AddressType], list[NetworkType]]
         Separate lists of IP addresses and /24 subnets.
     """
-    compacted: list[AddressType | NetworkType] = []
-    leftovers: list[AddressType | NetworkType] = []
-    D: dict[NetworkType, set[AddressType]] = {}
     allow_ips, allow_nets = split_hybrid(allowlist)
-
-    if min_num == 0:
-        return sorted(ip_list, key=lambda x: int(x)), []
-
-    for ip in ip_list:
-        if ip.version != 4:
-            leftovers.append(ip)
-            continue
-        network = ipa.ip_network(f"{ip}/24", strict=False)
-        if network in D:
-            D[network].add(ip)
-        else:
-            D[network] = {ip}
-
-    for net, ips in D.items():
-        if (
-            len(ips) >= min_num
-            and not any([ip in net for ip in allow_ips])
-            and not any([allow_net.overlaps(net) for allow_net in allow_nets])
-        ):
-            compacted.append(net)
-        else:
-            compacted += list(ips)
-
-    return split_hybrid(compacted + leftovers)
+    allow_lookup = build_interval_lookup(
+        [
+            *(address_key(ip) for ip in allow_ips),
+            *(network_key(net) for net in allow_nets),
+        ]
+    )
+    ip_keys, net_keys = compact_keys(
+        [address_key(ip) for ip in ip_list],
+        allow_lookup,
+        min_num,
+    )
+    return (
+        [key_address(key) for key in ip_keys],
+        [key_network(key) for key in net_keys],
+    )
 
 
 def ip_in_network(ip: AddressType, lookup: NetworkLookup) -> NetworkType | None:
@@ -0,0 +1,450 @@
+"""Memory-mapped check snapshot helpers."""
+
+import json
+import mmap
+from bisect import bisect_left
+from bisect import bisect_right
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import overload
+
+from banip.constants import AddressKey
+from banip.constants import NetworkKey
+from banip.utilities.generations import staged_file
+from banip.utilities.ip import ADDRESS_BITS
+from banip.utilities.lookup import network_parents
+
+SNAPSHOT_MAGIC = b"BANIPCK1"
+HEADER_SIZE = 4
+PARENT_SIZE = 4
+HITS_SIZE = 2
+
+
+class FixedRecords(Sequence[int]):
+    """Sorted fixed-width big-endian records exposed as integer keys.
+
+    Indexing returns the integer stored in the first ``key_width`` bytes
+    of each record, so the sequence can be searched with :mod:`bisect`
+    without decoding the whole section.
+
+    Parameters
+    ----------
+    buffer : memoryview
+        Buffer holding the section.
+    count : int
+        Number of records.
+    width : int
+        Size of one record in bytes.
+    key_width : int
+        Size of the leading key in bytes.
+    """
+
+    def __init__(
+        self, buffer: memoryview, count: int, width: int, key_width: int
+    ) -> None:
+        self.buffer = buffer
+        self.length = count
+        self.width = width
+        self.key_width = key_width
+        self.decoded: list[int] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of records."""
+        return self.length
+
+    @overload
+    def __getitem__(self, index: int) -> int: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[int]: ...
+
+    def __getitem__(self, index: int | slice) -> int | Sequence[int]:
+        """Return the key of one record, or keys for a slice of records."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("record index out of range")
+        start = index * self.width
+        return int.from_bytes(self.buffer[start : start + self.key_width])
+
+    @property
+    def keys(self) -> Sequence[int]:
+        """Return the record keys for searching.
+
+        Returns
+        -------
+        Sequence[int]
+            Keys decoded by :meth:`decode`, or the records themselves
+            when the keys have not been decoded.
+        """
+        return self if self.decoded is None else self.decoded
+
+    def decode(self) -> None:
+        """Decode every key into memory so searches avoid per-step reads."""
+        self.decoded = [
+            int.from_bytes(self.buffer[start : start + self.key_width])
+            for start in range(0, self.length * self.width, self.width)
+        ]
+
+    def field(self, index: int, offset: int, size: int, signed: bool = False) -> int:
+        """Return an integer field from one record.
+
+        Parameters
+        ----------
+        index : int
+            Record index.
+        offset : int
+            Byte offset of the field within the record.
+        size : int
+            Size of the field in bytes.
+        signed : bool, optional
+            Whether the field is a signed integer. Defaults to False.
+
+        Returns
+        -------
+        int
+            Decoded field value.
+        """
+        start = index * self.width + offset
+        return int.from_bytes(self.buffer[start : start + size], signed=signed)
+
+
+def check_snapshot(path: Path) -> Path:
+    """Return the check snapshot path for a rendered blocklist.
+
+    Parameters
+    ----------
+    path : Path
+        Rendered blocklist path.
+
+    Returns
+    -------
+    Path
+        Snapshot path next to the blocklist.
+    """
+    return path.with_name(f"{path.stem}_check.bin")
+
+
+def source_stamps(sources: dict[str, Path]) -> dict[str, list[int]]:
+    """Return modification stamps used to detect a stale snapshot.
+
+    Parameters
+    ----------
+    sources : dict[str, Path]
+        Snapshot inputs keyed by a stable label.
+
+    Returns
+    -------
+    dict[str, list[int]]
+        ``[mtime_ns, size]`` for each existing source, keyed by label.
+    """
+    stamps: dict[str, list[int]] = {}
+    for label, path in sources.items():
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        stamps[label] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+
+def write_check_snapshot(
+    path: Path,
+    ips: list[AddressKey],
+    networks: list[NetworkKey],
+    ipsum: dict[AddressKey, int],
+    header: dict[str, object],
+) -> None:
+    """Write a check snapshot for memory-mapped lookups.
+
+    The file holds a magic value, a JSON header, and fixed-width
+    big-endian record sections for each address family: exact blocklist
+    addresses, blocklist networks with a parent index for nested
+    networks, and ipsum confidence values.
+
+    Parameters
+    ----------
+    path : Path
+        Snapshot destination.
+    ips : list[AddressKey]
+        Exact addresses in the rendered blocklist.
+    networks : list[NetworkKey]
+        Networks in the rendered blocklist.
+    ipsum : dict[AddressKey, int]
+        Ipsum confidence values keyed by address.
+    header : dict[str, object]
+        Additional JSON metadata, such as source stamps and policy
+        verdicts.
+    """
+    sections: dict[str, list[int]] = {}
+    chunks: list[bytes] = []
+    offset = 0
+
+    def add(name: str, records: list[bytes], width: int) -> None:
+        nonlocal offset
+        sections[name] = [offset, len(records), width]
+        chunk = b"".join(records)
+        chunks.append(chunk)
+        offset += len(chunk)
+
+    for version, bits in ADDRESS_BITS.items():
+        size = bits // 8
+        family_ips = sorted(
+            {value for ip_version, value in ips if ip_version == version}
+        )
+        add(f"ips{version}", [value.to_bytes(size) for value in family_ips], size)
+
+        family_nets = sorted({net for net in networks if net[0] == version})
+        parents = network_parents(family_nets)
+        add(
+            f"nets{version}",
+            [
+                start.to_bytes(size)
+                + prefixlen.to_bytes(1)
+                + parent.to_bytes(PARENT_SIZE, signed=True)
+                for (_, start, prefixlen), parent in zip(
+                    family_nets, parents, strict=True
+                )
+            ],
+            size + 1 + PARENT_SIZE,
+        )
+
+        family_hits = sorted(
+            (value, min(hits, 2 ** (8 * HITS_SIZE) - 1))
+            for (ip_version, value), hits in ipsum.items()
+            if ip_version == version and hits >= 0
+        )
+        add(
+            f"ipsum{version}",
+            [
+                value.to_bytes(size) + hits.to_bytes(HITS_SIZE)
+                for value, hits in family_hits
+            ],
+            size + HITS_SIZE,
+        )
+
+    encoded = json.dumps({**header, "sections": sections}).encode()
+    with staged_file(path) as tmp_path, tmp_path.open("wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(encoded).to_bytes(HEADER_SIZE))
+        f.write(encoded)
+        for chunk in chunks:
+            f.write(chunk)
+
+
+@dataclass(frozen=True)
+class CheckSnapshot:
+    """Memory-mapped check snapshot.
+
+    Parameters
+    ----------
+    header : dict
+        Decoded JSON header.
+    sections : dict[str, FixedRecords]
+        Record sections keyed by name.
+    """
+
+    header: dict
+    sections: dict[str, FixedRecords]
+
+    def contains_ip(self, key: AddressKey) -> bool:
+        """Return whether an address is listed exactly in the blocklist.
+
+        Parameters
+        ----------
+        key : AddressKey
+            Integer address key.
+
+        Returns
+        -------
+        bool
+            True when the exact address is listed.
+        """
+        version, value = key
+        keys = self.sections[f"ips{version}"].keys
+        index = bisect_right(keys, value) - 1
+        return index >= 0 and keys[index] == value
+
+    def network(self, key: AddressKey) -> NetworkKey | None:
+        """Return the innermost blocklist network containing an address.
+
+        Parameters
+        ----------
+        key : AddressKey
+            Integer address key.
+
+        Returns
+        -------
+        NetworkKey | None
+            Matching network, or None when no network contains it.
+        """
+        version, value = key
+        bits = ADDRESS_BITS[version]
+        records = self.sections[f"nets{version}"]
+        keys = records.keys
+        index = bisect_right(keys, value) - 1
+        while index >= 0:
+            start = keys[index]
+            prefixlen = records.field(index, bits // 8, 1)
+            if value <= start + (1 << (bits - prefixlen)) - 1:
+                return version, start, prefixlen
+            index = records.field(index, bits // 8 + 1, PARENT_SIZE, signed=True)
+        return None
+
+    def entries(
+        self, version: int, first: int, last: int
+    ) -> list[AddressKey | NetworkKey]:
+        """Return the blocklist entries overlapping an inclusive range.
+
+        Addresses inside the range are found by bisection. Networks are
+        found by bisection plus a walk up the parent indexes of the
+        networks enclosing the first address, so a query never scans
+        entries outside the range.
+
+        Parameters
+        ----------
+        version : int
+            IP version of the range, either 4 or 6.
+        first : int
+            First address in the range as an integer.
+        last : int
+            Last address in the range as an integer.
+
+        Returns
+        -------
+        list[AddressKey | NetworkKey]
+            Overlapping networks sorted by address and then prefix
+            length, followed by addresses sorted by address.
+        """
+        bits = ADDRESS_BITS[version]
+        records = self.sections[f"nets{version}"]
+        keys = records.keys
+
+        def prefixlen(index: int) -> int:
+            return records.field(index, bits // 8, 1)
+
+        def parent(index: int) -> int:
+            return records.field(index, bits // 8 + 1, PARENT_SIZE, signed=True)
+
+        lower = bisect_left(keys, first)
+        index = lower - 1
+        while index >= 0 and keys[index] + (1 << (bits - prefixlen(index))) <= first:
+            index = parent(index)
+        enclosing: list[int] = []
+        while index >= 0:
+            enclosing.append(index)
+            index = parent(index)
+        found: list[AddressKey | NetworkKey] = [
+            (version, keys[i], prefixlen(i))
+            for i in [*reversed(enclosing), *range(lower, bisect_right(keys, last))]
+        ]
+
+        ips = self.sections[f"ips{version}"].keys
+        found.extend(
+            (version, ips[i])
+            for i in range(bisect_left(ips, first), bisect_right(ips, last))
+        )
+        return found
+
+    def confidence(self, key: AddressKey) -> int | None:
+        """Return the ipsum confidence value for an address.
+
+        Parameters
+        ----------
+        key : AddressKey
+            Integer address key.
+
+        Returns
+        -------
+        int | None
+            Confidence value, or None when the address is not in ipsum.
+        """
+        version, value = key
+        records = self.sections[f"ipsum{version}"]
+        keys = records.keys
+        index = bisect_right(keys, value) - 1
+        if index < 0 or keys[index] != value:
+            return None
+        return records.field(index, ADDRESS_BITS[version] // 8, HITS_SIZE)
+
+    def verdicts(
+        self, country_code: str
+    ) -> tuple[tuple[str, ...], tuple[str, ...]] | None:
+        """Return precomputed policy verdicts for a country.
+
+        Parameters
+        ----------
+        country_code : str
+            Two-letter country code.
+
+        Returns
+        -------
+        tuple[tuple[str, ...], tuple[str, ...]] | None
+            Names of blocking and permitting policies, or None when the
+            country is not in the verdict table.
+        """
+        if not (entry := self.header.get("verdicts", {}).get(country_code)):
+            return None
+        blocked, permitted = entry
+        return tuple(blocked), tuple(permitted)
+
+
+def read_check_snapshot(
+    path: Path,
+    sources: dict[str, Path],
+    decode: bool = False,
+) -> CheckSnapshot | None:
+    """Open a check snapshot when it matches its current sources.
+
+    Parameters
+    ----------
+    path : Path
+        Snapshot path.
+    sources : dict[str, Path]
+        Snapshot inputs keyed by the labels used when it was written.
+    decode : bool, optional
+        Whether to decode every section's keys into memory, which makes
+        repeated lookups faster at the cost of a slower open. Defaults
+        to False.
+
+    Returns
+    -------
+    CheckSnapshot | None
+        The mapped snapshot, or None when it is missing, unreadable, or
+        older than any of its sources.
+    """
+    try:
+        with path.open("rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    prefix = len(SNAPSHOT_MAGIC) + HEADER_SIZE
+    length = int.from_bytes(data[len(SNAPSHOT_MAGIC) : prefix])
+    try:
+        if data[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError("not a check snapshot")
+        header = json.loads(data[prefix : prefix + length])
+        if header.get("sources") != source_stamps(sources):
+            raise ValueError("snapshot is older than its sources")
+        layout = {
+            name: (int(offset), int(count), int(width), ADDRESS_BITS[int(name[-1])])
+            for name, (offset, count, width) in header["sections"].items()
+        }
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        # Nothing references the mapping yet, so it can be released.
+        data.close()
+        return None
+    view = memoryview(data)[prefix + length :]
+    sections = {
+        name: FixedRecords(
+            view[offset : offset + count * width], count, width, bits // 8
+        )
+        for name, (offset, count, width, bits) in layout.items()
+    }
+    if decode:
+        for records in sections.values():
+            records.decode()
+    return CheckSnapshot(header=header, sections=sections)
@@ -0,0 +1,549 @@
+"""Stream Processing Offload Protocol (SPOP) encoding helpers.
+
+These helpers implement the subset of SPOP 2.0 used by an HAProxy
+Stream Processing Offload Agent: hello and disconnect handshakes,
+NOTIFY messages, and ACK frames that set variables. Payload
+fragmentation is not supported.
+"""
+
+import asyncio
+import ipaddress as ipa
+from dataclasses import dataclass
+from enum import IntEnum
+
+SPOP_VERSION = "2.0"
+MAX_FRAME_SIZE = 16380
+FLAG_FIN = 0x01
+FLAG_ABORT = 0x02
+ACTION_SET_VAR = 1
+ACTION_UNSET_VAR = 2
+BOOL_TRUE = 0x10
+
+
+class FrameType(IntEnum):
+    """SPOP frame types."""
+
+    HAPROXY_HELLO = 1
+    HAPROXY_DISCONNECT = 2
+    NOTIFY = 3
+    AGENT_HELLO = 101
+    AGENT_DISCONNECT = 102
+    ACK = 103
+
+
+class DataType(IntEnum):
+    """SPOP typed-data identifiers."""
+
+    NULL = 0
+    BOOL = 1
+    INT32 = 2
+    UINT32 = 3
+    INT64 = 4
+    UINT64 = 5
+    IPV4 = 6
+    IPV6 = 7
+    STRING = 8
+    BINARY = 9
+
+
+class VarScope(IntEnum):
+    """Scopes of variables set by an agent."""
+
+    PROCESS = 0
+    SESSION = 1
+    TRANSACTION = 2
+    REQUEST = 3
+    RESPONSE = 4
+
+
+class SpopStatus(IntEnum):
+    """Disconnect status codes."""
+
+    NORMAL = 0
+    IO = 1
+    TIMEOUT = 2
+    TOO_BIG = 3
+    INVALID = 4
+    NO_VERSION = 5
+    NO_FRAME_SIZE = 6
+    NO_CAPABILITIES = 7
+    BAD_VERSION = 8
+    BAD_FRAME_SIZE = 9
+    FRAGMENTATION = 10
+    UNKNOWN = 99
+
+
+class SpopError(ValueError):
+    """Protocol error that ends an SPOP connection.
+
+    Parameters
+    ----------
+    status : SpopStatus
+        Disconnect status code to report to the peer.
+    message : str
+        Human-readable description of the error.
+    """
+
+    def __init__(self, status: SpopStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class Frame:
+    """One SPOP frame.
+
+    Parameters
+    ----------
+    type : int
+        Frame type.
+    payload : bytes
+        Encoded frame payload.
+    stream_id : int, optional
+        Stream identifier. Defaults to 0.
+    frame_id : int, optional
+        Frame identifier. Defaults to 0.
+    flags : int, optional
+        Frame flags. Defaults to ``FLAG_FIN``.
+    """
+
+    type: int
+    payload: bytes
+    stream_id: int = 0
+    frame_id: int = 0
+    flags: int = FLAG_FIN
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode an unsigned integer with the SPOP variable-length format.
+
+    Parameters
+    ----------
+    value : int
+        Non-negative integer below ``2**64``.
+
+    Returns
+    -------
+    bytes
+        Encoded integer.
+    """
+    if value < 240:
+        return bytes([value])
+    encoded = bytearray([(value | 240) & 0xFF])
+    value = (value - 240) >> 4
+    while value >= 128:
+        encoded.append((value | 128) & 0xFF)
+        value = (value - 128) >> 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def decode_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Decode a variable-length integer.
+
+    Parameters
+    ----------
+    data : bytes
+        Buffer holding the integer.
+    pos : int
+        Offset of the first byte.
+
+    Returns
+    -------
+    tuple[int, int]
+        Decoded integer and the offset following it.
+
+    Raises
+    ------
+    SpopError
+        If the buffer ends inside the integer.
+    """
+    try:
+        value = data[pos]
+        pos += 1
+        if value < 240:
+            return value, pos
+        shift = 4
+        while True:
+            byte = data[pos]
+            pos += 1
+            value += byte << shift
+            shift += 7
+            if byte < 128:
+                return value, pos
+    except IndexError:
+        raise SpopError(SpopStatus.INVALID, "truncated integer")
+
+
+def encode_string(text: str | bytes) -> bytes:
+    """Encode a length-prefixed string.
+
+    Parameters
+    ----------
+    text : str | bytes
+        String to encode. Text is encoded as UTF-8.
+
+    Returns
+    -------
+    bytes
+        Encoded string.
+    """
+    raw = text.encode() if isinstance(text, str) else text
+    return encode_varint(len(raw)) + raw
+
+
+def decode_bytes(data: bytes, pos: int) -> tuple[bytes, int]:
+    """Decode a length-prefixed byte string.
+
+    Parameters
+    ----------
+    data : bytes
+        Buffer holding the string.
+    pos : int
+        Offset of the length prefix.
+
+    Returns
+    -------
+    tuple[bytes, int]
+        Decoded bytes and the offset following them.
+
+    Raises
+    ------
+    SpopError
+        If the buffer ends inside the string.
+    """
+    length, pos = decode_varint(data, pos)
+    if pos + length > len(data):
+        raise SpopError(SpopStatus.INVALID, "truncated string")
+    return data[pos : pos + length], pos + length
+
+
+def decode_string(data: bytes, pos: int) -> tuple[str, int]:
+    """Decode a length-prefixed UTF-8 string.
+
+    Parameters
+    ----------
+    data : bytes
+        Buffer holding the string.
+    pos : int
+        Offset of the length prefix.
+
+    Returns
+    -------
+    tuple[str, int]
+        Decoded string and the offset following it.
+    """
+    raw, pos = decode_bytes(data, pos)
+    return raw.decode(errors="replace"), pos
+
+
+def encode_typed(value: object) -> bytes:
+    """Encode a Python value as SPOP typed data.
+
+    Booleans, integers, strings, bytes, IP addresses, and ``None`` are
+    supported. Non-negative integers are sent as unsigned values.
+
+    Parameters
+    ----------
+    value : object
+        Value to encode.
+
+    Returns
+    -------
+    bytes
+        Type byte followed by the encoded value.
+
+    Raises
+    ------
+    TypeError
+        If the value has an unsupported type.
+    """
+    if value is None:
+        return bytes([DataType.NULL])
+    if isinstance(value, bool):
+        return bytes([DataType.BOOL | (BOOL_TRUE if value else 0)])
+    if isinstance(value, int):
+        if value >= 0:
+            kind = DataType.UINT32 if value < 2**32 else DataType.UINT64
+            return bytes([kind]) + encode_varint(value)
+        kind = DataType.INT32 if value >= -(2**31) else DataType.INT64
+        return bytes([kind]) + encode_varint(value + 2**64)
+    if isinstance(value, str):
+        return bytes([DataType.STRING]) + encode_string(value)
+    if isinstance(value, bytes):
+        return bytes([DataType.BINARY]) + encode_string(value)
+    if isinstance(value, ipa.IPv4Address):
+        return bytes([DataType.IPV4]) + value.packed
+    if isinstance(value, ipa.IPv6Address):
+        return bytes([DataType.IPV6]) + value.packed
+    raise TypeError(f"Unsupported SPOP value: {value!r}")
+
+
+def decode_typed(data: bytes, pos: int) -> tuple[object, int]:
+    """Decode SPOP typed data.
+
+    Parameters
+    ----------
+    data : bytes
+        Buffer holding the value.
+    pos : int
+        Offset of the type byte.
+
+    Returns
+    -------
+    tuple[object, int]
+        Decoded value and the offset following it.
+
+    Raises
+    ------
+    SpopError
+        If the value is truncated or has an unknown type.
+    """
+    if pos >= len(data):
+        raise SpopError(SpopStatus.INVALID, "truncated value")
+    kind = data[pos] & 0x0F
+    flags = data[pos] & 0xF0
+    pos += 1
+    if kind == DataType.NULL:
+        return None, pos
+    if kind == DataType.BOOL:
+        return bool(flags & BOOL_TRUE), pos
+    if kind in (DataType.UINT32, DataType.UINT64):
+        return decode_varint(data, pos)
+    if kind in (DataType.INT32, DataType.INT64):
+        value, pos = decode_varint(data, pos)
+        return value - 2**64 if value >= 2**63 else value, pos
+    if kind in (DataType.IPV4, DataType.IPV6):
+        size = 4 if kind == DataType.IPV4 else 16
+        if pos + size > len(data):
+            raise SpopError(SpopStatus.INVALID, "truncated address")
+        return ipa.ip_address(data[pos : pos + size]), pos + size
+    if kind == DataType.STRING:
+        return decode_string(data, pos)
+    if kind == DataType.BINARY:
+        return decode_bytes(data, pos)
+    raise SpopError(SpopStatus.INVALID, f"unknown data type {kind}")
+
+
+def encode_kv(items: dict[str, object]) -> bytes:
+    """Encode a list of named values.
+
+    Parameters
+    ----------
+    items : dict[str, object]
+        Values keyed by name.
+
+    Returns
+    -------
+    bytes
+        Encoded name and value pairs.
+    """
+    return b"".join(
+        encode_string(name) + encode_typed(value) for name, value in items.items()
+    )
+
+
+def decode_kv(data: bytes) -> dict[str, object]:
+    """Decode a payload made of named values.
+
+    Parameters
+    ----------
+    data : bytes
+        Hello or disconnect frame payload.
+
+    Returns
+    -------
+    dict[str, object]
+        Values keyed by name.
+    """
+    items: dict[str, object] = {}
+    pos = 0
+    while pos < len(data):
+        name, pos = decode_string(data, pos)
+        items[name], pos = decode_typed(data, pos)
+    return items
+
+
+def encode_messages(messages: dict[str, dict[str, object]]) -> bytes:
+    """Encode a NOTIFY payload.
+
+    Parameters
+    ----------
+    messages : dict[str, dict[str, object]]
+        Message arguments keyed by message name.
+
+    Returns
+    -------
+    bytes
+        Encoded messages.
+    """
+    return b"".join(
+        encode_string(name) + bytes([len(args)]) + encode_kv(args)
+        for name, args in messages.items()
+    )
+
+
+def decode_messages(data: bytes) -> dict[str, dict[str, object]]:
+    """Decode a NOTIFY payload.
+
+    Parameters
+    ----------
+    data : bytes
+        NOTIFY frame payload.
+
+    Returns
+    -------
+    dict[str, dict[str, object]]
+        Message arguments keyed by message name.
+
+    Raises
+    ------
+    SpopError
+        If the payload is truncated.
+    """
+    messages: dict[str, dict[str, object]] = {}
+    pos = 0
+    while pos < len(data):
+        name, pos = decode_string(data, pos)
+        if pos >= len(data):
+            raise SpopError(SpopStatus.INVALID, "truncated message")
+        count = data[pos]
+        pos += 1
+        args: dict[str, object] = {}
+        for _ in range(count):
+            arg_name, pos = decode_string(data, pos)
+            args[arg_name], pos = decode_typed(data, pos)
+        messages[name] = args
+    return messages
+
+
+def encode_set_vars(scope: VarScope, variables: dict[str, object]) -> bytes:
+    """Encode ACK actions that set variables.
+
+    Parameters
+    ----------
+    scope : VarScope
+        Scope of every variable.
+    variables : dict[str, object]
+        Variable values keyed by name.
+
+    Returns
+    -------
+    bytes
+        Encoded SET-VAR actions.
+    """
+    return b"".join(
+        bytes([ACTION_SET_VAR, 3, scope]) + encode_string(name) + encode_typed(value)
+        for name, value in variables.items()
+    )
+
+
+def decode_set_vars(data: bytes) -> dict[str, object]:
+    """Decode the variables set by an ACK payload.
+
+    Parameters
+    ----------
+    data : bytes
+        ACK frame payload.
+
+    Returns
+    -------
+    dict[str, object]
+        Values of SET-VAR actions keyed by variable name. UNSET-VAR
+        actions are skipped.
+
+    Raises
+    ------
+    SpopError
+        If the payload is truncated or holds an unknown action.
+    """
+    variables: dict[str, object] = {}
+    pos = 0
+    while pos < len(data):
+        if pos + 3 > len(data):
+            raise SpopError(SpopStatus.INVALID, "truncated action")
+        action = data[pos]
+        pos += 3
+        name, pos = decode_string(data, pos)
+        if action == ACTION_SET_VAR:
+            variables[name], pos = decode_typed(data, pos)
+        elif action != ACTION_UNSET_VAR:
+            raise SpopError(SpopStatus.INVALID, f"unknown action {action}")
+    return variables
+
+
+def encode_frame(frame: Frame) -> bytes:
+    """Encode a frame with its length prefix.
+
+    Parameters
+    ----------
+    frame : Frame
+        Frame to encode.
+
+    Returns
+    -------
+    bytes
+        Encoded frame.
+    """
+    body = (
+        bytes([frame.type])
+        + frame.flags.to_bytes(4)
+        + encode_varint(frame.stream_id)
+        + encode_varint(frame.frame_id)
+        + frame.payload
+    )
+    return len(body).to_bytes(4) + body
+
+
+def decode_frame(data: bytes) -> Frame:
+    """Decode a frame without its length prefix.
+
+    Parameters
+    ----------
+    data : bytes
+        Frame type, metadata, and payload.
+
+    Returns
+    -------
+    Frame
+        Decoded frame.
+
+    Raises
+    ------
+    SpopError
+        If the frame is truncated.
+    """
+    if len(data) < 5:
+        raise SpopError(SpopStatus.INVALID, "truncated frame")
+    flags = int.from_bytes(data[1:5])
+    stream_id, pos = decode_varint(data, 5)
+    frame_id, pos = decode_varint(data, pos)
+    return Frame(data[0], data[pos:], stream_id, frame_id, flags)
+
+
+async def read_frame(reader: asyncio.StreamReader, max_size: int) -> Frame:
+    """Read one frame from a stream.
+
+    Parameters
+    ----------
+    reader : asyncio.StreamReader
+        Connection reader.
+    max_size : int
+        Largest accepted frame size in bytes.
+
+    Returns
+    -------
+    Frame
+        Decoded frame.
+
+    Raises
+    ------
+    SpopError
+        If the frame is larger than ``max_size`` or malformed.
+    asyncio.IncompleteReadError
+        If the connection closes inside a frame.
+    """
+    length = int.from_bytes(await reader.readexactly(4))
+    if length > max_size:
+        raise SpopError(SpopStatus.TOO_BIG, "frame is too big")
+    return decode_frame(await reader.readexactly(length))
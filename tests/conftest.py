@@ -0,0 +1,100 @@
+"""Shared test fixtures."""
+
+import gzip
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass
+from dataclasses import field
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+
+@dataclass
+class FeedServer:
+    """Local HTTP stand-in for upstream data feeds.
+
+    Routes map a path to a body and response headers. Requests carrying
+    an ``If-None-Match`` header equal to the route's ``ETag`` are
+    answered with 304, and the next ``failures`` requests with 503.
+    When ``ranges`` is true, ``Range: bytes=N-`` requests whose
+    ``If-Range`` matches the ``ETag`` are answered with 206. A nonzero
+    ``cutoff`` drops the connection after that many body bytes of the
+    next response, and a nonzero ``skew`` moves the start of every
+    range answered by that many bytes. With ``gzip`` set to
+    ``negotiate``, bodies are gzip-encoded for requests that accept
+    gzip, and with ``always`` for every request; ranges then apply to
+    the encoded body.
+    """
+
+    url: str
+    routes: dict[str, tuple[bytes, dict[str, str]]] = field(default_factory=dict)
+    seen: list[tuple[str, dict[str, str]]] = field(default_factory=list)
+    failures: int = 0
+    ranges: bool = True
+    cutoff: int = 0
+    skew: int = 0
+    gzip: str = ""
+
+
+@pytest.fixture
+def feed_server() -> Iterator[FeedServer]:
+    """Serve feed routes from a local HTTP server."""
+    feeds = FeedServer(url="")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            feeds.seen.append((self.path, dict(self.headers)))
+            if feeds.failures:
+                feeds.failures -= 1
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if self.path not in feeds.routes:
+                self.send_error(404)
+                return
+            body, headers = feeds.routes[self.path]
+            etag = headers.get("ETag")
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            accepts = "gzip" in self.headers.get("Accept-Encoding", "")
+            if feeds.gzip == "always" or (feeds.gzip == "negotiate" and accepts):
+                body = gzip.compress(body, mtime=0)
+                headers = {**headers, "Content-Encoding": "gzip"}
+            status, size = 200, len(body)
+            requested = self.headers.get("Range", "")
+            guard = self.headers.get("If-Range")
+            if feeds.ranges and requested and guard in (None, etag):
+                start = int(requested.removeprefix("bytes=").rstrip("-")) + feeds.skew
+                if start >= size:
+                    self.send_error(416)
+                    return
+                status, body = 206, body[start:]
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if feeds.cutoff:
+                body, feeds.cutoff = body[: feeds.cutoff], 0
+                self.close_connection = True
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            """Keep test output quiet."""
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    feeds.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield feeds
+    server.shutdown()
+    server.server_close()
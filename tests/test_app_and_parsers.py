@@ -12,13 +12,24 @@ from banip.parsers import bots_args
 from banip.parsers import build_args
 from banip.parsers import check_args
 from banip.parsers import database_args
+from banip.parsers import logscan_args
 from banip.parsers import patch_args
+from banip.parsers import serve_args
 from banip.parsers import stats_args
 
 
 @pytest.mark.parametrize(
     "parser_module",
-    [bots_args, build_args, check_args, database_args, patch_args, stats_args],
+    [
+        bots_args,
+        build_args,
+        check_args,
+        database_args,
+        logscan_args,
+        patch_args,
+        serve_args,
+        stats_args,
+    ],
 )
 def test_parser_modules_register_commands(parser_module) -> None:
     """Each parser module registers its command name."""
@@ -40,6 +51,19 @@ def test_build_outfile_is_parsed_as_a_path() -> None:
     assert args.outfile == Path("custom.txt")
 
 
+def test_build_parses_profile_selection_and_jobs() -> None:
+    """The build parser accepts a profile name and worker count."""
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="cmd")
+    build_args.load_command_args(subparsers)
+
+    args = parser.parse_args(["build", "--profile", "all", "-j", "3"])
+    defaults = parser.parse_args(["build"])
+
+    assert (args.profile, args.jobs) == ("all", 3)
+    assert (defaults.profile, defaults.jobs) == (None, 1)
+
+
 def test_check_parses_zero_or_more_ip_addresses() -> None:
     """Check accepts interactive, single-address, and batch invocations."""
     parser = argparse.ArgumentParser()
@@ -47,13 +71,43 @@ def test_check_parses_zero_or_more_ip_addresses() -> None:
     check_args.load_command_args(subparsers)
 
     interactive = parser.parse_args(["check"])
-    batch = parser.parse_args(["check", "192.0.2.1", "2001:db8::1"])
+    batch = parser.parse_args(["check", "192.0.2.1", "2001:db8::1", "192.0.0.0/22"])
 
     assert interactive.ip_addresses == []
     assert [str(address) for address in batch.ip_addresses] == [
         "192.0.2.1",
         "2001:db8::1",
+        "192.0.0.0/22",
     ]
+    assert (interactive.input, interactive.format) == (None, "table")
+
+
+def test_check_parses_bulk_input_and_format() -> None:
+    """Check accepts a bulk input source and a machine-readable format."""
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="cmd")
+    check_args.load_command_args(subparsers)
+
+    args = parser.parse_args(
+        ["check", "--input", "-", "--format", "ndjson", "--fields", "country"]
+    )
+
+    assert (args.input, args.format, args.fields) == ("-", "ndjson", ("country",))
+    with pytest.raises(SystemExit):
+        parser.parse_args(["check", "--format", "xml"])
+
+
+def test_bots_check_parses_many_addresses_and_input() -> None:
+    """Bots check accepts several addresses and an input file."""
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="cmd")
+    bots_args.load_command_args(subparsers)
+
+    args = parser.parse_args(["bots", "check", "192.0.2.1", "2001:db8::1"])
+    bulk = parser.parse_args(["bots", "check", "--input", "addresses.txt"])
+
+    assert [str(address) for address in args.ips] == ["192.0.2.1", "2001:db8::1"]
+    assert (args.input, bulk.ips, bulk.input) == (None, [], "addresses.txt")
 
 
 def test_check_rejects_invalid_ip_address() -> None:
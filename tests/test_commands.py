@@ -1,9 +1,18 @@
 """Tests for command task runners."""
 
 import argparse
+import asyncio
+import csv
+import gzip
+import hashlib
 import ipaddress as ipa
+import json
 import os
 import re
+import zipfile
+from datetime import datetime
+from datetime import timedelta
+from io import BytesIO
 from io import StringIO
 from pathlib import Path
 from types import SimpleNamespace
@@ -16,13 +25,24 @@ from banip import build
 from banip import check
 from banip import config
 from banip import database
+from banip import logscan
 from banip import null
 from banip import patch
+from banip import serve
 from banip import stats
 from banip import utilities
-from banip.utilities import data as utility_data
 from banip.argument_types import compact_type
+from banip.argument_types import duration_type
+from banip.argument_types import fields_type
+from banip.argument_types import interval_type
+from banip.argument_types import jobs_type
+from banip.argument_types import port_type
+from banip.argument_types import regex_type
+from banip.argument_types import target_type
 from banip.argument_types import threshold_type
+from banip.argument_types import top_type
+from banip.constants import CHECK_FIELDS
+from banip.utilities import data as utility_data
 
 
 def test_argument_types_accept_valid_values() -> None:
@@ -31,6 +51,17 @@ def test_argument_types_accept_valid_values() -> None:
     assert threshold_type("10") == 10
     assert compact_type("1") == 1
     assert compact_type("255") == 255
+    assert jobs_type("4") == 4
+    assert top_type("25") == 25
+    assert port_type("0") == 0
+    assert port_type("65535") == 65535
+    assert interval_type("0.5") == 0.5
+    assert duration_type("30d") == timedelta(days=30)
+    assert duration_type("1.5H") == timedelta(minutes=90)
+    assert regex_type(r"^(?P<ip>\S+)") == r"^(?P<ip>\S+)"
+    assert target_type("192.0.2.3") == ipa.ip_address("192.0.2.3")
+    assert fields_type("country, verdict,country") == ("verdict", "country")
+    assert target_type("2001:db8::/32") == ipa.ip_network("2001:db8::/32")
 
 
 @pytest.mark.parametrize(
@@ -40,6 +71,22 @@ def test_argument_types_accept_valid_values() -> None:
         (threshold_type, "11", "Value must be between 1 and 10"),
         (compact_type, "x", "Value must be an integer"),
         (compact_type, "0", "Value must be between 1 and 255"),
+        (jobs_type, "x", "Value must be an integer"),
+        (jobs_type, "0", "Value must be at least 1"),
+        (top_type, "x", "Value must be an integer"),
+        (top_type, "0", "Value must be at least 1"),
+        (port_type, "x", "Value must be an integer"),
+        (port_type, "65536", "Value must be between 0 and 65535"),
+        (interval_type, "x", "Value must be a number"),
+        (interval_type, "0", "Value must be greater than 0"),
+        (duration_type, "30", "Value must be a number followed by"),
+        (duration_type, "d", "Value must be a number followed by"),
+        (duration_type, "0w", "Value must be greater than 0"),
+        (regex_type, "(", "Invalid regular expression"),
+        (target_type, "192.0.2.1/24", "has host bits set"),
+        (target_type, "invalid", "does not appear to be an IPv4 or IPv6"),
+        (fields_type, " , ", "Value must name at least one field"),
+        (fields_type, "verdict,score", "Unknown field 'score'"),
     ],
 )
 def test_argument_types_reject_invalid_values(
@@ -121,31 +168,152 @@ def test_main_reports_missing_custom_command_code(
     assert "Code for a custom command" in capsys.readouterr().out
 
 
-def test_patch_task_runner_updates_ipsum(tmp_path, monkeypatch, capsys) -> None:
-    """Patch command adds new IPs and preserves higher confidence scores."""
+def test_patch_task_runner_journals_new_addresses(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Patch command journals new IPs and preserves higher confidence scores."""
     ipsum = tmp_path / "ipsum.txt"
     ipsum.write_text("192.0.2.1 9\n198.51.100.1 2\n")
     newips = tmp_path / "newips.txt"
     newips.write_text(
-        "ignored 192.0.2.2\nignored 192.0.2.1\nblank\n\nignored invalid\n"
+        "ignored 192.0.2.2\nignored 198.51.100.1\nignored 192.0.2.1\n"
+        "blank\n\nignored invalid\n"
     )
     monkeypatch.setattr(patch, "IPSUM", ipsum)
     monkeypatch.setattr(utility_data, "IPSUM", ipsum)
 
-    with newips.open() as handle:
-        args = argparse.Namespace(newips=handle, index=1, confidence=5)
-        patch.task_runner(args)
+    args = argparse.Namespace(
+        newips=[str(newips)],
+        index=1,
+        pattern=None,
+        confidence=5,
+        ttl=None,
+        decay=None,
+        jobs=1,
+        compact=False,
+    )
+    patch.task_runner(args)
 
     output = capsys.readouterr().out
-    assert utilities.format_status("ipsum_load") in output
     assert utilities.format_status("ipsum_patch") in output
-    assert "New IP addresses added" in output
-    assert ipsum.read_text().splitlines() == [
-        "192.0.2.1 9",
-        "198.51.100.1 2",
-        "192.0.2.2 5",
+    assert "Journal entries added" in output
+    assert "lines/s" in output
+    assert ipsum.read_text() == "192.0.2.1 9\n198.51.100.1 2\n"
+    journal = utilities.ipsum_journal(ipsum).read_text().splitlines()
+    assert [line.split("\t")[:3] for line in journal] == [
+        ["192.0.2.1", "5", str(newips)],
+        ["192.0.2.2", "5", str(newips)],
+        ["198.51.100.1", "5", str(newips)],
+    ]
+    assert utilities.load_ipsum() == {
+        ipa.ip_address("192.0.2.1"): 9,
+        ipa.ip_address("198.51.100.1"): 5,
+        ipa.ip_address("192.0.2.2"): 5,
+    }
+
+    # A feed update replaces ipsum.txt but keeps the patched addresses.
+    ipsum.write_text("203.0.113.1 3\n")
+    assert utilities.load_ipsum() == {
+        ipa.ip_address("203.0.113.1"): 3,
+        ipa.ip_address("192.0.2.1"): 5,
+        ipa.ip_address("192.0.2.2"): 5,
+        ipa.ip_address("198.51.100.1"): 5,
+    }
+
+
+def test_patch_task_runner_parses_logs_in_parallel(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Patch command splits logs across workers and reads gzip input."""
+    ipsum = tmp_path / "ipsum.txt"
+    ipsum.write_text("192.0.2.1 9\n")
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    lines = [
+        f"2026-01-01 fail2ban.actions [1]: NOTICE [sshd] Ban 198.51.100.{n % 40}\n"
+        for n in range(200)
+    ]
+    (logs / "fail2ban.log").write_text("".join(lines))
+    with gzip.open(logs / "fail2ban.log.1.gz", "wt") as f:
+        f.write("NOTICE [sshd] Ban 2001:db8::7\nNOTICE [sshd] Unban 192.0.2.9\n")
+    monkeypatch.setattr(patch, "IPSUM", ipsum)
+    monkeypatch.setattr(utility_data, "IPSUM", ipsum)
+    monkeypatch.setattr(patch, "PATCH_CHUNK_SIZE", 512)
+    monkeypatch.setenv("COLUMNS", "160")
+
+    patch.task_runner(
+        argparse.Namespace(
+            newips=[str(logs / "fail2ban.log*")],
+            index=-1,
+            pattern=r"\bBan (?P<ip>\S+)",
+            confidence=8,
+            ttl=None,
+            decay=timedelta(days=30),
+            jobs=3,
+            compact=False,
+        )
+    )
+
+    output = capsys.readouterr().out
+    assert re.search(r"Input files │\s+2 │", output)
+    assert re.search(r"Lines read │\s+202 │", output)
+    assert re.search(r"New IP addresses analyzed │\s+201 │", output)
+    assert re.search(r"Journal entries added │\s+41 │", output)
+    journal = utilities.ipsum_journal(ipsum).read_text().splitlines()
+    assert all(line.endswith("\tdecay") for line in journal)
+    assert utilities.load_ipsum() == {
+        ipa.ip_address("192.0.2.1"): 9,
+        ipa.ip_address("2001:db8::7"): 8,
+        **{ipa.ip_address(f"198.51.100.{n}"): 8 for n in range(40)},
+    }
+
+
+def test_patch_task_runner_reports_missing_inputs(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Patch command stops before journaling when an input is missing."""
+    ipsum = tmp_path / "ipsum.txt"
+    ipsum.write_text("192.0.2.1 9\n")
+    monkeypatch.setattr(patch, "IPSUM", ipsum)
+
+    with pytest.raises(SystemExit) as exc_info:
+        patch.task_runner(
+            argparse.Namespace(newips=[str(tmp_path / "*.log")], compact=False)
+        )
+
+    assert exc_info.value.code == 1
+    assert "Input files not found" in capsys.readouterr().out
+    assert not utilities.ipsum_journal(ipsum).exists()
+
+
+def test_patch_task_runner_compacts_journal(tmp_path, monkeypatch, capsys) -> None:
+    """Patch compaction keeps one highest-confidence entry per address."""
+    ipsum = tmp_path / "ipsum.txt"
+    ipsum.write_text("192.0.2.1 9\n")
+    monkeypatch.setattr(patch, "IPSUM", ipsum)
+    monkeypatch.setattr(utility_data, "IPSUM", ipsum)
+    key = utilities.parse_address_key
+    utilities.append_ipsum_journal(ipsum, {key("192.0.2.2"): 7}, "first.txt")
+    utilities.append_ipsum_journal(
+        ipsum, {key("192.0.2.2"): 3, key("2001:db8::1"): 4}, "second.txt"
+    )
+    with utilities.ipsum_journal(ipsum).open("a") as f:
+        f.write("192.0.2.3\t10\tinterrupted")
+    before = utilities.load_ipsum()
+
+    patch.task_runner(argparse.Namespace(newips=None, compact=True))
+
+    output = capsys.readouterr().out
+    assert utilities.format_status("journal_compact") in output
+    assert re.search(r"Journal entries before │\s+3 │", output)
+    assert re.search(r"Journal entries after │\s+2 │", output)
+    entries = utilities.read_ipsum_journal(ipsum)
+    assert [(entry.key, entry.confidence, entry.source) for entry in entries] == [
+        (key("192.0.2.2"), 7, "first.txt"),
+        (key("2001:db8::1"), 4, "second.txt"),
     ]
-    assert handle.closed
+    assert utilities.load_ipsum() == before
+    assert ipa.ip_address("192.0.2.3") not in before
 
 
 def test_patch_task_runner_exits_when_ipsum_missing(
@@ -166,7 +334,7 @@ def test_stats_task_runner_reports_missing_data(tmp_path, monkeypatch, capsys) -
     """Stats command prompts users to build data first."""
     monkeypatch.setattr(stats, "COUNTRY_NETS_TXT", tmp_path / "missing.txt")
 
-    stats.task_runner(argparse.Namespace(country_code="us"))
+    stats.task_runner(argparse.Namespace(country_code="us", all=False, format="table"))
 
     assert "Run the 'build'" in capsys.readouterr().out
 
@@ -178,14 +346,76 @@ def test_stats_task_runner_reports_country_stats(tmp_path, monkeypatch, capsys)
     monkeypatch.setattr(stats, "COUNTRY_NETS_TXT", data)
     monkeypatch.setattr(utility_data, "COUNTRY_NETS_TXT", data)
 
-    stats.task_runner(argparse.Namespace(country_code="us"))
+    stats.task_runner(argparse.Namespace(country_code="us", all=False, format="table"))
 
     output = capsys.readouterr().out
+    assert utilities.format_status("stats_index", "missing") in output
     assert utilities.format_status("stats_load") in output
     assert utilities.format_status("analyze") in output
     assert "Results for: US" in output
+    assert re.search(r"IP addresses \(v4\) │\s+4 │", output)
     assert "Networks (v4)" in output
     assert "Networks (v6)" in output
+    assert utilities.read_country_stats() == {
+        "CA": utilities.CountryStats(1, 0, 4, 0),
+        "US": utilities.CountryStats(1, 1, 4, 4),
+    }
+
+
+def test_stats_task_runner_ranks_countries_from_index(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Stats reads the precomputed index and ranks every country as JSON."""
+    data = tmp_path / "haproxy_geo_ip.txt"
+    data.write_text(
+        "192.0.2.0/30 US\n192.0.2.2/31 US\n198.51.100.0/24 CA\n2001:db8::/126 US\n"
+    )
+    monkeypatch.setattr(stats, "COUNTRY_NETS_TXT", data)
+    monkeypatch.setattr(utility_data, "COUNTRY_NETS_TXT", data)
+    utilities.write_country_stats(
+        utilities.summarize_countries(utilities.load_country_network_keys())
+    )
+
+    def reject() -> None:
+        raise AssertionError("the country network map should not be read")
+
+    monkeypatch.setattr(stats, "load_country_network_keys", reject)
+
+    stats.task_runner(argparse.Namespace(country_code=None, all=True, format="json"))
+
+    captured = capsys.readouterr()
+    assert utilities.format_status("stats_index") in captured.err
+    assert json.loads(captured.out) == [
+        {
+            "country": "CA",
+            "networks_v4": 1,
+            "networks_v6": 0,
+            "addresses_v4": 256,
+            "addresses_v6": 0,
+        },
+        {
+            "country": "US",
+            "networks_v4": 2,
+            "networks_v6": 1,
+            "addresses_v4": 4,
+            "addresses_v6": 4,
+        },
+    ]
+
+    # Changing the map makes the index stale until it is summarized again.
+    monkeypatch.setattr(
+        stats, "load_country_network_keys", utilities.load_country_network_keys
+    )
+    data.write_text("192.0.2.0/24 US\n")
+    monkeypatch.setenv("COLUMNS", "160")
+
+    stats.task_runner(argparse.Namespace(country_code=None, all=True, format="table"))
+
+    output = capsys.readouterr().out
+    assert utilities.format_status("stats_index", "stale") in output
+    assert "Country Rankings" in output
+    assert re.search(r"│\s+1 │ US\s+│\s+1 │\s+0 │\s+256 │", output)
+    assert "CA" not in output
 
 
 def test_stats_task_runner_reports_unknown_country(
@@ -197,10 +427,21 @@ def test_stats_task_runner_reports_unknown_country(
     monkeypatch.setattr(stats, "COUNTRY_NETS_TXT", data)
     monkeypatch.setattr(utility_data, "COUNTRY_NETS_TXT", data)
 
-    stats.task_runner(argparse.Namespace(country_code="zz"))
+    stats.task_runner(argparse.Namespace(country_code="zz", all=False, format="table"))
 
     assert "ZZ not found" in capsys.readouterr().out
 
+    with pytest.raises(SystemExit) as exc_info:
+        stats.task_runner(
+            argparse.Namespace(country_code="zz", all=False, format="json")
+        )
+
+    assert exc_info.value.code == 1
+    assert json.loads(capsys.readouterr().out) == {
+        "country": "ZZ",
+        "error": "not found",
+    }
+
 
 def write_check_config(tmp_path: Path) -> Path:
     """Write a configuration with permitting and blocking policies.
@@ -261,6 +502,42 @@ def test_check_task_runner_handles_one_lookup(tmp_path, monkeypatch, capsys) ->
     assert "7/10" in output
 
 
+def test_check_task_runner_explains_deduplicated_entries(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Check explains when a covering denylist entry was deduplicated."""
+    country_data = tmp_path / "haproxy_geo_ip.txt"
+    country_data.write_text("192.0.2.0/24 US\n")
+    rendered = tmp_path / "ip_blocklist.txt"
+    rendered.write_text("192.0.2.0/28\n")
+    utilities.write_dedupe_sidecar(
+        utilities.dedupe_sidecar(rendered),
+        [
+            {
+                "entry": "192.0.2.3",
+                "section": "custom",
+                "covered_by": "192.0.2.0/28",
+                "covered_by_section": "ipsum",
+            }
+        ],
+    )
+    ipsum = tmp_path / "ipsum.txt"
+    ipsum.write_text("192.0.2.3 7\n")
+    monkeypatch.setattr(check, "CONFIG", write_check_config(tmp_path))
+    monkeypatch.setattr(check, "COUNTRY_NETS_TXT", country_data)
+    monkeypatch.setattr(check, "RENDERED_BLOCKLIST", rendered)
+    monkeypatch.setattr(check, "IPSUM", ipsum)
+    monkeypatch.setattr(utility_data, "COUNTRY_NETS_TXT", country_data)
+    monkeypatch.setattr(utility_data, "RENDERED_BLOCKLIST", rendered)
+    monkeypatch.setattr(utility_data, "IPSUM", ipsum)
+
+    check.task_runner(argparse.Namespace(ip_addresses=[ipa.ip_address("192.0.2.3")]))
+
+    output = capsys.readouterr().out
+    assert "Deduplicated" in output
+    assert "custom 192.0.2.3 (covered by ipsum 192.0.2.0/28)" in output
+
+
 def test_check_task_runner_handles_batch_lookup(tmp_path, monkeypatch, capsys) -> None:
     """Check command renders multiple argument addresses in one table."""
     country_data = tmp_path / "haproxy_geo_ip.txt"
@@ -295,6 +572,285 @@ def test_check_task_runner_handles_batch_lookup(tmp_path, monkeypatch, capsys) -
     assert "CA" in output
 
 
+def prepare_check_data(tmp_path: Path, monkeypatch) -> None:
+    """Write generated check data and point the check command at it.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory in which to write the data.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to redirect data paths.
+    """
+    country_data = tmp_path / "haproxy_geo_ip.txt"
+    country_data.write_text("192.0.2.0/24 US\n198.51.100.0/24 CA\n")
+    rendered = tmp_path / "ip_blocklist.txt"
+    rendered.write_text("192.0.2.0/28\n")
+    ipsum = tmp_path / "ipsum.txt"
+    ipsum.write_text("192.0.2.3 7\n198.51.100.8 4\n")
+    monkeypatch.setattr(check, "CONFIG", write_check_config(tmp_path))
+    for module in (check, utility_data):
+        monkeypatch.setattr(module, "COUNTRY_NETS_TXT", country_data)
+        monkeypatch.setattr(module, "RENDERED_BLOCKLIST", rendered)
+        monkeypatch.setattr(module, "IPSUM", ipsum)
+
+
+def test_check_streams_bulk_input_as_ndjson_in_batches(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Bulk input is checked in batches and streamed as NDJSON."""
+    prepare_check_data(tmp_path, monkeypatch)
+    monkeypatch.setattr(check, "CHECK_BATCH_SIZE", 2)
+    addresses = tmp_path / "addresses.txt"
+    addresses.write_text(
+        "# export\n192.0.2.3 GET /\n\n198.51.100.8\nnot-an-ip\n192.0.2.3\n"
+    )
+
+    check.task_runner(
+        argparse.Namespace(ip_addresses=[], input=str(addresses), format="ndjson")
+    )
+
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert [record["address"] for record in records] == [
+        "192.0.2.3",
+        "198.51.100.8",
+        "not-an-ip",
+        "192.0.2.3",
+    ]
+    assert records[0]["verdict"] == "BLOCKED"
+    assert records[0]["blocklist_match"] == "192.0.2.0/28"
+    assert records[1]["country"] == "CA"
+    assert records[2]["error"] == "invalid IP address"
+    assert "Check Summary" in captured.err
+    assert re.search(r"BLOCKED\s+│\s+2", captured.err)
+    assert re.search(r"INVALID\s+│\s+1", captured.err)
+    assert re.search(r"Total\s+│\s+4", captured.err)
+
+
+def test_check_streams_stdin_as_csv(tmp_path, monkeypatch, capsys) -> None:
+    """Standard input is checked and written as CSV rows."""
+    prepare_check_data(tmp_path, monkeypatch)
+    monkeypatch.setattr("sys.stdin", StringIO("198.51.100.8\nbogus\n"))
+
+    check.task_runner(
+        argparse.Namespace(
+            ip_addresses=[ipa.ip_address("192.0.2.3")], input="-", format="csv"
+        )
+    )
+
+    rows = list(csv.reader(StringIO(capsys.readouterr().out)))
+    assert rows[0] == ["address", *CHECK_FIELDS]
+    assert rows[1][:3] == ["192.0.2.3", "BLOCKED", "US"]
+    assert rows[1][3:5] == ["", "public;restricted"]
+    assert rows[2][:3] == ["198.51.100.8", "NOT BLOCKED", "CA"]
+    assert rows[3] == ["bogus", "INVALID", *[""] * (len(CHECK_FIELDS) - 1)]
+
+
+def test_check_csv_marks_invalid_input_without_verdict_field(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """CSV rows for invalid input keep every selected column."""
+    prepare_check_data(tmp_path, monkeypatch)
+    source = tmp_path / "in.txt"
+    source.write_text("198.51.100.8\nbogus\n")
+
+    check.task_runner(
+        argparse.Namespace(
+            ip_addresses=[],
+            input=str(source),
+            format="csv",
+            fields=("country", "ipsum_confidence"),
+        )
+    )
+
+    rows = list(csv.reader(StringIO(capsys.readouterr().out)))
+    assert rows == [
+        ["address", "country", "ipsum_confidence", "error"],
+        ["198.51.100.8", "CA", "4", ""],
+        ["bogus", "", "", "invalid IP address"],
+    ]
+
+
+def test_check_reports_missing_input_file(tmp_path, monkeypatch, capsys) -> None:
+    """A missing bulk input file is reported without a traceback."""
+    prepare_check_data(tmp_path, monkeypatch)
+
+    check.task_runner(
+        argparse.Namespace(
+            ip_addresses=[], input=str(tmp_path / "missing.txt"), format="table"
+        )
+    )
+
+    assert "Input file not found" in capsys.readouterr().out
+
+
+def test_check_loads_only_data_for_selected_fields(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Selected fields skip unused data, and other data loads on first use."""
+    prepare_check_data(tmp_path, monkeypatch)
+
+    def fail_load(path: Path | None = None) -> None:
+        raise AssertionError("ipsum data should not be loaded")
+
+    monkeypatch.setattr(check, "load_ipsum", fail_load)
+    check.task_runner(
+        argparse.Namespace(
+            ip_addresses=[ipa.ip_address("192.0.2.3"), ipa.ip_address("198.51.100.8")],
+            input=None,
+            format="ndjson",
+            fields=("verdict", "country"),
+        )
+    )
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert records == [
+        {"address": "192.0.2.3", "verdict": "BLOCKED", "country": "US"},
+        {"address": "198.51.100.8", "verdict": "NOT BLOCKED", "country": "CA"},
+    ]
+
+    check.task_runner(
+        argparse.Namespace(
+            ip_addresses=[ipa.ip_address("192.0.2.3"), ipa.ip_address("198.51.100.8")],
+            fields=("country", "blocklist_match"),
+        )
+    )
+    output = capsys.readouterr().out
+    assert "Blocklist match" in output
+    assert "Verdict" not in output
+    assert "ipsum confidence" not in output
+
+    monkeypatch.setattr(
+        check, "load_ipsum", lambda path=None: {ipa.ip_address("192.0.2.3"): 7}
+    )
+    data = check.load_check_data(check.Console(), fields=("country",))
+    result = check.check_address(ipa.ip_address("192.0.2.3"), data)
+    assert (result.country_code, result.ipsum_confidence) == ("US", 7)
+
+
+def test_check_answers_network_range_queries(tmp_path, monkeypatch, capsys) -> None:
+    """Networks report overlapping entries, blocked share, and countries."""
+    prepare_check_data(tmp_path, monkeypatch)
+
+    check.task_runner(
+        argparse.Namespace(
+            ip_addresses=[
+                ipa.ip_network("192.0.2.0/23"),
+                ipa.ip_network("192.0.2.0/30"),
+            ],
+            input=None,
+            format="ndjson",
+        )
+    )
+
+    wide, narrow = map(json.loads, capsys.readouterr().out.splitlines())
+    assert wide["addresses"] == 512
+    assert (wide["covering"], wide["contained"]) == ([], ["192.0.2.0/28"])
+    assert (wide["blocklist_addresses"], wide["blocked_addresses"]) == (16, 16)
+    assert wide["unknown_addresses"] == 256
+    assert wide["countries"] == [
+        {
+            "country": "US",
+            "addresses": 256,
+            "blocked_policies": [],
+            "permitted_policies": ["public", "restricted"],
+            "networks": ["192.0.2.0/24"],
+        }
+    ]
+    assert (narrow["covering"], narrow["blocked_fraction"]) == (["192.0.2.0/28"], 1.0)
+
+
+def test_check_displays_range_card_and_rejects_csv_ranges(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Range checks use a Rich card and are not written as CSV."""
+    prepare_check_data(tmp_path, monkeypatch)
+    network = ipa.ip_network("198.51.100.0/24")
+
+    check.task_runner(argparse.Namespace(ip_addresses=[network]))
+    output = capsys.readouterr().out
+    assert "Range Check: 198.51.100.0/24" in output
+    assert "permitted: public, restricted" in output
+    assert re.search(r"Blocked 0 \(0\.0%\)", output)
+
+    check.task_runner(
+        argparse.Namespace(ip_addresses=[network], input=None, format="csv")
+    )
+    assert "Network ranges can be checked" in capsys.readouterr().out
+
+
+def test_logscan_classifies_plain_and_gzip_logs(tmp_path, monkeypatch, capsys) -> None:
+    """Log clients are classified once and aggregated across files."""
+    prepare_check_data(tmp_path, monkeypatch)
+    nginx = tmp_path / "access.log"
+    nginx.write_text(
+        '192.0.2.3 - - [10/Oct/2026:13:55:36 +0000] "GET / HTTP/1.1" 200 1\n'
+        '192.0.2.3 - - [10/Oct/2026:13:55:37 +0000] "GET / HTTP/1.1" 200 1\n'
+        '198.51.100.8 - - [10/Oct/2026:13:55:38 +0000] "GET / HTTP/1.1" 200 1\n'
+        "garbage\n"
+    )
+    rotated = tmp_path / "access.log.1.gz"
+    with gzip.open(rotated, "wt") as f:
+        f.write('198.51.100.8 - - [09/Oct/2026:10:00:00 +0000] "GET /" 200 1\n')
+
+    logscan.task_runner(
+        argparse.Namespace(
+            logs=[nginx, rotated],
+            log_format="nginx",
+            index=None,
+            regex=None,
+            top=10,
+            jobs=2,
+        )
+    )
+
+    output = capsys.readouterr().out
+    assert re.search(r"Lines without a client address\s+│\s+1 ", output)
+    assert re.search(r"Distinct client addresses\s+│\s+2 ", output)
+    assert re.search(r"BLOCKED\s+│\s+2 │\s+50\.0% │\s+1 ", output)
+    assert re.search(r"NOT BLOCKED\s+│\s+2 │\s+50\.0% │\s+1 ", output)
+    assert re.search(r"restricted\s+│\s+0 │\s+4 ", output)
+
+
+def test_logscan_reads_haproxy_and_custom_fields(tmp_path) -> None:
+    """HAProxy logs and field indexes yield normalized client addresses."""
+    haproxy = tmp_path / "haproxy.log"
+    haproxy.write_text(
+        "Oct 10 13:55:36 lb haproxy[14389]: 192.0.2.3:51234 "
+        "[10/Oct/2026:13:55:36.125] www app/web1 0/0/1/2/3 200 12 - - ----\n"
+        "Oct 10 13:55:37 lb haproxy[14389]: [2001:db8::1]:443 "
+        "[10/Oct/2026:13:55:37.125] www app/web1 0/0/1/2/3 200 12 - - ----\n"
+    )
+    fields = tmp_path / "fields.log"
+    fields.write_text("GET / 192.0.2.3:80\nGET / 2001:DB8::1\nGET /\n")
+
+    scan = logscan.scan_log(haproxy, logscan.LOG_PATTERNS["haproxy"], None)
+    assert scan.hits == {"192.0.2.3": 1, "2001:db8::1": 1}
+    scan = logscan.scan_log(fields, None, 2)
+    assert scan.hits == {"192.0.2.3": 1, "2001:db8::1": 1}
+    assert (scan.lines, scan.unmatched) == (3, 1)
+
+
+def test_logscan_reports_missing_log_files(tmp_path, monkeypatch, capsys) -> None:
+    """Missing log files are reported before any scanning."""
+    prepare_check_data(tmp_path, monkeypatch)
+
+    with pytest.raises(SystemExit) as exc_info:
+        logscan.task_runner(
+            argparse.Namespace(
+                logs=[tmp_path / "missing.log"],
+                log_format="nginx",
+                index=None,
+                regex=None,
+                top=10,
+                jobs=1,
+            )
+        )
+
+    assert exc_info.value.code == 1
+    assert "Log files not found" in capsys.readouterr().out
+
+
 def test_check_reports_country_policy_block(tmp_path, monkeypatch, capsys) -> None:
     """A country policy can block an address absent from the IP list."""
     country_data = tmp_path / "haproxy_geo_ip.txt"
@@ -588,6 +1144,49 @@ def test_config_rejects_invalid_country_policies(countries, message: str) -> Non
         config.parse_country_config(countries)
 
 
+def test_config_parses_build_profiles(tmp_path, monkeypatch) -> None:
+    """Profiles default to every policy and a named output file."""
+    monkeypatch.setattr(config, "RENDERED_BLOCKLIST", tmp_path / "ip_blocklist.txt")
+    config_file = tmp_path / "banip.yaml"
+    config_file.write_text(PROFILE_CONFIG + "  partner:\n    outfile: ~/partner.txt\n")
+
+    loaded = config.load_config(config_file)
+
+    assert loaded.profiles["edge"] == config.BuildProfile(
+        threshold=2,
+        compact=2,
+        policies=("public", "restricted"),
+        bots=True,
+        outfile=tmp_path / "ip_blocklist_edge.txt",
+    )
+    assert loaded.profiles["api"].policies == ("restricted",)
+    assert loaded.profiles["partner"].outfile == Path.home() / "partner.txt"
+
+
+@pytest.mark.parametrize(
+    ("profiles", "message"),
+    [
+        ("  all: {}\n", "Invalid build profile name"),
+        ("  edge:\n    threshold: 11\n", "must be an integer from 1 to 10"),
+        ("  edge:\n    compact: -1\n", "must be an integer from 0 to 255"),
+        ("  edge:\n    policies: [missing]\n", "Unknown country policy"),
+        ("  edge:\n    bots: yes please\n", "must be true or false"),
+        ("  edge:\n    extra: 1\n", "Unsupported config key"),
+    ],
+)
+def test_config_rejects_invalid_build_profiles(
+    tmp_path, profiles: str, message: str
+) -> None:
+    """Invalid profile names and settings fail validation."""
+    config_file = tmp_path / "banip.yaml"
+    config_file.write_text(
+        PROFILE_CONFIG.split("profiles:")[0] + "profiles:\n" + profiles
+    )
+
+    with pytest.raises(ValueError, match=message):
+        config.load_config(config_file)
+
+
 def test_config_rejects_invalid_denylist_entry(tmp_path) -> None:
     """Invalid YAML entries fail with section-specific messages."""
     path = tmp_path / "banip.yaml"
@@ -841,6 +1440,78 @@ def test_database_status_reports_modification_times(tmp_path, monkeypatch) -> No
     assert "Data directory:" in output
 
 
+def test_database_compile_records_manifest_and_status(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Compiled indexes are recorded in a manifest and checked by status."""
+    monkeypatch.setenv("COLUMNS", "160")
+    geolite = tmp_path / "geolite"
+    geolite.mkdir()
+    paths = {
+        "GEOLITE_4": geolite / "ipv4.csv",
+        "GEOLITE_6": geolite / "ipv6.csv",
+        "GEOLITE_LOC": geolite / "locations.csv",
+        "IPSUM": tmp_path / "ipsum.txt",
+    }
+    paths["GEOLITE_LOC"].write_text(
+        "geoname_id,locale_code,continent_code,continent_name,country_iso_code\n"
+        "1,en,NA,North America,US\n"
+    )
+    paths["GEOLITE_4"].write_text("network,geoname_id\n192.0.2.0/24,1\n")
+    paths["GEOLITE_6"].write_text("network,geoname_id\n2001:db8::/32,1\n")
+    paths["IPSUM"].write_text("192.0.2.1 5\n")
+    for name, path in paths.items():
+        monkeypatch.setattr(database, name, path)
+        monkeypatch.setattr(utility_data, name, path)
+    monkeypatch.setattr(database, "DATA", tmp_path)
+    monkeypatch.setattr(database, "CONFIG", tmp_path / "banip.yaml")
+
+    database.task_runner(argparse.Namespace(action="compile"))
+
+    output = capsys.readouterr().out
+    assert "Compiled Indexes" in output
+    assert output.count("compiled") >= 2
+    manifest = json.loads((tmp_path / "compiled.json").read_text())["indexes"]
+    assert manifest["ipsum"]["inputs"]["ipsum"]["sha256"] == (
+        hashlib.sha256(b"192.0.2.1 5\n").hexdigest()
+    )
+    assert set(manifest["geolite"]["inputs"]) == {
+        "geolite_4",
+        "geolite_6",
+        "geolite_loc",
+    }
+    assert utilities.read_geolite_index().networks == {
+        (4, 3221225984, 24): "US",
+        (6, 0x20010DB8 << 96, 32): "US",
+    }
+    assert [outcome.result for outcome in database.compile_indexes()] == [
+        "current",
+        "current",
+    ]
+
+    database.status()
+    output = capsys.readouterr().out
+    assert re.search(r"Compiled GeoLite index\s+│ current", output)
+    assert re.search(r"Compiled ipsum cache\s+│ current", output)
+
+    # Same size and stamp, different content: only the digest catches it.
+    stat = paths["IPSUM"].stat()
+    paths["IPSUM"].write_text("192.0.2.2 5\n")
+    os.utime(paths["IPSUM"], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    paths["GEOLITE_4"].write_text("network,geoname_id\n198.51.100.0/24,1\n")
+
+    database.status()
+    output = capsys.readouterr().out
+    assert re.search(r"Compiled GeoLite index\s+│ stale", output)
+    assert re.search(r"Compiled ipsum cache\s+│ stale", output)
+
+    assert [outcome.result for outcome in database.compile_indexes()] == [
+        "compiled",
+        "compiled",
+    ]
+    assert utilities.read_ipsum_cache(paths["IPSUM"]) == {(4, 3221225986): 5}
+
+
 def test_database_load_secrets_does_not_execute_shell(tmp_path, monkeypatch) -> None:
     """Secrets files are parsed as dotenv data."""
     secrets = tmp_path / ".secrets"
@@ -857,38 +1528,187 @@ def test_database_load_secrets_does_not_execute_shell(tmp_path, monkeypatch) ->
 
 
 def test_database_update_ipsum_uses_validated_url_override(
-    tmp_path,
-    monkeypatch,
+    tmp_path, monkeypatch, feed_server
 ) -> None:
-    """Ipsum updates consume the validated database configuration."""
+    """Ipsum updates use the configured URL, skip unchanged feeds, and cache."""
+    feed_server.routes["/ipsum.txt"] = (b"192.0.2.1 5\n", {"ETag": '"v1"'})
+    settings = SimpleNamespace(ipsum_url=f"{feed_server.url}/ipsum.txt")
+    ipsum = tmp_path / "ipsum.txt"
+    monkeypatch.setattr(database, "IPSUM", ipsum)
 
-    class Response:
-        """Successful feed response."""
+    def fail_load(path: Path) -> None:
+        raise AssertionError("an unchanged feed should not be loaded")
+
+    with utilities.HttpClient(tmp_path / "http_cache.json") as client:
+        first = database.update_ipsum(client, settings)
+        assert utilities.read_ipsum_cache(ipsum) == {(4, 3221225985): 5}
+        ipsum.write_text("edited\n")
+        assert not database.update_ipsum(client, settings).changed
+        with monkeypatch.context() as patched:
+            patched.setattr(database, "parse_ipsum", fail_load)
+            patched.setattr(utility_data, "read_ipsum_cache", fail_load)
+            assert not database.update_ipsum(client, settings).changed
+        ipsum.unlink()
+        assert database.update_ipsum(client, settings).changed
+
+    assert (first.source, first.changed, first.size) == ("ipsum", True, 12)
+    assert [path for path, _ in feed_server.seen] == ["/ipsum.txt"] * 4
+    assert feed_server.seen[1][1]["If-None-Match"] == '"v1"'
+    assert "If-None-Match" not in feed_server.seen[3][1]
+    assert ipsum.read_text() == "192.0.2.1 5\n"
+    assert utilities.read_ipsum_cache(ipsum) == {(4, 3221225985): 5}
+
+
+def test_database_compile_after_update_records_the_new_feed(
+    tmp_path, monkeypatch, feed_server
+) -> None:
+    """Compiling after an update records the feed the update cached."""
+    settings = SimpleNamespace(ipsum_url=f"{feed_server.url}/ipsum.txt")
+    ipsum = tmp_path / "ipsum.txt"
+    for module in (database, utility_data):
+        monkeypatch.setattr(module, "IPSUM", ipsum)
+    monkeypatch.setattr(utility_data, "GEOLITE_4", tmp_path / "geolite" / "ipv4.csv")
+    monkeypatch.setattr(database, "DATA", tmp_path)
 
-        text = "192.0.2.1 5\n"
+    for body, etag in ((b"192.0.2.1 5\n", '"v1"'), (b"192.0.2.2 6\n", '"v2"')):
+        feed_server.routes["/ipsum.txt"] = (body, {"ETag": etag})
+        with utilities.HttpClient(tmp_path / "http_cache.json") as client:
+            assert database.update_ipsum(client, settings).changed
+        outcomes = database.compile_indexes()
 
-        def raise_for_status(self) -> None:
-            """Accept the fake response."""
+        assert outcomes[1].result == "current"
+        recorded = database.load_manifest()["ipsum"]["inputs"]["ipsum"]
+        assert recorded["sha256"] == hashlib.sha256(body).hexdigest()
+        assert recorded["stamp"] == utilities.source_stamps({"ipsum": ipsum})["ipsum"]
 
-    seen = []
-    settings = SimpleNamespace(ipsum_url="https://example.com/ipsum.txt")
+
+def test_database_update_publishes_only_new_data(
+    tmp_path, monkeypatch, feed_server, capsys
+) -> None:
+    """An update that changes nothing keeps the active generation."""
+    feed_server.routes["/ipsum.txt"] = (b"192.0.2.1 5\n", {"ETag": '"v1"'})
+    settings = SimpleNamespace(ipsum_url=f"{feed_server.url}/ipsum.txt")
+    monkeypatch.setattr(
+        database, "load_config", lambda path: SimpleNamespace(database=settings)
+    )
+    for module in (database, utility_data):
+        monkeypatch.setattr(module, "IPSUM", tmp_path / "ipsum.txt")
+    monkeypatch.setattr(utility_data, "GEOLITE_4", tmp_path / "geolite" / "ipv4.csv")
+    monkeypatch.setattr(database, "DATA", tmp_path)
+    monkeypatch.setattr(
+        database,
+        "HttpClient",
+        lambda: utilities.HttpClient(tmp_path / "http_cache.json"),
+    )
+
+    args = argparse.Namespace(action="update", source="ipsum")
+    database.task_runner(args)
+    published = utilities.list_generations(tmp_path)
+    database.task_runner(args)
+
+    assert len(published) == 1
+    assert utilities.list_generations(tmp_path) == published
+    assert feed_server.seen[-1][1]["If-None-Match"] == '"v1"'
+    capsys.readouterr()
+
+
+def test_database_update_all_runs_sources_concurrently(
+    tmp_path, monkeypatch, feed_server, capsys
+) -> None:
+    """Updating all sources loads config once and reports each source."""
+    monkeypatch.setenv("COLUMNS", "160")
+    feed_server.routes["/ipsum.txt"] = (b"192.0.2.1 5\n", {})
+    settings = SimpleNamespace(
+        ipsum_url=f"{feed_server.url}/ipsum.txt",
+        maxmind_edition="GeoLite2-Country",
+        secrets_file=None,
+    )
+    loads = []
     monkeypatch.setattr(
         database,
         "load_config",
-        lambda _path: SimpleNamespace(database=settings),
+        lambda path: loads.append(path) or SimpleNamespace(database=settings),
     )
+    for module in (database, utility_data):
+        monkeypatch.setattr(module, "IPSUM", tmp_path / "ipsum.txt")
+    monkeypatch.setattr(utility_data, "GEOLITE_4", tmp_path / "geolite" / "ipv4.csv")
+    monkeypatch.setattr(database, "DATA", tmp_path)
     monkeypatch.setattr(
-        database.requests,
-        "get",
-        lambda url, timeout: seen.append((url, timeout)) or Response(),
+        database,
+        "HttpClient",
+        lambda: utilities.HttpClient(tmp_path / "http_cache.json"),
     )
-    ipsum = tmp_path / "ipsum.txt"
-    monkeypatch.setattr(database, "IPSUM", ipsum)
+    monkeypatch.delenv("MAXMIND_ACCOUNT_ID", raising=False)
+    monkeypatch.delenv("MAXMIND_LICENSE_KEY", raising=False)
 
-    database.update_ipsum()
+    with pytest.raises(SystemExit) as exc_info:
+        database.task_runner(argparse.Namespace(action="update", source="all"))
 
-    assert seen == [("https://example.com/ipsum.txt", 60)]
-    assert ipsum.read_text() == Response.text
+    assert exc_info.value.code == 1
+    assert len(loads) == 1
+    assert (tmp_path / "ipsum.txt").read_text() == "192.0.2.1 5\n"
+    output = capsys.readouterr().out
+    assert "Database Update" in output
+    assert "12 bytes" in output
+    assert "updated" in output
+    assert "failed: MAXMIND_ACCOUNT_ID and MAXMIND_LICENSE_KEY" in output
+
+    # The updated feed is still recorded and published.
+    assert "Compiled Indexes" in output
+    assert "ipsum" in database.load_manifest()
+    generation = utilities.current_generation(tmp_path)
+    assert generation is not None
+    assert (generation / "ipsum.txt").read_text() == "192.0.2.1 5\n"
+
+
+def test_database_update_geolite_streams_verified_archive(
+    tmp_path, monkeypatch, feed_server
+) -> None:
+    """GeoLite updates verify the archive and extract only required files."""
+    archive = BytesIO()
+    with zipfile.ZipFile(archive, "w") as bundle:
+        bundle.writestr("GeoLite2-Country-CSV_20261001/LICENSE.txt", "license")
+        for name in database.REQUIRED_GEOLITE_FILES:
+            bundle.writestr(f"GeoLite2-Country-CSV_20261001/{name}", f"{name}\n")
+    body = archive.getvalue()
+    digest = hashlib.sha256(body).hexdigest()
+    path = "/GeoLite2-Country/download?suffix=zip"
+    feed_server.routes[path] = (body, {"ETag": '"g1"'})
+    feed_server.routes[f"{path}.sha256"] = (f"{digest}  geolite.zip\n".encode(), {})
+    template = f"{feed_server.url}/{{edition}}/download?suffix=zip"
+    monkeypatch.setattr(database, "MAXMIND_DOWNLOAD_URL", template)
+    monkeypatch.setattr(database, "MAXMIND_CHECKSUM_URL", f"{template}.sha256")
+    monkeypatch.setattr(
+        database,
+        "maxmind_settings",
+        lambda settings: ("GeoLite2-Country", "id", "key"),
+    )
+    settings = SimpleNamespace()
+    data = tmp_path / ".banip"
+    monkeypatch.setattr(database, "DATA", data)
+    for name in ("GEOLITE_4", "GEOLITE_6", "GEOLITE_LOC"):
+        monkeypatch.setattr(
+            database, name, data / "geolite" / getattr(database, name).name
+        )
+
+    with utilities.HttpClient(tmp_path / "http_cache.json") as client:
+        assert database.update_geolite(client, settings).changed
+        assert not database.update_geolite(client, settings).changed
+
+    assert sorted(item.name for item in (data / "geolite").iterdir()) == sorted(
+        database.REQUIRED_GEOLITE_FILES
+    )
+    assert sorted(item.name for item in data.iterdir()) == ["geolite"]
+    assert feed_server.seen[-1][1]["If-None-Match"] == '"g1"'
+    assert feed_server.seen[-1][1]["Authorization"].startswith("Basic ")
+
+    feed_server.routes[path] = (body + b"tampered", {"ETag": '"g2"'})
+    with utilities.HttpClient(tmp_path / "http_cache.json") as client:
+        with pytest.raises(RuntimeError, match="does not match"):
+            database.update_geolite(client, settings)
+
+    assert sorted(item.name for item in data.iterdir()) == ["geolite"]
+    assert (data / "geolite" / "GeoLite2-Country-Locations-en.csv").exists()
 
 
 def test_bots_normalize_ranges_deduplicates_and_sorts() -> None:
@@ -931,7 +1751,7 @@ def test_bots_parse_irr_ranges_deduplicates_and_sorts() -> None:
     ]
 
 
-def test_bots_fetch_provider_supports_meta_whois(monkeypatch) -> None:
+def test_bots_fetch_provider_supports_meta_whois(tmp_path, monkeypatch) -> None:
     """Meta provider data is fetched from RADb WHOIS output."""
     monkeypatch.setattr(
         bots,
@@ -941,47 +1761,71 @@ def test_bots_fetch_provider_supports_meta_whois(monkeypatch) -> None:
         ),
     )
 
-    entry = bots.fetch_provider("meta")
+    entry = bots.fetch_provider("meta", utilities.HttpClient(tmp_path / "cache.json"))
 
     assert entry["provider"] == "meta"
     assert entry["source"] == [bots.META_WHOIS_SOURCE]
     assert entry["ranges"] == ["192.0.2.0/24", "2001:db8::/48"]
 
 
-def test_bots_fetch_provider_supports_anthropic_json(monkeypatch) -> None:
+def test_bots_fetch_provider_supports_anthropic_json(
+    tmp_path, monkeypatch, feed_server
+) -> None:
     """Anthropic provider data is fetched from its JSON feed."""
+    payload = {
+        "creationTime": "2026-05-01T20:46:04Z",
+        "prefixes": [
+            {"ipv4Prefix": "198.51.100.0/24"},
+            {"ipv4Prefix": "192.0.2.0/24"},
+        ],
+    }
+    feed_server.routes["/bots.json"] = (json.dumps(payload).encode(), {"ETag": "a"})
+    url = f"{feed_server.url}/bots.json"
+    monkeypatch.setitem(bots.PROVIDER_URLS, "anthropic", (url,))
 
-    class Response:
-        """Fake JSON feed response."""
-
-        def raise_for_status(self) -> None:
-            """No-op successful status check."""
-
-        def json(self) -> dict[str, object]:
-            """Return provider payload data."""
-            return {
-                "creationTime": "2026-05-01T20:46:04Z",
-                "prefixes": [
-                    {"ipv4Prefix": "198.51.100.0/24"},
-                    {"ipv4Prefix": "192.0.2.0/24"},
-                ],
-            }
-
-    seen_urls = []
+    with utilities.HttpClient(tmp_path / "http_cache.json") as client:
+        entry = bots.fetch_provider("anthropic", client)
+        client.commit([url])
+        unchanged = bots.fetch_provider("anthropic", client, conditional=True)
 
-    def get(url: str, timeout: int) -> Response:
-        seen_urls.append((url, timeout))
-        return Response()
+    assert entry is not None
+    assert entry["provider"] == "anthropic"
+    assert entry["source"] == [url]
+    assert entry["upstream_updated_at"] == "2026-05-01T20:46:04Z"
+    assert entry["ranges"] == ["192.0.2.0/24", "198.51.100.0/24"]
+    assert unchanged is None
 
-    monkeypatch.setattr(bots.requests, "get", get)
 
-    entry = bots.fetch_provider("anthropic")
+def test_bots_fetch_provider_refetches_unchanged_feeds_of_changed_provider(
+    tmp_path, monkeypatch, feed_server
+) -> None:
+    """A provider with one changed feed is rebuilt from all its feeds."""
+    feed_server.routes["/a.json"] = (
+        b'{"prefixes": [{"ipv4Prefix": "192.0.2.0/24"}]}',
+        {"ETag": "a"},
+    )
+    feed_server.routes["/b.json"] = (b'{"prefixes": []}', {"ETag": "b1"})
+    urls = (f"{feed_server.url}/a.json", f"{feed_server.url}/b.json")
+    monkeypatch.setitem(bots.PROVIDER_URLS, "openai", urls)
+
+    with utilities.HttpClient(tmp_path / "http_cache.json") as client:
+        bots.fetch_provider("openai", client)
+        client.commit(urls)
+        feed_server.routes["/b.json"] = (
+            b'{"prefixes": [{"ipv4Prefix": "198.51.100.0/24"}]}',
+            {"ETag": "b2"},
+        )
+        entry = bots.fetch_provider("openai", client, conditional=True)
 
-    assert seen_urls == [("https://claude.com/crawling/bots.json", 30)]
-    assert entry["provider"] == "anthropic"
-    assert entry["source"] == ["https://claude.com/crawling/bots.json"]
-    assert entry["upstream_updated_at"] == "2026-05-01T20:46:04Z"
+    assert entry is not None
     assert entry["ranges"] == ["192.0.2.0/24", "198.51.100.0/24"]
+    assert [path for path, _ in feed_server.seen] == [
+        "/a.json",
+        "/b.json",
+        "/a.json",
+        "/b.json",
+        "/a.json",
+    ]
 
 
 def test_bots_refresh_replaces_only_selected_provider(
@@ -1005,7 +1849,7 @@ def test_bots_refresh_replaces_only_selected_provider(
     monkeypatch.setattr(
         bots,
         "fetch_provider",
-        lambda provider: {
+        lambda provider, client, conditional: {
             "provider": provider,
             "source": ["test"],
             "refreshed_at": "now",
@@ -1026,6 +1870,42 @@ def test_bots_refresh_replaces_only_selected_provider(
     assert "Saved to:" in output
 
 
+def test_bots_refresh_keeps_entries_of_failed_providers(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """A failed provider keeps its stored entry while others refresh."""
+    monkeypatch.setenv("COLUMNS", "160")
+    monkeypatch.setattr(bots, "BOTDATA", tmp_path / "botdata.json")
+    bots.write_botdata(
+        {"providers": {"meta": {"refreshed_at": "old", "ranges": ["192.0.2.0/24"]}}}
+    )
+    sessions = set()
+
+    def fetch_provider(
+        provider: str, client: object, conditional: bool
+    ) -> dict[str, object] | None:
+        sessions.add(id(client))
+        if provider == "google":
+            return None
+        if provider in {"meta", "bing"}:
+            raise bots.requests.ConnectionError(f"{provider} unreachable")
+        return {"provider": provider, "refreshed_at": "now", "ranges": []}
+
+    monkeypatch.setattr(bots, "fetch_provider", fetch_provider)
+
+    bots.refresh("all")
+
+    providers = bots.load_botdata()["providers"]
+    assert len(sessions) == 1
+    assert sorted(providers) == ["anthropic", "meta", "openai"]
+    assert providers["meta"]["ranges"] == ["192.0.2.0/24"]
+    output = capsys.readouterr().out
+    assert "Fetch time" in output
+    assert "unchanged" in output
+    assert "kept previous: meta unreachable" in output
+    assert "failed: bing unreachable" in output
+
+
 def test_bots_list_providers_formats_stored_data(tmp_path, monkeypatch, capsys) -> None:
     """Bot provider listings use the shared summary presentation."""
     botdata = tmp_path / "botdata.json"
@@ -1104,6 +1984,85 @@ def test_bots_check_ip_reports_no_match(tmp_path, monkeypatch, capsys) -> None:
     assert "not found" in output
 
 
+def test_bots_write_botdata_persists_provider_index(tmp_path, monkeypatch) -> None:
+    """Writing bot data rebuilds the provider index next to it."""
+    monkeypatch.setattr(bots, "BOTDATA", tmp_path / "botdata.json")
+    bots.write_botdata(
+        {
+            "providers": {
+                "google": {"ranges": ["192.0.2.0/24", "2001:db8::/32"]},
+                "bing": {"ranges": ["192.0.2.0/24", "192.0.2.128/25"]},
+            }
+        }
+    )
+
+    stored = json.loads((tmp_path / "botdata_index.json").read_text())
+    assert stored["networks"] == [
+        [4, 3221225984, 24, ["bing", "google"]],
+        [4, 3221226112, 25, ["bing"]],
+        [6, 42540766411282592856903984951653826560, 32, ["google"]],
+    ]
+    monkeypatch.setattr(bots, "load_managed_bot_networks", None)
+    index = bots.load_bot_index()
+    assert index.lookup((4, 3221226113)) == [
+        ((4, 3221225984, 24), ("bing", "google")),
+        ((4, 3221226112, 25), ("bing",)),
+    ]
+
+
+def test_bots_check_ips_rebuilds_stale_index(tmp_path, monkeypatch, capsys) -> None:
+    """Bulk bot checks rebuild an outdated index and report every provider."""
+    botdata = tmp_path / "botdata.json"
+    monkeypatch.setattr(bots, "BOTDATA", botdata)
+    bots.write_botdata({"providers": {"google": {"ranges": ["192.0.2.0/24"]}}})
+    botdata.write_text(
+        json.dumps(
+            {
+                "providers": {
+                    "google": {"ranges": ["192.0.2.0/24"]},
+                    "openai": {"ranges": ["192.0.2.64/26", "2001:db8::/48"]},
+                }
+            }
+        )
+    )
+
+    bots.check_ips(["192.0.2.70", "2001:db8::1", "198.51.100.9", "bogus"])
+
+    output = capsys.readouterr().out
+    assert "Addresses: 4 checked, 2 found" in output
+    assert "192.0.2.0/24" in output
+    assert "192.0.2.64/26" in output
+    assert "2001:db8::/48" in output
+    assert "not found" in output
+    assert "invalid" in output
+    stored = json.loads((tmp_path / "botdata_index.json").read_text())
+    assert len(stored["networks"]) == 3
+
+
+def test_bots_task_runner_checks_addresses_from_file(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Bot checks combine command-line addresses with an input file."""
+    monkeypatch.setattr(bots, "BOTDATA", tmp_path / "botdata.json")
+    bots.write_botdata({"providers": {"bing": {"ranges": ["198.51.100.0/24"]}}})
+    source = tmp_path / "addresses.txt"
+    source.write_text("# crawlers\n198.51.100.9 bingbot\n\n192.0.2.1\n")
+
+    bots.task_runner(
+        argparse.Namespace(
+            action="check", ips=[ipa.ip_address("198.51.100.10")], input=str(source)
+        )
+    )
+    bots.task_runner(
+        argparse.Namespace(action="check", ips=[], input=str(tmp_path / "missing"))
+    )
+
+    output = capsys.readouterr().out
+    assert "Addresses: 3 checked, 2 found" in output
+    assert "198.51.100.9" in output
+    assert "Input file not found" in output
+
+
 def test_build_task_runner_generates_blocklist_outputs(
     tmp_path, monkeypatch, capsys
 ) -> None:
@@ -1154,6 +2113,21 @@ def test_build_task_runner_generates_blocklist_outputs(
         "2001:db8::/126,1,1,,0,0,\n"
     )
     paths["IPSUM"].write_text("192.0.2.4 9\n192.0.2.9 8\n198.51.100.9 8\n")
+    recorded = datetime.now().astimezone() - timedelta(days=2)
+    utilities.ipsum_journal(paths["IPSUM"]).write_text(
+        "".join(
+            utilities.render_journal_entry(
+                utilities.JournalEntry(
+                    utilities.parse_address_key(address),
+                    9,
+                    "patch.txt",
+                    recorded,
+                    recorded + timedelta(days=days),
+                )
+            )
+            for address, days in (("192.0.2.10", 3), ("192.0.2.11", 1))
+        )
+    )
     paths["TARGETS"].write_text("# comment\nus\nUS\n")
     for name, path in paths.items():
         if hasattr(build, name):
@@ -1164,6 +2138,7 @@ def test_build_task_runner_generates_blocklist_outputs(
             monkeypatch.setattr(bots, name, path)
         if hasattr(config, name):
             monkeypatch.setattr(config, name, path)
+    monkeypatch.setenv("COLUMNS", "160")
     alternate = data / "alternate_blocklist.txt"
     build.task_runner(
         argparse.Namespace(
@@ -1178,6 +2153,8 @@ def test_build_task_runner_generates_blocklist_outputs(
     assert "Compacting ipsum (0)" in output
     assert "0.00%" in output
     assert "Final Build Summary" in output
+    assert re.search(r"Patched \(active\)\s+│\s+1 │", output)
+    assert re.search(r"Patched \(expired\)\s+│\s+1 │", output)
     assert paths["COUNTRY_ALLOWLIST"].read_text() == "US\n"
     assert (data / "country_allowlist_restricted.txt").read_text() == "US\n"
     assert "192.0.2.5" in paths["CONFIG"].read_text()
@@ -1188,17 +2165,17 @@ def test_build_task_runner_generates_blocklist_outputs(
     )
     assert paths["RENDERED_ALLOWLIST"].read_text() == "192.0.2.4\n"
     blocklist_lines = paths["RENDERED_BLOCKLIST"].read_text().splitlines()
-    assert blocklist_lines[0] == "192.0.2.9"
-    assert blocklist_lines[1] == ""
-    assert blocklist_lines[2] == "# ------------custom entries -------------"
-    assert blocklist_lines[3].startswith("# Added on: ")
-    assert blocklist_lines[4:] == [
+    assert blocklist_lines[:3] == ["192.0.2.9", "192.0.2.10", ""]
+    assert blocklist_lines[3] == "# ------------custom entries -------------"
+    assert blocklist_lines[4].startswith("# Added on: ")
+    assert blocklist_lines[5:] == [
         "# ----------------------------------------",
         "",
         "192.0.2.5",
         "192.0.2.0/30",
     ]
     assert "198.51.100.9" not in blocklist_lines
+    assert "192.0.2.11" not in blocklist_lines
     assert alternate.read_text() == paths["RENDERED_BLOCKLIST"].read_text()
 
 
@@ -1293,6 +2270,461 @@ def test_build_task_runner_generates_named_country_policies(
     assert "Threat scope" in output
 
 
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_build_task_runner_compiles_policy_networks(
+    tmp_path, monkeypatch, capsys, jobs: int
+) -> None:
+    """Build compiles each named policy into coalesced CIDR networks."""
+    data = tmp_path / ".banip"
+    geolite = data / "geolite"
+    geolite.mkdir(parents=True)
+    paths = {
+        "COUNTRY_ALLOWLIST": data / "country_allowlist.txt",
+        "GEOLITE_4": geolite / "GeoLite2-Country-Blocks-IPv4.csv",
+        "GEOLITE_6": geolite / "GeoLite2-Country-Blocks-IPv6.csv",
+        "GEOLITE_LOC": geolite / "GeoLite2-Country-Locations-en.csv",
+        "IPSUM": data / "ipsum.txt",
+        "RENDERED_BLOCKLIST": data / "ip_blocklist.txt",
+        "RENDERED_ALLOWLIST": data / "ip_allowlist.txt",
+        "COUNTRY_NETS_TXT": data / "haproxy_geo_ip.txt",
+        "BOTDATA": data / "botdata.json",
+        "CONFIG": data / "banip.yaml",
+    }
+    paths["CONFIG"].write_text(write_check_config(tmp_path).read_text())
+    paths["GEOLITE_LOC"].write_text(
+        "geoname_id,locale_code,continent_code,continent_name,country_iso_code,"
+        "country_name,is_in_european_union\n"
+        "1,en,NA,North America,US,United States,0\n"
+        "2,en,NA,North America,CA,Canada,0\n"
+        "3,en,AS,Asia,CN,China,0\n"
+    )
+    paths["GEOLITE_4"].write_text(
+        "network,geoname_id,registered_country_geoname_id,represented_country_geoname_id,"
+        "is_anonymous_proxy,is_satellite_provider,postal_code\n"
+        "192.0.2.0/25,1,1,,0,0,\n"
+        "192.0.2.128/25,2,2,,0,0,\n"
+        "198.51.100.0/25,3,3,,0,0,\n"
+        "198.51.100.128/26,3,3,,0,0,\n"
+    )
+    paths["GEOLITE_6"].write_text(
+        "network,geoname_id,registered_country_geoname_id,represented_country_geoname_id,"
+        "is_anonymous_proxy,is_satellite_provider,postal_code\n"
+        "2001:db8::/33,3,3,,0,0,\n"
+        "2001:db8:8000::/33,3,3,,0,0,\n"
+    )
+    paths["IPSUM"].write_text("192.0.2.9 8\n")
+    stale = data / "country_permitted_restricted.txt"
+    stale.write_text("192.0.2.0/24\n")
+    for name, path in paths.items():
+        for module in (build, utility_data, bots, config):
+            if hasattr(module, name):
+                monkeypatch.setattr(module, name, path)
+
+    build.task_runner(
+        argparse.Namespace(
+            threshold=3,
+            compact=0,
+            no_bots=True,
+            policy_networks="blocked",
+            jobs=jobs,
+        )
+    )
+
+    output = capsys.readouterr().out
+    assert utilities.format_status("geo_index", "missing") in output
+    assert utilities.format_status("policy_compile") in output
+    assert "Networks (blocked)" in output
+    assert not stale.exists()
+    assert (data / "country_blocked_restricted.txt").read_text() == (
+        "198.51.100.0/25\n198.51.100.128/26\n2001:db8::/32\n"
+    )
+    assert (data / "country_blocked_public.txt").read_text() == (
+        "198.51.100.0/25\n198.51.100.128/26\n2001:db8::/32\n"
+    )
+
+    utilities.geolite_index().write_bytes(b"not an index")
+    build.task_runner(argparse.Namespace(threshold=3, compact=0, no_bots=True))
+    assert utilities.format_status("geo_index", "stale") in capsys.readouterr().out
+
+
+def prepare_build_data(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    config_text: str,
+    ipsum_text: str,
+) -> dict[str, Path]:
+    """Write small build inputs and point every command module at them.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory in which to write the data.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to patch module path constants.
+    config_text : str
+        Contents of banip.yaml.
+    ipsum_text : str
+        Contents of ipsum.txt.
+
+    Returns
+    -------
+    dict[str, Path]
+        Patched paths keyed by constant name.
+    """
+    data = tmp_path / ".banip"
+    geolite = data / "geolite"
+    geolite.mkdir(parents=True)
+    paths = {
+        "COUNTRY_ALLOWLIST": data / "country_allowlist.txt",
+        "GEOLITE_4": geolite / "GeoLite2-Country-Blocks-IPv4.csv",
+        "GEOLITE_6": geolite / "GeoLite2-Country-Blocks-IPv6.csv",
+        "GEOLITE_LOC": geolite / "GeoLite2-Country-Locations-en.csv",
+        "IPSUM": data / "ipsum.txt",
+        "RENDERED_BLOCKLIST": data / "ip_blocklist.txt",
+        "RENDERED_ALLOWLIST": data / "ip_allowlist.txt",
+        "COUNTRY_NETS_TXT": data / "haproxy_geo_ip.txt",
+        "BOTDATA": data / "botdata.json",
+        "CONFIG": data / "banip.yaml",
+    }
+    paths["CONFIG"].write_text(config_text)
+    paths["GEOLITE_LOC"].write_text(
+        "geoname_id,locale_code,continent_code,continent_name,country_iso_code,"
+        "country_name,is_in_european_union\n"
+        "1,en,NA,North America,US,United States,0\n"
+        "2,en,NA,North America,CA,Canada,0\n"
+        "3,en,AS,Asia,CN,China,0\n"
+    )
+    paths["GEOLITE_4"].write_text(
+        "network,geoname_id,registered_country_geoname_id,represented_country_geoname_id,"
+        "is_anonymous_proxy,is_satellite_provider,postal_code\n"
+        "192.0.2.0/24,1,1,,0,0,\n"
+        "198.51.100.0/24,2,2,,0,0,\n"
+        "203.0.113.0/24,3,3,,0,0,\n"
+    )
+    paths["GEOLITE_6"].write_text(
+        "network,geoname_id,registered_country_geoname_id,represented_country_geoname_id,"
+        "is_anonymous_proxy,is_satellite_provider,postal_code\n"
+        "2001:db8::/32,1,1,,0,0,\n"
+    )
+    paths["IPSUM"].write_text(ipsum_text)
+    for name, path in paths.items():
+        for module in (build, utility_data, bots, config):
+            if hasattr(module, name):
+                monkeypatch.setattr(module, name, path)
+    return paths
+
+
+PROFILE_CONFIG = (
+    "version: 3\n"
+    "countries:\n"
+    "  default_policy: restricted\n"
+    "  policies:\n"
+    "    restricted:\n"
+    "      mode: allowlist\n"
+    "      codes: [US]\n"
+    "    public:\n"
+    "      mode: blocklist\n"
+    "      codes: [CN]\n"
+    "allowlist: []\n"
+    "denylist: [192.0.2.200]\n"
+    "bots:\n"
+    "  enabled: false\n"
+    "profiles:\n"
+    "  edge:\n"
+    "    threshold: 2\n"
+    "    compact: 2\n"
+    "  api:\n"
+    "    threshold: 5\n"
+    "    policies: [restricted]\n"
+)
+
+
+def test_check_uses_build_snapshot_until_sources_change(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Check answers from the build snapshot and falls back when stale."""
+    paths = prepare_build_data(
+        tmp_path,
+        monkeypatch,
+        PROFILE_CONFIG,
+        "192.0.2.1 2\n192.0.2.2 6\n198.51.100.1 6\n203.0.113.1 9\n",
+    )
+    for name in ("CONFIG", "COUNTRY_NETS_TXT", "RENDERED_BLOCKLIST", "IPSUM"):
+        monkeypatch.setattr(check, name, paths[name])
+    build.task_runner(argparse.Namespace(threshold=3, compact=0))
+    assert utilities.format_status("snapshot_write") in capsys.readouterr().out
+
+    def fail_load() -> None:
+        raise AssertionError("text data should not be loaded")
+
+    monkeypatch.setattr(check, "load_ipsum", fail_load)
+    data = check.load_check_data(check.Console())
+    result = check.check_address(ipa.ip_address("192.0.2.2"), data)
+
+    assert data.snapshot is not None
+    assert result.blocklist_match == ipa.ip_address("192.0.2.2")
+    assert result.ipsum_confidence == 6
+    assert result.blocked_policies == ()
+    assert result.permitted_policies == ("public", "restricted")
+    cn_result = check.check_address(ipa.ip_address("203.0.113.1"), data)
+    assert cn_result.blocked_policies == ("public", "restricted")
+    assert cn_result.blocklist_match is None
+
+    monkeypatch.undo()
+    for name in ("CONFIG", "COUNTRY_NETS_TXT", "RENDERED_BLOCKLIST", "IPSUM"):
+        monkeypatch.setattr(check, name, paths[name])
+        monkeypatch.setattr(utility_data, name, paths[name])
+    paths["IPSUM"].write_text("192.0.2.2 4\n")
+    stale = check.load_check_data(check.Console())
+
+    assert stale.snapshot is None
+    assert check.check_address(ipa.ip_address("192.0.2.2"), stale).ipsum_confidence == 4
+
+
+def test_check_reads_build_outputs_from_active_generation(
+    tmp_path, monkeypatch
+) -> None:
+    """Check keeps reading the published generation while files change."""
+    paths = prepare_build_data(
+        tmp_path,
+        monkeypatch,
+        PROFILE_CONFIG,
+        "192.0.2.1 2\n192.0.2.2 6\n198.51.100.1 6\n203.0.113.1 9\n",
+    )
+    data_dir = paths["RENDERED_BLOCKLIST"].parent
+    for name in ("CONFIG", "COUNTRY_NETS_TXT", "RENDERED_BLOCKLIST", "IPSUM"):
+        monkeypatch.setattr(check, name, paths[name])
+    monkeypatch.setattr(check, "DATA", data_dir)
+    build.task_runner(argparse.Namespace(threshold=3, compact=0))
+
+    generation = utilities.current_generation(data_dir)
+    assert generation is not None
+    assert (data_dir / "current").is_symlink()
+    assert (generation / "ip_blocklist_check.bin").samefile(
+        utilities.check_snapshot(paths["RENDERED_BLOCKLIST"])
+    )
+
+    # A later build replacing working files leaves the generation intact.
+    utilities.write_atomic(paths["COUNTRY_NETS_TXT"], "192.0.2.0/24 CA\n")
+    data = check.load_check_data(check.Console(), resident=True)
+
+    assert data.snapshot is not None
+    assert data.country_data_path == generation / "haproxy_geo_ip.txt"
+    result = check.check_address(ipa.ip_address("203.0.113.1"), data)
+    assert result.country_code == "CN"
+    data = check.load_check_data(check.Console())
+    ranged = check.check_range(ipa.ip_network("203.0.113.0/30"), data)
+    assert [span.country_code for span in ranged.countries] == ["CN"]
+
+    # A patch makes the snapshot stale; the text fallback still reads the
+    # generation's blocklist and feed, with the live journal overlaid.
+    utilities.write_atomic(paths["RENDERED_BLOCKLIST"], "198.51.100.99\n")
+    utilities.write_atomic(paths["IPSUM"], "198.51.100.99 9\n")
+    utilities.append_ipsum_journal(
+        paths["IPSUM"], {utilities.parse_address_key("198.51.100.7"): 4}, "p.txt"
+    )
+    data = check.load_check_data(check.Console())
+
+    assert data.snapshot is None
+    assert ipa.ip_address("192.0.2.2") in data.rendered_ips
+    assert ipa.ip_address("198.51.100.99") not in data.rendered_ips
+    assert data.ipsum[ipa.ip_address("203.0.113.1")] == 9
+    assert data.ipsum[ipa.ip_address("198.51.100.7")] == 4
+    assert ipa.ip_address("198.51.100.99") not in data.ipsum
+
+
+def test_serve_answers_socket_and_http_and_reloads(tmp_path, monkeypatch) -> None:
+    """Serve answers JSON lookups and swaps in data from a finished build."""
+    paths = prepare_build_data(
+        tmp_path,
+        monkeypatch,
+        PROFILE_CONFIG,
+        "192.0.2.1 2\n192.0.2.2 6\n198.51.100.1 6\n203.0.113.1 9\n",
+    )
+    for name in ("CONFIG", "COUNTRY_NETS_TXT", "RENDERED_BLOCKLIST", "IPSUM"):
+        monkeypatch.setattr(check, name, paths[name])
+    monkeypatch.setattr(serve, "RENDERED_BLOCKLIST", paths["RENDERED_BLOCKLIST"])
+    build.task_runner(argparse.Namespace(threshold=3, compact=0))
+    service = serve.CheckService(
+        check.load_check_data(check.Console()), serve.data_stamps()
+    )
+    socket_path = tmp_path / "banip.sock"
+
+    async def exercise() -> tuple[list[dict], bytes, bool, dict]:
+        servers = await serve.start_servers(service, socket_path, 0)
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        responses = []
+        for request in (
+            {"ip": "192.0.2.2"},
+            {"ips": ["203.0.113.1", "bogus"]},
+            {"unknown": True},
+        ):
+            writer.write(json.dumps(request).encode() + b"\n")
+            responses.append(json.loads(await reader.readline()))
+        writer.close()
+
+        port = servers["http"].sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection(serve.HTTP_HOST, port)
+        writer.write(b"GET /check?ip=192.0.2.2 HTTP/1.1\r\nConnection: close\r\n\r\n")
+        http_response = await reader.read()
+        writer.close()
+
+        paths["IPSUM"].write_text("192.0.2.2 4\n")
+        reloaded = await service.refresh() or await service.refresh()
+        stats = service.answer({"stats": True})[1]
+        for server in servers.values():
+            server.close()
+        return responses, http_response, reloaded, stats
+
+    responses, http_response, reloaded, stats = asyncio.run(exercise())
+
+    assert responses[0]["result"]["verdict"] == "BLOCKED"
+    assert responses[0]["result"]["ipsum_confidence"] == 6
+    assert responses[1]["results"][0]["blocked_policies"] == ["public", "restricted"]
+    assert responses[1]["results"][1]["error"] == "invalid IP address"
+    assert "error" in responses[2]
+    head, _, body = http_response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    assert json.loads(body)["result"]["blocklist_match"] == "192.0.2.2"
+    assert reloaded
+    assert service.data.snapshot is None
+    assert service.lookup(["192.0.2.2"])[0]["ipsum_confidence"] == 4
+    assert stats["reloads"] == 1
+    assert stats["endpoints"]["socket ip"]["count"] == 1
+    assert stats["endpoints"]["socket invalid"]["errors"] == 1
+    assert stats["endpoints"]["GET /check"]["count"] == 1
+
+
+def test_serve_answers_pipelined_spoa_notify_frames(tmp_path, monkeypatch) -> None:
+    """The SPOA agent answers pipelined NOTIFY frames with verdict variables."""
+    paths = prepare_build_data(
+        tmp_path,
+        monkeypatch,
+        PROFILE_CONFIG,
+        "192.0.2.1 2\n192.0.2.2 6\n198.51.100.1 6\n203.0.113.1 9\n",
+    )
+    for name in ("CONFIG", "COUNTRY_NETS_TXT", "RENDERED_BLOCKLIST", "IPSUM"):
+        monkeypatch.setattr(check, name, paths[name])
+    build.task_runner(argparse.Namespace(threshold=3, compact=0))
+    service = serve.CheckService(
+        check.load_check_data(check.Console(), resident=True), {}
+    )
+
+    async def exercise() -> tuple[dict, list[utilities.Frame], utilities.Frame]:
+        servers = await serve.start_servers(service, tmp_path / "banip.sock", None, 0)
+        port = servers["spoa"].sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection(serve.HTTP_HOST, port)
+        hello = {
+            "supported-versions": "2.0",
+            "max-frame-size": 16384,
+            "capabilities": "pipelining",
+        }
+        writer.write(
+            utilities.encode_frame(
+                utilities.Frame(
+                    utilities.FrameType.HAPROXY_HELLO, utilities.encode_kv(hello)
+                )
+            )
+        )
+        agent_hello = await utilities.read_frame(reader, 16384)
+        for frame_id, address in enumerate(["192.0.2.2", "203.0.113.1"], start=1):
+            payload = utilities.encode_messages(
+                {"banip-check": {"ip": ipa.ip_address(address)}}
+            )
+            writer.write(
+                utilities.encode_frame(
+                    utilities.Frame(
+                        utilities.FrameType.NOTIFY, payload, frame_id, frame_id
+                    )
+                )
+            )
+        acks = [await utilities.read_frame(reader, 16384) for _ in range(2)]
+        writer.write(b"\x00\x00\x00\x05\x63\x00\x00\x00\x01")
+        goodbye = await utilities.read_frame(reader, 16384)
+        for server in servers.values():
+            server.close()
+        return utilities.decode_kv(agent_hello.payload), acks, goodbye
+
+    agent_hello, acks, goodbye = asyncio.run(exercise())
+
+    assert agent_hello["max-frame-size"] == serve.MAX_FRAME_SIZE
+    assert agent_hello["capabilities"] == "pipelining"
+    assert [ack.frame_id for ack in acks] == [1, 2]
+    assert utilities.decode_set_vars(acks[0].payload) == {
+        "verdict": "BLOCKED",
+        "blocked": True,
+        "country": "US",
+        "match": "192.0.2.2",
+        "ipsum": 6,
+    }
+    assert utilities.decode_set_vars(acks[1].payload)["country"] == "CN"
+    assert goodbye.type == utilities.FrameType.AGENT_DISCONNECT
+    assert utilities.decode_kv(goodbye.payload)["status-code"] == (
+        utilities.SpopStatus.INVALID
+    )
+    assert service.latency["spoa notify"].count == 2
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_build_task_runner_builds_all_profiles_from_shared_inputs(
+    tmp_path, monkeypatch, capsys, jobs: int
+) -> None:
+    """Build renders every configured profile after loading inputs once."""
+    paths = prepare_build_data(
+        tmp_path,
+        monkeypatch,
+        PROFILE_CONFIG,
+        "192.0.2.1 2\n192.0.2.2 6\n198.51.100.1 6\n203.0.113.1 9\n",
+    )
+    loads = 0
+    original_load_ipsum = build.load_ipsum_keys
+
+    def counting_load_ipsum():
+        nonlocal loads
+        loads += 1
+        return original_load_ipsum()
+
+    monkeypatch.setattr(build, "load_ipsum_keys", counting_load_ipsum)
+    build.task_runner(
+        argparse.Namespace(
+            threshold=3,
+            compact=0,
+            outfile=None,
+            profile="all",
+            jobs=jobs,
+        )
+    )
+
+    output = capsys.readouterr().out
+    data = paths["CONFIG"].parent
+    edge = (data / "ip_blocklist_edge.txt").read_text().splitlines()
+    api = (data / "ip_blocklist_api.txt").read_text().splitlines()
+    assert loads == 1
+    assert edge[:2] == ["198.51.100.1", "192.0.2.0/24"]
+    assert api[0] == "192.0.2.2"
+    assert "198.51.100.1" not in api
+    assert "192.0.2.200" not in edge
+    assert "192.0.2.200" in api
+    assert not paths["RENDERED_BLOCKLIST"].exists()
+    assert "Final Build Summary: api" in output
+    assert "Final Build Summary: edge" in output
+
+
+def test_build_task_runner_rejects_unknown_profile(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Build exits with a clear message for an undefined profile."""
+    prepare_build_data(tmp_path, monkeypatch, PROFILE_CONFIG, "")
+
+    with pytest.raises(SystemExit) as exc_info:
+        build.task_runner(
+            argparse.Namespace(threshold=3, compact=0, profile="partner", jobs=1)
+        )
+
+    assert exc_info.value.code == 1
+    assert "Unknown build profile: 'partner'" in capsys.readouterr().out
+
+
 def test_build_task_runner_renders_managed_bot_ranges(
     tmp_path, monkeypatch, capsys
 ) -> None:
@@ -1397,6 +2829,86 @@ def test_build_task_runner_renders_managed_bot_ranges(
     assert paths["CONFIG"].read_text() == config_text
 
 
+def test_build_task_runner_drops_cross_section_duplicates(
+    tmp_path, monkeypatch, capsys
+) -> None:
+    """Build drops entries covered by another section and records why."""
+    paths = prepare_build_data(
+        tmp_path,
+        monkeypatch,
+        "version: 3\n"
+        "countries:\n"
+        "  default_policy: blocked\n"
+        "  policies:\n"
+        "    blocked:\n"
+        "      mode: blocklist\n"
+        "      codes: [CN]\n"
+        "denylist:\n"
+        "  - 192.0.2.9\n"
+        "  - 203.0.113.7\n"
+        "  - 198.51.100.0/25\n"
+        "bots:\n"
+        "  enabled: true\n"
+        "  providers:\n"
+        "    - google\n",
+        "192.0.2.9 8\n",
+    )
+    paths["BOTDATA"].write_text(
+        json.dumps(
+            {
+                "providers": {
+                    "google": {
+                        "provider": "google",
+                        "source": ["test"],
+                        "refreshed_at": "now",
+                        "ranges": ["198.51.100.64/26", "203.0.113.0/24"],
+                    }
+                }
+            }
+        )
+    )
+    alternate = tmp_path / "alternate.txt"
+
+    build.task_runner(argparse.Namespace(threshold=3, compact=0, outfile=alternate))
+
+    output = capsys.readouterr().out
+    entries = [
+        str(token)
+        for line in alternate.read_text().splitlines()
+        if (token := utilities.extract_ip(line))
+    ]
+    sidecar = json.loads(utilities.dedupe_sidecar(alternate).read_text())
+    assert "Deduplicated" in output
+    assert re.search(r"Total written\s+│.*│\s+3 │\s+385 │", output)
+    assert entries == ["192.0.2.9", "203.0.113.0/24", "198.51.100.0/25"]
+    assert sidecar == {
+        "dropped": [
+            {
+                "entry": "198.51.100.64/26",
+                "section": "bots/google",
+                "covered_by": "198.51.100.0/25",
+                "covered_by_section": "custom",
+            },
+            {
+                "entry": "192.0.2.9",
+                "section": "custom",
+                "covered_by": "192.0.2.9",
+                "covered_by_section": "ipsum",
+            },
+            {
+                "entry": "203.0.113.7",
+                "section": "custom",
+                "covered_by": "203.0.113.0/24",
+                "covered_by_section": "bots/google",
+            },
+        ]
+    }
+    assert (
+        utilities.dedupe_sidecar(paths["RENDERED_BLOCKLIST"]).read_text()
+        == utilities.dedupe_sidecar(alternate).read_text()
+    )
+
+
 def test_apply_allowlist_splits_overlapping_networks() -> None:
     """Allowlisted space is removed from every blocked entry type."""
     blocked_ips = [
@@ -1413,13 +2925,14 @@ def test_apply_allowlist_splits_overlapping_networks() -> None:
     }
 
     filtered_ips, filtered_nets = build.apply_allowlist(
-        blocked_ips,
-        blocked_nets,
-        allowlist,
+        map(utilities.address_key, blocked_ips),
+        map(utilities.network_key, blocked_nets),
+        utilities.build_interval_lookup(map(utilities.entry_key, allowlist)),
     )
-    lookup = utilities.build_network_lookup(filtered_nets)
+    lookup = utilities.build_network_lookup(map(utilities.key_network, filtered_nets))
 
-    assert filtered_ips == [ipa.ip_address("198.51.100.1")]
+    assert filtered_ips == [utilities.address_key(ipa.ip_address("198.51.100.1"))]
+    assert filtered_nets == sorted(filtered_nets)
     assert not utilities.ip_in_network(ipa.ip_address("192.0.2.1"), lookup)
     assert utilities.ip_in_network(ipa.ip_address("192.0.2.2"), lookup)
     assert not utilities.ip_in_network(ipa.ip_address("2001:db8::1"), lookup)
@@ -1,15 +1,22 @@
 """Tests for shared utility functions."""
 
 import ipaddress as ipa
+import mmap
+import threading
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
 from types import SimpleNamespace
 
 import pytest
+from requests.exceptions import HTTPError
 from requests.exceptions import RequestException
 
 from banip import utilities
 from banip.utilities import data as utility_data
 from banip.utilities import display as utility_display
 from banip.utilities import external as utility_external
+from banip.utilities import snapshot as utility_snapshot
 
 
 def test_print_docstring_removes_common_indent(capsys) -> None:
@@ -86,6 +93,154 @@ def test_extract_ip_parses_addresses_networks_and_invalid_values() -> None:
     assert utilities.extract_ip("not-an-ip") is None
 
 
+def test_integer_keys_round_trip_through_text() -> None:
+    """Integer keys parse and render exactly like ipaddress objects."""
+    for text in ("192.0.2.9", "2001:db8::1", "::ffff:192.0.2.1"):
+        key = utilities.parse_address_key(text)
+        assert key == utilities.address_key(ipa.ip_address(text))
+        assert key is not None
+        assert utilities.render_key(key) == str(ipa.ip_address(text))
+    for text in ("192.0.2.0/24", "0.0.0.0/0", "2001:db8::/32"):
+        key = utilities.parse_network_key(text)
+        assert key == utilities.network_key(ipa.ip_network(text))
+        assert key is not None
+        assert utilities.render_key(key) == text
+        assert utilities.key_network(key) == ipa.ip_network(text)
+
+    assert utilities.parse_address_key("192.0.2.256") is None
+    assert utilities.parse_network_key("192.0.2.1/24") is None
+    assert utilities.parse_network_key("192.0.2.0/33") is None
+    assert utilities.parse_network_key("192.0.2.0") is None
+
+
+def test_span_keys_match_ipaddress_summaries() -> None:
+    """Integer CIDR decomposition matches the standard library."""
+    first = int(ipa.ip_address("192.0.2.5"))
+    last = int(ipa.ip_address("192.0.3.20"))
+    expected = ipa.summarize_address_range(ipa.ip_address(first), ipa.ip_address(last))
+
+    assert [
+        utilities.key_network(key) for key in utilities.span_keys(4, first, last)
+    ] == list(expected)
+    assert utilities.span_keys(6, 0, 2**128 - 1) == [(6, 0, 0)]
+
+
+def test_interval_lookup_merges_nested_entries() -> None:
+    """Interval lookups report membership, overlaps, and uncovered gaps."""
+    lookup = utilities.build_interval_lookup(
+        [
+            utilities.network_key(ipa.ip_network("192.0.2.0/24")),
+            utilities.network_key(ipa.ip_network("192.0.2.64/26")),
+            utilities.address_key(ipa.ip_address("198.51.100.7")),
+        ]
+    )
+    first, last = utilities.network_interval(ipa.ip_network("192.0.0.0/22"))
+
+    assert utilities.address_key(ipa.ip_address("192.0.2.200")) in lookup
+    assert utilities.address_key(ipa.ip_address("198.51.100.7")) in lookup
+    assert utilities.address_key(ipa.ip_address("198.51.100.8")) not in lookup
+    assert utilities.address_key(ipa.ip_address("2001:db8::1")) not in lookup
+    assert lookup.overlaps(4, first, last)
+    assert lookup.gaps(4, first, last) == [
+        (first, int(ipa.ip_address("192.0.1.255"))),
+        (int(ipa.ip_address("192.0.3.0")), last),
+    ]
+
+
+def test_compact_keys_skips_allowlisted_subnets() -> None:
+    """Key compaction collapses dense /24 groups outside the allowlist."""
+    ips = [
+        utilities.address_key(ipa.ip_address(text))
+        for text in ("198.51.100.2", "192.0.2.1", "198.51.100.1", "192.0.2.3")
+    ]
+    allow_lookup = utilities.build_interval_lookup(
+        [utilities.address_key(ipa.ip_address("192.0.2.200"))]
+    )
+
+    compact_ips, compact_nets = utilities.compact_keys(ips, allow_lookup, min_num=2)
+
+    assert compact_ips == sorted(ips[1::2])
+    assert compact_nets == [utilities.network_key(ipa.ip_network("198.51.100.0/24"))]
+
+
+def test_check_snapshot_answers_nested_lookups(tmp_path) -> None:
+    """Snapshots find exact addresses, nested networks, and confidences."""
+    source = tmp_path / "ipsum.txt"
+    source.write_text("192.0.2.1 7\n")
+    path = utilities.check_snapshot(tmp_path / "ip_blocklist.txt")
+    utilities.write_check_snapshot(
+        path,
+        ips=[utilities.parse_address_key("198.51.100.7")],
+        networks=[
+            utilities.parse_network_key(text)
+            for text in ("10.0.0.0/8", "10.1.0.0/16", "10.200.0.0/16", "2001:db8::/32")
+        ],
+        ipsum={
+            utilities.parse_address_key("192.0.2.1"): 7,
+            utilities.parse_address_key("2001:db8::1"): 3,
+        },
+        header={
+            "sources": utilities.source_stamps({"ipsum": source}),
+            "verdicts": {"US": [["strict"], ["open"]]},
+        },
+    )
+
+    snapshot = utilities.read_check_snapshot(path, {"ipsum": source})
+
+    assert snapshot is not None
+    assert path.name == "ip_blocklist_check.bin"
+    assert snapshot.contains_ip(utilities.parse_address_key("198.51.100.7"))
+    assert not snapshot.contains_ip(utilities.parse_address_key("198.51.100.8"))
+    assert snapshot.network(utilities.parse_address_key("10.1.2.3")) == (
+        4,
+        int(ipa.ip_address("10.1.0.0")),
+        16,
+    )
+    assert snapshot.network(utilities.parse_address_key("10.150.0.1")) == (
+        4,
+        int(ipa.ip_address("10.0.0.0")),
+        8,
+    )
+    assert snapshot.network(utilities.parse_address_key("11.0.0.1")) is None
+    assert snapshot.network(utilities.parse_address_key("2001:db8::9"))
+    assert snapshot.confidence(utilities.parse_address_key("192.0.2.1")) == 7
+    assert snapshot.confidence(utilities.parse_address_key("2001:db8::1")) == 3
+    assert snapshot.confidence(utilities.parse_address_key("192.0.2.2")) is None
+    assert snapshot.verdicts("US") == (("strict",), ("open",))
+    assert snapshot.verdicts("CA") is None
+
+    source.write_text("192.0.2.1 8\n192.0.2.2 1\n")
+    assert utilities.read_check_snapshot(path, {"ipsum": source}) is None
+    assert utilities.read_check_snapshot(tmp_path / "missing.bin", {}) is None
+
+
+def test_check_snapshot_rejections_release_the_mapping(tmp_path, monkeypatch) -> None:
+    """Snapshots that are not used are unmapped before returning."""
+    source = tmp_path / "ipsum.txt"
+    source.write_text("192.0.2.1 7\n")
+    path = utilities.check_snapshot(tmp_path / "ip_blocklist.txt")
+    header = {"sources": utilities.source_stamps({"ipsum": source})}
+    utilities.write_check_snapshot(path, ips=[], networks=[], ipsum={}, header=header)
+    maps: list[mmap.mmap] = []
+
+    def recording_mmap(*args, **kwargs) -> mmap.mmap:
+        maps.append(mmap.mmap(*args, **kwargs))
+        return maps[-1]
+
+    monkeypatch.setattr(
+        utility_snapshot,
+        "mmap",
+        SimpleNamespace(mmap=recording_mmap, ACCESS_READ=mmap.ACCESS_READ),
+    )
+
+    source.write_text("192.0.2.1 8\n")
+    assert utilities.read_check_snapshot(path, {"ipsum": source}) is None
+    path.write_bytes(b"not a snapshot")
+    assert utilities.read_check_snapshot(path, {"ipsum": source}) is None
+    assert len(maps) == 2
+    assert all(mapping.closed for mapping in maps)
+
+
 def test_compact_can_disable_or_create_subnets() -> None:
     """Compaction returns either sorted IPs or eligible /24 networks."""
     ips = [
@@ -118,6 +273,109 @@ def test_compact_respects_allowlisted_networks() -> None:
     assert compact_nets == []
 
 
+def test_coalesce_merges_overlapping_and_adjacent_intervals() -> None:
+    """Interval coalescing sorts input and merges touching spans."""
+    assert utilities.coalesce([(10, 12), (0, 3), (4, 5), (11, 20), (30, 30)]) == [
+        (0, 5),
+        (10, 20),
+        (30, 30),
+    ]
+    assert utilities.coalesce([]) == []
+
+
+def test_interval_networks_returns_minimal_cidr_cover() -> None:
+    """Integer intervals are summarized into the fewest CIDR networks."""
+    first, last = utilities.network_interval(ipa.ip_network("192.0.2.0/25"))
+    _, end = utilities.network_interval(ipa.ip_network("192.0.2.128/26"))
+
+    assert utilities.interval_networks(4, first, end) == [
+        ipa.ip_network("192.0.2.0/25"),
+        ipa.ip_network("192.0.2.128/26"),
+    ]
+    assert utilities.interval_networks(4, first, last) == [
+        ipa.ip_network("192.0.2.0/25")
+    ]
+    six_first, six_last = utilities.network_interval(ipa.ip_network("2001:db8::/127"))
+    assert utilities.interval_networks(6, six_first, six_last + 3) == [
+        ipa.ip_network("2001:db8::/126"),
+        ipa.ip_network("2001:db8::4/128"),
+    ]
+
+
+def test_find_contained_reports_innermost_cross_section_container() -> None:
+    """Nested entries are matched only against other section groups."""
+    entries = [
+        utilities.entry_interval(ipa.ip_network("192.0.2.0/24")),
+        utilities.entry_interval(ipa.ip_network("192.0.2.0/26")),
+        utilities.entry_interval(ipa.ip_address("192.0.2.5")),
+        utilities.entry_interval(ipa.ip_address("2001:db8::1")),
+    ]
+    sections = [
+        ("ipsum", [entries[2]]),
+        ("bots", [entries[1]]),
+        ("custom", [entries[0], entries[2], entries[3]]),
+        ("custom", [utilities.entry_interval(ipa.ip_network("192.0.2.0/28"))]),
+    ]
+
+    assert set(utilities.find_contained(sections)) == {
+        utilities.Containment(section=1, entry=0, container_section=2, container=0),
+        utilities.Containment(section=0, entry=0, container_section=3, container=0),
+        utilities.Containment(section=3, entry=0, container_section=1, container=0),
+        utilities.Containment(section=2, entry=1, container_section=0, container=0),
+    }
+
+
+def test_load_dedupe_sidecar_indexes_covering_notes(tmp_path) -> None:
+    """Dedupe provenance is found for addresses inside dropped entries."""
+    blocklist = tmp_path / "ip_blocklist.txt"
+    sidecar = utilities.dedupe_sidecar(blocklist)
+    utilities.write_dedupe_sidecar(
+        sidecar,
+        [
+            {
+                "entry": "192.0.2.5",
+                "section": "custom",
+                "covered_by": "192.0.2.0/24",
+                "covered_by_section": "ipsum",
+            },
+            {
+                "entry": "192.0.2.0/26",
+                "section": "bots/google",
+                "covered_by": "192.0.2.0/24",
+                "covered_by_section": "ipsum",
+            },
+        ],
+    )
+
+    index = utilities.load_dedupe_sidecar(sidecar)
+
+    assert sidecar.name == "ip_blocklist_dedupe.json"
+    assert index.lookup(ipa.ip_address("192.0.2.5")) == (
+        "bots/google 192.0.2.0/26 (covered by ipsum 192.0.2.0/24)",
+        "custom 192.0.2.5 (covered by ipsum 192.0.2.0/24)",
+    )
+    assert index.lookup(ipa.ip_address("192.0.2.200")) == ()
+    assert utilities.load_dedupe_sidecar(tmp_path / "missing.json").notes == {}
+
+
+def test_coverage_counts_overlapping_entries_once() -> None:
+    """Coverage is the exact union size for each address family."""
+    entries = [
+        ipa.ip_network("192.0.2.0/24"),
+        ipa.ip_network("192.0.2.0/26"),
+        ipa.ip_address("192.0.2.5"),
+        ipa.ip_address("198.51.100.1"),
+        ipa.ip_network("2001:db8::/126"),
+        ipa.ip_address("2001:db8::4"),
+    ]
+
+    intervals = [utilities.entry_interval(entry) for entry in entries]
+
+    assert utilities.coverage(intervals) == utilities.Coverage(ipv4=257, ipv6=5)
+    assert utilities.coverage([]) == utilities.Coverage()
+    assert utilities.union_size([(5, 9), (0, 2), (1, 3), (8, 12)]) == 12
+
+
 def test_build_network_lookup_splits_and_sorts_network_bounds() -> None:
     """Lookup data is sorted and split by IP address family."""
     networks = [
@@ -206,6 +464,202 @@ def test_load_ipsum_skips_malformed_lines(tmp_path, monkeypatch) -> None:
     assert utilities.load_ipsum() == {ipa.ip_address("192.0.2.1"): 5}
 
 
+def test_ipsum_cache_round_trips_and_tracks_source(tmp_path) -> None:
+    """The binary ipsum cache is reused only while the source is unchanged."""
+    ipsum = tmp_path / "ipsum.txt"
+    ipsum.write_text("192.0.2.1 5\n2001:db8::1 3\n")
+    expected = {(4, 3221225985): 5, (6, (0x20010DB8 << 96) + 1): 3}
+
+    assert utilities.read_ipsum_cache(ipsum) is None
+    assert utilities.cached_ipsum_keys(ipsum) == expected
+    assert utilities.ipsum_cache(ipsum).is_file()
+    assert utilities.read_ipsum_cache(ipsum) == expected
+
+    ipsum.write_text("198.51.100.7 9\n")
+    assert utilities.read_ipsum_cache(ipsum) is None
+    assert utilities.cached_ipsum_keys(ipsum) == {(4, 3325256711): 9}
+
+    utilities.ipsum_cache(ipsum).write_bytes(b"truncated")
+    assert utilities.cached_ipsum_keys(ipsum) == {(4, 3325256711): 9}
+
+
+def test_ipsum_parser_follows_resumed_and_restarted_downloads(
+    tmp_path, feed_server
+) -> None:
+    """Streamed ipsum chunks parse to the same records as the saved feed."""
+    lines = [f"10.{n >> 8 & 255}.{n & 255}.1 {n % 9 + 1}\n" for n in range(12000)]
+    body = ("# comment\n" + "".join(lines) + "2001:db8::1 4").encode()
+    feed_server.routes["/ipsum.txt"] = (body, {"ETag": '"i1"'})
+    url = f"{feed_server.url}/ipsum.txt"
+    destination = tmp_path / "ipsum.txt"
+
+    feed_server.cutoff = utilities.CHUNK_SIZE + 7
+    parser = utilities.IpsumParser()
+    with utilities.HttpClient(tmp_path / "cache.json", backoff=0) as client:
+        assert client.download(url, destination, sink=parser).status == 206
+
+    ipsum = parser.finish()
+    assert ipsum == utilities.parse_ipsum(destination)
+    assert len(ipsum) == 12001
+    assert ipsum[(6, (0x20010DB8 << 96) + 1)] == 4
+
+    destination.unlink()
+    feed_server.cutoff = utilities.CHUNK_SIZE + 7
+    parser = utilities.IpsumParser()
+    with utilities.HttpClient(tmp_path / "cache.json", retries=0) as client:
+        with pytest.raises(RequestException):
+            client.download(url, destination, sink=parser)
+    assert parser.ipsum
+
+    feed_server.routes["/ipsum.txt"] = (b"192.0.2.1 5\n", {"ETag": '"i2"'})
+    with utilities.HttpClient(tmp_path / "cache.json") as client:
+        assert client.download(url, destination, sink=parser).status == 200
+
+    assert parser.finish() == {(4, 3221225985): 5}
+
+
+def test_download_asks_for_unencoded_bodies(tmp_path, feed_server) -> None:
+    """Downloads count and resume bytes of the body as sent."""
+    body = "".join(f"192.0.{n >> 8 & 255}.{n & 255} 3\n" for n in range(9000))
+    feed_server.routes["/ipsum.txt"] = (body.encode(), {"ETag": '"i1"'})
+    feed_server.gzip = "negotiate"
+    url = f"{feed_server.url}/ipsum.txt"
+    destination = tmp_path / "ipsum.txt"
+
+    feed_server.cutoff = utilities.CHUNK_SIZE + 7
+    with utilities.HttpClient(tmp_path / "cache.json", backoff=0) as client:
+        assert client.download(url, destination).status == 206
+    assert destination.read_text() == body
+    assert {seen["Accept-Encoding"] for _, seen in feed_server.seen} == {"identity"}
+
+    # A server that encodes anyway is decoded without a size check.
+    feed_server.gzip = "always"
+    with utilities.HttpClient(tmp_path / "cache.json") as client:
+        assert client.download(url, destination, conditional=False).status == 200
+    assert destination.read_text() == body
+
+
+def test_download_restarts_when_the_range_does_not_match(tmp_path, feed_server) -> None:
+    """A partial response starting at another offset is not appended."""
+    body = bytes(range(256)) * 1024
+    feed_server.routes["/data.bin"] = (body, {"ETag": '"d1"'})
+    url = f"{feed_server.url}/data.bin"
+    destination = tmp_path / "data.bin"
+
+    feed_server.cutoff = utilities.CHUNK_SIZE + 7
+    feed_server.skew = 5
+    with utilities.HttpClient(tmp_path / "cache.json", backoff=0) as client:
+        assert client.download(url, destination).status == 200
+
+    assert destination.read_bytes() == body
+    assert "Range" in feed_server.seen[1][1]
+    assert "Range" not in feed_server.seen[2][1]
+
+
+def test_geolite_index_round_trips_networks_and_intervals(
+    tmp_path, monkeypatch
+) -> None:
+    """The compiled GeoLite index matches the parsed CSV files."""
+    paths = {
+        "GEOLITE_4": tmp_path / "geolite" / "ipv4.csv",
+        "GEOLITE_6": tmp_path / "geolite" / "ipv6.csv",
+        "GEOLITE_LOC": tmp_path / "geolite" / "locations.csv",
+    }
+    paths["GEOLITE_4"].parent.mkdir()
+    paths["GEOLITE_LOC"].write_text(
+        "geoname_id,locale_code,continent_code,continent_name,country_iso_code\n"
+        "1,en,NA,North America,US\n"
+        "2,en,NA,North America,CA\n"
+        "3,en,EU,Europe,\n"
+    )
+    paths["GEOLITE_4"].write_text(
+        "network,geoname_id\n192.0.2.0/25,1\n192.0.2.128/25,1\n198.51.100.0/24,2\n"
+    )
+    paths["GEOLITE_6"].write_text("network,geoname_id\n2001:db8::/32,3\n")
+    for name, path in paths.items():
+        monkeypatch.setattr(utility_data, name, path)
+
+    assert utilities.read_geolite_index() is None
+    networks = utilities.parse_geolite()
+    intervals = utilities.country_intervals(networks)
+    utilities.write_geolite_index(networks, intervals)
+
+    assert utilities.geolite_index() == tmp_path / "geolite_index.bin"
+    assert utilities.geolite_index_current()
+    compiled = utilities.read_geolite_index()
+    assert compiled == utilities.GeoliteIndex(networks, intervals)
+    assert compiled.intervals["US"] == {4: [(3221225984, 3221226239)], 6: []}
+    assert compiled.networks[(6, 0x20010DB8 << 96, 32)] == "EU"
+
+    paths["GEOLITE_6"].write_text("network,geoname_id\n2001:db8::/48,3\n")
+    assert not utilities.geolite_index_current()
+    assert utilities.read_geolite_index() is None
+
+
+def test_publish_generation_links_data_and_prunes_old_generations(
+    tmp_path,
+) -> None:
+    """Generations capture data files and keep a bounded history."""
+    (tmp_path / "geolite").mkdir()
+    (tmp_path / "geolite" / "blocks.csv").write_text("network\n")
+    (tmp_path / "ipsum.txt").write_text("192.0.2.1 5\n")
+    (tmp_path / "http_cache.json").write_text("{}\n")
+    (tmp_path / "banip.yaml").write_text("version: 2\n")
+
+    assert utilities.current_generation(tmp_path) is None
+    first = utilities.publish_generation(tmp_path, keep=1)
+
+    assert first is not None
+    assert utilities.current_generation(tmp_path) == first
+    assert utilities.generation_files(tmp_path) == [
+        Path("geolite/blocks.csv"),
+        Path("ipsum.txt"),
+    ]
+    assert sorted(
+        str(path.relative_to(first)) for path in first.rglob("*") if path.is_file()
+    ) == ["geolite/blocks.csv", "ipsum.txt"]
+    ipsum = tmp_path / "ipsum.txt"
+    assert utilities.generation_path(ipsum, first) == first / "ipsum.txt"
+    assert utilities.generation_path(tmp_path / "banip.yaml", first) == (
+        tmp_path / "banip.yaml"
+    )
+    assert utilities.generation_path(Path("/elsewhere/ipsum.txt"), first) == Path(
+        "/elsewhere/ipsum.txt"
+    )
+
+    utilities.write_atomic(ipsum, "192.0.2.2 7\n")
+    assert (first / "ipsum.txt").read_text() == "192.0.2.1 5\n"
+
+    second = utilities.publish_generation(tmp_path, keep=1)
+    third = utilities.publish_generation(tmp_path, keep=1)
+
+    assert utilities.list_generations(tmp_path) == [second, third]
+    assert utilities.current_generation(tmp_path) == third
+    assert (third / "ipsum.txt").read_text() == "192.0.2.2 7\n"
+    assert utilities.publish_generation(tmp_path / "empty") is None
+
+
+def test_staged_files_are_unique_and_cleaned_up(tmp_path) -> None:
+    """Concurrent replacements stage under separate names."""
+    target = tmp_path / "ipsum.txt"
+    with (
+        utilities.staged_file(target) as first,
+        utilities.staged_file(target) as second,
+    ):
+        assert first != second
+        assert first.parent == target.parent
+        first.write_text("first\n")
+        second.write_text("second\n")
+    assert target.read_text() == "first\n"
+
+    with pytest.raises(OSError):
+        with utilities.staged_file(target) as staged:
+            staged.write_text("partial\n")
+            raise OSError("disk full")
+    assert target.read_text() == "first\n"
+    assert list(tmp_path.iterdir()) == [target]
+
+
 def test_load_rendered_blocklist_splits_file(tmp_path, monkeypatch) -> None:
     """Rendered blocklist data is loaded as sorted IP and network lists."""
     rendered = tmp_path / "ip_blocklist.txt"
@@ -317,3 +771,329 @@ def test_clear_uses_platform_command(monkeypatch) -> None:
     utilities.clear()
 
     assert commands == ["cls"]
+
+
+@pytest.mark.parametrize(
+    "value", [0, 1, 239, 240, 2287, 2288, 264431, 2**32 - 1, 2**64 - 1]
+)
+def test_spop_varint_round_trips(value: int) -> None:
+    """SPOP variable-length integers decode to the encoded value."""
+    encoded = utilities.encode_varint(value)
+
+    assert utilities.decode_varint(encoded + b"\x00", 0) == (value, len(encoded))
+
+
+def test_spop_messages_and_actions_round_trip() -> None:
+    """NOTIFY messages and SET-VAR actions keep their typed values."""
+    messages = {
+        "banip-check": {
+            "ip": ipa.ip_address("2001:db8::1"),
+            "name": "example",
+            "count": -5,
+            "seen": True,
+            "raw": b"\x00\x01",
+            "missing": None,
+        }
+    }
+    variables = {"blocked": False, "ipsum": 7, "country": "US"}
+
+    assert utilities.decode_messages(utilities.encode_messages(messages)) == messages
+    assert (
+        utilities.decode_set_vars(
+            utilities.encode_set_vars(utilities.VarScope.SESSION, variables)
+        )
+        == variables
+    )
+    with pytest.raises(utilities.SpopError):
+        utilities.decode_messages(utilities.encode_messages(messages)[:-1])
+
+
+def test_country_index_matches_lookup_country(tmp_path, monkeypatch) -> None:
+    """The in-memory country index agrees with the on-disk search."""
+    country_data = tmp_path / "haproxy_geo_ip.txt"
+    country_data.write_text("192.0.2.0/24 US\n198.51.100.0/25 CA\n2001:db8::/32 DE\n")
+    monkeypatch.setattr(utility_data, "COUNTRY_NETS_TXT", country_data)
+    index = utilities.load_country_index()
+
+    for text in ("192.0.2.9", "198.51.100.127", "198.51.100.128", "2001:db8::1"):
+        address = ipa.ip_address(text)
+        assert index.lookup(utilities.address_key(address)) == (
+            utilities.lookup_country(address, country_data)
+        )
+    ca_first, ca_last = utilities.network_interval(ipa.ip_network("198.51.100.0/25"))
+    query = utilities.network_interval(ipa.ip_network("198.51.100.0/23"))
+    assert index.overlapping(4, *query) == [(ca_first, ca_last, "CA")]
+    assert index.overlapping(4, 0, int(ipa.ip_address("192.0.2.0"))) == [
+        (int(ipa.ip_address("192.0.2.0")), int(ipa.ip_address("192.0.2.255")), "US")
+    ]
+    assert index.overlapping(6, 0, 1) == []
+
+
+def test_entry_index_and_snapshot_answer_range_queries(tmp_path) -> None:
+    """Range queries return covering and contained entries in order."""
+    ips = ["10.1.2.3", "10.9.0.1", "198.51.100.7"]
+    networks = ["10.0.0.0/8", "10.1.0.0/16", "10.1.2.0/24", "10.200.0.0/16"]
+    keys = [
+        *(utilities.parse_address_key(text) for text in ips),
+        *(utilities.parse_network_key(text) for text in networks),
+    ]
+    index = utilities.build_entry_index(keys)
+    path = tmp_path / "ip_blocklist_check.bin"
+    utilities.write_check_snapshot(
+        path,
+        ips=[utilities.parse_address_key(text) for text in ips],
+        networks=[utilities.parse_network_key(text) for text in networks],
+        ipsum={},
+        header={"sources": {}},
+    )
+    snapshot = utilities.read_check_snapshot(path, {})
+    assert snapshot is not None
+
+    for query in ("10.1.2.0/23", "10.1.0.0/16", "10.0.0.0/7", "11.0.0.0/8"):
+        network = ipa.ip_network(query)
+        first, last = int(network.network_address), int(network.broadcast_address)
+        expected = sorted(
+            str(entry)
+            for entry in (*map(ipa.ip_network, ips), *map(ipa.ip_network, networks))
+            if entry.overlaps(network)
+        )
+        found = index.overlapping(4, first, last)
+        assert sorted(str(utilities.key_network(key)) for key in found) == expected
+        assert (
+            sorted(
+                str(ipa.ip_network(utilities.render_key(key)))
+                for key in snapshot.entries(4, first, last)
+            )
+            == expected
+        )
+
+    assert [
+        utilities.render_key(key)
+        for key in index.overlapping(
+            4, *utilities.network_interval(ipa.ip_network("10.1.2.0/28"))
+        )
+    ] == ["10.0.0.0/8", "10.1.0.0/16", "10.1.2.0/24", "10.1.2.3/32"]
+
+
+def test_tagged_index_reports_nested_networks_across_tags() -> None:
+    """Tagged lookups return every containing network with its tags."""
+    tagged = [
+        ("10.0.0.0/8", "google"),
+        ("10.1.0.0/16", "bing"),
+        ("10.1.0.0/16", "openai"),
+        ("10.1.2.0/24", "google"),
+        ("10.200.0.0/16", "meta"),
+        ("2001:db8::/32", "meta"),
+    ]
+    index = utilities.build_tagged_index(
+        (utilities.parse_network_key(text), tag) for text, tag in tagged
+    )
+
+    def lookup(text: str) -> list[tuple[str, tuple[str, ...]]]:
+        return [
+            (utilities.render_network_key(key), tags)
+            for key, tags in index.lookup(utilities.parse_address_key(text))
+        ]
+
+    assert lookup("10.1.2.3") == [
+        ("10.0.0.0/8", ("google",)),
+        ("10.1.0.0/16", ("bing", "openai")),
+        ("10.1.2.0/24", ("google",)),
+    ]
+    assert lookup("10.1.3.1") == [
+        ("10.0.0.0/8", ("google",)),
+        ("10.1.0.0/16", ("bing", "openai")),
+    ]
+    assert lookup("10.255.0.1") == [("10.0.0.0/8", ("google",))]
+    assert lookup("2001:db8::1") == [("2001:db8::/32", ("meta",))]
+    assert lookup("11.0.0.1") == []
+
+
+def test_http_client_sends_validators_and_retries(tmp_path, feed_server) -> None:
+    """Recorded validators make repeat fetches conditional."""
+    cache = tmp_path / "http_cache.json"
+    url = f"{feed_server.url}/ipsum.txt"
+    feed_server.routes["/ipsum.txt"] = (
+        b"192.0.2.1 5\n",
+        {"ETag": '"v1"', "Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT"},
+    )
+    feed_server.failures = 2
+
+    with utilities.HttpClient(cache, backoff=0) as client:
+        first = client.get(url)
+        uncommitted = client.get(url)
+        client.commit([url])
+
+    assert (first.status, first.modified, first.text) == (200, True, "192.0.2.1 5\n")
+    assert uncommitted.modified
+    assert [path for path, _ in feed_server.seen] == ["/ipsum.txt"] * 4
+
+    with utilities.HttpClient(cache, backoff=0) as client:
+        repeat = client.get(url)
+        forced = client.get(url, conditional=False)
+
+    assert (repeat.status, repeat.modified, repeat.content) == (304, False, b"")
+    assert repeat.validators.sha256 == first.validators.sha256
+    assert feed_server.seen[-2][1]["If-None-Match"] == '"v1"'
+    assert feed_server.seen[-2][1]["If-Modified-Since"] == (
+        "Mon, 05 Oct 2026 10:00:00 GMT"
+    )
+    assert "If-None-Match" not in feed_server.seen[-1][1]
+    assert forced.modified
+
+
+def test_http_client_compares_content_and_gives_up_after_retries(
+    tmp_path, feed_server
+) -> None:
+    """Identical bodies are unmodified and persistent errors raise."""
+    cache = tmp_path / "http_cache.json"
+    url = f"{feed_server.url}/feed.json"
+    feed_server.routes["/feed.json"] = (b'{"prefixes": []}', {})
+
+    with utilities.HttpClient(cache, backoff=0) as client:
+        client.get(url)
+        client.commit([url])
+        again = client.get(url)
+        feed_server.failures = 5
+        with pytest.raises(HTTPError):
+            client.get(url)
+
+    assert (again.status, again.modified, again.json()) == (
+        200,
+        False,
+        {"prefixes": []},
+    )
+    assert feed_server.failures == 1
+    assert utilities.load_validators(cache)[url].sha256 == again.validators.sha256
+    assert utilities.load_validators(tmp_path / "missing.json") == {}
+
+
+def test_http_client_resumes_interrupted_downloads(tmp_path, feed_server) -> None:
+    """Partial downloads continue with range requests."""
+    chunk = utilities.CHUNK_SIZE
+    body = bytes(range(256)) * (chunk // 64)
+    feed_server.routes["/geolite.zip"] = (body, {"ETag": '"z1"'})
+    url = f"{feed_server.url}/geolite.zip"
+    destination = tmp_path / "geolite.zip"
+    part = tmp_path / "geolite.zip.part"
+
+    feed_server.cutoff = chunk + 100
+    with utilities.HttpClient(tmp_path / "cache.json", backoff=0) as client:
+        resumed = client.download(url, destination)
+
+    assert destination.read_bytes() == body
+    assert (resumed.size, resumed.status) == (len(body), 206)
+    assert feed_server.seen[-1][1]["Range"] == f"bytes={chunk}-"
+    assert feed_server.seen[-1][1]["If-Range"] == '"z1"'
+
+    destination.unlink()
+    feed_server.cutoff = 2 * chunk + 100
+    with utilities.HttpClient(tmp_path / "cache.json", retries=0) as client:
+        with pytest.raises(RequestException):
+            client.download(url, destination)
+    assert part.stat().st_size == 2 * chunk
+    assert not destination.exists()
+
+    with utilities.HttpClient(tmp_path / "cache.json") as client:
+        result = client.download(url, destination)
+
+    assert destination.read_bytes() == body
+    assert result.validators.sha256 == resumed.validators.sha256
+    assert feed_server.seen[-1][1]["Range"] == f"bytes={2 * chunk}-"
+    assert sorted(item.name for item in tmp_path.iterdir()) == ["geolite.zip"]
+
+    destination.unlink()
+    feed_server.cutoff = chunk + 100
+    with utilities.HttpClient(tmp_path / "cache.json", retries=0) as client:
+        with pytest.raises(RequestException):
+            client.download(url, destination)
+    feed_server.ranges = False
+    with utilities.HttpClient(tmp_path / "cache.json") as client:
+        restarted = client.download(url, destination)
+
+    assert (restarted.status, restarted.size) == (200, len(body))
+    assert destination.read_bytes() == body
+
+
+def test_read_tokens_skips_blank_and_comment_lines() -> None:
+    """Bulk input yields the first field of each address line."""
+    lines = ["192.0.2.1 web\n", "\n", "# note\n", "  2001:db8::1\n", "bogus x\n"]
+
+    assert list(utilities.read_tokens(lines)) == ["192.0.2.1", "2001:db8::1", "bogus"]
+
+
+def test_line_ranges_read_each_line_once(tmp_path) -> None:
+    """Byte ranges split a file on line boundaries without gaps or repeats."""
+    path = tmp_path / "input.log"
+    lines = [f"{'x' * (n % 7)} 192.0.2.{n}\n" for n in range(50)]
+    path.write_text("".join(lines) + "no newline")
+
+    for size in (1, 5, 16, 64, 10_000):
+        ranges = utilities.line_ranges(path, size)
+        read = [
+            line
+            for start, end in ranges
+            for line in utilities.read_line_range(path, start, end)
+        ]
+        assert read == [*lines, "no newline"]
+
+
+def test_patch_journal_expiry_and_decay_are_evaluated_lazily(tmp_path) -> None:
+    """Journal entries expire and decay at load time and compact away."""
+    ipsum = tmp_path / "ipsum.txt"
+    start = datetime.fromisoformat("2026-01-01T00:00:00+00:00")
+    key = utilities.parse_address_key
+    entries = [
+        utilities.JournalEntry(key("192.0.2.1"), 8, "a", start),
+        utilities.JournalEntry(
+            key("192.0.2.1"), 10, "b", start, start + timedelta(days=10), decay=True
+        ),
+        utilities.JournalEntry(key("192.0.2.2"), 6, "c", start, start + timedelta(1)),
+        utilities.JournalEntry(key("192.0.2.3"), 5, "d", start, start + timedelta(9)),
+        utilities.JournalEntry(key("192.0.2.3"), 4, "e", start, start + timedelta(3)),
+    ]
+    utilities.ipsum_journal(ipsum).write_text(
+        "".join(map(utilities.render_journal_entry, entries))
+    )
+    assert utilities.read_ipsum_journal(ipsum) == entries
+
+    read = utilities.read_ipsum_journal(ipsum)
+    assert utilities.journal_confidence(read, start + timedelta(hours=12)) == {
+        key("192.0.2.1"): 10,
+        key("192.0.2.2"): 6,
+        key("192.0.2.3"): 5,
+    }
+    assert utilities.journal_confidence(read, start + timedelta(days=5)) == {
+        key("192.0.2.1"): 8,
+        key("192.0.2.3"): 5,
+    }
+    assert utilities.journal_confidence(read, start + timedelta(days=9.5)) == {
+        key("192.0.2.1"): 8,
+    }
+
+    # Entry b still outweighs a on day 1, but from day 2 on it never does.
+    assert utilities.compact_ipsum_journal(ipsum, start + timedelta(days=1)) == (5, 3)
+    assert [entry.source for entry in utilities.read_ipsum_journal(ipsum)] == [
+        "a",
+        "b",
+        "d",
+    ]
+    assert utilities.compact_ipsum_journal(ipsum, start + timedelta(days=2)) == (3, 2)
+    assert [entry.source for entry in utilities.read_ipsum_journal(ipsum)] == ["a", "d"]
+
+
+def test_patch_journal_appends_wait_for_the_journal_lock(tmp_path) -> None:
+    """Appends block while another writer holds the journal lock."""
+    ipsum = tmp_path / "ipsum.txt"
+    key = utilities.parse_address_key("192.0.2.1")
+    with utilities.journal_lock(ipsum):
+        writer = threading.Thread(
+            target=utilities.append_ipsum_journal, args=(ipsum, {key: 5}, "a")
+        )
+        writer.start()
+        writer.join(timeout=0.2)
+        assert writer.is_alive()
+        assert not utilities.ipsum_journal(ipsum).exists()
+    writer.join()
+
+    assert [entry.key for entry in utilities.read_ipsum_journal(ipsum)] == [key]